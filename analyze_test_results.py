@@ -1,242 +1,683 @@
 """
 Script para análise e visualização dos resultados dos testes de sentimento.
+
+As métricas são calculadas em uma única passagem sobre o arquivo de
+resultados (JSONL, JSON ou Parquet), em memória constante: matriz de
+confusão, precisão/recall/F1 por classe e bins de calibração. Os gráficos
+são opcionais e o matplotlib só é importado se forem gerados.
+
+Uso:
+    python analyze_test_results.py [arquivo] [--no-plots] [--bins 10]
+
+Registros do gerador de carga (`generate_test_data.py`) com `latency_ms`
+também alimentam histogramas de latência por operação e a contagem de erros.
 """
+import argparse
+import glob
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
-from datetime import datetime
+import math
 import os
-import glob
+from datetime import datetime
+
+SENTIMENTS = ['positiva', 'negativa', 'neutra']
+
+# Colunas usadas na análise (as demais não são lidas de arquivos Parquet)
+ANALYSIS_COLUMNS = [
+    "customer_name",
+    "review_text",
+    "expected_sentiment",
+    "predicted_sentiment",
+    "confidence_score",
+    "is_correct",
+]
+
+# Resolução do histograma de confiança (os scores têm duas casas decimais)
+CONFIDENCE_BUCKETS = 100
+
+# Histograma de latência: buckets logarítmicos com ~2% de erro relativo
+LATENCY_BUCKET_GROWTH = 1.02
+LATENCY_MIN_MS = 0.1
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências em buckets logarítmicos (memória constante).
+
+    Cada bucket cobre um intervalo ~2% maior que o anterior, então os
+    percentis têm erro relativo de no máximo ~2%, de 0,1 ms a horas.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def _bucket(latency_ms):
+        if latency_ms <= LATENCY_MIN_MS:
+            return 0
+        return int(math.log(latency_ms / LATENCY_MIN_MS, LATENCY_BUCKET_GROWTH)) + 1
+
+    @staticmethod
+    def _upper_bound(bucket):
+        return LATENCY_MIN_MS * LATENCY_BUCKET_GROWTH ** bucket
+
+    def record(self, latency_ms):
+        bucket = self._bucket(latency_ms)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += latency_ms
+        self.max = max(self.max, latency_ms)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """Limite superior do bucket que contém o percentil (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self._upper_bound(bucket), self.max)
+        return self.max
+
+    def to_dict(self):
+        """Representação compacta (buckets não vazios) para gravação em JSON."""
+        return {
+            "growth": LATENCY_BUCKET_GROWTH,
+            "min_ms": LATENCY_MIN_MS,
+            "count": self.count,
+            "max_ms": round(self.max, 3),
+            "buckets": {str(b): c for b, c in sorted(self.buckets.items())},
+        }
+
+
+class LoadMetrics:
+    """Latência por operação e erros dos registros do gerador de carga."""
+
+    def __init__(self):
+        self.latency = {}
+        self.status = {}
+        self.errors = {}
+        self.first_start = None
+        self.last_end = None
+
+    @property
+    def total(self):
+        return sum(h.count for h in self.latency.values())
+
+    def update(self, record):
+        operation = record.get('operation', 'post')
+        latency_ms = float(record['latency_ms'])
+        self.latency.setdefault(operation, LatencyHistogram()).record(latency_ms)
+
+        status = str(record.get('status'))
+        by_status = self.status.setdefault(operation, {})
+        by_status[status] = by_status.get(status, 0) + 1
+        if record.get('error'):
+            key = (operation, record['error'])
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+        start = record.get('intended_start')
+        if start is not None:
+            end = start + latency_ms / 1000
+            if self.first_start is None or start < self.first_start:
+                self.first_start = start
+            if self.last_end is None or end > self.last_end:
+                self.last_end = end
+
+    def duration(self):
+        if self.first_start is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    def summary(self):
+        """Resumo por operação: contagem, vazão e percentis de latência."""
+        duration = self.duration()
+        summary = {}
+        for operation, histogram in sorted(self.latency.items()):
+            summary[operation] = {
+                'count': histogram.count,
+                'rps': histogram.count / duration if duration else 0.0,
+                'mean_ms': histogram.mean(),
+                'p50_ms': histogram.percentile(50),
+                'p90_ms': histogram.percentile(90),
+                'p99_ms': histogram.percentile(99),
+                'max_ms': histogram.max,
+                'status': self.status.get(operation, {}),
+            }
+        return summary
+
+    def to_dict(self):
+        """Resumo com os histogramas completos, para comparar execuções."""
+        return {
+            'duration_s': self.duration(),
+            'operations': self.summary(),
+            'histograms': {
+                operation: histogram.to_dict()
+                for operation, histogram in sorted(self.latency.items())
+            },
+            'errors': [
+                {'operation': operation, 'error': error, 'count': count}
+                for (operation, error), count in sorted(self.errors.items())
+            ],
+        }
+
+
+class StreamingMetrics:
+    """
+    Acumula as métricas de classificação registro a registro.
 
-# Configurar estilo dos gráficos
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+    A memória usada não depende do número de resultados: contadores da
+    matriz de confusão, um histograma de confiança de resolução fixa, bins
+    de calibração e no máximo `max_errors` exemplos de erro.
+    """
+
+    def __init__(self, bins=10, max_errors=50):
+        self.bins = bins
+        self.max_errors = max_errors
+        self.total = 0
+        self.correct = 0
+        self.confusion = {}
+        self.confidence_histogram = [0] * (CONFIDENCE_BUCKETS + 1)
+        self.confidence_sum = 0.0
+        self.confidence_min = None
+        self.confidence_max = None
+        self.correct_confidence_sum = 0.0
+        self.incorrect_confidence_sum = 0.0
+        self.calibration_count = [0] * bins
+        self.calibration_confidence = [0.0] * bins
+        self.calibration_correct = [0] * bins
+        self.error_examples = []
+        self.load = LoadMetrics()
+
+    def add(self, record):
+        """Encaminha um registro do arquivo para as métricas aplicáveis."""
+        if 'latency_ms' in record:
+            self.load.update(record)
+        if record.get('expected_sentiment') and record.get('predicted_sentiment'):
+            self.update(record)
+
+    def update(self, result):
+        """Adiciona um resultado (dict com os campos de ANALYSIS_COLUMNS)."""
+        expected = result['expected_sentiment']
+        predicted = result['predicted_sentiment']
+        is_correct = result.get('is_correct')
+        if is_correct is None:
+            is_correct = expected == predicted
+        confidence = float(result.get('confidence_score') or 0.0)
+
+        self.total += 1
+        row = self.confusion.setdefault(expected, {})
+        row[predicted] = row.get(predicted, 0) + 1
+
+        self.confidence_sum += confidence
+        if self.confidence_min is None or confidence < self.confidence_min:
+            self.confidence_min = confidence
+        if self.confidence_max is None or confidence > self.confidence_max:
+            self.confidence_max = confidence
+        bucket = min(CONFIDENCE_BUCKETS, max(0, round(confidence * CONFIDENCE_BUCKETS)))
+        self.confidence_histogram[bucket] += 1
+
+        calibration_bin = min(self.bins - 1, max(0, int(confidence * self.bins)))
+        self.calibration_count[calibration_bin] += 1
+        self.calibration_confidence[calibration_bin] += confidence
+
+        if is_correct:
+            self.correct += 1
+            self.correct_confidence_sum += confidence
+            self.calibration_correct[calibration_bin] += 1
+        else:
+            self.incorrect_confidence_sum += confidence
+            if len(self.error_examples) < self.max_errors:
+                self.error_examples.append({
+                    'customer_name': result.get('customer_name', ''),
+                    'review_text': (result.get('review_text') or '')[:100],
+                    'expected_sentiment': expected,
+                    'predicted_sentiment': predicted,
+                    'confidence_score': result.get('confidence_score'),
+                })
+
+    @property
+    def accuracy(self):
+        return self.correct / self.total if self.total else 0.0
+
+    @property
+    def labels(self):
+        """Classes observadas, com as conhecidas primeiro."""
+        seen = set(self.confusion)
+        for row in self.confusion.values():
+            seen.update(row)
+        return [s for s in SENTIMENTS if s in seen] + sorted(seen - set(SENTIMENTS))
+
+    def count(self, expected, predicted):
+        return self.confusion.get(expected, {}).get(predicted, 0)
+
+    def per_class(self):
+        """Precisão, recall, F1 e suporte de cada classe."""
+        labels = self.labels
+        metrics = {}
+        for label in labels:
+            true_positive = self.count(label, label)
+            support = sum(self.confusion.get(label, {}).values())
+            predicted = sum(self.count(other, label) for other in labels)
+            precision = true_positive / predicted if predicted else 0.0
+            recall = true_positive / support if support else 0.0
+            f1 = (
+                2 * precision * recall / (precision + recall)
+                if precision + recall else 0.0
+            )
+            metrics[label] = {
+                'precision': precision,
+                'recall': recall,
+                'f1': f1,
+                'support': support,
+            }
+        return metrics
+
+    def macro_f1(self):
+        per_class = self.per_class()
+        supported = [m['f1'] for m in per_class.values() if m['support']]
+        return sum(supported) / len(supported) if supported else 0.0
+
+    def confidence_mean(self):
+        return self.confidence_sum / self.total if self.total else 0.0
+
+    def confidence_median(self):
+        """Mediana da confiança a partir do histograma (resolução de 0,01)."""
+        if not self.total:
+            return 0.0
+
+        def value_at(rank):
+            seen = 0
+            for bucket, count in enumerate(self.confidence_histogram):
+                seen += count
+                if seen > rank:
+                    return bucket / CONFIDENCE_BUCKETS
+            return 1.0
+
+        return (value_at((self.total - 1) // 2) + value_at(self.total // 2)) / 2
+
+    def calibration(self):
+        """Bins de calibração: confiança média vs. acurácia observada."""
+        table = []
+        for index in range(self.bins):
+            count = self.calibration_count[index] or 1
+            table.append({
+                'lower': index / self.bins,
+                'upper': (index + 1) / self.bins,
+                'count': self.calibration_count[index],
+                'confidence': self.calibration_confidence[index] / count,
+                'accuracy': self.calibration_correct[index] / count,
+            })
+        return table
+
+    def expected_calibration_error(self):
+        """ECE: média ponderada da diferença entre confiança e acurácia."""
+        if not self.total:
+            return 0.0
+        return sum(
+            b['count'] * abs(b['confidence'] - b['accuracy'])
+            for b in self.calibration()
+        ) / self.total
+
+
+def iter_results(path):
+    """
+    Lê os resultados um a um, sem carregar o arquivo inteiro.
+
+    Suporta JSONL (um resultado por linha), Parquet (lido por row group, só
+    com as colunas da análise) e o formato JSON antigo (lista).
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(columns=ANALYSIS_COLUMNS):
+            yield from batch.to_pylist()
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def find_latest_results():
+    """Procura o arquivo de resultados mais recente."""
+    result_files = []
+    for extension in ("jsonl", "json", "parquet"):
+        result_files.extend(glob.glob(f"test_results_*.{extension}"))
 
-def load_test_results():
-    """Carrega os resultados mais recentes dos testes."""
-    # Procurar pelo arquivo de resultados mais recente
-    result_files = glob.glob("test_results_*.json")
-    
     if not result_files:
         print("❌ Nenhum arquivo de resultados encontrado.")
         print("Execute primeiro o script generate_test_data.py")
         return None
-    
-    # Pegar o arquivo mais recente
-    latest_file = max(result_files, key=os.path.getctime)
-    print(f"📂 Carregando resultados de: {latest_file}")
-    
-    try:
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            results = json.load(f)
-        return results
-    except Exception as e:
-        print(f"❌ Erro ao carregar arquivo: {e}")
-        return None
 
-def analyze_results(results):
-    """Analisa os resultados dos testes."""
-    if not results:
+    return max(result_files, key=os.path.getctime)
+
+
+def compute_metrics(path, bins=10):
+    """Calcula as métricas de um arquivo de resultados em uma passagem."""
+    metrics = StreamingMetrics(bins=bins)
+    for record in iter_results(path):
+        metrics.add(record)
+    return metrics
+
+
+def analyze_results(metrics):
+    """Mostra a análise dos resultados."""
+    if not metrics or not metrics.total:
         return
-    
-    df = pd.DataFrame(results)
-    
+
     print("\n📊 ANÁLISE DETALHADA DOS RESULTADOS")
     print("=" * 60)
-    
+
     # Estatísticas gerais
-    total = len(df)
-    correct = df['is_correct'].sum()
-    accuracy = (correct / total) * 100
-    
-    print(f"Total de testes: {total}")
-    print(f"Acertos: {correct}")
-    print(f"Erros: {total - correct}")
-    print(f"Acurácia geral: {accuracy:.1f}%")
-    
-    # Análise por sentimento esperado
+    print(f"Total de testes: {metrics.total}")
+    print(f"Acertos: {metrics.correct}")
+    print(f"Erros: {metrics.total - metrics.correct}")
+    print(f"Acurácia geral: {metrics.accuracy * 100:.1f}%")
+    print(f"F1 macro: {metrics.macro_f1():.3f}")
+
+    # Métricas por classe
     print("\n📈 PERFORMANCE POR SENTIMENTO:")
-    print("-" * 40)
-    
-    for sentiment in ['positiva', 'negativa', 'neutra']:
-        sentiment_df = df[df['expected_sentiment'] == sentiment]
-        if len(sentiment_df) > 0:
-            sentiment_correct = sentiment_df['is_correct'].sum()
-            sentiment_total = len(sentiment_df)
-            sentiment_accuracy = (sentiment_correct / sentiment_total) * 100
-            
-            print(f"{sentiment.capitalize():10}: {sentiment_correct:2d}/{sentiment_total:2d} ({sentiment_accuracy:5.1f}%)")
-    
+    print("-" * 60)
+    print(f"{'':10} {'Precisão':>9} {'Recall':>9} {'F1':>9} {'Suporte':>9}")
+    for label, values in metrics.per_class().items():
+        print(
+            f"{label.capitalize():10} {values['precision']:9.3f} "
+            f"{values['recall']:9.3f} {values['f1']:9.3f} {values['support']:9d}"
+        )
+
     # Matriz de confusão
-    print("\n🔄 MATRIZ DE CONFUSÃO:")
-    print("-" * 40)
-    confusion_matrix = pd.crosstab(
-        df['expected_sentiment'], 
-        df['predicted_sentiment'], 
-        margins=True
-    )
-    print(confusion_matrix)
-    
+    print("\n🔄 MATRIZ DE CONFUSÃO (linhas: esperado, colunas: predito):")
+    print("-" * 60)
+    labels = metrics.labels
+    print(f"{'':10}" + "".join(f"{label:>10}" for label in labels))
+    for expected in labels:
+        print(f"{expected:10}" + "".join(
+            f"{metrics.count(expected, predicted):10d}" for predicted in labels
+        ))
+
     # Análise de confiança
     print("\n🎯 ANÁLISE DE CONFIANÇA:")
     print("-" * 40)
-    df['confidence_float'] = df['confidence_score'].astype(float)
-    
-    print(f"Confiança média: {df['confidence_float'].mean():.3f}")
-    print(f"Confiança mediana: {df['confidence_float'].median():.3f}")
-    print(f"Confiança mínima: {df['confidence_float'].min():.3f}")
-    print(f"Confiança máxima: {df['confidence_float'].max():.3f}")
-    
-    # Confiança por acerto/erro
-    correct_confidence = df[df['is_correct']]['confidence_float'].mean()
-    incorrect_confidence = df[~df['is_correct']]['confidence_float'].mean()
-    
-    print(f"Confiança média (acertos): {correct_confidence:.3f}")
-    print(f"Confiança média (erros): {incorrect_confidence:.3f}")
-    
-    return df
-
-def create_visualizations(df):
-    """Cria visualizações dos resultados."""
-    if df is None or len(df) == 0:
+    print(f"Confiança média: {metrics.confidence_mean():.3f}")
+    print(f"Confiança mediana: {metrics.confidence_median():.3f}")
+    print(f"Confiança mínima: {metrics.confidence_min:.3f}")
+    print(f"Confiança máxima: {metrics.confidence_max:.3f}")
+
+    incorrect = metrics.total - metrics.correct
+    if metrics.correct:
+        mean = metrics.correct_confidence_sum / metrics.correct
+        print(f"Confiança média (acertos): {mean:.3f}")
+    if incorrect:
+        mean = metrics.incorrect_confidence_sum / incorrect
+        print(f"Confiança média (erros): {mean:.3f}")
+
+    # Calibração
+    print("\n📐 CALIBRAÇÃO:")
+    print("-" * 40)
+    for b in metrics.calibration():
+        if b['count']:
+            print(
+                f"[{b['lower']:.1f}, {b['upper']:.1f}): {b['count']:5d} | "
+                f"confiança {b['confidence']:.3f} | acurácia {b['accuracy']:.3f}"
+            )
+    ece = metrics.expected_calibration_error()
+    print(f"Erro de calibração esperado (ECE): {ece:.3f}")
+
+
+def print_load_summary(load):
+    """Mostra latência por operação e erros de uma execução de carga."""
+    print(f"Duração: {load.duration():.1f}s | Requisições: {load.total}")
+    print(f"{'Operação':10} {'N':>7} {'RPS':>7} {'média':>8} {'p50':>8} "
+          f"{'p90':>8} {'p99':>8} {'máx':>8}  (ms)")
+    for operation, values in load.summary().items():
+        print(
+            f"{operation:10} {values['count']:7d} {values['rps']:7.1f} "
+            f"{values['mean_ms']:8.1f} {values['p50_ms']:8.1f} {values['p90_ms']:8.1f} "
+            f"{values['p99_ms']:8.1f} {values['max_ms']:8.1f}"
+        )
+
+    if load.errors:
+        print("\n❗ ERROS:")
+        for (operation, error), count in sorted(
+            load.errors.items(), key=lambda item: -item[1]
+        ):
+            print(f"  {operation:10} {error:30} {count:7d}")
+
+
+def analyze_load(load):
+    """Mostra a análise de latência dos registros do gerador de carga."""
+    if not load.total:
         return
-    
-    # Configurar figura com subplots
+    print("\n⏱️ LATÊNCIA E ERROS (medidos a partir do horário planejado)")
+    print("=" * 60)
+    print_load_summary(load)
+
+
+def create_visualizations(metrics):
+    """Cria visualizações dos resultados (requer matplotlib)."""
+    if not metrics or not metrics.total:
+        return None
+
+    try:
+        import matplotlib
+        if not os.environ.get("DISPLAY"):
+            matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print(
+            "ℹ️ matplotlib não instalado: gráficos não gerados "
+            "(pip install matplotlib)"
+        )
+        return None
+
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-    fig.suptitle('Análise de Performance - Sentiment Analysis API', fontsize=16, fontweight='bold')
-    
-    # 1. Gráfico de acurácia por sentimento
-    sentiment_stats = []
-    for sentiment in ['positiva', 'negativa', 'neutra']:
-        sentiment_df = df[df['expected_sentiment'] == sentiment]
-        if len(sentiment_df) > 0:
-            accuracy = (sentiment_df['is_correct'].sum() / len(sentiment_df)) * 100
-            sentiment_stats.append({'Sentimento': sentiment.capitalize(), 'Acurácia': accuracy})
-    
-    sentiment_df_plot = pd.DataFrame(sentiment_stats)
-    bars = axes[0, 0].bar(sentiment_df_plot['Sentimento'], sentiment_df_plot['Acurácia'], 
-                         color=['#2ecc71', '#e74c3c', '#f39c12'])
-    axes[0, 0].set_title('Acurácia por Sentimento')
-    axes[0, 0].set_ylabel('Acurácia (%)')
+    fig.suptitle(
+        'Análise de Performance - Sentiment Analysis API',
+        fontsize=16,
+        fontweight='bold',
+    )
+
+    # 1. Precisão/recall/F1 por sentimento
+    per_class = metrics.per_class()
+    labels = list(per_class)
+    width = 0.25
+    for offset, key in enumerate(['precision', 'recall', 'f1']):
+        axes[0, 0].bar(
+            [i + (offset - 1) * width for i in range(len(labels))],
+            [per_class[label][key] * 100 for label in labels],
+            width, label=key.capitalize(),
+        )
+    axes[0, 0].set_xticks(range(len(labels)))
+    axes[0, 0].set_xticklabels([label.capitalize() for label in labels])
+    axes[0, 0].set_title('Precisão, Recall e F1 por Sentimento')
+    axes[0, 0].set_ylabel('%')
     axes[0, 0].set_ylim(0, 100)
-    
-    # Adicionar valores nas barras
-    for bar in bars:
-        height = bar.get_height()
-        axes[0, 0].text(bar.get_x() + bar.get_width()/2., height + 1,
-                       f'{height:.1f}%', ha='center', va='bottom')
-    
-    # 2. Matriz de confusão como heatmap
-    confusion_matrix = pd.crosstab(df['expected_sentiment'], df['predicted_sentiment'])
-    sns.heatmap(confusion_matrix, annot=True, fmt='d', cmap='Blues', ax=axes[0, 1])
+    axes[0, 0].legend()
+
+    # 2. Matriz de confusão
+    matrix = [[metrics.count(e, p) for p in metrics.labels] for e in metrics.labels]
+    axes[0, 1].imshow(matrix, cmap='Blues')
+    for i, row in enumerate(matrix):
+        for j, value in enumerate(row):
+            axes[0, 1].text(j, i, str(value), ha='center', va='center')
+    axes[0, 1].set_xticks(range(len(metrics.labels)))
+    axes[0, 1].set_xticklabels(metrics.labels)
+    axes[0, 1].set_yticks(range(len(metrics.labels)))
+    axes[0, 1].set_yticklabels(metrics.labels)
     axes[0, 1].set_title('Matriz de Confusão')
     axes[0, 1].set_xlabel('Sentimento Predito')
     axes[0, 1].set_ylabel('Sentimento Esperado')
-    
-    # 3. Distribuição de confiança
-    df['confidence_float'] = df['confidence_score'].astype(float)
-    axes[1, 0].hist(df['confidence_float'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+
+    # 3. Distribuição de confiança (histograma acumulado na passagem)
+    axes[1, 0].bar(
+        [i / CONFIDENCE_BUCKETS for i in range(CONFIDENCE_BUCKETS + 1)],
+        metrics.confidence_histogram,
+        width=1 / CONFIDENCE_BUCKETS, color='skyblue', edgecolor='black',
+    )
     axes[1, 0].set_title('Distribuição dos Scores de Confiança')
     axes[1, 0].set_xlabel('Score de Confiança')
     axes[1, 0].set_ylabel('Frequência')
-    
-    # 4. Confiança por acerto/erro
-    correct_conf = df[df['is_correct']]['confidence_float']
-    incorrect_conf = df[~df['is_correct']]['confidence_float']
-    
-    axes[1, 1].boxplot([correct_conf, incorrect_conf], labels=['Acertos', 'Erros'])
-    axes[1, 1].set_title('Confiança: Acertos vs Erros')
-    axes[1, 1].set_ylabel('Score de Confiança')
-    
+
+    # 4. Diagrama de calibração
+    calibration = [b for b in metrics.calibration() if b['count']]
+    axes[1, 1].plot([0, 1], [0, 1], linestyle='--', color='gray')
+    axes[1, 1].plot(
+        [b['confidence'] for b in calibration],
+        [b['accuracy'] for b in calibration],
+        marker='o',
+    )
+    axes[1, 1].set_title('Calibração: Confiança vs Acurácia')
+    axes[1, 1].set_xlabel('Confiança média')
+    axes[1, 1].set_ylabel('Acurácia')
+
     plt.tight_layout()
-    
+
     # Salvar gráfico
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"sentiment_analysis_report_{timestamp}.png"
     plt.savefig(filename, dpi=300, bbox_inches='tight')
     print(f"\n📊 Gráficos salvos em: {filename}")
-    
-    plt.show()
 
-def generate_detailed_report(df):
+    if matplotlib.get_backend().lower() != 'agg':
+        plt.show()
+    return filename
+
+
+def write_json_summary(metrics, path):
+    """Grava a carga (com histogramas) e as métricas de classificação em JSON."""
+    summary = {'load': metrics.load.to_dict()}
+    if metrics.total:
+        summary['classification'] = {
+            'total': metrics.total,
+            'accuracy': metrics.accuracy,
+            'macro_f1': metrics.macro_f1(),
+            'ece': metrics.expected_calibration_error(),
+            'per_class': metrics.per_class(),
+        }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"📄 Resumo JSON salvo em: {path}")
+    return path
+
+
+def generate_detailed_report(metrics):
     """Gera relatório detalhado em texto."""
-    if df is None:
-        return
-    
+    if not metrics or not metrics.total:
+        return None
+
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    report_filename = f"sentiment_analysis_detailed_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-    
+    suffix = datetime.now().strftime('%Y%m%d_%H%M%S')
+    report_filename = f"sentiment_analysis_detailed_report_{suffix}.txt"
+
     with open(report_filename, 'w', encoding='utf-8') as f:
         f.write("RELATÓRIO DETALHADO - ANÁLISE DE SENTIMENTO\n")
         f.write("=" * 60 + "\n")
         f.write(f"Data/Hora: {timestamp}\n")
-        f.write(f"Total de testes: {len(df)}\n\n")
-        
+        f.write(f"Total de testes: {metrics.total}\n\n")
+
         # Estatísticas gerais
-        total = len(df)
-        correct = df['is_correct'].sum()
-        accuracy = (correct / total) * 100
-        
         f.write("ESTATÍSTICAS GERAIS:\n")
         f.write("-" * 30 + "\n")
-        f.write(f"Acurácia geral: {accuracy:.1f}%\n")
-        f.write(f"Acertos: {correct}/{total}\n")
-        f.write(f"Erros: {total - correct}/{total}\n\n")
-        
+        f.write(f"Acurácia geral: {metrics.accuracy * 100:.1f}%\n")
+        f.write(f"F1 macro: {metrics.macro_f1():.3f}\n")
+        f.write(f"Acertos: {metrics.correct}/{metrics.total}\n")
+        f.write(f"Erros: {metrics.total - metrics.correct}/{metrics.total}\n")
+        f.write(f"ECE: {metrics.expected_calibration_error():.3f}\n\n")
+
         # Performance por sentimento
         f.write("PERFORMANCE POR SENTIMENTO:\n")
         f.write("-" * 30 + "\n")
-        
-        for sentiment in ['positiva', 'negativa', 'neutra']:
-            sentiment_df = df[df['expected_sentiment'] == sentiment]
-            if len(sentiment_df) > 0:
-                sentiment_correct = sentiment_df['is_correct'].sum()
-                sentiment_total = len(sentiment_df)
-                sentiment_accuracy = (sentiment_correct / sentiment_total) * 100
-                
-                f.write(f"{sentiment.capitalize()}: {sentiment_accuracy:.1f}% ({sentiment_correct}/{sentiment_total})\n")
-        
+        for label, values in metrics.per_class().items():
+            f.write(
+                f"{label.capitalize()}: precisão {values['precision']:.3f} | "
+                f"recall {values['recall']:.3f} | F1 {values['f1']:.3f} "
+                f"({values['support']} exemplos)\n"
+            )
+
         # Casos de erro
-        f.write("\nCASOS DE ERRO:\n")
+        errors = metrics.total - metrics.correct
+        f.write(f"\nCASOS DE ERRO ({len(metrics.error_examples)} de {errors}):\n")
         f.write("-" * 30 + "\n")
-        
-        errors = df[~df['is_correct']]
-        for _, row in errors.iterrows():
-            f.write(f"Cliente: {row['customer_name']}\n")
-            f.write(f"Texto: {row['review_text'][:100]}...\n")
-            f.write(f"Esperado: {row['expected_sentiment']} | Predito: {row['predicted_sentiment']}\n")
-            f.write(f"Confiança: {row['confidence_score']}\n")
+        for error in metrics.error_examples:
+            f.write(f"Cliente: {error['customer_name']}\n")
+            f.write(f"Texto: {error['review_text']}...\n")
+            f.write(
+                f"Esperado: {error['expected_sentiment']} | "
+                f"Predito: {error['predicted_sentiment']}\n"
+            )
+            f.write(f"Confiança: {error['confidence_score']}\n")
             f.write("-" * 50 + "\n")
-    
+
     print(f"📄 Relatório detalhado salvo em: {report_filename}")
+    return report_filename
+
 
 def main():
     """Função principal."""
+    parser = argparse.ArgumentParser(
+        description="Analisa resultados dos testes de sentimento"
+    )
+    parser.add_argument(
+        "path", nargs="?", help="Arquivo de resultados (padrão: o mais recente)"
+    )
+    parser.add_argument("--no-plots", action="store_true", help="Não gera gráficos")
+    parser.add_argument("--bins", type=int, default=10, help="Bins de calibração")
+    parser.add_argument(
+        "--json", metavar="ARQUIVO",
+        help="Grava o resumo (com os histogramas de latência) em JSON",
+    )
+    args = parser.parse_args()
+
     print("📊 ANALISADOR DE RESULTADOS - SENTIMENT ANALYSIS API")
     print("=" * 60)
-    
-    # Carregar resultados
-    results = load_test_results()
-    
-    if not results:
+
+    path = args.path or find_latest_results()
+    if not path:
+        return
+    print(f"📂 Carregando resultados de: {path}")
+
+    try:
+        metrics = compute_metrics(path, bins=args.bins)
+    except Exception as e:
+        print(f"❌ Erro ao carregar arquivo: {e}")
+        return
+
+    if not metrics.total and not metrics.load.total:
+        print("ℹ️ Nenhum resultado no arquivo.")
         return
-    
-    # Analisar resultados
-    df = analyze_results(results)
-    
-    if df is not None:
-        # Criar visualizações
-        create_visualizations(df)
-        
-        # Gerar relatório detalhado
-        generate_detailed_report(df)
-        
+
+    analyze_load(metrics.load)
+    if args.json:
+        write_json_summary(metrics, args.json)
+    if not metrics.total:
         print("\n✨ Análise concluída!")
-        print("📁 Arquivos gerados:")
+        return
+    analyze_results(metrics)
+
+    print("\n📁 Arquivos gerados:")
+    if not args.no_plots and create_visualizations(metrics):
         print("  - Gráficos: sentiment_analysis_report_*.png")
-        print("  - Relatório: sentiment_analysis_detailed_report_*.txt")
+    generate_detailed_report(metrics)
+    print("  - Relatório: sentiment_analysis_detailed_report_*.txt")
+    print("\n✨ Análise concluída!")
+
 
 if __name__ == "__main__":
     main()
-
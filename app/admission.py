@@ -0,0 +1,204 @@
+"""
+Controle de admissão das classificações (descarte de carga).
+
+Quando o tráfego passa do que o Groq permite, as requisições se acumulavam na
+fila do orçamento do LLM até o cliente desistir, desperdiçando o trabalho já
+feito. Antes de classificar, `AdmissionController.decide` estima a espera
+pelo orçamento com as classificações em andamento neste worker (ver
+`LLMBudget.estimate_wait`). Uma classificação pode fazer várias chamadas ao
+LLM (camadas de modelos, trechos de textos longos) ou nenhuma (modelo local),
+então a fila é convertida em chamadas pela média de chamadas por
+classificação, medida em `track`. Se a espera mais a duração estimada da
+própria classificação passar do prazo do cliente (cabeçalho `X-Request-Timeout`, padrão
+`ADMISSION_DEFAULT_TIMEOUT`), a requisição é recusada na hora (503 com
+`Retry-After`) ou, com `ADMISSION_ACTION=degrade`, classificada pelo
+classificador local, sem LLM.
+
+As contagens são em memória, por worker; o `/ready` informa a saturação
+para o balanceador desviar o tráfego do worker sobrecarregado.
+"""
+import math
+import threading
+from contextlib import contextmanager
+from typing import Dict, NamedTuple, Optional
+
+from app.config import settings
+from app.llm_budget import (
+    BULK,
+    INTERACTIVE,
+    LANES,
+    LLMBudget,
+    count_llm_calls,
+    get_llm_budget,
+)
+
+ADMIT = "admit"
+DEGRADE = "degrade"
+REJECT = "reject"
+ACTIONS = (DEGRADE, REJECT)
+
+# Peso da última classificação na média móvel de chamadas por classificação
+_CALLS_EWMA_ALPHA = 0.1
+
+TIMEOUT_HEADER = "X-Request-Timeout"
+DEGRADED_HEADER = "X-Degraded"
+
+
+class AdmissionDecision(NamedTuple):
+    """Resultado do controle de admissão de uma requisição."""
+
+    action: str
+    estimated_wait: float
+    retry_after: int = 0
+
+
+class AdmissionController:
+    """
+    Decide se uma classificação entra na fila do LLM.
+
+    Args:
+        budget (LLMBudget): Orçamento do LLM usado para estimar a espera
+        action (str): "reject" (503) ou "degrade" (classificador local)
+        max_in_flight (int): Limite de classificações simultâneas por worker
+            (0 = sem limite; acima dele a espera é considerada infinita)
+        ready_max_wait (float): Espera (s) acima da qual o worker é
+            considerado saturado no /ready
+    """
+
+    def __init__(
+        self,
+        budget: LLMBudget,
+        action: str = REJECT,
+        max_in_flight: int = 0,
+        ready_max_wait: float = 10.0,
+    ):
+        if action not in ACTIONS:
+            raise ValueError(
+                f"Ação inválida: {action}. Disponíveis: {', '.join(ACTIONS)}"
+            )
+        self.budget = budget
+        self.action = action
+        self.max_in_flight = max_in_flight
+        self.ready_max_wait = ready_max_wait
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._counts = {ADMIT: 0, DEGRADE: 0, REJECT: 0}
+        # Média de chamadas ao LLM por classificação (1 até a primeira medição)
+        self._calls: Dict[str, float] = {lane: 1.0 for lane in LANES}
+
+    def _ahead(self, lane: str) -> int:
+        """Chamadas ao LLM esperadas das classificações à frente de `lane`."""
+        # A faixa interativa tem slots reservados: só as interativas a atrasam
+        lanes = (INTERACTIVE,) if lane == INTERACTIVE else LANES
+        return round(sum(self._in_flight[ln] * self._calls[ln] for ln in lanes))
+
+    def calls_per_classification(self, lane: str = INTERACTIVE) -> float:
+        """Média de chamadas ao LLM por classificação da faixa."""
+        with self._lock:
+            return self._calls[lane]
+
+    def estimate_wait(self, lane: str = INTERACTIVE) -> float:
+        """Espera estimada (s) por orçamento de uma nova classificação."""
+        with self._lock:
+            ahead = self._ahead(lane)
+            total = sum(self._in_flight.values())
+        if self.max_in_flight and total >= self.max_in_flight:
+            return math.inf
+        return self.budget.estimate_wait(lane, ahead)
+
+    def service_time(self, lane: str = INTERACTIVE) -> float:
+        """Duração estimada (s) das chamadas ao LLM de uma classificação."""
+        return self.budget.service_time(lane) * self.calls_per_classification(lane)
+
+    def decide(self, lane: str, timeout: float) -> AdmissionDecision:
+        """
+        Decide o destino de uma classificação com prazo `timeout` segundos.
+
+        Args:
+            lane (str): Faixa de prioridade
+            timeout (float): Tempo que o cliente ainda aceita esperar
+
+        Returns:
+            AdmissionDecision: admit, degrade ou reject (com Retry-After)
+        """
+        wait = self.estimate_wait(lane)
+        if wait + self.service_time(lane) <= timeout:
+            action = ADMIT
+        else:
+            action = self.action
+        with self._lock:
+            self._counts[action] += 1
+        retry_after = 0
+        if action == REJECT:
+            # Tempo para a fila atual esvaziar (limitado a 1 minuto)
+            retry_after = 60 if math.isinf(wait) else min(60, max(1, math.ceil(wait)))
+        return AdmissionDecision(action, wait, retry_after)
+
+    @contextmanager
+    def track(self, lane: str):
+        """
+        Conta a classificação como em andamento durante o bloco e registra
+        quantas chamadas ao LLM ela fez.
+        """
+        with self._lock:
+            self._in_flight[lane] += 1
+        completed = False
+        try:
+            with count_llm_calls() as calls:
+                yield
+            completed = True
+        finally:
+            with self._lock:
+                self._in_flight[lane] -= 1
+                if completed:
+                    self._calls[lane] += _CALLS_EWMA_ALPHA * (
+                        calls[0] - self._calls[lane]
+                    )
+
+    def saturated(self) -> bool:
+        """Indica se novas requisições interativas esperariam demais."""
+        return self.estimate_wait(INTERACTIVE) > self.ready_max_wait
+
+    def stats(self) -> dict:
+        """Classificações em andamento, decisões e espera estimada (no worker)."""
+        waits = {lane: self.estimate_wait(lane) for lane in (INTERACTIVE, BULK)}
+        with self._lock:
+            in_flight = dict(self._in_flight)
+            counts = dict(self._counts)
+            calls = dict(self._calls)
+        return {
+            "action": self.action,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": in_flight,
+            "decisions": counts,
+            "estimated_wait_ms": {
+                lane: None if math.isinf(wait) else round(wait * 1000, 2)
+                for lane, wait in waits.items()
+            },
+            "service_time_ms": round(self.budget.service_time() * 1000, 2),
+            "calls_per_classification": {
+                lane: round(value, 2) for lane, value in calls.items()
+            },
+            "saturated": waits[INTERACTIVE] > self.ready_max_wait,
+        }
+
+
+_admission: Optional[AdmissionController] = None
+_admission_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Controle de admissão do worker (None se ADMISSION_ENABLED for False)."""
+    global _admission
+    if not settings.ADMISSION_ENABLED:
+        return None
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                _admission = AdmissionController(
+                    get_llm_budget(),
+                    action=settings.ADMISSION_ACTION,
+                    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+                    ready_max_wait=settings.ADMISSION_READY_MAX_WAIT,
+                )
+    return _admission
@@ -0,0 +1,561 @@
+"""
+Particionamento mensal e arquivamento da tabela de avaliações.
+
+No PostgreSQL a tabela `reviews` pode ser particionada por mês de
+`created_at` (`python manage.py partition`). O arquivamento
+(`python manage.py archive`) move os meses mais antigos que a janela de
+retenção para arquivos JSONL comprimidos com gzip em `ARCHIVE_DIR` e remove
+esses dados da tabela (no PostgreSQL particionado, a partição inteira é
+desanexada e descartada). Funciona também sem particionamento e no SQLite,
+removendo as linhas arquivadas com DELETE.
+
+Cada arquivo de dados tem um manifesto com as contagens diárias por idioma e
+sentimento, de modo que o relatório soma o período arquivado sem
+descomprimir os dados, e a exportação lê os arquivos de forma transparente.
+Antes de remover um mês, seus rollups diários (app/rollups.py) são gerados,
+preservando a contagem de clientes distintos.
+
+Arquivos em `ARCHIVE_DIR`:
+    reviews_<AAAA>_<MM>[-<n>].jsonl.gz       avaliações do mês (uma por linha)
+    reviews_<AAAA>_<MM>[-<n>].manifest.json  contagens diárias do arquivo
+"""
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, func, select, text
+
+from app.config import settings
+from app.language import UNDETERMINED_LANGUAGE
+from app.models import Base, IdempotencyKey, Review, engine
+from app.rollups import build_daily_rollups
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = Review.__table__.name
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"{TABLE_NAME}_{month.year:04d}_{month.month:02d}"
+
+
+# ---------------------------------------------------------------------------
+# Particionamento (PostgreSQL)
+# ---------------------------------------------------------------------------
+
+
+def _is_partitioned(connection) -> bool:
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name"),
+        {"name": TABLE_NAME},
+    ).scalar()
+    return relkind == "p"
+
+
+def _create_month_partition(connection, month: date) -> bool:
+    name = _partition_name(month)
+    exists = connection.execute(
+        text("SELECT to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if exists:
+        return False
+    connection.execute(
+        text(
+            f"CREATE TABLE {name} PARTITION OF {TABLE_NAME} "
+            f"FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{_add_months(month, 1).isoformat()}')"
+        )
+    )
+    return True
+
+
+def ensure_partitions(bind=None, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Cria as partições mensais do mês atual até `months_ahead` meses à frente.
+
+    Args:
+        bind: Engine PostgreSQL (padrão: engine da aplicação)
+        months_ahead (Optional[int]): Meses futuros (padrão: PARTITION_MONTHS_AHEAD)
+
+    Returns:
+        List[str]: Partições criadas
+    """
+    bind = bind or engine
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+
+    created = []
+    current = _month_start(datetime.utcnow().date())
+    with bind.begin() as connection:
+        if not _is_partitioned(connection):
+            return created
+        for offset in range(months_ahead + 1):
+            month = _add_months(current, offset)
+            if _create_month_partition(connection, month):
+                created.append(_partition_name(month))
+    return created
+
+
+def partition_reviews_table(bind=None) -> List[str]:
+    """
+    Converte `reviews` em uma tabela particionada por mês (PostgreSQL).
+
+    Os dados existentes são copiados para as partições mensais
+    correspondentes. A chave primária passa a ser (id, created_at), exigência
+    do PostgreSQL para tabelas particionadas; a sequence de IDs é mantida.
+
+    Args:
+        bind: Engine PostgreSQL (padrão: engine da aplicação)
+
+    Returns:
+        List[str]: Alterações aplicadas
+    """
+    bind = bind or engine
+    if bind.dialect.name != "postgresql":
+        raise RuntimeError("Particionamento disponível apenas no PostgreSQL")
+
+    changes = []
+    legacy = f"{TABLE_NAME}_unpartitioned"
+    with bind.begin() as connection:
+        if not _is_partitioned(connection):
+            connection.execute(text(f"ALTER TABLE {TABLE_NAME} RENAME TO {legacy}"))
+            connection.execute(
+                text(
+                    f"CREATE TABLE {TABLE_NAME} "
+                    f"(LIKE {legacy} INCLUDING DEFAULTS) "
+                    "PARTITION BY RANGE (created_at)"
+                )
+            )
+            connection.execute(
+                text(
+                    f"ALTER TABLE {TABLE_NAME} ALTER COLUMN created_at SET NOT NULL, "
+                    "ALTER COLUMN created_at SET DEFAULT (now() at time zone 'utc'), "
+                    "ADD PRIMARY KEY (id, created_at)"
+                )
+            )
+            connection.execute(
+                text(
+                    f"CREATE TABLE {TABLE_NAME}_default "
+                    f"PARTITION OF {TABLE_NAME} DEFAULT"
+                )
+            )
+
+            bounds = connection.execute(
+                text(f"SELECT min(created_at), max(created_at) FROM {legacy}")
+            ).first()
+            if bounds[0] is not None:
+                month = _month_start(bounds[0].date())
+                while month <= bounds[1].date():
+                    _create_month_partition(connection, month)
+                    month = _add_months(month, 1)
+
+            # A chave de partição não aceita NULL: essas linhas recebem a data
+            # da migração em vez de ficarem de fora da cópia
+            connection.execute(
+                text(
+                    f"UPDATE {legacy} SET created_at = (now() at time zone 'utc') "
+                    "WHERE created_at IS NULL"
+                )
+            )
+            copied = connection.execute(
+                text(f"INSERT INTO {TABLE_NAME} SELECT * FROM {legacy}")
+            ).rowcount
+            total = connection.execute(text(f"SELECT count(*) FROM {legacy}")).scalar()
+            if copied != total:
+                # Desfaz a transação inteira: a tabela original é preservada
+                raise RuntimeError(
+                    f"Cópia incompleta para a tabela particionada: {copied} de {total}"
+                )
+            connection.execute(
+                text(
+                    f"ALTER SEQUENCE {TABLE_NAME}_id_seq OWNED BY {TABLE_NAME}.id"
+                )
+            )
+            connection.execute(text(f"DROP TABLE {legacy}"))
+            changes.append(f"{TABLE_NAME} particionada por mês")
+
+    # Índices são recriados na tabela particionada (propagam às partições)
+    with bind.begin() as connection:
+        existing = {
+            row[0]
+            for row in connection.execute(
+                text("SELECT indexname FROM pg_indexes WHERE tablename = :t"),
+                {"t": TABLE_NAME},
+            )
+        }
+        for index in Base.metadata.tables[TABLE_NAME].indexes:
+            if index.name in existing:
+                continue
+            if index.unique and "created_at" not in index.columns:
+                # Índices únicos de tabelas particionadas precisam conter a
+                # chave de partição. A unicidade de idempotency_key é garantida
+                # pela chave primária da tabela idempotency_keys
+                columns = ", ".join(column.name for column in index.columns)
+                connection.execute(
+                    text(f"CREATE INDEX {index.name} ON {TABLE_NAME} ({columns})")
+                )
+            else:
+                index.create(bind=connection)
+            changes.append(f"index {index.name}")
+
+    changes.extend(f"partição {name}" for name in ensure_partitions(bind))
+    return changes
+
+
+# ---------------------------------------------------------------------------
+# Arquivamento
+# ---------------------------------------------------------------------------
+
+
+PENDING_SUFFIX = ".pending"
+
+
+def _archive_paths(month: date, archive_dir: str) -> Tuple[str, str]:
+    """Retorna caminhos livres (dados, manifesto) para o arquivo do mês."""
+    base = os.path.join(archive_dir, _partition_name(month))
+    suffix = ""
+    counter = 0
+    while os.path.exists(f"{base}{suffix}.manifest.json") or os.path.exists(
+        f"{base}{suffix}.manifest.json{PENDING_SUFFIX}"
+    ):
+        counter += 1
+        suffix = f"-{counter}"
+    return f"{base}{suffix}.jsonl.gz", f"{base}{suffix}.manifest.json"
+
+
+def _serialize_row(row: dict) -> dict:
+    record = dict(row)
+    if record.get("created_at") is not None:
+        record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+def _write_durably(path: str, write):
+    """Grava `path` via arquivo temporário com fsync e rename atômico."""
+    with open(f"{path}.tmp", "wb") as output:
+        write(output)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(f"{path}.tmp", path)
+
+
+def _archive_month(
+    connection, month: date, archive_dir: str
+) -> Tuple[int, Optional[str]]:
+    """
+    Grava as avaliações de um mês em JSONL gzip + manifesto pendente.
+
+    O manifesto fica com o sufixo `.pending` (ignorado na leitura) até a
+    remoção do mês da tabela ser confirmada; ver `_publish_manifest`.
+
+    Returns:
+        Tuple[int, Optional[str]]: (avaliações gravadas, manifesto pendente ou
+            None se o mês está vazio)
+    """
+    start = datetime.combine(month, datetime.min.time())
+    end = datetime.combine(_add_months(month, 1), datetime.min.time())
+    data_path, manifest_path = _archive_paths(month, archive_dir)
+
+    result = connection.execution_options(stream_results=True, yield_per=5000).execute(
+        select(*Review.__table__.columns)
+        .where(and_(Review.created_at >= start, Review.created_at < end))
+        .order_by(Review.id)
+    )
+
+    days: Dict[str, Dict[str, Dict[str, int]]] = {}
+    ids: List[int] = []
+
+    def write_data(output):
+        with gzip.open(output, "wt", encoding="utf-8") as data_file:
+            for row in result.mappings():
+                record = _serialize_row(row)
+                data_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+                day = record["created_at"][:10]
+                language = record.get("language") or UNDETERMINED_LANGUAGE
+                by_sentiment = days.setdefault(day, {}).setdefault(language, {})
+                sentiment = record["sentiment"]
+                by_sentiment[sentiment] = by_sentiment.get(sentiment, 0) + 1
+                ids.append(record["id"])
+
+    _write_durably(data_path, write_data)
+    if not ids:
+        os.remove(data_path)
+        return 0, None
+
+    manifest = {
+        "month": f"{month.year:04d}-{month.month:02d}",
+        "data_file": os.path.basename(data_path),
+        "rows": len(ids),
+        # Primeiro ID arquivado: indica, numa recuperação, se a remoção do mês
+        # foi confirmada (ver _recover_pending_manifests)
+        "first_id": ids[0],
+        "archived_at": datetime.utcnow().isoformat(),
+        "days": days,
+    }
+    pending_path = f"{manifest_path}{PENDING_SUFFIX}"
+    _write_durably(
+        pending_path,
+        lambda output: output.write(
+            json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+        ),
+    )
+    return len(ids), pending_path
+
+
+def _publish_manifest(pending_path: str):
+    """Publica o manifesto: a partir daqui o relatório e a exportação o leem."""
+    os.replace(pending_path, pending_path[: -len(PENDING_SUFFIX)])
+
+
+def _discard_pending(pending_path: str):
+    """Remove um manifesto pendente e seu arquivo de dados."""
+    with open(pending_path, encoding="utf-8") as manifest_file:
+        data_file = json.load(manifest_file)["data_file"]
+    data_path = os.path.join(os.path.dirname(pending_path), data_file)
+    if os.path.exists(data_path):
+        os.remove(data_path)
+    os.remove(pending_path)
+
+
+def _recover_pending_manifests(bind, archive_dir: str) -> None:
+    """
+    Conclui arquivamentos interrompidos entre a remoção e a publicação.
+
+    Se o primeiro ID arquivado não está mais na tabela, a remoção foi
+    confirmada e o manifesto é publicado; senão, o arquivo é descartado (as
+    avaliações continuam na tabela e serão arquivadas de novo).
+    """
+    pattern = os.path.join(
+        archive_dir, f"{TABLE_NAME}_*.manifest.json{PENDING_SUFFIX}"
+    )
+    for pending_path in sorted(glob.glob(pattern)):
+        with open(pending_path, encoding="utf-8") as manifest_file:
+            first_id = json.load(manifest_file)["first_id"]
+        with bind.connect() as connection:
+            live = connection.execute(
+                select(Review.id).where(Review.id == first_id)
+            ).first()
+        if live is None:
+            _publish_manifest(pending_path)
+            logger.info(f"Published interrupted archive {pending_path}")
+        else:
+            _discard_pending(pending_path)
+            logger.warning(f"Discarded uncommitted archive {pending_path}")
+
+
+def archive_reviews(
+    bind=None,
+    retention_days: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    dry_run: bool = False,
+) -> List[Tuple[str, int]]:
+    """
+    Arquiva os meses completos anteriores à janela de retenção.
+
+    O manifesto de cada mês só é publicado depois de confirmada a remoção do
+    mês da tabela, de modo que uma falha no meio não conta as avaliações na
+    tabela e no arquivo ao mesmo tempo.
+
+    Args:
+        bind: Engine de origem (padrão: engine da aplicação)
+        retention_days (Optional[int]): Dias mantidos na tabela quente
+            (padrão: ARCHIVE_RETENTION_DAYS)
+        archive_dir (Optional[str]): Diretório dos arquivos (padrão: ARCHIVE_DIR)
+        dry_run (bool): Apenas lista os meses que seriam arquivados
+
+    Returns:
+        List[Tuple[str, int]]: (mês, avaliações arquivadas) por mês
+    """
+    bind = bind or engine
+    if retention_days is None:
+        retention_days = settings.ARCHIVE_RETENTION_DAYS
+    archive_dir = archive_dir or settings.ARCHIVE_DIR
+    os.makedirs(archive_dir, exist_ok=True)
+    if not dry_run:
+        _recover_pending_manifests(bind, archive_dir)
+
+    today = datetime.utcnow().date()
+    cutoff_month = _month_start(date.fromordinal(today.toordinal() - retention_days))
+
+    with bind.connect() as connection:
+        oldest = connection.execute(select(func.min(Review.created_at))).scalar()
+    if oldest is None:
+        return []
+
+    archived = []
+    month = _month_start(oldest.date())
+    while month < cutoff_month:
+        label = f"{month.year:04d}-{month.month:02d}"
+        if dry_run:
+            archived.append((label, 0))
+            month = _add_months(month, 1)
+            continue
+
+        start = datetime.combine(month, datetime.min.time())
+        end = datetime.combine(_add_months(month, 1), datetime.min.time())
+        # Os sketches de clientes distintos do mês sobrevivem ao arquivamento
+        build_daily_rollups(bind, month, _add_months(month, 1) - timedelta(days=1))
+        pending_path = None
+        try:
+            with bind.begin() as connection:
+                rows, pending_path = _archive_month(connection, month, archive_dir)
+                partitioned = bind.dialect.name == "postgresql" and _is_partitioned(
+                    connection
+                )
+                partition = _partition_name(month)
+                if partitioned and connection.execute(
+                    text("SELECT to_regclass(:name)"), {"name": partition}
+                ).scalar():
+                    connection.execute(
+                        text(f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {partition}")
+                    )
+                    connection.execute(text(f"DROP TABLE {partition}"))
+                elif pending_path:
+                    connection.execute(
+                        Review.__table__.delete().where(
+                            and_(Review.created_at >= start, Review.created_at < end)
+                        )
+                    )
+                # Chaves de idempotência das avaliações arquivadas
+                keys = IdempotencyKey.__table__
+                connection.execute(
+                    keys.delete().where(
+                        and_(keys.c.created_at >= start, keys.c.created_at < end)
+                    )
+                )
+        except Exception:
+            if pending_path:
+                _discard_pending(pending_path)
+            raise
+
+        if pending_path:
+            _publish_manifest(pending_path)
+            archived.append((label, rows))
+            logger.info(f"Archived {rows} reviews from {label}")
+        month = _add_months(month, 1)
+
+    return archived
+
+
+# ---------------------------------------------------------------------------
+# Leitura transparente dos arquivos
+# ---------------------------------------------------------------------------
+
+_manifest_cache: Dict[str, Tuple[float, dict]] = {}
+_manifest_lock = threading.Lock()
+
+
+def load_manifests(archive_dir: Optional[str] = None) -> List[dict]:
+    """
+    Carrega os manifestos do diretório de arquivos (com cache por mtime).
+
+    Args:
+        archive_dir (Optional[str]): Diretório dos arquivos (padrão: ARCHIVE_DIR)
+
+    Returns:
+        List[dict]: Manifestos, com o caminho do arquivo de dados em "data_path"
+    """
+    archive_dir = archive_dir or settings.ARCHIVE_DIR
+    manifests = []
+    paths = glob.glob(os.path.join(archive_dir, f"{TABLE_NAME}_*.manifest.json"))
+    with _manifest_lock:
+        for path in sorted(paths):
+            mtime = os.path.getmtime(path)
+            cached = _manifest_cache.get(path)
+            if cached is None or cached[0] != mtime:
+                with open(path, encoding="utf-8") as manifest_file:
+                    manifest = json.load(manifest_file)
+                manifest["data_path"] = os.path.join(
+                    os.path.dirname(path), manifest["data_file"]
+                )
+                cached = (mtime, manifest)
+                _manifest_cache[path] = cached
+            manifests.append(cached[1])
+    return manifests
+
+
+def archived_counts(
+    start_day: date,
+    end_day: date,
+    language: Optional[str] = None,
+    archive_dir: Optional[str] = None,
+) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    Soma as contagens arquivadas de um período (sem ler os dados).
+
+    Args:
+        start_day (date): Primeiro dia do período
+        end_day (date): Último dia do período (inclusive)
+        language (Optional[str]): Considera apenas esse idioma
+        archive_dir (Optional[str]): Diretório dos arquivos
+
+    Returns:
+        Tuple[Dict[str, int], Dict[str, int]]: Contagens por sentimento e por idioma
+    """
+    first, last = start_day.isoformat(), end_day.isoformat()
+    sentiment_counts: Dict[str, int] = {}
+    language_counts: Dict[str, int] = {}
+
+    for manifest in load_manifests(archive_dir):
+        for day, by_language in manifest["days"].items():
+            if not first <= day <= last:
+                continue
+            for day_language, by_sentiment in by_language.items():
+                if language and day_language != language:
+                    continue
+                for sentiment, count in by_sentiment.items():
+                    sentiment_counts[sentiment] = (
+                        sentiment_counts.get(sentiment, 0) + count
+                    )
+                    language_counts[day_language] = (
+                        language_counts.get(day_language, 0) + count
+                    )
+    return sentiment_counts, language_counts
+
+
+def iter_archived_reviews(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    archive_dir: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Percorre as avaliações arquivadas de um período, em streaming.
+
+    Args:
+        start (Optional[datetime]): Início do período (inclusive)
+        end (Optional[datetime]): Fim do período (inclusive)
+        archive_dir (Optional[str]): Diretório dos arquivos
+
+    Yields:
+        dict: Avaliação com `created_at` como datetime
+    """
+    first = start.date().isoformat() if start else None
+    last = end.date().isoformat() if end else None
+
+    for manifest in load_manifests(archive_dir):
+        days = manifest["days"]
+        if first and max(days) < first or last and min(days) > last:
+            continue
+        with gzip.open(manifest["data_path"], "rt", encoding="utf-8") as data_file:
+            for line in data_file:
+                record = json.loads(line)
+                created_at = datetime.fromisoformat(record["created_at"])
+                if start and created_at < start or end and created_at > end:
+                    continue
+                record["created_at"] = created_at
+                yield record
@@ -0,0 +1,235 @@
+"""
+Reclassificação (backfill) de avaliações com modelo ou prompt desatualizados.
+
+Cada avaliação guarda o modelo (`model_version`) e a versão do prompt
+(`prompt_version`) que produziram o sentimento. Quando os modelos
+(`GROQ_MODEL`/`GROQ_MODELS`) ou os prompts mudam, o backfill percorre as
+linhas desatualizadas em lotes ordenados por id (paginação por chave),
+classifica cada lote com
+concorrência limitada na faixa `bulk` do orçamento do LLM e grava um
+checkpoint após cada lote. Interrompido, o job retoma do último lote gravado.
+
+O job consome no máximo `BACKFILL_RATE_SHARE` do limite de requisições por
+minuto, deixando o restante para o tráfego da API.
+"""
+import json
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import bindparam, func, or_, select, update
+
+from app.config import settings
+from app.llm_budget import BULK, LLMBudget, llm_lane
+from app.models import Review, engine
+from app.sentiment_service import PROMPT_VERSION, SentimentAnalyzer, model_tiers
+
+logger = logging.getLogger(__name__)
+
+
+def target_versions() -> Tuple[str, str]:
+    """
+    Versões (modelos, prompt) que as avaliações devem ter.
+
+    Com camadas de modelos (GROQ_MODELS), qualquer camada configurada é
+    atual; os modelos vêm separados por vírgula.
+    """
+    return ",".join(model_tiers()), PROMPT_VERSION
+
+
+def _stale_filter(model_version: str, prompt_version: str):
+    return or_(
+        Review.model_version.is_(None),
+        Review.model_version.notin_(model_version.split(",")),
+        Review.prompt_version.is_(None),
+        Review.prompt_version != prompt_version,
+    )
+
+
+def count_stale(bind=None) -> int:
+    """Número de avaliações com modelo ou prompt desatualizados."""
+    bind = bind or engine
+    with bind.connect() as connection:
+        return connection.execute(
+            select(func.count(Review.id)).where(_stale_filter(*target_versions()))
+        ).scalar()
+
+
+def load_checkpoint(path: str) -> dict:
+    """Lê o checkpoint do backfill ({} se não existir ou estiver corrompido)."""
+    try:
+        with open(path, encoding="utf-8") as checkpoint_file:
+            return json.load(checkpoint_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_checkpoint(path: str, state: dict):
+    """Grava o checkpoint de forma atômica (arquivo temporário + rename)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(state, checkpoint_file, indent=2)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary, path)
+
+
+def run_backfill(
+    bind=None,
+    analyzer: Optional[SentimentAnalyzer] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    rate_share: Optional[float] = None,
+    checkpoint_path: Optional[str] = None,
+    restart: bool = False,
+    limit: Optional[int] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Reclassifica as avaliações desatualizadas, retomando do checkpoint.
+
+    Textos repetidos dentro de um lote são classificados uma única vez.
+    Linhas que continuarem desatualizadas (ex.: fallback para o léxico por
+    falha do LLM) não são repetidas na mesma passada; use `restart` para uma
+    nova passada completa.
+
+    Args:
+        bind: Engine do banco (padrão: engine da aplicação)
+        analyzer (Optional[SentimentAnalyzer]): Analisador a usar
+        batch_size (Optional[int]): Linhas por lote (padrão: BACKFILL_BATCH_SIZE)
+        concurrency (Optional[int]): Classificações simultâneas
+            (padrão: BACKFILL_CONCURRENCY)
+        rate_share (Optional[float]): Fração do limite de requisições por
+            minuto (padrão: BACKFILL_RATE_SHARE)
+        checkpoint_path (Optional[str]): Arquivo de checkpoint
+            (padrão: BACKFILL_CHECKPOINT)
+        restart (bool): Ignora o checkpoint e começa do início
+        limit (Optional[int]): Máximo de linhas nesta execução
+        progress (Optional[Callable[[dict], None]]): Chamado após cada lote
+
+    Returns:
+        dict: Estado final do checkpoint
+    """
+    bind = bind or engine
+    analyzer = analyzer or SentimentAnalyzer()
+    batch_size = batch_size or settings.BACKFILL_BATCH_SIZE
+    concurrency = max(1, concurrency or settings.BACKFILL_CONCURRENCY)
+    if rate_share is None:
+        rate_share = settings.BACKFILL_RATE_SHARE
+    checkpoint_path = checkpoint_path or settings.BACKFILL_CHECKPOINT
+
+    model_version, prompt_version = target_versions()
+    state = {} if restart else load_checkpoint(checkpoint_path)
+    if (
+        state.get("model_version") != model_version
+        or state.get("prompt_version") != prompt_version
+    ):
+        state = {
+            "model_version": model_version,
+            "prompt_version": prompt_version,
+            "last_id": 0,
+            "processed": 0,
+            "changed": 0,
+            "fallback": 0,
+            "completed": False,
+            "started_at": datetime.utcnow().isoformat(),
+        }
+
+    # Limite de taxa próprio: uma fração do orçamento por minuto do provedor
+    throttle = None
+    if analyzer.use_llm and settings.GROQ_REQUESTS_PER_MINUTE > 0:
+        throttle = LLMBudget(
+            0,
+            requests_per_minute=settings.GROQ_REQUESTS_PER_MINUTE * rate_share,
+            interactive_share=0.0,
+        )
+
+    def classify(key):
+        text, language = key
+        # Sem a camada do modelo local: o backfill existe para obter rótulos do LLM
+        with llm_lane(BULK):
+            if throttle is None:
+                return analyzer.analyze_sentiment_versioned(
+                    text, language, local_tier=False
+                )
+            with throttle.acquire(timeout=math.inf):
+                return analyzer.analyze_sentiment_versioned(
+                    text, language, local_tier=False
+                )
+
+    table = Review.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(
+            sentiment=bindparam("new_sentiment"),
+            confidence_score=bindparam("new_confidence"),
+            model_version=bindparam("new_model"),
+            prompt_version=bindparam("new_prompt"),
+        )
+    )
+    stale = _stale_filter(model_version, prompt_version)
+    current_models = model_version.split(",")
+    processed_now = 0
+
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="backfill") as pool:
+        while limit is None or processed_now < limit:
+            size = (
+                batch_size if limit is None else min(batch_size, limit - processed_now)
+            )
+            with bind.connect() as connection:
+                rows = connection.execute(
+                    select(
+                        Review.id,
+                        Review.review_text,
+                        Review.language,
+                        Review.sentiment,
+                    )
+                    .where(Review.id > state["last_id"], stale)
+                    .order_by(Review.id)
+                    .limit(size)
+                ).all()
+            if not rows:
+                state["completed"] = True
+                save_checkpoint(checkpoint_path, state)
+                break
+
+            keys = list(dict.fromkeys((row.review_text, row.language) for row in rows))
+            results = dict(zip(keys, pool.map(classify, keys)))
+
+            updates = []
+            for row in rows:
+                sentiment, confidence, new_model, new_prompt = results[
+                    (row.review_text, row.language)
+                ]
+                updates.append(
+                    {
+                        "row_id": row.id,
+                        "new_sentiment": sentiment,
+                        "new_confidence": confidence,
+                        "new_model": new_model,
+                        "new_prompt": new_prompt,
+                    }
+                )
+                state["changed"] += sentiment != row.sentiment
+                state["fallback"] += new_model not in current_models
+            with bind.begin() as connection:
+                connection.execute(statement, updates)
+
+            processed_now += len(rows)
+            state["processed"] += len(rows)
+            state["last_id"] = rows[-1].id
+            state["updated_at"] = datetime.utcnow().isoformat()
+            save_checkpoint(checkpoint_path, state)
+            logger.info(
+                f"Backfill: {state['processed']} processed, last id {state['last_id']}"
+            )
+            if progress:
+                progress(state)
+
+    return state
@@ -0,0 +1,228 @@
+"""
+Difusão em tempo real das avaliações classificadas (Server-Sent Events).
+
+Um único hub por worker recebe cada avaliação classificada e, a cada
+`SSE_STATS_INTERVAL` segundos, um resumo agregado. Cada evento é codificado
+uma única vez e a mesma sequência de bytes é entregue a todos os inscritos,
+então o custo por evento não cresce com o número de dashboards conectados.
+
+Cada inscrito tem uma fila limitada (`SSE_QUEUE_SIZE`). Consumidores lentos
+não atrasam os demais: avaliações antigas são descartadas (o cliente recebe
+um evento `dropped` com a quantidade perdida) e resumos pendentes são
+substituídos pelo mais recente, que traz os totais acumulados.
+
+O hub é em memória: cada worker difunde apenas o que ele mesmo classificou.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REVIEW_EVENT = "review"
+STATS_EVENT = "stats"
+DROPPED_EVENT = "dropped"
+KEEPALIVE = b": keepalive\n\n"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_event(event: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    """Codifica um evento no formato text/event-stream."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    data = json.dumps(
+        data, ensure_ascii=False, separators=(",", ":"), default=_json_default
+    )
+    lines.append(f"data: {data}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class Subscription:
+    """
+    Fila limitada de eventos já codificados de um inscrito.
+
+    Args:
+        max_size (int): Avaliações pendentes antes do descarte das mais antigas
+    """
+
+    def __init__(self, max_size: int):
+        self._events = deque(maxlen=max_size)
+        self._stats: Optional[bytes] = None
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self.coalesced = 0
+
+    def push(self, payload: bytes):
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(payload)
+        self._ready.set()
+
+    def push_stats(self, payload: bytes):
+        if self._stats is not None:
+            self.coalesced += 1
+        self._stats = payload
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Próximo trecho a enviar (None se nada chegar dentro de `timeout`).
+
+        Um aviso de descarte, se houver, vem antes dos eventos seguintes.
+        """
+        if not self._events and self._stats is None:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        chunks = []
+        if self.dropped:
+            chunks.append(encode_event(DROPPED_EVENT, {"count": self.dropped}))
+            self.dropped = 0
+        while self._events:
+            chunks.append(self._events.popleft())
+        if self._stats is not None:
+            chunks.append(self._stats)
+            self._stats = None
+        return b"".join(chunks)
+
+
+class BroadcastHub:
+    """
+    Hub de difusão de um worker.
+
+    Args:
+        queue_size (int): Tamanho da fila de cada inscrito
+        stats_interval (float): Intervalo (s) entre os resumos agregados
+        max_subscribers (int): Limite de inscritos simultâneos
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 256,
+        stats_interval: float = 5.0,
+        max_subscribers: int = 10000,
+    ):
+        self.queue_size = queue_size
+        self.stats_interval = stats_interval
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[Subscription] = set()
+        self._next_id = 0
+        self._delta: Dict[str, int] = {}
+        self._totals: Dict[str, int] = {}
+        self._delta_started = time.time()
+        self._ticker: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Optional[Subscription]:
+        """Cria um inscrito (None se o limite foi atingido)."""
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        loop = asyncio.get_running_loop()
+        ticker = self._ticker
+        if ticker is None or ticker.done() or ticker.get_loop() is not loop:
+            self._ticker = loop.create_task(self._tick())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        if not self._subscribers and self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+
+    def publish_review(self, review: dict):
+        """
+        Difunde uma avaliação classificada (chamado no event loop).
+
+        Args:
+            review (dict): id, sentiment, confidence_score, language etc.
+        """
+        sentiment = review.get("sentiment")
+        self._delta[sentiment] = self._delta.get(sentiment, 0) + 1
+        self._totals[sentiment] = self._totals.get(sentiment, 0) + 1
+        if not self._subscribers:
+            return
+        self._next_id += 1
+        payload = encode_event(REVIEW_EVENT, review, self._next_id)
+        for subscription in self._subscribers:
+            subscription.push(payload)
+
+    def publish_stats(self):
+        """Difunde o resumo do intervalo e reinicia a contagem."""
+        now = time.time()
+        delta, self._delta = self._delta, {}
+        started, self._delta_started = self._delta_started, now
+        if not self._subscribers:
+            return
+        payload = encode_event(
+            STATS_EVENT,
+            {
+                "since": datetime.utcfromtimestamp(started).isoformat() + "Z",
+                "until": datetime.utcfromtimestamp(now).isoformat() + "Z",
+                "delta": delta,
+                "delta_total": sum(delta.values()),
+                "totals": dict(self._totals),
+                "subscribers": len(self._subscribers),
+            },
+        )
+        for subscription in self._subscribers:
+            subscription.push_stats(payload)
+
+    async def _tick(self):
+        try:
+            while True:
+                await asyncio.sleep(self.stats_interval)
+                self.publish_stats()
+        except asyncio.CancelledError:
+            pass
+
+
+async def sse_stream(hub: BroadcastHub, subscription: Subscription, heartbeat: float):
+    """
+    Gera os bytes do stream SSE de um inscrito até a desconexão.
+
+    Envia um comentário de keepalive quando nada acontece por `heartbeat`
+    segundos, para manter proxies e balanceadores com a conexão aberta.
+    """
+    try:
+        yield f"retry: {int(heartbeat * 1000)}\n\n".encode("ascii")
+        while True:
+            chunk = await subscription.next(timeout=heartbeat)
+            yield chunk if chunk is not None else KEEPALIVE
+    finally:
+        hub.unsubscribe(subscription)
+
+
+_hub: Optional[BroadcastHub] = None
+
+
+def get_broadcast_hub() -> BroadcastHub:
+    """Hub de difusão do worker, criado no primeiro uso."""
+    global _hub
+    if _hub is None:
+        _hub = BroadcastHub(
+            queue_size=settings.SSE_QUEUE_SIZE,
+            stats_interval=settings.SSE_STATS_INTERVAL,
+            max_subscribers=settings.SSE_MAX_SUBSCRIBERS,
+        )
+    return _hub
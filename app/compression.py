@@ -0,0 +1,261 @@
+"""
+Compressão das respostas negociada pelo `Accept-Encoding`.
+
+O `CompressionMiddleware` comprime com brotli (`br`, se o pacote `brotli`
+estiver instalado) ou gzip as respostas de tipos textuais e binários não
+comprimidos (JSON, MessagePack, Arrow) a partir de `COMPRESSION_MIN_SIZE`
+bytes. Corpos (ou trechos de streaming) a partir de
+`COMPRESSION_THREADPOOL_SIZE` bytes são comprimidos em uma thread, sem
+bloquear o event loop; os menores são comprimidos no próprio loop, onde o
+custo de trocar de thread seria maior que o da compressão.
+
+Respostas de streaming (ex.: exportação em Arrow) são comprimidas trecho a
+trecho, com flush a cada trecho para o cliente receber os dados à medida que
+são gerados. Server-Sent Events (`text/event-stream`) nunca são comprimidos:
+o buffer do compressor atrasaria os eventos.
+
+Toda resposta de tipo comprimível leva `Vary: Accept-Encoding`, inclusive as
+enviadas sem compressão (abaixo do tamanho mínimo ou sem `Accept-Encoding`
+aceitável): um cache compartilhado não pode servir uma codificação a um
+cliente que pediu outra.
+"""
+import zlib
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.responses import parse_quality_values
+from app.timing import phase
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/msgpack",
+    "application/vnd.apache.arrow.stream",
+    "text/",
+)
+# Tipos que nunca são comprimidos, mesmo casando com COMPRESSIBLE_TYPES
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Codificação a usar ("br", "gzip" ou None) conforme o Accept-Encoding.
+
+    Com pesos iguais, brotli é preferido (respostas menores).
+    """
+    qualities = parse_quality_values(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith(UNCOMPRESSED_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _is_eligible(headers: dict) -> bool:
+    """Resposta que seria comprimida se grande o bastante e aceita pelo cliente."""
+    content_type = headers.get(b"content-type", b"").decode("latin-1")
+    return b"content-encoding" not in headers and is_compressible(content_type)
+
+
+def _add_vary(headers: list) -> list:
+    """Inclui Accept-Encoding no cabeçalho Vary, mantendo os valores existentes."""
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            tokens = [token.strip().lower() for token in value.split(b",")]
+            if b"accept-encoding" in tokens or b"*" in tokens:
+                return headers
+            headers = list(headers)
+            headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    return [*headers, (b"vary", b"Accept-Encoding")]
+
+
+def _vary_on_encoding(send):
+    """`send` que marca com Vary as respostas comprimíveis não comprimidas."""
+
+    async def wrapped(message):
+        if message["type"] == "http.response.start" and _is_eligible(
+            dict(message.get("headers", []))
+        ):
+            message = {**message, "headers": _add_vary(message.get("headers", []))}
+        await send(message)
+
+    return wrapped
+
+
+class _Compressor:
+    """Compressor incremental (um por resposta)."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16 + MAX_WBITS: formato gzip (cabeçalho e trailer)
+            self._zlib = zlib.compressobj(
+                gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Comprime um trecho; com `final`, encerra o fluxo."""
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            return output + (self._brotli.finish() if final else self._brotli.flush())
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compressão das respostas.
+
+    Args:
+        app: Aplicação ASGI
+        minimum_size (int): Tamanho mínimo (bytes) para comprimir
+        threadpool_size (int): Tamanho a partir do qual comprime em uma thread
+        gzip_level (int): Nível do gzip (1 a 9)
+        brotli_quality (int): Qualidade do brotli (0 a 11)
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        threadpool_size: int = 65536,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.threadpool_size = threadpool_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, _vary_on_encoding(send))
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    async def _compress(
+        self, compressor: _Compressor, data: bytes, final: bool
+    ) -> bytes:
+        with phase("compression"):
+            if len(data) >= self.threadpool_size:
+                return await run_in_threadpool(compressor.compress, data, final)
+            return compressor.compress(data, final)
+
+
+class _CompressionResponder:
+    """Estado da compressão de uma resposta."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[dict] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    def _headers(self, content_length: Optional[int]) -> list:
+        headers = [
+            (name, value)
+            for name, value in self._start.get("headers", [])
+            if name not in (b"content-length", b"content-encoding")
+        ]
+        headers.append((b"content-encoding", self.encoding.encode("ascii")))
+        headers = _add_vary(headers)
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("ascii")))
+        return headers
+
+    async def send(self, message):
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if not _is_eligible(dict(message.get("headers", []))):
+                self._passthrough = True
+                await self._send(message)
+                return
+            # O início é retido até o primeiro trecho do corpo: só então se
+            # sabe o tamanho (ou se é streaming)
+            self._start = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        middleware = self.middleware
+
+        if self._compressor is None:
+            if not more_body and len(body) < middleware.minimum_size:
+                # Sem compressão pelo tamanho, mas a resposta ainda varia com
+                # o Accept-Encoding (respostas maiores da rota são comprimidas)
+                self._passthrough = True
+                headers = _add_vary(self._start.get("headers", []))
+                await self._send({**self._start, "headers": headers})
+                await self._send(message)
+                return
+            self._compressor = _Compressor(
+                self.encoding, middleware.gzip_level, middleware.brotli_quality
+            )
+            compressed = await middleware._compress(
+                self._compressor, body, not more_body
+            )
+            await self._send(
+                {
+                    **self._start,
+                    "headers": self._headers(None if more_body else len(compressed)),
+                }
+            )
+        else:
+            compressed = await middleware._compress(
+                self._compressor, body, not more_body
+            )
+
+        await self._send(
+            {"type": "http.response.body", "body": compressed, "more_body": more_body}
+        )
+
+
+def add_compression_middleware(app):
+    """Registra o CompressionMiddleware conforme as configurações."""
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            threadpool_size=settings.COMPRESSION_THREADPOOL_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
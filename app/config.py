@@ -20,20 +20,179 @@ class Settings:
     API_TITLE: str = "Sentiment Analysis API"
     API_DESCRIPTION: str = "API para análise de sentimento de avaliações de clientes"
     API_VERSION: str = "1.0.0"
+    # Classe de resposta padrão: "orjson" (rápida) ou "json" (biblioteca padrão)
+    DEFAULT_RESPONSE_CLASS: str = os.getenv("DEFAULT_RESPONSE_CLASS", "orjson").lower()
     
     # Configurações do servidor
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    # Número de processos worker em produção (`python manage.py serve`)
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+
+    # Tempos por fase: cabeçalho Server-Timing e access log em JSON
+    SERVER_TIMING_ENABLED: bool = (
+        os.getenv("SERVER_TIMING_ENABLED", "True").lower() == "true"
+    )
+    ACCESS_LOG_ENABLED: bool = os.getenv("ACCESS_LOG_ENABLED", "True").lower() == "true"
+
+    # Compressão das respostas (br/gzip, conforme o Accept-Encoding)
+    COMPRESSION_ENABLED: bool = (
+        os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    )
+    # Respostas menores que isso (bytes) são enviadas sem compressão
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    # A partir desse tamanho (bytes) a compressão roda fora do event loop
+    COMPRESSION_THREADPOOL_SIZE: int = int(
+        os.getenv("COMPRESSION_THREADPOOL_SIZE", "65536")
+    )
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # Configurações de inicialização
+    # Cria/atualiza o schema no startup (prefira `python manage.py migrate`)
+    AUTO_MIGRATE: bool = os.getenv("AUTO_MIGRATE", "False").lower() == "true"
+    # Conexões abertas antecipadamente no pool pelo endpoint /ready
+    DB_POOL_WARM_CONNECTIONS: int = int(os.getenv("DB_POOL_WARM_CONNECTIONS", "2"))
     
+    # Persistência write-behind: confirma via spool local e insere em lotes
+    WRITE_BEHIND_ENABLED: bool = (
+        os.getenv("WRITE_BEHIND_ENABLED", "False").lower() == "true"
+    )
+    WRITE_BEHIND_DIR: str = os.getenv("WRITE_BEHIND_DIR", "./spool")
+    WRITE_BEHIND_BATCH_SIZE: int = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+    WRITE_BEHIND_FLUSH_INTERVAL: float = float(
+        os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5")
+    )
+    WRITE_BEHIND_FSYNC: bool = os.getenv("WRITE_BEHIND_FSYNC", "True").lower() == "true"
+
+    # Stream SSE (/reviews/stream): fila por inscrito, intervalo dos resumos
+    # agregados, keepalive (s) e limite de inscritos por worker
+    SSE_QUEUE_SIZE: int = int(os.getenv("SSE_QUEUE_SIZE", "256"))
+    SSE_STATS_INTERVAL: float = float(os.getenv("SSE_STATS_INTERVAL", "5"))
+    SSE_HEARTBEAT: float = float(os.getenv("SSE_HEARTBEAT", "15"))
+    SSE_MAX_SUBSCRIBERS: int = int(os.getenv("SSE_MAX_SUBSCRIBERS", "10000"))
+
+    # Janelas (minutos) dos contadores deslizantes de /reviews/stats/live e
+    # aquecimento a partir do banco no startup
+    LIVE_STATS_WINDOWS: str = os.getenv("LIVE_STATS_WINDOWS", "15,60,1440")
+    LIVE_STATS_WARMUP: bool = os.getenv("LIVE_STATS_WARMUP", "True").lower() == "true"
+
+    # Respostas recentes de POST /reviews com Idempotency-Key mantidas em memória
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+    # Particionamento mensal (PostgreSQL) e arquivamento de meses antigos
+    PARTITION_MONTHS_AHEAD: int = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "./archive")
+    ARCHIVE_RETENTION_DAYS: int = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
+    # Linhas por row group (Parquet) / record batch (Arrow) na exportação
+    EXPORT_ROW_GROUP_SIZE: int = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "50000"))
+
+    # Reclassificação de avaliações com modelo/prompt desatualizados
+    BACKFILL_BATCH_SIZE: int = int(os.getenv("BACKFILL_BATCH_SIZE", "100"))
+    BACKFILL_CONCURRENCY: int = int(os.getenv("BACKFILL_CONCURRENCY", "4"))
+    # Fração de GROQ_REQUESTS_PER_MINUTE que o backfill pode consumir
+    BACKFILL_RATE_SHARE: float = float(os.getenv("BACKFILL_RATE_SHARE", "0.25"))
+    BACKFILL_CHECKPOINT: str = os.getenv(
+        "BACKFILL_CHECKPOINT", "./backfill.checkpoint.json"
+    )
+
     # Configurações do Groq LLM
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "gsk_YOUR_GROQ_API_KEY")
     GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+    # Camadas de modelos em ordem, do mais rápido ao maior (separados por
+    # vírgula); vazio = apenas GROQ_MODEL
+    GROQ_MODELS: str = os.getenv("GROQ_MODELS", "")
+    # Confiança mínima para aceitar a resposta de uma camada antes da última
+    LLM_ESCALATION_CONFIDENCE: float = float(
+        os.getenv("LLM_ESCALATION_CONFIDENCE", "0.70")
+    )
     
     # Configurações de análise de sentimento
     USE_LLM_ANALYSIS: bool = os.getenv("USE_LLM_ANALYSIS", "True").lower() == "true"
     LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "1024"))
     LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.1"))
+    # Idioma assumido quando a detecção não é conclusiva
+    DEFAULT_LANGUAGE: str = os.getenv("DEFAULT_LANGUAGE", "pt")
+    # Usa o léxico local do idioma quando o LLM não estiver disponível ou falhar
+    USE_LEXICON_FALLBACK: bool = (
+        os.getenv("USE_LEXICON_FALLBACK", "True").lower() == "true"
+    )
+    # Modelo local destilado dos rótulos do LLM (manage.py train-local);
+    # vazio = desabilitado
+    LOCAL_MODEL_DIR: str = os.getenv("LOCAL_MODEL_DIR", "./models/local")
+    # Confiança mínima para o modelo local responder antes do LLM
+    # (0 = apenas como fallback do LLM)
+    LOCAL_MODEL_ACCEPT_CONFIDENCE: float = float(
+        os.getenv("LOCAL_MODEL_ACCEPT_CONFIDENCE", "0")
+    )
+    # No fallback, abaixo desta confiança usa o léxico
+    LOCAL_MODEL_MIN_CONFIDENCE: float = float(
+        os.getenv("LOCAL_MODEL_MIN_CONFIDENCE", "0.5")
+    )
+    # Intervalo (s) entre verificações de um novo artefato (hot-swap)
+    LOCAL_MODEL_RELOAD_INTERVAL: float = float(
+        os.getenv("LOCAL_MODEL_RELOAD_INTERVAL", "5")
+    )
+
+    # Textos longos: divididos em trechos por frase e classificados em paralelo
+    LLM_CHUNK_CHARS: int = int(os.getenv("LLM_CHUNK_CHARS", "2000"))
+    LLM_CHUNK_CONCURRENCY: int = int(os.getenv("LLM_CHUNK_CONCURRENCY", "4"))
+    # Limite rígido de tokens (prompt + resposta) gastos por avaliação
+    LLM_MAX_TOKENS_PER_REVIEW: int = int(
+        os.getenv("LLM_MAX_TOKENS_PER_REVIEW", "4000")
+    )
+    REVIEW_TEXT_MAX_LENGTH: int = int(os.getenv("REVIEW_TEXT_MAX_LENGTH", "100000"))
+
+    # Orçamento de chamadas ao Groq, compartilhado entre todos os workers
+    GROQ_MAX_CONCURRENCY: int = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+    GROQ_REQUESTS_PER_MINUTE: float = float(
+        os.getenv("GROQ_REQUESTS_PER_MINUTE", "0")
+    )  # 0 = sem limite
+    GROQ_RATE_BURST: int = int(os.getenv("GROQ_RATE_BURST", "0"))  # 0 = concorrência
+    LLM_QUEUE_TIMEOUT: float = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+    # Fração da concorrência e da rajada reservada às requisições interativas;
+    # tarefas em lote (faixa "bulk") usam apenas o restante
+    LLM_INTERACTIVE_SHARE: float = float(os.getenv("LLM_INTERACTIVE_SHARE", "0.5"))
+    # API keys dos clientes: "nome:chave[:req_por_minuto[:cota_diária]]",
+    # separadas por vírgula ("" = API aberta, sem identificação)
+    API_KEYS: str = os.getenv("API_KEYS", "")
+    # Limites padrão de classificações (POST /reviews) por cliente
+    API_KEY_RATE_PER_MINUTE: float = float(os.getenv("API_KEY_RATE_PER_MINUTE", "60"))
+    API_KEY_BURST: int = int(os.getenv("API_KEY_BURST", "10"))
+    # 0 = sem cota
+    API_KEY_DAILY_QUOTA: int = int(os.getenv("API_KEY_DAILY_QUOTA", "10000"))
+    # Onde contar as cotas: "memory" (1/WORKERS por worker) ou "database"
+    API_KEY_QUOTA_STORE: str = os.getenv("API_KEY_QUOTA_STORE", "memory").lower()
+    # Banco das cotas compartilhadas (padrão: DATABASE_URL) e quantas
+    # classificações cada worker reserva por consulta ao banco
+    API_KEY_QUOTA_DATABASE_URL: str = os.getenv("API_KEY_QUOTA_DATABASE_URL", "")
+    API_KEY_QUOTA_LEASE: int = int(os.getenv("API_KEY_QUOTA_LEASE", "20"))
+    # Controle de admissão: recusa (503) ou degrada para o classificador local
+    # as requisições cuja espera estimada pelo LLM passa do prazo do cliente
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    # "reject" ou "degrade"
+    ADMISSION_ACTION: str = os.getenv("ADMISSION_ACTION", "reject").lower()
+    # Prazo (s) assumido quando o cliente não envia X-Request-Timeout
+    ADMISSION_DEFAULT_TIMEOUT: float = float(
+        os.getenv("ADMISSION_DEFAULT_TIMEOUT", "30")
+    )
+    # Classificações simultâneas por worker (0 = sem limite)
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "0"))
+    # Espera estimada (s) a partir da qual o /ready responde 503 (saturado)
+    ADMISSION_READY_MAX_WAIT: float = float(os.getenv("ADMISSION_READY_MAX_WAIT", "10"))
+    # Avaliação em sombra: modelo candidato ("" = desligada), fração das
+    # requisições amostradas, chamadas simultâneas e pendentes da sombra
+    SHADOW_MODEL: str = os.getenv("SHADOW_MODEL", "")
+    SHADOW_SAMPLE_RATE: float = float(os.getenv("SHADOW_SAMPLE_RATE", "0.05"))
+    SHADOW_CONCURRENCY: int = int(os.getenv("SHADOW_CONCURRENCY", "2"))
+    SHADOW_MAX_PENDING: int = int(os.getenv("SHADOW_MAX_PENDING", "100"))
+    # Diretório de estado do orçamento; definido automaticamente com WORKERS > 1
+    LLM_BUDGET_DIR: str = os.getenv("LLM_BUDGET_DIR", "")
+    # Faz uma chamada leve ao Groq no /ready para abrir a conexão antecipadamente
+    LLM_WARMUP_REQUEST: bool = (
+        os.getenv("LLM_WARMUP_REQUEST", "False").lower() == "true"
+    )
 
 
 settings = Settings()
\ No newline at end of file
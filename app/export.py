@@ -0,0 +1,284 @@
+"""
+Exportação colunar (Parquet / Arrow IPC) de avaliações e resultados de teste.
+
+As colunas categóricas (sentimento, idioma) são gravadas com dictionary
+encoding e os dados são escritos em row groups (Parquet) ou record batches
+(Arrow) à medida que são lidos, sem materializar a exportação inteira em
+memória. A exportação de avaliações percorre os meses arquivados e depois a
+tabela do banco.
+
+Requer a dependência opcional `pyarrow`.
+"""
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import and_, select
+
+from app.archive import iter_archived_reviews
+from app.config import settings
+from app.models import Review, engine
+
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+REVIEW_EXPORT_COLUMNS = (
+    "id",
+    "customer_name",
+    "review_text",
+    "sentiment",
+    "confidence_score",
+    "language",
+    "created_at",
+)
+
+TEST_RESULT_COLUMNS = (
+    "id",
+    "customer_name",
+    "review_text",
+    "expected_sentiment",
+    "predicted_sentiment",
+    "confidence_score",
+    "is_correct",
+)
+
+
+def _require_pyarrow():
+    """Importa pyarrow sob demanda, com mensagem clara se não instalado."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError(
+            "A exportação Parquet/Arrow requer pyarrow (pip install pyarrow)"
+        )
+    return pyarrow
+
+
+def _category():
+    pa = _require_pyarrow()
+    return pa.dictionary(pa.int8(), pa.string())
+
+
+def review_schema():
+    """Schema Arrow das avaliações exportadas."""
+    pa = _require_pyarrow()
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("customer_name", pa.string()),
+            ("review_text", pa.string()),
+            ("sentiment", _category()),
+            ("confidence_score", pa.float32()),
+            ("language", _category()),
+            ("created_at", pa.timestamp("us")),
+        ]
+    )
+
+
+def test_result_schema():
+    """Schema Arrow dos resultados de teste exportados."""
+    pa = _require_pyarrow()
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("customer_name", pa.string()),
+            ("review_text", pa.string()),
+            ("expected_sentiment", _category()),
+            ("predicted_sentiment", _category()),
+            ("confidence_score", pa.float32()),
+            ("is_correct", pa.bool_()),
+        ]
+    )
+
+
+def _to_float(value) -> Optional[float]:
+    # Valores legados não numéricos viram nulos em vez de abortar a exportação
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _batch_to_table(rows: List[dict], schema):
+    """Converte linhas (dicts) em uma tabela Arrow com o schema informado."""
+    pa = _require_pyarrow()
+    columns = {name: [row.get(name) for row in rows] for name in schema.names}
+    columns["confidence_score"] = [_to_float(v) for v in columns["confidence_score"]]
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Arquivo só de escrita que acumula bytes para envio em streaming."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _open_writer(sink, schema, export_format: str):
+    pa = _require_pyarrow()
+    if export_format == "parquet":
+        return pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    if export_format == "arrow":
+        return pa.ipc.new_stream(sink, schema)
+    raise ValueError(f"Formato de exportação inválido: {export_format}")
+
+
+def iter_export_chunks(
+    batches: Iterable[List[dict]], schema, export_format: str
+) -> Iterator[bytes]:
+    """
+    Codifica lotes de linhas e produz os bytes gerados a cada lote.
+
+    Cada lote vira um row group (Parquet) ou record batch (Arrow), então o
+    consumo de memória é limitado ao tamanho do lote.
+
+    Args:
+        batches (Iterable[List[dict]]): Lotes de linhas
+        schema: Schema Arrow
+        export_format (str): "parquet" ou "arrow"
+
+    Yields:
+        bytes: Trechos do arquivo exportado
+    """
+    sink = _ChunkSink()
+    writer = _open_writer(sink, schema, export_format)
+    try:
+        for rows in batches:
+            if not rows:
+                continue
+            writer.write_table(_batch_to_table(rows, schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def iter_review_batches(
+    bind=None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+) -> Iterator[List[dict]]:
+    """
+    Percorre avaliações arquivadas e do banco em lotes.
+
+    O banco é lido com paginação por chave (id), sem OFFSET.
+
+    Args:
+        bind: Engine de origem (padrão: engine da aplicação)
+        start (Optional[datetime]): Início do período (inclusive)
+        end (Optional[datetime]): Fim do período (inclusive)
+        batch_size (Optional[int]): Linhas por lote (padrão: EXPORT_ROW_GROUP_SIZE)
+
+    Yields:
+        List[dict]: Lote de avaliações
+    """
+    bind = bind or engine
+    batch_size = batch_size or settings.EXPORT_ROW_GROUP_SIZE
+
+    batch = []
+    for review in iter_archived_reviews(start, end):
+        batch.append(review)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+    columns = [Review.__table__.c[name] for name in REVIEW_EXPORT_COLUMNS]
+    filters = []
+    if start:
+        filters.append(Review.created_at >= start)
+    if end:
+        filters.append(Review.created_at <= end)
+
+    last_id = 0
+    with bind.connect() as connection:
+        while True:
+            rows = connection.execute(
+                select(*columns)
+                .where(and_(Review.id > last_id, *filters))
+                .order_by(Review.id)
+                .limit(batch_size)
+            ).mappings().all()
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            yield [dict(row) for row in rows]
+
+
+def iter_test_result_batches(
+    path: str, batch_size: Optional[int] = None
+) -> Iterator[List[dict]]:
+    """
+    Lê um arquivo de resultados de teste (JSON array ou JSONL) em lotes.
+
+    Args:
+        path (str): Arquivo gerado pelo generate_test_data.py
+        batch_size (Optional[int]): Linhas por lote
+
+    Yields:
+        List[dict]: Lote de resultados
+    """
+    batch_size = batch_size or settings.EXPORT_ROW_GROUP_SIZE
+    with open(path, encoding="utf-8") as results_file:
+        first = results_file.read(1)
+        while first.isspace():
+            first = results_file.read(1)
+        results_file.seek(0)
+
+        if first == "[":
+            records = json.load(results_file)
+        else:
+            records = (json.loads(line) for line in results_file if line.strip())
+
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def write_export(chunks: Iterable[bytes], output_path: str) -> int:
+    """
+    Grava os trechos de uma exportação em arquivo.
+
+    Returns:
+        int: Bytes gravados
+    """
+    written = 0
+    with open(output_path, "wb") as output_file:
+        for chunk in chunks:
+            output_file.write(chunk)
+            written += len(chunk)
+    return written
@@ -0,0 +1,109 @@
+"""
+HyperLogLog: contagem aproximada de elementos distintos em espaço fixo.
+
+Usado nos rollups diários para contar clientes distintos por sentimento. Os
+sketches de vários dias são combinados (máximo registro a registro), então um
+relatório de um ano soma 365 sketches em vez de executar `COUNT(DISTINCT)`
+sobre as linhas. Com a precisão padrão (2^12 registros, 4 KB) o erro padrão
+é de ~1,6%. A combinação usa NumPy quando disponível.
+"""
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - dependência opcional
+    numpy = None
+
+DEFAULT_PRECISION = 12
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+
+def _alpha(registers: int) -> float:
+    if registers == 16:
+        return 0.673
+    if registers == 32:
+        return 0.697
+    if registers == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / registers)
+
+
+def normalize_customer(name: str) -> str:
+    """Forma canônica do nome do cliente para a contagem de distintos."""
+    return " ".join(name.split()).casefold()
+
+
+class HyperLogLog:
+    """
+    Sketch HyperLogLog com hash de 64 bits.
+
+    Args:
+        precision (int): Bits do índice do registro (4 a 16)
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(
+        self, precision: int = DEFAULT_PRECISION, registers: Optional[bytearray] = None
+    ):
+        if not 4 <= precision <= 16:
+            raise ValueError("A precisão deve estar entre 4 e 16")
+        self.precision = precision
+        if registers is None:
+            registers = bytearray(1 << precision)
+        self.registers = registers
+
+    def add(self, value: str):
+        """Adiciona um elemento ao sketch."""
+        hashed = int.from_bytes(
+            hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+        )
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog"):
+        """Combina outro sketch neste (união dos conjuntos)."""
+        if other.precision != self.precision:
+            raise ValueError("Sketches com precisões diferentes")
+        if numpy is not None:
+            registers = numpy.frombuffer(self.registers, dtype=numpy.uint8)
+            numpy.maximum(
+                registers,
+                numpy.frombuffer(other.registers, dtype=numpy.uint8),
+                out=registers,
+            )
+        else:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """Estimativa do número de elementos distintos."""
+        size = len(self.registers)
+        harmonic = sum(map(_INVERSE_POWERS.__getitem__, self.registers))
+        estimate = _alpha(size) * size * size / harmonic
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Correção para cardinalidades pequenas (linear counting)
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        """Serializa o sketch (precisão + registros comprimidos)."""
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        precision = data[0]
+        registers = bytearray(zlib.decompress(data[1:]))
+        if len(registers) != 1 << precision:
+            raise ValueError("Sketch HyperLogLog corrompido")
+        return cls(precision, registers)
@@ -0,0 +1,128 @@
+"""
+Chaves de idempotência do `POST /reviews` (cabeçalho `Idempotency-Key`).
+
+Clientes que repetem a requisição após um timeout não devem pagar uma
+segunda chamada ao LLM nem gravar a avaliação duas vezes:
+
+- Enquanto a primeira tentativa está em andamento, as repetições com a mesma
+  chave aguardam o mesmo resultado (single-flight, neste processo).
+- Depois de concluída, a resposta é devolvida de um cache recente em memória
+  ou, em outro worker/após reinício, reconstruída a partir da tabela
+  `idempotency_keys` (chave primária na chave, gravada na mesma transação
+  da avaliação ou, no modo write-behind, reservada antes da confirmação e
+  liberada se a avaliação não chegar ao spool).
+
+Uma chave reutilizada com outro conteúdo é rejeitada. Falhas não são
+memorizadas: a próxima repetição tenta de novo.
+"""
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.config import settings
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyMismatch(Exception):
+    """Chave de idempotência reutilizada com outro conteúdo."""
+
+
+def request_fingerprint(customer_name: str, review_text: str) -> str:
+    """Impressão digital do conteúdo associado a uma chave."""
+    digest = hashlib.sha256()
+    digest.update(customer_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(review_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesce execuções concorrentes por chave e memoriza as concluídas.
+
+    Args:
+        max_recent (int): Respostas recentes mantidas em memória (LRU)
+    """
+
+    def __init__(self, max_recent: int = 10000):
+        self.max_recent = max_recent
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self._recent: "OrderedDict[str, Tuple[str, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def recent(self, key: str, fingerprint: str):
+        """
+        Resposta recente da chave, se houver.
+
+        Raises:
+            IdempotencyKeyMismatch: Se a chave foi usada com outro conteúdo
+        """
+        with self._lock:
+            entry = self._recent.get(key)
+            if entry is None:
+                return None
+            self._recent.move_to_end(key)
+        if entry[0] != fingerprint:
+            raise IdempotencyKeyMismatch(key)
+        return entry[1]
+
+    def remember(self, key: str, fingerprint: str, result):
+        """Memoriza a resposta concluída de uma chave."""
+        if self.max_recent <= 0:
+            return
+        with self._lock:
+            self._recent[key] = (fingerprint, result)
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.max_recent:
+                self._recent.popitem(last=False)
+
+    async def run(
+        self, key: str, fingerprint: str, function: Callable[[], Awaitable]
+    ) -> Tuple[object, bool]:
+        """
+        Executa `function` uma única vez por chave entre chamadas concorrentes.
+
+        Returns:
+            Tuple[object, bool]: (resultado, True se veio de outra execução)
+
+        Raises:
+            IdempotencyKeyMismatch: Se a chave está em uso com outro conteúdo
+        """
+        entry = self._in_flight.get(key)
+        if entry is not None:
+            if entry[0] != fingerprint:
+                raise IdempotencyKeyMismatch(key)
+            # shield: o cancelamento de uma repetição não cancela a original
+            return await asyncio.shield(entry[1]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        try:
+            result = await function()
+        except BaseException as error:
+            future.set_exception(error)
+            # Evita o aviso de exceção não consumida quando ninguém aguardava
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self.remember(key, fingerprint, result)
+            return result, False
+        finally:
+            self._in_flight.pop(key, None)
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Retorna o coordenador de chaves de idempotência do processo."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight(settings.IDEMPOTENCY_CACHE_SIZE)
+    return _single_flight
@@ -0,0 +1,86 @@
+"""
+Detecção rápida de idioma por n-gramas de caracteres.
+
+O detector compara os trigramas do início do texto com perfis compactos dos
+trigramas mais frequentes de cada idioma suportado. Não depende de modelos
+externos e leva poucos microssegundos por texto.
+"""
+import re
+from typing import Dict
+
+from app.config import settings
+
+SUPPORTED_LANGUAGES = ("pt", "en")
+
+# Idioma registrado quando não é possível determinar (ISO 639-2 "und")
+UNDETERMINED_LANGUAGE = "und"
+
+# Trigramas frequentes e característicos de cada idioma (com espaços de borda)
+_PROFILES: Dict[str, tuple] = {
+    "pt": (
+        " de", "de ", " qu", "que", "ue ", "ção", "ão ", "ões", " nã", "não",
+        " co", "com", "om ", "nte", "ent", " pa", "par", "ara", "do ", "da ",
+        " do", " da", "os ", " os", " es", "est", "mui", "uit", "ito", " um",
+        "um ", "uma", "mas", " ma", "men", "nto", "ado", "ida", "lho", "nha",
+        "ei ", " me", "ou ", " fo", "foi", "oi ", "tem", "em ", " ao", "rá ",
+        "õe ", "sta", "ade", "ssi", "ime", " se", "mo ", "bom", "pés",
+        "ele", "ndo", "ava", "ina", "ém ",
+    ),
+    "en": (
+        " th", "the", "he ", "ing", "ng ", " an", "and", "nd ", " of", "of ",
+        "ed ", " wa", "was", "ion", "er ", " is", "is ", " it", "it ", "for",
+        "you", " yo", "hat", "tha", "ver", "ery", "ry ", "wit", "ith",
+        "th ", " wi", "not", "n't", "'t ", "ly ", "all", "ll ", " be", "ere",
+        "uld", "ld ", " wh", "whe", "ike", "ow ", " my", "my ", " so",
+        "ay ", "ful", "ul ", "ice", " gr", "ood", "od ", "bad", "ad ", " we",
+        "ome", "ust", " ve", "ive", " ex", "rie", "pe ", "ted",
+    ),
+}
+# Índice trigrama -> idioma (os perfis não compartilham trigramas)
+_TRIGRAM_LANGUAGE: Dict[str, str] = {
+    trigram: language
+    for language, trigrams in _PROFILES.items()
+    for trigram in trigrams
+}
+
+# Caracteres que praticamente só ocorrem em português entre os idiomas suportados
+_PORTUGUESE_CHARS = re.compile(r"[ãõçáéíóúâêôà]")
+_NON_LETTERS = re.compile(r"[^\w'\s]+")
+
+# Amostra máxima analisada (o começo do texto basta para o idioma)
+_SAMPLE_CHARS = 400
+
+
+def detect_language(text: str, default: str = None) -> str:
+    """
+    Detecta o idioma de um texto.
+
+    Args:
+        text (str): Texto a ser analisado
+        default (str): Idioma retornado quando não há sinal suficiente
+            (padrão: DEFAULT_LANGUAGE)
+
+    Returns:
+        str: Código do idioma ("pt", "en") ou o padrão
+    """
+    default = default or settings.DEFAULT_LANGUAGE
+    if not text:
+        return default
+
+    sample = _NON_LETTERS.sub(" ", text[:_SAMPLE_CHARS].lower())
+    sample = f" {' '.join(sample.split())} "
+
+    scores = {language: 0 for language in _PROFILES}
+    lookup = _TRIGRAM_LANGUAGE.get
+    for i in range(len(sample) - 2):
+        language = lookup(sample[i:i + 3])
+        if language:
+            scores[language] += 1
+
+    scores["pt"] += 2 * len(_PORTUGUESE_CHARS.findall(sample))
+
+    best = max(scores, key=scores.get)
+    ranked = sorted(scores.values(), reverse=True)
+    if ranked[0] < 2 or ranked[0] - ranked[1] < 1:
+        return default
+    return best
@@ -0,0 +1,102 @@
+"""
+Classificação local de sentimento por léxico, por idioma.
+
+Usada como camada local quando o LLM não está disponível ou falha. Cada
+idioma tem seus próprios dicionários de palavras positivas, negativas e de
+negação; uma negação inverte a polaridade das palavras seguintes.
+"""
+import re
+from typing import Optional, Tuple
+
+POSITIVE_WORDS = {
+    "pt": {
+        "excelente", "ótimo", "ótima", "bom", "boa", "satisfeito", "satisfeita",
+        "feliz", "fantástico", "fantástica", "maravilhoso", "maravilhosa",
+        "incrível", "perfeito", "perfeita", "perfeitamente", "adorei", "amei",
+        "gostei", "recomendo", "prestativo", "prestativa", "eficiente",
+        "rápido", "rápida", "ágil", "superou", "top", "qualidade", "atencioso",
+        "atenciosa", "profissional", "dedicado", "dedicada", "excepcional",
+    },
+    "en": {
+        "excellent", "great", "good", "satisfied", "happy", "fantastic",
+        "amazing", "wonderful", "incredible", "perfect", "perfectly", "love",
+        "loved", "recommend", "recommended", "helpful", "efficient", "fast",
+        "quick", "quickly", "awesome", "best", "professional", "friendly",
+    },
+}
+
+NEGATIVE_WORDS = {
+    "pt": {
+        "péssimo", "péssima", "ruim", "insatisfeito", "insatisfeita",
+        "decepcionado", "decepcionada", "decepção", "decepcionante", "terrível",
+        "horrível", "lento", "lenta", "demorado", "demorada", "demorou",
+        "defeito", "problema", "problemas", "erro", "erros", "grosseiro",
+        "grosseira", "despreparado", "despreparada", "frustrante", "fraco",
+        "fraca", "ineficiente", "pior", "reclamação", "demora",
+    },
+    "en": {
+        "terrible", "horrible", "bad", "awful", "worst", "disappointed",
+        "disappointing", "unhappy", "unhelpful", "slow", "broken", "defect",
+        "problem", "problems", "error", "errors", "rude", "poor", "useless",
+        "frustrating", "waste",
+    },
+}
+
+NEGATIONS = {
+    "pt": {"não", "nunca", "nem", "jamais", "nada"},
+    "en": {"not", "never", "no", "nothing", "didn't", "don't", "wasn't", "isn't"},
+}
+
+# Quantas palavras após uma negação têm a polaridade invertida
+_NEGATION_SCOPE = 2
+_WORDS = re.compile(r"[\w']+")
+
+
+def analyze_with_lexicon(text: str, language: str) -> Optional[Tuple[str, str]]:
+    """
+    Classifica o sentimento de um texto usando o léxico do idioma.
+
+    Args:
+        text (str): Texto a ser analisado
+        language (str): Código do idioma ("pt", "en")
+
+    Returns:
+        Optional[Tuple[str, str]]: (sentimento, confiança) ou None se o idioma
+            não tiver léxico ou nenhuma palavra de sentimento for encontrada
+    """
+    positive_words = POSITIVE_WORDS.get(language)
+    if positive_words is None:
+        return None
+    negative_words = NEGATIVE_WORDS[language]
+    negations = NEGATIONS[language]
+
+    positive = negative = 0
+    negated_until = -1
+    for index, word in enumerate(_WORDS.findall(text.lower())):
+        if word in negations:
+            negated_until = index + _NEGATION_SCOPE
+            continue
+
+        polarity = 1 if word in positive_words else -1 if word in negative_words else 0
+        if polarity and index <= negated_until:
+            polarity = -polarity
+        if polarity > 0:
+            positive += 1
+        elif polarity < 0:
+            negative += 1
+
+    hits = positive + negative
+    if hits == 0:
+        return None
+
+    score = (positive - negative) / hits
+    if score > 0.2:
+        sentiment = "positiva"
+    elif score < -0.2:
+        sentiment = "negativa"
+    else:
+        sentiment = "neutra"
+
+    # Confiança limitada: o léxico é uma camada de fallback
+    confidence = min(0.85, 0.5 + 0.35 * abs(score) * min(hits, 3) / 3)
+    return sentiment, f"{confidence:.2f}"
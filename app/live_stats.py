@@ -0,0 +1,379 @@
+"""
+Contadores de sentimento em janelas deslizantes (últimos 15 min / 1 h / 24 h).
+
+Um buffer circular com um balde por minuto (× sentimento) cobre a maior
+janela. Cada janela mantém o total corrente, somando cada classificação e
+subtraindo os baldes que saem dela quando o minuto avança; a consulta é O(1)
+e não acessa o banco. Na inicialização os baldes são preenchidos a partir do
+banco (uma consulta agregada por minuto).
+
+Com vários workers (`LLM_BUDGET_DIR` definido, como no orçamento do LLM), os
+baldes ficam em um arquivo compartilhado protegido por `flock`
+(`SharedSlidingWindowCounters`): todos os workers somam no mesmo balde e
+qualquer um deles responde pelo tráfego da API inteira. O aquecimento a
+partir do banco é feito uma única vez, pelo primeiro worker a iniciar; os
+demais aguardam o fim da carga antes de contar.
+"""
+import calendar
+import logging
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models import Review, engine
+
+logger = logging.getLogger(__name__)
+
+SENTIMENTS = ("positiva", "negativa", "neutra")
+_INDEX = {sentiment: index for index, sentiment in enumerate(SENTIMENTS)}
+
+
+def _epoch_minute(value: datetime) -> int:
+    """Minuto (desde a época) de um datetime UTC sem fuso."""
+    return calendar.timegm(value.utctimetuple()) // 60
+
+
+def window_label(minutes: int) -> str:
+    """Rótulo da janela: 15m, 1h, 24h..."""
+    return f"{minutes // 60}h" if minutes % 60 == 0 else f"{minutes}m"
+
+
+def _windows_payload(totals: Dict[int, List[int]]) -> dict:
+    """Total, contagem e fração por sentimento de cada janela."""
+    windows = {}
+    for window, counts in totals.items():
+        total = sum(counts)
+        windows[window_label(window)] = {
+            "minutes": window,
+            "total": total,
+            "counts": dict(zip(SENTIMENTS, counts)),
+            "shares": {
+                sentiment: round(value / total, 4) if total else 0.0
+                for sentiment, value in zip(SENTIMENTS, counts)
+            },
+        }
+    return windows
+
+
+class SlidingWindowCounters:
+    """
+    Contagens por sentimento nas janelas configuradas.
+
+    Args:
+        windows (Sequence[int]): Tamanhos das janelas em minutos
+    """
+
+    def __init__(self, windows: Sequence[int] = (15, 60, 1440)):
+        self.windows = sorted(set(windows))
+        self.size = self.windows[-1]
+        self._buckets: List[List[int]] = [
+            [0] * len(SENTIMENTS) for _ in range(self.size)
+        ]
+        self._bucket_minute: List[int] = [-1] * self.size
+        self._totals: Dict[int, List[int]] = {
+            w: [0] * len(SENTIMENTS) for w in self.windows
+        }
+        self._current: Optional[int] = None
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def _advance(self, minute: int):
+        """Move o minuto corrente, retirando das janelas os baldes expirados."""
+        if self._current is None or minute - self._current >= self.size:
+            # Primeiro uso ou inatividade maior que a maior janela
+            for bucket in self._buckets:
+                bucket[:] = [0] * len(SENTIMENTS)
+            self._bucket_minute = [-1] * self.size
+            for totals in self._totals.values():
+                totals[:] = [0] * len(SENTIMENTS)
+            self._current = minute
+            self._bucket_minute[minute % self.size] = minute
+            return
+
+        for step in range(self._current + 1, minute + 1):
+            for window, totals in self._totals.items():
+                leaving = step - window
+                slot = leaving % self.size
+                if self._bucket_minute[slot] == leaving:
+                    bucket = self._buckets[slot]
+                    for index in range(len(SENTIMENTS)):
+                        totals[index] -= bucket[index]
+            slot = step % self.size
+            self._buckets[slot] = [0] * len(SENTIMENTS)
+            self._bucket_minute[slot] = step
+        self._current = minute
+
+    def _add(self, minute: int, index: int, count: int):
+        if self._current is None or minute > self._current:
+            self._advance(minute)
+        age = self._current - minute
+        if age >= self.size:
+            return
+        slot = minute % self.size
+        if self._bucket_minute[slot] != minute:
+            # Minuto sem balde: anterior ao início da contagem
+            self._buckets[slot] = [0] * len(SENTIMENTS)
+            self._bucket_minute[slot] = minute
+        self._buckets[slot][index] += count
+        for window, totals in self._totals.items():
+            if age < window:
+                totals[index] += count
+
+    def record(self, sentiment: str, when: Optional[float] = None, count: int = 1):
+        """
+        Conta uma classificação.
+
+        Args:
+            sentiment (str): positiva, negativa ou neutra
+            when (Optional[float]): Timestamp Unix (padrão: agora)
+            count (int): Quantidade
+        """
+        index = _INDEX.get(sentiment)
+        if index is None:
+            return
+        minute = int((time.time() if when is None else when) // 60)
+        with self._lock:
+            self._add(minute, index, count)
+
+    def load(self, rows: Iterable):
+        """Soma linhas agregadas (minuto: datetime, sentimento, quantidade)."""
+        with self._lock:
+            for minute, sentiment, count in rows:
+                index = _INDEX.get(sentiment)
+                if index is not None and minute is not None:
+                    self._add(_epoch_minute(minute), index, count)
+
+    def warm_up(self, fetch: Callable[[], list]) -> int:
+        """
+        Carrega o histórico devolvido por `fetch` (linhas como em `load`).
+
+        Returns:
+            int: Avaliações carregadas
+        """
+        rows = fetch()
+        self.load(rows)
+        self.warmed = True
+        return sum(count for _, _, count in rows)
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        """Contagens de cada janela até agora (O(número de janelas))."""
+        minute = int((time.time() if now is None else now) // 60)
+        with self._lock:
+            if self._current is None or minute > self._current:
+                self._advance(minute)
+            windows = _windows_payload(self._totals)
+        return {"warmed": self.warmed, "shared": False, "windows": windows}
+
+
+# Arquivo compartilhado: cabeçalho (aquecido, número de baldes) seguido de um
+# registro por balde (minuto, contagem de cada sentimento)
+_HEADER = struct.Struct("<qq")
+_BUCKET = struct.Struct("<q" + "q" * len(SENTIMENTS))
+
+
+class SharedSlidingWindowCounters:
+    """
+    Contagens por sentimento compartilhadas entre os workers.
+
+    Mesma interface de `SlidingWindowCounters`, com os baldes por minuto em
+    um arquivo de `directory`: cada classificação atualiza o balde do seu
+    minuto sob `flock` exclusivo, e a consulta lê os baldes (sob `flock`
+    compartilhado) e soma os que estão em cada janela.
+
+    Args:
+        windows (Sequence[int]): Tamanhos das janelas em minutos
+        directory (str): Diretório de estado compartilhado (LLM_BUDGET_DIR)
+    """
+
+    def __init__(self, windows: Sequence[int], directory: str):
+        self.windows = sorted(set(windows))
+        self.size = self.windows[-1]
+        self._path = os.path.join(directory, "live-stats.bin")
+        self._length = _HEADER.size + self.size * _BUCKET.size
+        with self._locked(exclusive=True):
+            pass
+
+    @property
+    def warmed(self) -> bool:
+        """Indica se algum worker já carregou o histórico do banco."""
+        with self._locked(exclusive=False) as fd:
+            header = os.pread(fd, _HEADER.size, 0)
+        return len(header) == _HEADER.size and _HEADER.unpack(header) == (
+            1, self.size
+        )
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """Descritor do arquivo sob `flock`, criando-o se necessário."""
+        import fcntl
+
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            if exclusive:
+                header = os.pread(fd, _HEADER.size, 0)
+                if (
+                    len(header) < _HEADER.size
+                    or _HEADER.unpack(header)[1] != self.size
+                    or os.fstat(fd).st_size != self._length
+                ):
+                    # Arquivo novo ou de outra configuração de janelas
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self._length)
+                    os.pwrite(fd, _HEADER.pack(0, self.size), 0)
+            yield fd
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _add(self, fd: int, minute: int, index: int, count: int):
+        offset = _HEADER.size + (minute % self.size) * _BUCKET.size
+        stored, *counts = _BUCKET.unpack(os.pread(fd, _BUCKET.size, offset))
+        if stored > minute:
+            # Balde já reutilizado por um minuto mais recente
+            return
+        if stored < minute:
+            counts = [0] * len(SENTIMENTS)
+        counts[index] += count
+        os.pwrite(fd, _BUCKET.pack(minute, *counts), offset)
+
+    def record(self, sentiment: str, when: Optional[float] = None, count: int = 1):
+        """Conta uma classificação (ver `SlidingWindowCounters.record`)."""
+        index = _INDEX.get(sentiment)
+        if index is None:
+            return
+        minute = int((time.time() if when is None else when) // 60)
+        with self._locked(exclusive=True) as fd:
+            self._add(fd, minute, index, count)
+
+    def load(self, rows: Iterable):
+        """Soma linhas agregadas (minuto: datetime, sentimento, quantidade)."""
+        with self._locked(exclusive=True) as fd:
+            self._load(fd, rows)
+
+    def _load(self, fd: int, rows: Iterable):
+        for minute, sentiment, count in rows:
+            index = _INDEX.get(sentiment)
+            if index is not None and minute is not None:
+                self._add(fd, _epoch_minute(minute), index, count)
+
+    def warm_up(self, fetch: Callable[[], list]) -> int:
+        """
+        Carrega o histórico de `fetch` se nenhum worker o carregou ainda.
+
+        O `flock` exclusivo é mantido durante a consulta: os demais workers
+        só contam depois da carga, sem somar o mesmo histórico duas vezes.
+
+        Returns:
+            int: Avaliações carregadas (0 se outro worker já carregou)
+        """
+        with self._locked(exclusive=True) as fd:
+            if _HEADER.unpack(os.pread(fd, _HEADER.size, 0))[0]:
+                return 0
+            rows = fetch()
+            self._load(fd, rows)
+            os.pwrite(fd, _HEADER.pack(1, self.size), 0)
+        return sum(count for _, _, count in rows)
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        """Contagens de cada janela até agora, somando todos os workers."""
+        minute = int((time.time() if now is None else now) // 60)
+        with self._locked(exclusive=False) as fd:
+            raw = os.pread(fd, self._length, 0)
+        totals = {w: [0] * len(SENTIMENTS) for w in self.windows}
+        warmed = False
+        if len(raw) == self._length and _HEADER.unpack_from(raw)[1] == self.size:
+            warmed = _HEADER.unpack_from(raw)[0] == 1
+            for stored, *counts in _BUCKET.iter_unpack(raw[_HEADER.size:]):
+                age = minute - stored
+                for window, window_totals in totals.items():
+                    if 0 <= age < window:
+                        for index, value in enumerate(counts):
+                            window_totals[index] += value
+        return {"warmed": warmed, "shared": True, "windows": _windows_payload(totals)}
+
+
+def _minute_column(dialect: str):
+    """Expressão SQL que trunca created_at ao minuto."""
+    if dialect == "postgresql":
+        return func.date_trunc("minute", Review.created_at)
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%d %H:%M:00", Review.created_at)
+    return None
+
+
+def warm_up_enabled() -> bool:
+    """Indica se o aquecimento a partir do banco deve rodar no startup."""
+    return settings.LIVE_STATS_WARMUP
+
+
+def warm_up_live_stats(counters, bind=None) -> int:
+    """
+    Preenche os contadores com as avaliações da maior janela.
+
+    Com contadores compartilhados, apenas o primeiro worker consulta o banco.
+
+    Returns:
+        int: Avaliações carregadas
+    """
+    bind = bind or engine
+    return counters.warm_up(lambda: _history_rows(bind, counters.size))
+
+
+def _history_rows(bind, minutes: int) -> list:
+    """Avaliações dos últimos `minutes` agregadas por minuto e sentimento."""
+    since = datetime.utcnow() - timedelta(minutes=minutes)
+    minute = _minute_column(bind.dialect.name)
+    with bind.connect() as connection:
+        if minute is not None:
+            rows = connection.execute(
+                select(minute, Review.sentiment, func.count())
+                .where(Review.created_at >= since)
+                .group_by(minute, Review.sentiment)
+            ).all()
+        else:
+            rows = [
+                (created_at, sentiment, 1)
+                for created_at, sentiment in connection.execute(
+                    select(Review.created_at, Review.sentiment).where(
+                        Review.created_at >= since
+                    )
+                )
+            ]
+
+    parsed = []
+    for value, sentiment, count in rows:
+        if isinstance(value, str):
+            value = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        parsed.append((value, sentiment, count))
+    return parsed
+
+
+_live_stats = None
+
+
+def get_live_stats():
+    """
+    Contadores deslizantes, criados no primeiro uso.
+
+    Returns:
+        SlidingWindowCounters ou SharedSlidingWindowCounters: Compartilhados
+            entre os workers quando `LLM_BUDGET_DIR` está definido
+    """
+    global _live_stats
+    if _live_stats is None:
+        windows = [
+            int(value) for value in settings.LIVE_STATS_WINDOWS.split(",") if value
+        ]
+        if settings.LLM_BUDGET_DIR:
+            _live_stats = SharedSlidingWindowCounters(windows, settings.LLM_BUDGET_DIR)
+        else:
+            _live_stats = SlidingWindowCounters(windows)
+    return _live_stats
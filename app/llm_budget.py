@@ -0,0 +1,511 @@
+"""
+Orçamento compartilhado de concorrência e taxa para chamadas ao LLM (Groq).
+
+Com um único processo o orçamento é controlado em memória. Quando a API roda
+com vários workers (`python manage.py serve --workers N`), o orçamento passa a
+ser coordenado por arquivos com `flock` em um diretório compartilhado
+(`LLM_BUDGET_DIR`), de modo que todos os workers juntos respeitem o limite de
+concorrência e de requisições por minuto do provedor.
+
+O orçamento tem duas faixas de prioridade. A faixa `interactive` (requisições
+de usuários, padrão) tem uma parte reservada dos slots de concorrência e do
+token bucket (`LLM_INTERACTIVE_SHARE`) e também pode usar o restante; a faixa
+`bulk` (reprocessamentos, tarefas em segundo plano) usa apenas o que não está
+reservado. A faixa vem do contexto (`llm_lane("bulk")`) ou do argumento
+`lane` de `acquire`.
+
+O prazo do cliente (`llm_deadline`) limita a espera por orçamento: uma
+chamada não fica na fila depois que quem a pediu já desistiu. O tempo médio
+de cada chamada e o saldo do token bucket alimentam `estimate_wait`, usado
+pelo controle de admissão (app/admission.py).
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Intervalos de espera (segundos) ao aguardar um slot de concorrência livre
+_SLOT_POLL_MIN = 0.005
+_SLOT_POLL_MAX = 0.05
+# Duração assumida de uma chamada antes da primeira medição (segundos)
+_DEFAULT_SERVICE_TIME = 1.0
+# Peso da última medição na média móvel exponencial da duração das chamadas
+_SERVICE_EWMA_ALPHA = 0.2
+
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+_current_lane: ContextVar[str] = ContextVar("llm_lane", default=INTERACTIVE)
+# Prazo (time.monotonic) de quem pediu a classificação no contexto atual
+_current_deadline: ContextVar[Optional[float]] = ContextVar(
+    "llm_deadline", default=None
+)
+# Contador de chamadas ao LLM do bloco `count_llm_calls` em andamento
+_current_calls: ContextVar[Optional[List[int]]] = ContextVar("llm_calls", default=None)
+
+
+class LLMBudgetTimeout(Exception):
+    """Tempo máximo de espera por orçamento do LLM excedido."""
+
+
+@contextmanager
+def llm_lane(lane: str):
+    """Define a faixa de prioridade das chamadas ao LLM feitas no bloco."""
+    if lane not in LANES:
+        raise ValueError(f"Faixa inválida: {lane}. Disponíveis: {', '.join(LANES)}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def current_lane() -> str:
+    """Faixa de prioridade do contexto atual."""
+    return _current_lane.get()
+
+
+@contextmanager
+def llm_deadline(seconds: Optional[float]):
+    """
+    Limita a espera por orçamento das chamadas feitas no bloco.
+
+    Args:
+        seconds (Optional[float]): Tempo restante até o prazo do cliente
+            (None = apenas LLM_QUEUE_TIMEOUT)
+    """
+    deadline = None if seconds is None else time.monotonic() + seconds
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+@contextmanager
+def count_llm_calls():
+    """
+    Conta as chamadas ao LLM feitas no bloco (inclusive em threads que
+    herdam o contexto, como os trechos de textos longos).
+
+    Yields:
+        List[int]: Lista de um elemento com o número de chamadas
+    """
+    calls = [0]
+    token = _current_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _current_calls.reset(token)
+
+
+class _LaneStats:
+    """Fila e tempos de espera de uma faixa (neste processo)."""
+
+    def __init__(self):
+        self.queued = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_last = 0.0
+        self.service_ewma: Optional[float] = None
+
+    def record_service(self, seconds: float):
+        if self.service_ewma is None:
+            self.service_ewma = seconds
+        else:
+            self.service_ewma += _SERVICE_EWMA_ALPHA * (seconds - self.service_ewma)
+
+    def as_dict(self) -> dict:
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.acquired * 1000, 2)
+            if self.acquired
+            else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+            "wait_last_ms": round(self.wait_last * 1000, 2),
+            "service_ewma_ms": round(self.service_ewma * 1000, 2)
+            if self.service_ewma is not None
+            else None,
+        }
+
+
+class _ThreadSlots:
+    """Slots de concorrência controlados em memória (um único processo)."""
+
+    def __init__(self, size: int):
+        self._locks = [threading.Lock() for _ in range(size)]
+
+    def try_acquire(self, indices: Sequence[int]):
+        for index in indices:
+            if self._locks[index].acquire(blocking=False):
+                return index
+        return None
+
+    def release(self, handle):
+        self._locks[handle].release()
+
+
+class _FileSlots:
+    """Slots de concorrência compartilhados entre processos via `flock`."""
+
+    def __init__(self, size: int, directory: str):
+        self._paths = [os.path.join(directory, f"slot-{i}.lock") for i in range(size)]
+
+    def try_acquire(self, indices: Sequence[int]):
+        import fcntl
+
+        for index in indices:
+            fd = os.open(self._paths[index], os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def release(self, handle):
+        import fcntl
+
+        try:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        finally:
+            os.close(handle)
+
+
+class _ThreadTokenBucket:
+    """Token bucket em memória."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, floor: float = 0.0) -> float:
+        """
+        Consome um token sem deixar o saldo abaixo de `floor`.
+
+        Returns:
+            float: 0 ou o tempo a aguardar antes de tentar de novo
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens - floor >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 + floor - self._tokens) / self.rate
+
+    def available(self) -> float:
+        """Saldo atual de tokens, sem consumir."""
+        with self._lock:
+            elapsed = time.monotonic() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self.rate)
+
+
+class _FileTokenBucket:
+    """Token bucket com estado em arquivo, compartilhado entre processos."""
+
+    def __init__(self, rate_per_second: float, capacity: float, directory: str):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._path = os.path.join(directory, "rate.state")
+        self._lock = threading.Lock()
+
+    def take(self, floor: float = 0.0) -> float:
+        import fcntl
+
+        with self._lock:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.pread(fd, 256, 0)
+                now = time.time()
+                try:
+                    state = json.loads(raw) if raw else {}
+                except ValueError:
+                    state = {}
+                tokens = state.get("tokens", self.capacity)
+                updated = state.get("updated", now)
+                refill = max(0.0, now - updated) * self.rate
+                tokens = min(self.capacity, tokens + refill)
+
+                wait = 0.0
+                if tokens - floor >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 + floor - tokens) / self.rate
+
+                data = json.dumps({"tokens": tokens, "updated": now}).encode()
+                os.ftruncate(fd, 0)
+                os.pwrite(fd, data, 0)
+                return wait
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def available(self) -> float:
+        """Saldo atual de tokens (de todos os workers), sem consumir."""
+        import fcntl
+
+        fd = os.open(self._path, os.O_RDONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            raw = os.pread(fd, 256, 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        try:
+            state = json.loads(raw) if raw else {}
+        except ValueError:
+            state = {}
+        now = time.time()
+        tokens = state.get("tokens", self.capacity)
+        updated = state.get("updated", now)
+        return min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+
+
+class LLMBudget:
+    """
+    Limita a concorrência e a taxa de chamadas ao LLM.
+
+    Args:
+        max_concurrency (int): Chamadas simultâneas permitidas (0 = sem limite)
+        requests_per_minute (float): Requisições por minuto (0 = sem limite)
+        state_dir (Optional[str]): Diretório compartilhado entre processos;
+            se None, o orçamento vale apenas para o processo atual
+        interactive_share (Optional[float]): Fração da concorrência e da
+            rajada reservada à faixa interativa (padrão: LLM_INTERACTIVE_SHARE)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: float = 0,
+        state_dir: Optional[str] = None,
+        interactive_share: Optional[float] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.state_dir = state_dir
+        if interactive_share is None:
+            interactive_share = settings.LLM_INTERACTIVE_SHARE
+        self.interactive_share = min(1.0, max(0.0, interactive_share))
+
+        # Slots reservados: a faixa bulk sempre fica com pelo menos um
+        self.reserved_slots = 0
+        if max_concurrency > 1:
+            self.reserved_slots = min(
+                max_concurrency - 1,
+                math.ceil(max_concurrency * self.interactive_share),
+            )
+        self._lane_slots = {
+            INTERACTIVE: list(range(max_concurrency)),
+            BULK: list(range(self.reserved_slots, max_concurrency)),
+        }
+        self._stats: Dict[str, _LaneStats] = {lane: _LaneStats() for lane in LANES}
+        self._stats_lock = threading.Lock()
+
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+
+        self._slots = None
+        if max_concurrency > 0:
+            self._slots = (
+                _FileSlots(max_concurrency, state_dir)
+                if state_dir
+                else _ThreadSlots(max_concurrency)
+            )
+
+        self._bucket = None
+        self._bulk_floor = 0.0
+        if requests_per_minute > 0:
+            rate = requests_per_minute / 60.0
+            capacity = max(1.0, float(settings.GROQ_RATE_BURST or max_concurrency))
+            self._bucket = (
+                _FileTokenBucket(rate, capacity, state_dir)
+                if state_dir
+                else _ThreadTokenBucket(rate, capacity)
+            )
+            # Saldo que a faixa bulk não pode consumir: a faixa interativa
+            # sempre encontra tokens e vence as disputas por reposição
+            self._bulk_floor = min(capacity * self.interactive_share, capacity - 1)
+
+    def _acquire_slot(self, lane: str, deadline: float):
+        indices = self._lane_slots[lane]
+        delay = _SLOT_POLL_MIN
+        while True:
+            handle = self._slots.try_acquire(indices)
+            if handle is not None:
+                return handle
+            if time.monotonic() + delay > deadline:
+                raise LLMBudgetTimeout("Nenhum slot de concorrência do LLM disponível")
+            time.sleep(delay)
+            delay = min(delay * 2, _SLOT_POLL_MAX)
+
+    def _take_token(self, lane: str, deadline: float):
+        floor = self._bulk_floor if lane == BULK else 0.0
+        while True:
+            wait = self._bucket.take(floor)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise LLMBudgetTimeout("Limite de requisições por minuto do LLM")
+            time.sleep(wait)
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None, lane: Optional[str] = None):
+        """
+        Reserva um slot de concorrência e um token de taxa durante o bloco.
+
+        Args:
+            timeout (Optional[float]): Espera máxima em segundos
+            lane (Optional[str]): Faixa de prioridade (padrão: a do contexto)
+
+        Raises:
+            LLMBudgetTimeout: Se o orçamento não ficar disponível a tempo
+        """
+        if timeout is None:
+            timeout = settings.LLM_QUEUE_TIMEOUT
+            deadline = _current_deadline.get()
+            if deadline is not None:
+                timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+        lane = lane or _current_lane.get()
+        stats = self._stats[lane]
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._stats_lock:
+            stats.queued += 1
+        handle = None
+        try:
+            if self._slots:
+                handle = self._acquire_slot(lane, deadline)
+            if self._bucket:
+                self._take_token(lane, deadline)
+        except BaseException:
+            if handle is not None:
+                self._slots.release(handle)
+            with self._stats_lock:
+                stats.queued -= 1
+                stats.timeouts += 1
+            raise
+
+        waited = time.monotonic() - started
+        calls = _current_calls.get()
+        with self._stats_lock:
+            if calls is not None:
+                calls[0] += 1
+            stats.queued -= 1
+            stats.in_flight += 1
+            stats.acquired += 1
+            stats.wait_total += waited
+            stats.wait_last = waited
+            stats.wait_max = max(stats.wait_max, waited)
+        acquired_at = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._stats_lock:
+                stats.in_flight -= 1
+                stats.record_service(time.monotonic() - acquired_at)
+            if handle is not None:
+                self._slots.release(handle)
+
+    def service_time(self, lane: str = INTERACTIVE) -> float:
+        """Duração média (s) de uma chamada da faixa, medida neste processo."""
+        with self._stats_lock:
+            service = self._stats[lane].service_ewma
+            if service is None:
+                # Sem medições na faixa: usa a da outra, se houver
+                service = next(
+                    (s.service_ewma for s in self._stats.values() if s.service_ewma),
+                    None,
+                )
+        return service if service is not None else _DEFAULT_SERVICE_TIME
+
+    def estimate_wait(self, lane: str, ahead: int) -> float:
+        """
+        Espera estimada (s) por orçamento com `ahead` chamadas à frente.
+
+        Considera os slots de concorrência da faixa (com orçamento
+        compartilhado, a fração de um worker entre WORKERS) e o saldo e a
+        reposição do token bucket.
+
+        Args:
+            lane (str): Faixa de prioridade
+            ahead (int): Chamadas deste worker na frente da nova
+
+        Returns:
+            float: Segundos até a nova chamada obter o orçamento
+        """
+        wait = 0.0
+        if self._slots:
+            slots = len(self._lane_slots[lane])
+            if self.state_dir:
+                slots = max(1, slots // max(1, settings.WORKERS))
+            wait = self.service_time(lane) * (ahead // max(1, slots))
+        if self._bucket:
+            floor = self._bulk_floor if lane == BULK else 0.0
+            missing = ahead + 1 - (self._bucket.available() - floor)
+            if missing > 0:
+                wait = max(wait, missing / self._bucket.rate)
+        return wait
+
+    def stats(self) -> dict:
+        """Configuração e estado de cada faixa (neste processo)."""
+        with self._stats_lock:
+            lanes = {lane: stats.as_dict() for lane, stats in self._stats.items()}
+        lanes[INTERACTIVE]["slots"] = self.max_concurrency
+        lanes[BULK]["slots"] = self.max_concurrency - self.reserved_slots
+        return {
+            "max_concurrency": self.max_concurrency,
+            "reserved_interactive_slots": self.reserved_slots,
+            "requests_per_minute": self.requests_per_minute,
+            "interactive_share": self.interactive_share,
+            "lanes": lanes,
+        }
+
+
+_llm_budget: Optional[LLMBudget] = None
+_llm_budget_lock = threading.Lock()
+
+
+def get_llm_budget() -> LLMBudget:
+    """Retorna o orçamento do LLM do processo, criando-o no primeiro uso."""
+    global _llm_budget
+    if _llm_budget is None:
+        with _llm_budget_lock:
+            if _llm_budget is None:
+                _llm_budget = LLMBudget(
+                    max_concurrency=settings.GROQ_MAX_CONCURRENCY,
+                    requests_per_minute=settings.GROQ_REQUESTS_PER_MINUTE,
+                    state_dir=settings.LLM_BUDGET_DIR or None,
+                )
+                logger.info(
+                    f"LLM budget: concurrency={settings.GROQ_MAX_CONCURRENCY}, "
+                    f"rpm={settings.GROQ_REQUESTS_PER_MINUTE}, "
+                    f"shared={'yes' if settings.LLM_BUDGET_DIR else 'no'}"
+                )
+    return _llm_budget
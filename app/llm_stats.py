@@ -0,0 +1,128 @@
+"""
+Estatísticas de uso por modelo do LLM (chamadas, latência e tokens).
+
+Usadas pela avaliação em sombra e pelas camadas de modelos; mantidas em
+memória, por worker.
+"""
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+# Latências mais recentes mantidas por modelo para os percentis
+LATENCY_WINDOW = 2048
+
+
+def _percentile(ordered, fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ModelUsageStats:
+    """Chamadas, erros, latência e tokens de um modelo."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_total = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def add(self, usage: dict, ok: bool):
+        """Registra uma chamada a partir do `usage` de `_analyze_with_llm`."""
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+        if "latency_ms" in usage:
+            self.latency_total += usage["latency_ms"]
+            self.latencies.append(usage["latency_ms"])
+
+    def as_dict(self) -> dict:
+        ordered = sorted(self.latencies)
+        measured = len(ordered)
+        tokens = self.prompt_tokens + self.completion_tokens
+
+        def rounded(value):
+            return round(value, 2) if value is not None else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_ms": {
+                "mean": rounded(self.latency_total / measured) if measured else None,
+                "p50": rounded(_percentile(ordered, 0.50)),
+                "p95": rounded(_percentile(ordered, 0.95)),
+                "max": rounded(ordered[-1]) if ordered else None,
+            },
+            "tokens": {
+                "prompt": self.prompt_tokens,
+                "completion": self.completion_tokens,
+                "per_call": round(tokens / self.calls, 1) if self.calls else 0.0,
+            },
+        }
+
+
+class TierStats:
+    """
+    Uso das camadas de modelos (escalonamento por confiança).
+
+    Para cada modelo registra as chamadas (`ModelUsageStats`), quantas
+    respostas foram aceitas e quantas foram escalonadas por baixa confiança
+    ou por resposta inválida.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: Dict[str, ModelUsageStats] = {}
+        self._outcomes: Dict[str, Dict[str, int]] = {}
+
+    def record(self, model: str, usage: dict, outcome: str):
+        """
+        Registra uma tentativa em uma camada.
+
+        Args:
+            model (str): Modelo da camada
+            usage (dict): Latência e tokens da chamada
+            outcome (str): "accepted", "low_confidence" ou "invalid"
+        """
+        with self._lock:
+            self._usage.setdefault(model, ModelUsageStats()).add(
+                usage, outcome != "invalid"
+            )
+            outcomes = self._outcomes.setdefault(
+                model, {"accepted": 0, "low_confidence": 0, "invalid": 0}
+            )
+            outcomes[outcome] += 1
+
+    def as_dict(self, models) -> dict:
+        """Estatísticas das camadas, na ordem configurada."""
+        with self._lock:
+            served = sum(outcome["accepted"] for outcome in self._outcomes.values())
+            tiers = []
+            for model in models:
+                outcomes = self._outcomes.get(
+                    model, {"accepted": 0, "low_confidence": 0, "invalid": 0}
+                )
+                usage = self._usage.get(model, ModelUsageStats()).as_dict()
+                tiers.append(
+                    {
+                        "model": model,
+                        **outcomes,
+                        "served_share": round(outcomes["accepted"] / served, 4)
+                        if served
+                        else 0.0,
+                        **usage,
+                    }
+                )
+            return {"served": served, "tiers": tiers}
+
+
+_tier_stats = TierStats()
+
+
+def get_tier_stats() -> TierStats:
+    """Estatísticas das camadas de modelos deste processo."""
+    return _tier_stats
@@ -0,0 +1,488 @@
+"""
+Classificador local destilado das classificações do LLM.
+
+A tabela `reviews` guarda os rótulos produzidos pelo LLM (linhas com
+`prompt_version`). `python manage.py train-local` treina com elas uma
+regressão logística multinomial sobre n-gramas de palavras (1 e 2) e o
+idioma, com hashing de features: não há vocabulário a guardar e o tamanho
+do modelo é fixo (`2**bits` × 3 rótulos, em float32).
+
+O artefato fica em `LOCAL_MODEL_DIR`:
+
+- `weights-<versão>.npy`: matriz de pesos, carregada com `mmap_mode="r"`
+  (os workers compartilham as páginas do arquivo pelo cache do sistema);
+- `model.json`: manifesto com a versão, os rótulos, o bias, os dados do
+  treino e o relatório de acurácia contra o LLM na amostra de validação.
+
+O manifesto é substituído atomicamente depois de gravados os pesos, e os
+workers verificam a cada `LOCAL_MODEL_RELOAD_INTERVAL` segundos se ele
+mudou: um novo treino entra em uso sem reiniciar a aplicação.
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.lexicon import analyze_with_lexicon
+from app.models import Review, engine
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - dependência opcional
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("positiva", "negativa", "neutra")
+MANIFEST_NAME = "model.json"
+# Faixas de confiança avaliadas no relatório (cobertura × acurácia)
+REPORT_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.9)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def extract_features(text: str, language: Optional[str] = None) -> List[str]:
+    """Features textuais: palavras, pares de palavras e o idioma."""
+    words = _TOKEN.findall(text.casefold())
+    features = list(words)
+    features.extend(f"{first} {second}" for first, second in zip(words, words[1:]))
+    if language:
+        features.append(f"__lang:{language}")
+    return features
+
+
+def hash_features(
+    texts: Sequence[str],
+    languages: Optional[Sequence[Optional[str]]] = None,
+    bits: int = 18,
+):
+    """
+    Matriz esparsa (formato coordenado) das features com hashing.
+
+    Cada feature vale 1/√n (n = features do texto), aproximando a
+    normalização L2 sem um segundo passe.
+
+    Returns:
+        Tuple[ndarray, ndarray, ndarray]: (linhas, colunas, valores)
+    """
+    mask = (1 << bits) - 1
+    rows: List[int] = []
+    columns: List[int] = []
+    values: List[float] = []
+    for row, text in enumerate(texts):
+        features = extract_features(text, languages[row] if languages else None)
+        if not features:
+            continue
+        weight = 1.0 / len(features) ** 0.5
+        for feature in features:
+            rows.append(row)
+            columns.append(zlib.crc32(feature.encode("utf-8")) & mask)
+            values.append(weight)
+    return (
+        numpy.asarray(rows, dtype=numpy.int32),
+        numpy.asarray(columns, dtype=numpy.int32),
+        numpy.asarray(values, dtype=numpy.float32),
+    )
+
+
+def _scores(weights, bias, rows, columns, values, n_rows: int):
+    """Escores (n_rows × rótulos) de X·W + b com X esparsa."""
+    contributions = weights[columns] * values[:, None]
+    scores = numpy.empty((n_rows, weights.shape[1]), dtype=numpy.float64)
+    for label in range(weights.shape[1]):
+        scores[:, label] = numpy.bincount(
+            rows, weights=contributions[:, label], minlength=n_rows
+        )
+    return scores + bias
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = numpy.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class LocalModel:
+    """
+    Modelo linear carregado de um artefato.
+
+    Args:
+        weights: Matriz (2**bits × rótulos), normalmente um memmap
+        bias: Bias por rótulo
+        manifest (dict): Manifesto do artefato
+    """
+
+    def __init__(self, weights, bias, manifest: dict):
+        self.weights = weights
+        self.bias = numpy.asarray(bias, dtype=numpy.float64)
+        self.manifest = manifest
+        self.version: str = manifest["version"]
+        self.labels: Tuple[str, ...] = tuple(manifest["labels"])
+        self.bits: int = manifest["bits"]
+
+    @classmethod
+    def load(cls, directory: str) -> "LocalModel":
+        """Carrega o artefato de `directory` com os pesos mapeados em memória."""
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as file:
+            manifest = json.load(file)
+        weights_path = os.path.join(directory, manifest["weights"])
+        weights = numpy.load(weights_path, mmap_mode="r")
+        if weights.shape != (1 << manifest["bits"], len(manifest["labels"])):
+            raise ValueError(f"Pesos com formato inesperado: {weights.shape}")
+        return cls(weights, manifest["bias"], manifest)
+
+    def predict_proba(
+        self, texts: Sequence[str], languages: Optional[Sequence[Optional[str]]] = None
+    ):
+        """Probabilidades (textos × rótulos) de um lote, vetorizadas."""
+        rows, columns, values = hash_features(texts, languages, self.bits)
+        scores = _scores(self.weights, self.bias, rows, columns, values, len(texts))
+        return _softmax(scores)
+
+    def predict(
+        self, texts: Sequence[str], languages: Optional[Sequence[Optional[str]]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Classifica um lote de textos.
+
+        Returns:
+            List[Tuple[str, float]]: (sentimento, confiança) por texto
+        """
+        if not texts:
+            return []
+        probabilities = self.predict_proba(texts, languages)
+        best = probabilities.argmax(axis=1)
+        return [
+            (self.labels[label], float(probabilities[row, label]))
+            for row, label in enumerate(best)
+        ]
+
+    def info(self) -> dict:
+        """Versão, dados do treino e resumo do relatório do artefato."""
+        report = self.manifest.get("report", {})
+        return {
+            "version": self.version,
+            "created_at": self.manifest.get("created_at"),
+            "training": self.manifest.get("training"),
+            "accuracy": report.get("accuracy"),
+            "coverage": report.get("coverage"),
+        }
+
+
+def train(
+    texts: Sequence[str],
+    labels: Sequence[str],
+    languages: Optional[Sequence[Optional[str]]] = None,
+    bits: int = 18,
+    epochs: int = 30,
+    learning_rate: float = 0.5,
+    l2: float = 1e-6,
+):
+    """
+    Ajusta a regressão logística multinomial (gradiente completo com Adagrad).
+
+    Returns:
+        Tuple[ndarray, ndarray]: (pesos float32, bias)
+    """
+    n_rows, n_labels, n_features = len(texts), len(LABELS), 1 << bits
+    rows, columns, values = hash_features(texts, languages, bits)
+    targets = numpy.zeros((n_rows, n_labels))
+    targets[numpy.arange(n_rows), [LABELS.index(label) for label in labels]] = 1.0
+    # Pesos por classe inversamente proporcionais à frequência do rótulo
+    counts = targets.sum(axis=0)
+    class_weights = n_rows / (n_labels * numpy.maximum(counts, 1))
+    sample_weights = (targets * class_weights).sum(axis=1, keepdims=True) / n_rows
+
+    weights = numpy.zeros((n_features, n_labels))
+    bias = numpy.zeros(n_labels)
+    weights_acc = numpy.zeros_like(weights)
+    bias_acc = numpy.zeros_like(bias)
+    touched = numpy.unique(columns)
+    for _ in range(epochs):
+        probabilities = _softmax(_scores(weights, bias, rows, columns, values, n_rows))
+        residual = (probabilities - targets) * sample_weights
+        gradient = numpy.empty((touched.size, n_labels))
+        for label in range(n_labels):
+            gradient[:, label] = numpy.bincount(
+                columns, weights=values * residual[rows, label], minlength=n_features
+            )[touched]
+        gradient += l2 * weights[touched]
+        weights_acc[touched] += gradient**2
+        step = gradient / (numpy.sqrt(weights_acc[touched]) + 1e-8)
+        weights[touched] -= learning_rate * step
+        bias_gradient = residual.sum(axis=0)
+        bias_acc += bias_gradient**2
+        bias -= learning_rate * bias_gradient / (numpy.sqrt(bias_acc) + 1e-8)
+    return weights.astype(numpy.float32), bias
+
+
+def accuracy_report(
+    predictions: Sequence[Tuple[str, float]],
+    expected: Sequence[str],
+    baseline: Optional[Sequence[str]] = None,
+) -> dict:
+    """
+    Relatório de concordância com os rótulos do LLM.
+
+    Args:
+        predictions: (sentimento, confiança) do modelo local
+        expected: Rótulos do LLM
+        baseline: Rótulos do léxico nas mesmas avaliações (opcional)
+
+    Returns:
+        dict: Acurácia, precisão/recall por rótulo, matriz de confusão
+            (LLM × local) e cobertura/acurácia por faixa de confiança
+    """
+    total = len(expected)
+    hits = [predicted == label for (predicted, _), label in zip(predictions, expected)]
+    confusion = {label: {other: 0 for other in LABELS} for label in LABELS}
+    for (predicted, _), label in zip(predictions, expected):
+        confusion[label][predicted] += 1
+
+    per_label = {}
+    for label in LABELS:
+        true_positive = confusion[label][label]
+        predicted_count = sum(confusion[other][label] for other in LABELS)
+        support = sum(confusion[label].values())
+        per_label[label] = {
+            "precision": round(true_positive / predicted_count, 4)
+            if predicted_count
+            else None,
+            "recall": round(true_positive / support, 4) if support else None,
+            "support": support,
+        }
+
+    coverage = {}
+    for threshold in REPORT_THRESHOLDS:
+        selected = [
+            hit
+            for hit, (_, confidence) in zip(hits, predictions)
+            if confidence >= threshold
+        ]
+        coverage[f"{threshold:.1f}"] = {
+            "share": round(len(selected) / total, 4) if total else 0.0,
+            "accuracy": round(sum(selected) / len(selected), 4) if selected else None,
+        }
+
+    report = {
+        "samples": total,
+        "accuracy": round(sum(hits) / total, 4) if total else None,
+        "per_label": per_label,
+        "confusion": confusion,
+        "coverage": coverage,
+    }
+    if baseline is not None:
+        agreed = sum(predicted == label for predicted, label in zip(baseline, expected))
+        report["lexicon_accuracy"] = round(agreed / total, 4) if total else None
+    return report
+
+
+def _in_holdout(review_id: int, holdout: float) -> bool:
+    # Divisão determinística por id: a mesma avaliação cai sempre no mesmo lado
+    return (review_id * 2654435761) % 1000 < holdout * 1000
+
+
+def load_training_data(bind=None, limit: Optional[int] = None) -> Iterable[tuple]:
+    """
+    Avaliações classificadas pelo LLM, das mais recentes às mais antigas.
+
+    Yields:
+        Tuple[int, str, Optional[str], str]: (id, texto, idioma, sentimento)
+    """
+    query = (
+        select(Review.id, Review.review_text, Review.language, Review.sentiment)
+        .where(Review.prompt_version.is_not(None), Review.sentiment.in_(LABELS))
+        .order_by(Review.id.desc())
+    )
+    if limit:
+        query = query.limit(limit)
+    with (bind or engine).connect() as connection:
+        rows = connection.execute(
+            query, execution_options={"stream_results": True, "yield_per": 5000}
+        )
+        yield from rows
+
+
+def _publish(directory: str, weights, manifest: dict):
+    """Grava os pesos e troca o manifesto atomicamente (hot-swap)."""
+    os.makedirs(directory, exist_ok=True)
+    weights_path = os.path.join(directory, manifest["weights"])
+    with tempfile.NamedTemporaryFile(
+        dir=directory, suffix=".npy", delete=False
+    ) as file:
+        numpy.save(file, weights)
+    os.replace(file.name, weights_path)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, suffix=".json", delete=False, encoding="utf-8"
+    ) as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    os.replace(file.name, os.path.join(directory, MANIFEST_NAME))
+
+    # Mantém o artefato anterior: workers ainda podem estar abrindo-o
+    previous = sorted(
+        (name for name in os.listdir(directory) if name.startswith("weights-")),
+        key=lambda name: os.path.getmtime(os.path.join(directory, name)),
+    )
+    for name in previous[:-2]:
+        os.remove(os.path.join(directory, name))
+
+
+def train_local_model(
+    output_dir: Optional[str] = None,
+    bind=None,
+    limit: Optional[int] = None,
+    holdout: float = 0.2,
+    bits: int = 18,
+    epochs: int = 30,
+    min_samples: int = 50,
+) -> dict:
+    """
+    Treina o modelo local com os rótulos do LLM e publica o artefato.
+
+    Args:
+        output_dir (Optional[str]): Diretório do artefato (padrão: LOCAL_MODEL_DIR)
+        bind: Engine do banco (padrão: a da aplicação)
+        limit (Optional[int]): Máximo de avaliações (as mais recentes)
+        holdout (float): Fração reservada para o relatório de acurácia
+        bits (int): log2 do número de features
+        epochs (int): Passes de gradiente
+        min_samples (int): Mínimo de avaliações de treino
+
+    Returns:
+        dict: Manifesto do artefato publicado (inclui o relatório)
+
+    Raises:
+        RuntimeError: Sem NumPy ou com avaliações insuficientes
+    """
+    if numpy is None:
+        raise RuntimeError("O modelo local requer o pacote numpy")
+    output_dir = output_dir or settings.LOCAL_MODEL_DIR
+    train_set: Tuple[list, list, list] = ([], [], [])
+    test_set: Tuple[list, list, list] = ([], [], [])
+    for review_id, text, language, sentiment in load_training_data(bind, limit):
+        target = test_set if _in_holdout(review_id, holdout) else train_set
+        target[0].append(text)
+        target[1].append(language)
+        target[2].append(sentiment)
+    if len(train_set[0]) < min_samples:
+        raise RuntimeError(
+            f"Avaliações classificadas pelo LLM insuficientes: {len(train_set[0])} "
+            f"(mínimo {min_samples})"
+        )
+
+    started = time.perf_counter()
+    texts, languages, labels = train_set
+    weights, bias = train(texts, labels, languages, bits=bits, epochs=epochs)
+    elapsed = time.perf_counter() - started
+
+    created_at = datetime.utcnow()
+    version = f"local-{created_at:%Y%m%d%H%M%S}"
+    manifest = {
+        "version": version,
+        "created_at": created_at.isoformat(timespec="seconds") + "Z",
+        "labels": list(LABELS),
+        "bits": bits,
+        "weights": f"weights-{version}.npy",
+        "bias": [float(value) for value in bias],
+        "training": {
+            "samples": len(train_set[0]),
+            "holdout": len(test_set[0]),
+            "epochs": epochs,
+            "seconds": round(elapsed, 2),
+            "label_counts": {label: train_set[2].count(label) for label in LABELS},
+        },
+    }
+    model = LocalModel(weights, bias, manifest)
+    baseline = [
+        (analyze_with_lexicon(text, language) or ("neutra",))[0]
+        for text, language in zip(test_set[0], test_set[1])
+    ]
+    manifest["report"] = accuracy_report(
+        model.predict(test_set[0], test_set[1]), test_set[2], baseline
+    )
+    _publish(output_dir, weights, manifest)
+    logger.info(f"Local model {version} published to {output_dir}")
+    return manifest
+
+
+class LocalModelLoader:
+    """
+    Mantém o modelo local carregado e o troca quando o manifesto muda.
+
+    Args:
+        directory (str): Diretório do artefato
+        reload_interval (float): Intervalo (s) entre verificações do manifesto
+    """
+
+    def __init__(self, directory: str, reload_interval: float = 5.0):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._model: Optional[LocalModel] = None
+        self._signature = None
+        self._checked_at = float("-inf")
+
+    def _manifest_signature(self):
+        try:
+            stat = os.stat(os.path.join(self.directory, MANIFEST_NAME))
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def current(self) -> Optional[LocalModel]:
+        """Modelo em uso (None se não houver artefato)."""
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return self._model
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.reload_interval:
+                return self._model
+            signature = self._manifest_signature()
+            if signature != self._signature:
+                if signature is None:
+                    self._model = None
+                else:
+                    try:
+                        self._model = LocalModel.load(self.directory)
+                        logger.info(f"Local model loaded: {self._model.version}")
+                    except (OSError, ValueError, KeyError) as e:
+                        # Mantém o modelo anterior se o novo artefato for inválido
+                        logger.error(f"Failed to load local model: {e}")
+                self._signature = signature
+            self._checked_at = time.monotonic()
+        return self._model
+
+
+_local_model_loader: Optional[LocalModelLoader] = None
+_local_model_loader_lock = threading.Lock()
+
+
+def get_local_model() -> Optional[LocalModel]:
+    """Modelo local do worker (None sem NumPy, sem artefato ou desabilitado)."""
+    global _local_model_loader
+    if numpy is None or not settings.LOCAL_MODEL_DIR:
+        return None
+    if _local_model_loader is None:
+        with _local_model_loader_lock:
+            if _local_model_loader is None:
+                _local_model_loader = LocalModelLoader(
+                    settings.LOCAL_MODEL_DIR, settings.LOCAL_MODEL_RELOAD_INTERVAL
+                )
+    return _local_model_loader.current()
+
+
+def model_report(model: Optional[LocalModel]) -> Dict[str, object]:
+    """Resumo do modelo local para `GET /llm/tiers`."""
+    return {
+        "accept_confidence": settings.LOCAL_MODEL_ACCEPT_CONFIDENCE,
+        "min_confidence": settings.LOCAL_MODEL_MIN_CONFIDENCE,
+        "model": model.info() if model else None,
+    }
@@ -1,12 +1,53 @@
 """
 Aplicação principal FastAPI.
 """
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
 
+from app.admission import get_admission_controller
+from app.compression import add_compression_middleware
 from app.config import settings
-from app.models import create_tables
-from app.routes import router
+from app.live_stats import get_live_stats, warm_up_enabled, warm_up_live_stats
+from app.models import get_db, migrate, warm_up_pool
+from app.rate_limit import release_rate_limiter
+from app.responses import get_default_response_class
+from app.routes import get_sentiment_analyzer, router
+from app.sentiment_service import SentimentAnalyzer
+from app.timing import add_timing_middleware
+from app.write_behind import start_write_behind, stop_write_behind
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida da aplicação (startup/shutdown)."""
+    # A criação do schema é um passo explícito (`python manage.py migrate`);
+    # AUTO_MIGRATE existe apenas para ambientes de desenvolvimento.
+    if settings.AUTO_MIGRATE:
+        await run_in_threadpool(migrate)
+    if settings.WRITE_BEHIND_ENABLED:
+        # Reprocessa spools de quedas anteriores antes de aceitar requisições
+        await run_in_threadpool(start_write_behind)
+    if warm_up_enabled():
+        try:
+            loaded = await run_in_threadpool(warm_up_live_stats, get_live_stats())
+            logger.info(f"Live stats warmed with {loaded} reviews")
+        except Exception as e:
+            # Sem o schema ou o banco, os contadores começam vazios
+            logger.warning(f"Live stats warm-up failed: {e}")
+    yield
+    # Reservas de cota não consumidas voltam para os outros workers
+    await run_in_threadpool(release_rate_limiter)
+    if settings.WRITE_BEHIND_ENABLED:
+        await run_in_threadpool(stop_write_behind)
+
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -15,6 +56,8 @@ app = FastAPI(
     version=settings.API_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=get_default_response_class(),
 )
 
 # Configurar CORS
@@ -24,18 +67,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Compressão das respostas (dentro do timing: o access log registra os bytes
+# efetivamente enviados)
+add_compression_middleware(app)
+# Tempos por fase (registrado por último: envolve os demais middlewares)
+add_timing_middleware(app)
 
 # Incluir rotas
 app.include_router(router, prefix="/api/v1", tags=["reviews"])
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Evento executado na inicialização da aplicação."""
-    create_tables()
-
-
 @app.get("/")
 async def root():
     """Endpoint raiz da API."""
@@ -53,9 +96,47 @@ async def health_check():
     return {"status": "healthy", "message": "API está funcionando corretamente"}
 
 
-if __name__ == "__main__":
-    import uvicorn
+@app.get("/ready")
+async def readiness_check(
+    db: Session = Depends(get_db),
+    sentiment_analyzer: SentimentAnalyzer = Depends(get_sentiment_analyzer),
+):
+    """
+    Endpoint de prontidão e pré-aquecimento.
 
-    uvicorn.run(
-        "app.main:app", host=settings.HOST, port=settings.PORT, reload=settings.DEBUG
+    Abre conexões no pool do banco e prepara o cliente LLM, para que a
+    primeira requisição real não pague o custo de inicialização. Responde 503
+    também quando o worker está saturado (espera estimada pelo LLM acima de
+    ADMISSION_READY_MAX_WAIT), para o balanceador desviar o tráfego.
+    """
+    checks = {}
+
+    try:
+        await run_in_threadpool(
+            warm_up_pool, db.get_bind(), settings.DB_POOL_WARM_CONNECTIONS
+        )
+        checks["database"] = "ok"
+    except Exception as e:
+        logger.error(f"Database warmup failed: {e}")
+        checks["database"] = "error"
+
+    llm_ready = await run_in_threadpool(sentiment_analyzer.warmup)
+    checks["llm"] = "ok" if llm_ready else "error"
+
+    content = {"checks": checks}
+    admission = get_admission_controller()
+    if admission is not None and sentiment_analyzer.use_llm:
+        content["admission"] = admission.stats()
+        checks["capacity"] = "saturated" if content["admission"]["saturated"] else "ok"
+
+    ready = all(status == "ok" for status in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", **content},
     )
+
+
+if __name__ == "__main__":
+    from app.server import serve
+
+    serve(workers=settings.WORKERS)
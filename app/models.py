@@ -2,9 +2,21 @@
 Modelos de dados da aplicação.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, create_engine
+from sqlalchemy import (
+    Column,
+    Date,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    DateTime,
+    Text,
+    create_engine,
+    inspect,
+    text,
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import deferred, sessionmaker
 from app.config import settings
 
 Base = declarative_base()
@@ -17,10 +29,24 @@ class Review(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     customer_name = Column(String(255), nullable=False)
-    review_text = Column(Text, nullable=False)
+    # Texto potencialmente grande: carregado apenas quando acessado
+    review_text = deferred(Column(Text, nullable=False))
     sentiment = Column(String(50), nullable=False)  # positiva, negativa, neutra
     confidence_score = Column(String(50), nullable=True)
+    language = Column(String(8), nullable=True, index=True)  # pt, en, ...
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Modelo (ex.: nome do modelo Groq, "lexicon") e versão do prompt que
+    # produziram o sentimento; linhas desatualizadas são reclassificadas pelo
+    # `python manage.py backfill`
+    model_version = Column(String(100), nullable=True)
+    prompt_version = Column(String(32), nullable=True)
+    # Cabeçalho Idempotency-Key do POST que criou a avaliação
+    idempotency_key = Column(String(255), nullable=True, unique=True, index=True)
+
+    __table_args__ = (
+        # Avaliações de um cliente, das mais recentes às mais antigas
+        Index("ix_reviews_customer_name_id", "customer_name", "id"),
+    )
 
     def __repr__(self):
         return (
@@ -29,6 +55,56 @@ class Review(Base):
         )
 
 
+class IdempotencyKey(Base):
+    """
+    Chaves de idempotência do POST /reviews e a resposta original.
+
+    A chave primária garante a unicidade em todos os workers, inclusive com a
+    tabela `reviews` particionada (onde não há índice único em
+    `idempotency_key`) e no modo write-behind, em que a chave é reservada
+    antes de a avaliação chegar ao banco.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    review_id = Column(Integer, nullable=False)
+    # request_fingerprint(customer_name, review_text) da requisição original
+    fingerprint = Column(String(64), nullable=False)
+    sentiment = Column(String(50), nullable=False)
+    confidence_score = Column(String(50), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class DailyRollup(Base):
+    """
+    Resumo diário das avaliações por idioma e sentimento.
+
+    Guarda a contagem e um sketch HyperLogLog dos clientes distintos do dia,
+    gerados pelo `python manage.py rollup` (ver app/rollups.py).
+    """
+
+    __tablename__ = "review_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    language = Column(String(8), primary_key=True)
+    sentiment = Column(String(50), primary_key=True)
+    review_count = Column(Integer, nullable=False)
+    customers_hll = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ApiKeyUsage(Base):
+    """Classificações consumidas da cota diária de cada cliente (API key)."""
+
+    __tablename__ = "api_key_usage"
+
+    client = Column(String(100), primary_key=True)
+    day = Column(Date, primary_key=True)
+    used = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
 # Configuração do banco de dados
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -46,3 +122,65 @@ def get_db():
 def create_tables():
     """Cria as tabelas no banco de dados."""
     Base.metadata.create_all(bind=engine)
+
+
+def migrate(bind=None):
+    """
+    Cria ou atualiza o schema do banco de dados.
+
+    Além de criar tabelas inexistentes, adiciona colunas e índices novos dos
+    modelos a tabelas já existentes. Não remove nem altera colunas.
+
+    Args:
+        bind: Engine a ser migrada (padrão: engine da aplicação)
+
+    Returns:
+        List[str]: Descrição das alterações aplicadas
+    """
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+
+    changes = []
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {table.name} "
+                        f"ADD COLUMN {column.name} {column_type}"
+                    )
+                )
+                changes.append(f"{table.name}.{column.name}")
+
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=connection)
+                    changes.append(f"index {index.name}")
+
+    return changes
+
+
+def warm_up_pool(bind=None, connections: int = 1):
+    """
+    Abre conexões no pool do banco antecipadamente.
+
+    Args:
+        bind: Engine cujo pool será aquecido (padrão: engine da aplicação)
+        connections (int): Número de conexões a abrir simultaneamente
+    """
+    bind = bind or engine
+    opened = []
+    try:
+        for _ in range(max(1, connections)):
+            connection = bind.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in opened:
+            connection.close()
@@ -0,0 +1,505 @@
+"""
+Identificação por API key, limite de taxa e cota diária por cliente.
+
+Com `API_KEYS` definido, toda rota de `/api/v1` exige o cabeçalho
+`X-API-Key` (401 sem uma chave válida). As classificações
+(`POST /reviews`), que consomem o orçamento do Groq, passam ainda por:
+
+- um token bucket por cliente (`req_por_minuto` e rajada `API_KEY_BURST`),
+  em memória; com vários workers, cada um aplica a sua fração do limite;
+- uma cota diária (dia UTC). Em memória (padrão), com vários workers cada um
+  conta a sua fração `1/WORKERS` da cota, como no limite por minuto. Com
+  `API_KEY_QUOTA_STORE=database` a cota é compartilhada pelos workers
+  através da tabela `api_key_usage` (SQLite ou PostgreSQL): cada worker
+  reserva até `API_KEY_QUOTA_LEASE` classificações por vez e as consome em
+  memória, indo ao banco só quando a reserva acaba. Há no máximo uma reserva
+  em andamento por cliente em cada worker, e as unidades não consumidas são
+  devolvidas no shutdown (numa queda, elas se perdem até a virada do dia).
+
+A verificação (`enforce_rate_limit`) é feita pela rota depois da resposta
+de idempotência e do controle de admissão: repetições com a mesma
+`Idempotency-Key` e requisições recusadas com 503 não consomem o limite nem
+a cota.
+
+Requisições recusadas recebem 429 com `Retry-After` e os cabeçalhos
+`X-RateLimit-*` / `X-Quota-*`, também enviados nas aceitas. As verificações
+rodam no event loop; no caminho comum (sem ir ao banco) custam poucos
+microssegundos.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import date, datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.models import ApiKeyUsage, engine
+
+logger = logging.getLogger(__name__)
+
+API_KEY_HEADER = "X-API-Key"
+
+
+class ApiClient(NamedTuple):
+    """Cliente identificado por uma API key e seus limites."""
+
+    name: str
+    rate_per_minute: float
+    burst: float
+    daily_quota: int  # 0 = sem cota
+
+
+class RateLimitResult(NamedTuple):
+    """Resultado da verificação de uma classificação."""
+
+    allowed: bool
+    headers: Dict[str, str]
+    detail: str = ""
+
+
+def hash_api_key(key: str) -> str:
+    """Hash da chave: as chaves em si não ficam em memória nem em logs."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def parse_api_keys(
+    spec: str,
+    rate_per_minute: float = 60,
+    burst: float = 10,
+    daily_quota: int = 0,
+) -> Dict[str, ApiClient]:
+    """
+    Lê a configuração de API keys.
+
+    Args:
+        spec (str): Entradas "nome:chave[:req_por_minuto[:cota_diária]]"
+            separadas por vírgula
+        rate_per_minute (float): Limite padrão de classificações por minuto
+        burst (float): Rajada padrão do token bucket
+        daily_quota (int): Cota diária padrão (0 = sem cota)
+
+    Returns:
+        Dict[str, ApiClient]: Clientes indexados pelo hash da chave
+
+    Raises:
+        ValueError: Se alguma entrada for inválida
+    """
+    clients = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = entry.split(":")
+        if len(parts) < 2 or len(parts) > 4 or not parts[0] or not parts[1]:
+            raise ValueError(
+                f"API key inválida: {parts[0]!r} (use nome:chave[:rpm[:cota]])"
+            )
+        rate = float(parts[2]) if len(parts) > 2 and parts[2] else rate_per_minute
+        quota = int(parts[3]) if len(parts) > 3 and parts[3] else daily_quota
+        clients[hash_api_key(parts[1])] = ApiClient(parts[0], rate, burst, quota)
+    return clients
+
+
+def _seconds_until_midnight(now: float) -> int:
+    """Segundos até o início do próximo dia UTC (renovação da cota)."""
+    return max(1, math.ceil(86400 - now % 86400))
+
+
+class MemoryQuotaStore:
+    """Cotas contadas em memória (válidas para um único worker)."""
+
+    shared = False
+
+    def __init__(self):
+        self._used: Dict[Tuple[str, date], int] = {}
+
+    def lease(
+        self, client: str, day: date, amount: int, quota: int
+    ) -> Tuple[int, int]:
+        """
+        Reserva até `amount` unidades da cota do dia.
+
+        Returns:
+            Tuple[int, int]: (unidades concedidas, total usado no dia)
+        """
+        key = (client, day)
+        used = self._used.get(key, 0)
+        granted = max(0, min(amount, quota - used))
+        used += granted
+        self._used[key] = used
+        if len(self._used) > 10000:
+            # Descarta contagens de dias anteriores
+            self._used = {k: v for k, v in self._used.items() if k[1] >= day}
+        return granted, used
+
+    def release(self, client: str, day: date, amount: int) -> None:
+        """Devolve `amount` unidades reservadas e não consumidas."""
+        key = (client, day)
+        if key in self._used:
+            self._used[key] = max(0, self._used[key] - amount)
+
+
+class DatabaseQuotaStore:
+    """
+    Cotas compartilhadas pelos workers em uma tabela (SQLite ou PostgreSQL).
+
+    As reservas usam compare-and-swap no contador do dia (UPDATE condicionado
+    ao valor lido), sem depender de locks específicos do banco.
+
+    Args:
+        bind: Engine do banco (padrão: API_KEY_QUOTA_DATABASE_URL ou a da
+            aplicação)
+    """
+
+    shared = True
+
+    def __init__(self, bind=None):
+        if bind is None:
+            url = settings.API_KEY_QUOTA_DATABASE_URL
+            bind = create_engine(url) if url else engine
+        self.bind = bind
+        ApiKeyUsage.__table__.create(bind=bind, checkfirst=True)
+
+    def lease(
+        self, client: str, day: date, amount: int, quota: int
+    ) -> Tuple[int, int]:
+        table = ApiKeyUsage.__table__
+        while True:
+            with self.bind.begin() as connection:
+                used = connection.execute(
+                    select(table.c.used).where(
+                        table.c.client == client, table.c.day == day
+                    )
+                ).scalar()
+                if used is None:
+                    granted = max(0, min(amount, quota))
+                    try:
+                        connection.execute(
+                            insert(table).values(
+                                client=client,
+                                day=day,
+                                used=granted,
+                                updated_at=datetime.utcnow(),
+                            )
+                        )
+                    except IntegrityError:
+                        continue  # outro worker criou o contador: tenta de novo
+                    return granted, granted
+
+                granted = max(0, min(amount, quota - used))
+                if granted == 0:
+                    return 0, used
+                result = connection.execute(
+                    update(table)
+                    .where(
+                        table.c.client == client,
+                        table.c.day == day,
+                        table.c.used == used,
+                    )
+                    .values(used=used + granted, updated_at=datetime.utcnow())
+                )
+                if result.rowcount == 1:
+                    return granted, used + granted
+
+    def release(self, client: str, day: date, amount: int) -> None:
+        """Devolve `amount` unidades reservadas e não consumidas."""
+        table = ApiKeyUsage.__table__
+        with self.bind.begin() as connection:
+            # Decremento atômico: não precisa do compare-and-swap do lease
+            connection.execute(
+                update(table)
+                .where(
+                    table.c.client == client,
+                    table.c.day == day,
+                    table.c.used >= amount,
+                )
+                .values(used=table.c.used - amount, updated_at=datetime.utcnow())
+            )
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class _Lease:
+    __slots__ = ("day", "remaining", "used")
+
+    def __init__(self, day: date):
+        self.day = day
+        self.remaining = 0  # unidades reservadas ainda não consumidas
+        self.used = 0  # total usado no dia na última consulta ao store
+
+
+class RateLimiter:
+    """
+    Limite de taxa e cota diária das classificações de cada cliente.
+
+    Args:
+        clients (Dict[str, ApiClient]): Clientes indexados pelo hash da chave
+        store: MemoryQuotaStore ou DatabaseQuotaStore
+        lease_size (int): Máximo de unidades reservadas por consulta a um store
+            compartilhado
+        workers (int): Workers que dividem o limite de taxa e a cota (a
+            cota restante, com um store compartilhado)
+    """
+
+    def __init__(
+        self, clients: Dict[str, ApiClient], store=None, lease_size=20, workers=1
+    ):
+        self.clients = clients
+        self.store = store or MemoryQuotaStore()
+        self.lease_size = max(1, lease_size) if self.store.shared else 1
+        self.workers = max(1, workers)
+        self._buckets: Dict[str, _Bucket] = {}
+        self._leases: Dict[str, _Lease] = {}
+        # Uma reserva em andamento por cliente: as demais corrotinas esperam
+        # por ela em vez de reservar cada uma o seu lote
+        self._lease_locks: Dict[str, asyncio.Lock] = {}
+
+    def identify(self, api_key: Optional[str]) -> Optional[ApiClient]:
+        """Cliente da chave (None se ausente ou desconhecida)."""
+        if not api_key:
+            return None
+        return self.clients.get(hash_api_key(api_key))
+
+    def _take_token(self, client: ApiClient, now: float) -> Tuple[float, float]:
+        """Consome um token; retorna (espera necessária, tokens restantes)."""
+        rate = client.rate_per_minute / 60.0 / self.workers
+        capacity = max(1.0, client.burst / self.workers)
+        bucket = self._buckets.get(client.name)
+        if bucket is None:
+            bucket = self._buckets[client.name] = _Bucket(capacity, now)
+        bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * rate)
+        bucket.updated = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0, bucket.tokens
+        return (1 - bucket.tokens) / rate if rate > 0 else math.inf, bucket.tokens
+
+    def _lease_amount(self, client: ApiClient, lease: _Lease) -> int:
+        """
+        Tamanho da próxima reserva.
+
+        Limitado à fração deste worker na cota ainda livre, para que um worker
+        não retenha o fim da cota enquanto os outros recusam requisições.
+        """
+        free = client.daily_quota - lease.used
+        return max(1, min(self.lease_size, free // self.workers))
+
+    def _worker_quota(self, client: ApiClient) -> int:
+        """Cota deste worker: a do cliente ou, em memória, a sua fração dela."""
+        if self.store.shared:
+            return client.daily_quota
+        return client.daily_quota // self.workers
+
+    def _lease(self, client: ApiClient, day: date) -> _Lease:
+        lease = self._leases.get(client.name)
+        if lease is None or lease.day != day:
+            lease = self._leases[client.name] = _Lease(day)
+        return lease
+
+    async def _take_quota(self, client: ApiClient, now: float) -> Tuple[bool, int]:
+        """Consome uma unidade da cota; retorna (concedida, restante no dia)."""
+        day = datetime.utcfromtimestamp(now).date()
+        lease = self._lease(client, day)
+        if lease.remaining <= 0:
+            if self.store.shared:
+                lock = self._lease_locks.setdefault(client.name, asyncio.Lock())
+                async with lock:
+                    # Outra corrotina pode ter renovado a reserva enquanto esta
+                    # esperava
+                    lease = self._lease(client, day)
+                    if lease.remaining <= 0:
+                        granted, used = await run_in_threadpool(
+                            self.store.lease,
+                            client.name,
+                            day,
+                            self._lease_amount(client, lease),
+                            client.daily_quota,
+                        )
+                        lease.remaining += granted
+                        lease.used = used
+            else:
+                granted, used = self.store.lease(
+                    client.name, day, 1, self._worker_quota(client)
+                )
+                lease.remaining += granted
+                lease.used = used
+            if lease.remaining <= 0:
+                return False, 0
+        lease.remaining -= 1
+        remaining = self._worker_quota(client) - lease.used + lease.remaining
+        if not self.store.shared:
+            # Estimativa para a API inteira: o tráfego é dividido entre os workers
+            remaining *= self.workers
+        return True, remaining
+
+    def release_leases(self) -> int:
+        """
+        Devolve ao store as unidades reservadas e não consumidas (shutdown).
+
+        Returns:
+            int: Unidades devolvidas
+        """
+        returned = 0
+        for name, lease in list(self._leases.items()):
+            if lease.remaining > 0:
+                try:
+                    self.store.release(name, lease.day, lease.remaining)
+                except Exception as e:
+                    logger.warning(f"Could not release quota lease of {name}: {e}")
+                    continue
+                returned += lease.remaining
+                lease.used -= lease.remaining
+                lease.remaining = 0
+        return returned
+
+    async def check(self, client: ApiClient) -> RateLimitResult:
+        """
+        Verifica (e consome) uma classificação do cliente.
+
+        Returns:
+            RateLimitResult: Permitida ou não, com os cabeçalhos de limite
+        """
+        now = time.time()
+        wait, tokens = self._take_token(client, now)
+        headers = {
+            "X-RateLimit-Limit": f"{client.rate_per_minute:g}",
+            "X-RateLimit-Remaining": str(int(tokens)),
+        }
+        if wait > 0:
+            retry_after = 60 if math.isinf(wait) else max(1, math.ceil(wait))
+            headers["Retry-After"] = str(retry_after)
+            if client.daily_quota:
+                headers["X-Quota-Limit"] = str(client.daily_quota)
+            return RateLimitResult(
+                False, headers, f"Limite de {client.rate_per_minute:g} classificações "
+                "por minuto excedido"
+            )
+
+        if not client.daily_quota:
+            return RateLimitResult(True, headers)
+
+        allowed, remaining = await self._take_quota(client, now)
+        reset = _seconds_until_midnight(now)
+        headers["X-Quota-Limit"] = str(client.daily_quota)
+        headers["X-Quota-Remaining"] = str(max(0, remaining))
+        headers["X-Quota-Reset"] = str(reset)
+        if not allowed:
+            headers["Retry-After"] = str(reset)
+            return RateLimitResult(
+                False,
+                headers,
+                f"Cota diária de {client.daily_quota} classificações esgotada",
+            )
+        return RateLimitResult(True, headers)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Limitador do worker (None se nenhuma API key estiver configurada)."""
+    global _rate_limiter
+    if not settings.API_KEYS:
+        return None
+    if _rate_limiter is None:
+        store = (
+            DatabaseQuotaStore()
+            if settings.API_KEY_QUOTA_STORE == "database"
+            else MemoryQuotaStore()
+        )
+        _rate_limiter = RateLimiter(
+            parse_api_keys(
+                settings.API_KEYS,
+                rate_per_minute=settings.API_KEY_RATE_PER_MINUTE,
+                burst=settings.API_KEY_BURST,
+                daily_quota=settings.API_KEY_DAILY_QUOTA,
+            ),
+            store=store,
+            lease_size=settings.API_KEY_QUOTA_LEASE,
+            workers=settings.WORKERS,
+        )
+        logger.info(
+            f"API keys: {len(_rate_limiter.clients)} clients, "
+            f"quota store={settings.API_KEY_QUOTA_STORE}"
+        )
+        if not store.shared and settings.WORKERS > 1:
+            logger.warning(
+                f"Daily quotas are split across {settings.WORKERS} workers; "
+                "use API_KEY_QUOTA_STORE=database for one shared quota"
+            )
+    return _rate_limiter
+
+
+def release_rate_limiter() -> None:
+    """Devolve as reservas de cota do worker (chamado no shutdown)."""
+    if _rate_limiter is not None and _rate_limiter.store.shared:
+        returned = _rate_limiter.release_leases()
+        if returned:
+            logger.info(f"Released {returned} leased quota units")
+
+
+async def identify_client(
+    request: Request,
+    api_key: Optional[str] = Header(None, alias=API_KEY_HEADER),
+) -> Optional[ApiClient]:
+    """
+    Dependency que identifica o cliente pela API key.
+
+    Sem API keys configuradas, a API é aberta e retorna None.
+
+    Raises:
+        HTTPException: 401 se a chave estiver ausente ou for desconhecida
+    """
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return None
+    client = limiter.identify(api_key)
+    if client is None:
+        raise HTTPException(
+            status_code=401,
+            detail=f"{API_KEY_HEADER} ausente ou inválida",
+            headers={"WWW-Authenticate": API_KEY_HEADER},
+        )
+    # Nome do cliente no access log
+    request.state.api_client = client.name
+    return client
+
+
+async def enforce_rate_limit(
+    client: Optional[ApiClient], response: Optional[Response] = None
+):
+    """
+    Aplica o limite de taxa e a cota diária a uma nova classificação.
+
+    Chamada pela rota só quando a classificação vai de fato acontecer (não
+    em repetições idempotentes nem em requisições recusadas pela admissão).
+
+    Args:
+        client (Optional[ApiClient]): Cliente de `identify_client`
+        response (Optional[Response]): Recebe os cabeçalhos de limite
+
+    Raises:
+        HTTPException: 429 com Retry-After e os cabeçalhos de cota
+    """
+    if client is None:
+        return
+    result = await get_rate_limiter().check(client)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429, detail=result.detail, headers=result.headers
+        )
+    if response is not None:
+        response.headers.update(result.headers)
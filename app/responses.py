@@ -0,0 +1,155 @@
+"""
+Classes de resposta e serialização rápida.
+
+O caminho rápido monta as respostas a partir de linhas simples do banco (sem
+objetos ORM nem revalidação Pydantic) e as codifica com orjson quando
+disponível. A classe de resposta padrão é configurável via
+`DEFAULT_RESPONSE_CLASS` ("orjson" ou "json").
+
+Com o pacote `msgpack` instalado, as rotas que usam `render_negotiated`
+respondem em MessagePack (`application/msgpack`) quando o cabeçalho `Accept`
+o prefere a JSON: mesmo conteúdo, datas como strings ISO 8601, corpo menor e
+leitura mais rápida no cliente.
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List, Mapping, Type
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from app.config import settings
+from app.timing import phase
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+    ORJSONResponse = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependência opcional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def _json_default(value: Any):
+    """Serializa tipos não suportados pelo encoder JSON padrão."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse com suporte a datetime sem passar pelo jsonable_encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=_json_default,
+        ).encode("utf-8")
+
+
+class MsgPackResponse(Response):
+    """Resposta codificada em MessagePack (datas como strings ISO 8601)."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_json_default, use_bin_type=True)
+
+
+def parse_quality_values(header: str) -> dict:
+    """Valores de um cabeçalho Accept/Accept-Encoding com seus pesos (q)."""
+    qualities = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """
+    Indica se o cabeçalho Accept prefere MessagePack a JSON.
+
+    Exemplo: "application/msgpack" ou "application/msgpack, application/json;q=0.5".
+    """
+    if msgpack is None or "msgpack" not in accept:
+        return False
+    qualities = parse_quality_values(accept)
+    msgpack_quality = max(
+        qualities.get(MSGPACK_MEDIA_TYPE, 0.0),
+        qualities.get("application/x-msgpack", 0.0),
+    )
+    json_quality = qualities.get(
+        "application/json", qualities.get("application/*", qualities.get("*/*", 0.0))
+    )
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def get_default_response_class() -> Type[Response]:
+    """Retorna a classe de resposta configurada em DEFAULT_RESPONSE_CLASS."""
+    if settings.DEFAULT_RESPONSE_CLASS == "orjson" and ORJSONResponse is not None:
+        return ORJSONResponse
+    return FastJSONResponse
+
+
+def rows_to_dicts(rows: Iterable[Mapping]) -> List[dict]:
+    """Converte linhas do banco (RowMapping) em dicionários simples."""
+    return [dict(row) for row in rows]
+
+
+def render_json(content: Any, status_code: int = 200) -> Response:
+    """
+    Cria a resposta JSON diretamente, sem validação do response_model.
+
+    Args:
+        content (Any): Conteúdo já no formato final (dicts, listas, datetimes)
+        status_code (int): Status HTTP
+
+    Returns:
+        Response: Resposta codificada com a classe padrão
+    """
+    response_class = get_default_response_class()
+    with phase("serialization"):
+        return response_class(content=content, status_code=status_code)
+
+
+def render_negotiated(
+    request: Request, content: Any, status_code: int = 200
+) -> Response:
+    """
+    Como `render_json`, mas em MessagePack quando o cliente o prefere.
+
+    Args:
+        request (Request): Requisição (cabeçalho Accept)
+        content (Any): Conteúdo já no formato final (dicts, listas, datetimes)
+        status_code (int): Status HTTP
+
+    Returns:
+        Response: Resposta JSON ou MessagePack, com `Vary: Accept`
+    """
+    if prefers_msgpack(request.headers.get("accept", "")):
+        with phase("serialization"):
+            response = MsgPackResponse(content=content, status_code=status_code)
+    else:
+        response = render_json(content, status_code)
+    response.headers["Vary"] = "Accept"
+    return response
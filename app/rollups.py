@@ -0,0 +1,229 @@
+"""
+Rollups diários com clientes distintos aproximados (HyperLogLog).
+
+O `python manage.py rollup` resume cada dia completo (anterior a hoje) em
+`review_daily_rollups`: uma linha por (dia, idioma, sentimento) com a
+contagem e um sketch HyperLogLog dos clientes distintos. O relatório combina
+os sketches dos dias do período, o que custa o mesmo para uma semana ou um
+ano, e lê as avaliações brutas apenas dos dias ainda sem rollup (normalmente
+só o dia corrente).
+
+Como a união de sketches é idempotente, sobreposições (ex.: um dia com rollup
+e também lido das linhas) não alteram o resultado. Os rollups devem cobrir
+os dias sem lacunas até o último gerado, o que a execução incremental (sem
+`--start-date`) garante. O arquivamento gera os rollups do mês antes de
+remover as linhas, então os meses arquivados continuam contados. Após um
+backfill ou a carga de dados históricos, rode
+`python manage.py rollup --rebuild` para refazer os dias afetados.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select
+
+from app.hll import HyperLogLog, normalize_customer
+from app.language import UNDETERMINED_LANGUAGE
+from app.models import DailyRollup, Review, engine
+
+logger = logging.getLogger(__name__)
+
+SketchKey = Tuple[date, str, str]
+
+
+def _day_bounds(first: date, last: date) -> Tuple[datetime, datetime]:
+    """Intervalo [início do primeiro dia, início do dia seguinte ao último)."""
+    start = datetime.combine(first, datetime.min.time())
+    end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+    return start, end
+
+
+def _day_ranges(days: List[date]) -> List[Tuple[date, date]]:
+    """Agrupa dias ordenados em intervalos contíguos (primeiro, último)."""
+    ranges: List[Tuple[date, date]] = []
+    for day in days:
+        if ranges and ranges[-1][1] + timedelta(days=1) == day:
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def _iter_review_rows(
+    connection, ranges: List[Tuple[date, date]], language=None
+):
+    """Percorre (created_at, idioma, sentimento, cliente) dos intervalos."""
+    conditions = []
+    for first, last in ranges:
+        start, end = _day_bounds(first, last)
+        conditions.append(and_(Review.created_at >= start, Review.created_at < end))
+    statement = select(
+        Review.created_at, Review.language, Review.sentiment, Review.customer_name
+    ).where(or_(*conditions))
+    if language:
+        statement = statement.where(Review.language == language)
+    yield from connection.execute(
+        statement, execution_options={"stream_results": True, "yield_per": 5000}
+    )
+
+
+def build_daily_rollups(
+    bind=None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    rebuild: bool = False,
+) -> Dict[date, int]:
+    """
+    Gera os rollups dos dias completos de um período.
+
+    Sem `rebuild`, dias que já têm rollup são mantidos e, sem `start_date`,
+    o período começa no dia seguinte ao último rollup (execução incremental).
+
+    Args:
+        bind: Engine do banco (padrão: engine da aplicação)
+        start_date (Optional[date]): Primeiro dia (padrão: incremental ou a
+            avaliação mais antiga)
+        end_date (Optional[date]): Último dia (padrão e limite: ontem, UTC)
+        rebuild (bool): Refaz os dias que já têm rollup
+
+    Returns:
+        Dict[date, int]: Avaliações resumidas por dia gerado
+    """
+    bind = bind or engine
+    yesterday = datetime.utcnow().date() - timedelta(days=1)
+    end_date = min(end_date or yesterday, yesterday)
+
+    with bind.connect() as connection:
+        if start_date is None:
+            last_rollup = None
+            if not rebuild:
+                last_rollup = connection.execute(
+                    select(func.max(DailyRollup.day))
+                ).scalar()
+            if last_rollup is not None:
+                start_date = last_rollup + timedelta(days=1)
+            else:
+                oldest = connection.execute(
+                    select(func.min(Review.created_at))
+                ).scalar()
+                if oldest is None:
+                    return {}
+                start_date = oldest.date()
+        if start_date > end_date:
+            return {}
+
+        covered = set()
+        if not rebuild:
+            covered = set(
+                connection.execute(
+                    select(DailyRollup.day)
+                    .where(DailyRollup.day.between(start_date, end_date))
+                    .distinct()
+                ).scalars()
+            )
+
+        sketches: Dict[SketchKey, HyperLogLog] = {}
+        counts: Dict[SketchKey, int] = {}
+        for created_at, language, sentiment, customer in _iter_review_rows(
+            connection, [(start_date, end_date)]
+        ):
+            day = created_at.date()
+            if day in covered:
+                continue
+            key = (day, language or UNDETERMINED_LANGUAGE, sentiment)
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = HyperLogLog()
+            sketch.add(normalize_customer(customer))
+            counts[key] = counts.get(key, 0) + 1
+
+    days: Dict[date, int] = {}
+    for (day, _, _), count in counts.items():
+        days[day] = days.get(day, 0) + count
+    if not days and not rebuild:
+        return days
+
+    with bind.begin() as connection:
+        if rebuild:
+            connection.execute(
+                delete(DailyRollup).where(DailyRollup.day.between(start_date, end_date))
+            )
+        if not days:
+            return days
+        now = datetime.utcnow()
+        connection.execute(
+            DailyRollup.__table__.insert(),
+            [
+                {
+                    "day": day,
+                    "language": language,
+                    "sentiment": sentiment,
+                    "review_count": counts[(day, language, sentiment)],
+                    "customers_hll": sketch.to_bytes(),
+                    "created_at": now,
+                }
+                for (day, language, sentiment), sketch in sketches.items()
+            ],
+        )
+    logger.info(f"Rollups: {len(days)} days from {min(days)} to {max(days)}")
+    return days
+
+
+def distinct_customers(
+    connection,
+    start_date: date,
+    end_date: date,
+    language: Optional[str] = None,
+) -> Tuple[Dict[str, int], int]:
+    """
+    Clientes distintos (aproximados) por sentimento em um período.
+
+    Args:
+        connection: Sessão ou conexão do banco
+        start_date (date): Primeiro dia do período
+        end_date (date): Último dia do período (inclusive)
+        language (Optional[str]): Considera apenas esse idioma
+
+    Returns:
+        Tuple[Dict[str, int], int]: Clientes distintos por sentimento e no total
+    """
+    by_sentiment: Dict[str, HyperLogLog] = {}
+
+    def sketch_for(sentiment: str) -> HyperLogLog:
+        sketch = by_sentiment.get(sentiment)
+        if sketch is None:
+            sketch = by_sentiment[sentiment] = HyperLogLog()
+        return sketch
+
+    statement = select(
+        DailyRollup.day, DailyRollup.sentiment, DailyRollup.customers_hll
+    ).where(DailyRollup.day.between(start_date, end_date))
+    if language:
+        statement = statement.where(DailyRollup.language == language)
+    covered = set()
+    for day, sentiment, data in connection.execute(statement):
+        covered.add(day)
+        sketch_for(sentiment).merge(HyperLogLog.from_bytes(data))
+    # Os rollups são gerados dia a dia até o último: dias anteriores a ele
+    # sem linha não tiveram avaliações (no idioma). Os posteriores (hoje, ou
+    # rollup atrasado) são lidos das linhas brutas.
+    last_rollup = connection.execute(select(func.max(DailyRollup.day))).scalar()
+    missing = [
+        day
+        for day in (
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        )
+        if day not in covered and (last_rollup is None or day > last_rollup)
+    ]
+    if missing:
+        for _, _, sentiment, customer in _iter_review_rows(
+            connection, _day_ranges(missing), language
+        ):
+            sketch_for(sentiment).add(normalize_customer(customer))
+
+    total = HyperLogLog()
+    for sketch in by_sentiment.values():
+        total.merge(sketch)
+    counts = {sentiment: sketch.count() for sentiment, sketch in by_sentiment.items()}
+    return counts, total.count()
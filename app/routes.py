@@ -1,62 +1,270 @@
 """
 Rotas da API para análise de sentimento.
 """
+import base64
+import binascii
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, delete, func, select
 
-from app.models import Review, get_db
+from app.admission import (
+    DEGRADE,
+    DEGRADED_HEADER,
+    REJECT,
+    TIMEOUT_HEADER,
+    get_admission_controller,
+)
+from app.archive import archived_counts
+from app.broadcast import get_broadcast_hub, sse_stream
+from app.config import settings
+from app.export import (
+    EXPORT_FORMATS,
+    iter_export_chunks,
+    iter_review_batches,
+    review_schema,
+)
+from app.idempotency import (
+    IDEMPOTENCY_HEADER,
+    MAX_KEY_LENGTH,
+    REPLAYED_HEADER,
+    IdempotencyKeyMismatch,
+    get_single_flight,
+    request_fingerprint,
+)
+from app.language import UNDETERMINED_LANGUAGE, detect_language
+from app.live_stats import get_live_stats
+from app.local_model import get_local_model, model_report
+from app.llm_budget import LANES, get_llm_budget, llm_deadline, llm_lane
+from app.llm_stats import get_tier_stats
+from app.models import IdempotencyKey, Review, get_db
+from app.rate_limit import ApiClient, enforce_rate_limit, identify_client
 from app.schemas import (
     ReviewCreate,
     ReviewResponse,
     SentimentAnalysisResponse,
     ReportResponse,
 )
-from app.sentiment_service import SentimentAnalyzer
+from app.responses import render_negotiated, rows_to_dicts
+from app.rollups import distinct_customers
+from app.sentiment_service import SentimentAnalyzer, model_tiers
+from app.shadow import shadow_report
+from app.timing import TimedRoute, phase
+from app.write_behind import get_write_behind_writer
 
-router = APIRouter()
-sentiment_analyzer = SentimentAnalyzer()
+router = APIRouter(route_class=TimedRoute, dependencies=[Depends(identify_client)])
 
+# Colunas de ReviewResponse, selecionadas diretamente (sem objetos ORM)
+REVIEW_COLUMNS = (
+    Review.id,
+    Review.customer_name,
+    Review.review_text,
+    Review.sentiment,
+    Review.confidence_score,
+    Review.language,
+    Review.created_at,
+)
+REVIEW_FIELDS = {column.key: column for column in REVIEW_COLUMNS}
+
+FIELDS_DESCRIPTION = (
+    "Campos a retornar, separados por vírgula (ex.: id,sentiment,created_at). "
+    f"Disponíveis: {', '.join(REVIEW_FIELDS)}"
+)
 
-@router.post("/reviews", response_model=SentimentAnalysisResponse, status_code=201)
-async def create_review(review_data: ReviewCreate, db: Session = Depends(get_db)):
+
+def _parse_fields(fields: Optional[str]):
     """
-    Classifica uma avaliação de cliente usando análise de sentimento.
+    Converte o parâmetro `fields` nas colunas a selecionar no banco.
 
     Args:
-        review_data (ReviewCreate): Dados da avaliação
-        db (Session): Sessão do banco de dados
+        fields (Optional[str]): Campos separados por vírgula
 
     Returns:
-        SentimentAnalysisResponse: Resultado da análise de sentimento
+        tuple: Colunas selecionadas (todas, se `fields` não for informado)
     """
-    try:
-        # Realizar análise de sentimento
-        sentiment, confidence_score = sentiment_analyzer.analyze_sentiment(
-            review_data.review_text
+    if not fields:
+        return REVIEW_COLUMNS
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    invalid = [name for name in names if name not in REVIEW_FIELDS]
+    if invalid or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(invalid) or fields}. "
+            f"Disponíveis: {', '.join(REVIEW_FIELDS)}",
         )
+    return tuple(REVIEW_FIELDS[name] for name in dict.fromkeys(names))
 
-        # Criar nova avaliação no banco
-        db_review = Review(
-            customer_name=review_data.customer_name,
-            review_text=review_data.review_text,
-            sentiment=sentiment,
-            confidence_score=confidence_score,
+
+def _encode_cursor(review_id: int) -> str:
+    """Cursor opaco da paginação por chave (id da última avaliação)."""
+    return base64.urlsafe_b64encode(str(review_id).encode("ascii")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii"))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+_sentiment_analyzer: Optional[SentimentAnalyzer] = None
+
+
+def get_sentiment_analyzer() -> SentimentAnalyzer:
+    """Dependency que cria o analisador de sentimento no primeiro uso."""
+    global _sentiment_analyzer
+    if _sentiment_analyzer is None:
+        _sentiment_analyzer = SentimentAnalyzer()
+    return _sentiment_analyzer
+
+
+async def _classify_and_store(
+    review_data: ReviewCreate,
+    db: Session,
+    sentiment_analyzer: SentimentAnalyzer,
+    priority: str,
+    timeout: float,
+    response: Optional[Response] = None,
+    idempotency_key: Optional[str] = None,
+    client: Optional[ApiClient] = None,
+) -> SentimentAnalysisResponse:
+    """Classifica a avaliação e a grava no banco (ou no spool write-behind)."""
+    # Controle de admissão: falha rápido (ou usa o classificador local) se a
+    # fila do LLM não atende dentro do prazo do cliente
+    admission = get_admission_controller() if sentiment_analyzer.use_llm else None
+    decision = admission.decide(priority, timeout) if admission else None
+    if decision is not None and decision.action == REJECT:
+        raise HTTPException(
+            status_code=503,
+            detail=(
+                "LLM sobrecarregado: espera estimada de "
+                f"{decision.estimated_wait:.1f}s excede o prazo de {timeout:.1f}s"
+            ),
+            headers={"Retry-After": str(decision.retry_after)},
         )
+    # Só classificações que vão acontecer contam no limite e na cota do cliente
+    await enforce_rate_limit(client, response)
+    degraded = decision is not None and decision.action == DEGRADE
+    if degraded:
+        classify = sentiment_analyzer.analyze_sentiment_local
+        tracking = nullcontext()
+        if response is not None:
+            response.headers[DEGRADED_HEADER] = "true"
+    else:
+        classify = sentiment_analyzer.analyze_sentiment_versioned
+        tracking = admission.track(priority) if admission else nullcontext()
+
+    try:
+        # Realizar análise de sentimento
+        language = detect_language(review_data.review_text)
+
+        # A chamada ao LLM é bloqueante: executa fora do event loop (a thread
+        # herda o contexto, incluindo a faixa de prioridade e o prazo)
+        with phase("llm"), llm_lane(priority), llm_deadline(timeout), tracking:
+            (
+                sentiment,
+                confidence_score,
+                model_version,
+                prompt_version,
+            ) = await run_in_threadpool(classify, review_data.review_text, language)
+
+        review_values = {
+            "customer_name": review_data.customer_name,
+            "review_text": review_data.review_text,
+            "sentiment": sentiment,
+            "confidence_score": confidence_score,
+            "language": language,
+            "idempotency_key": idempotency_key,
+            "model_version": model_version,
+            "prompt_version": prompt_version,
+        }
 
-        db.add(db_review)
-        db.commit()
-        db.refresh(db_review)
+        writer = get_write_behind_writer()
+        if writer is not None:
+            if idempotency_key:
+                # A chave é reservada no banco antes da confirmação: uma
+                # repetição em outro worker encontra a reserva (e a resposta)
+                # em vez de receber outro ID para a mesma avaliação
+                with phase("db"):
+                    review_values["id"] = writer.allocator.next_id()
+                    db.add(
+                        _idempotency_record(
+                            idempotency_key, review_values["id"], review_data,
+                            sentiment, confidence_score,
+                        )
+                    )
+                    db.commit()
+            # Write-behind: durável no spool local, inserido em lote depois
+            with phase("spool"):
+                try:
+                    review_id = await run_in_threadpool(writer.submit, review_values)
+                except Exception:
+                    if idempotency_key:
+                        # A avaliação não entrou no spool: sem liberar a
+                        # reserva, as repetições receberiam um ID inexistente
+                        await run_in_threadpool(
+                            _release_idempotency_key,
+                            db, idempotency_key, review_values["id"],
+                        )
+                    raise
+        else:
+            # Criar nova avaliação no banco
+            with phase("db"):
+                db_review = Review(**review_values)
+                db.add(db_review)
+                db.flush()
+                # Lido antes do commit: evita o SELECT extra do refresh
+                review_id = db_review.id
+                if idempotency_key:
+                    # Mesma transação: a chave só existe se a avaliação existe
+                    db.add(
+                        _idempotency_record(
+                            idempotency_key, review_id, review_data,
+                            sentiment, confidence_score,
+                        )
+                    )
+                db.commit()
+
+        get_live_stats().record(sentiment)
+        # Dashboards conectados ao stream SSE recebem a avaliação na hora
+        get_broadcast_hub().publish_review(
+            {
+                "id": review_id,
+                "customer_name": review_data.customer_name,
+                "sentiment": sentiment,
+                "confidence_score": confidence_score,
+                "language": language,
+                "model_version": model_version,
+                "created_at": datetime.utcnow(),
+            }
+        )
 
         return SentimentAnalysisResponse(
-            id=db_review.id,
+            id=review_id,
             sentiment=sentiment,
             confidence_score=confidence_score,
-            message="Análise de sentimento realizada com sucesso",
+            message="Análise de sentimento realizada com o classificador local "
+            "(LLM sobrecarregado)"
+            if degraded
+            else "Análise de sentimento realizada com sucesso",
         )
 
+    except IntegrityError:
+        db.rollback()
+        # Outro worker gravou a mesma chave de idempotência primeiro
+        stored = None
+        if idempotency_key:
+            stored = _find_idempotent_review(db, idempotency_key)
+        if stored is None:
+            raise HTTPException(status_code=500, detail="Erro interno do servidor")
+        return _idempotent_response(stored, review_data)
+
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -64,26 +272,245 @@ async def create_review(review_data: ReviewCreate, db: Session = Depends(get_db)
         )
 
 
+def _idempotency_record(
+    idempotency_key: str,
+    review_id: int,
+    review_data: ReviewCreate,
+    sentiment: str,
+    confidence_score: Optional[str],
+) -> IdempotencyKey:
+    """Linha de `idempotency_keys` com a resposta original da chave."""
+    return IdempotencyKey(
+        key=idempotency_key,
+        review_id=review_id,
+        fingerprint=request_fingerprint(
+            review_data.customer_name, review_data.review_text
+        ),
+        sentiment=sentiment,
+        confidence_score=confidence_score,
+    )
+
+
+def _release_idempotency_key(db: Session, idempotency_key: str, review_id: int):
+    """Remove a reserva de uma chave cuja avaliação não foi gravada."""
+    db.rollback()
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.key == idempotency_key,
+            IdempotencyKey.review_id == review_id,
+        )
+    )
+    db.commit()
+
+
+def _find_idempotent_review(db: Session, idempotency_key: str):
+    """
+    Resposta gravada com a chave de idempotência, se houver.
+
+    Returns:
+        Optional[tuple]: (id, fingerprint, sentiment, confidence_score)
+    """
+    stored = db.execute(
+        select(
+            IdempotencyKey.review_id,
+            IdempotencyKey.fingerprint,
+            IdempotencyKey.sentiment,
+            IdempotencyKey.confidence_score,
+        ).where(IdempotencyKey.key == idempotency_key)
+    ).first()
+    if stored is not None:
+        return tuple(stored)
+
+    # Avaliações gravadas antes da tabela idempotency_keys
+    legacy = db.execute(
+        select(
+            Review.id,
+            Review.customer_name,
+            Review.review_text,
+            Review.sentiment,
+            Review.confidence_score,
+        ).where(Review.idempotency_key == idempotency_key)
+    ).first()
+    if legacy is None:
+        return None
+    return (
+        legacy.id,
+        request_fingerprint(legacy.customer_name, legacy.review_text),
+        legacy.sentiment,
+        legacy.confidence_score,
+    )
+
+
+def _idempotent_response(
+    stored, review_data: ReviewCreate
+) -> SentimentAnalysisResponse:
+    """Reconstrói a resposta original a partir da chave gravada."""
+    review_id, fingerprint, sentiment, confidence_score = stored
+    if fingerprint != request_fingerprint(
+        review_data.customer_name, review_data.review_text
+    ):
+        raise IdempotencyKeyMismatch(review_id)
+    return SentimentAnalysisResponse(
+        id=review_id,
+        sentiment=sentiment,
+        confidence_score=confidence_score,
+        message="Análise de sentimento realizada com sucesso",
+    )
+
+
+@router.post(
+    "/reviews",
+    response_model=SentimentAnalysisResponse,
+    status_code=201,
+)
+async def create_review(
+    review_data: ReviewCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    client: Optional[ApiClient] = Depends(identify_client),
+    sentiment_analyzer: SentimentAnalyzer = Depends(get_sentiment_analyzer),
+    priority: str = Header(
+        "interactive",
+        alias="X-Request-Priority",
+        description="Faixa do LLM: interactive (padrão) ou bulk (importações em lote)",
+    ),
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias=IDEMPOTENCY_HEADER,
+        description="Chave única por avaliação: repetições com a mesma chave "
+        "devolvem a resposta original sem nova classificação",
+    ),
+    request_timeout: Optional[float] = Header(
+        None,
+        alias=TIMEOUT_HEADER,
+        description="Tempo máximo (s) que o cliente aguarda; acima da espera "
+        "estimada a requisição é recusada com 503 ou degradada",
+    ),
+):
+    """
+    Classifica uma avaliação de cliente usando análise de sentimento.
+
+    Com o cabeçalho `Idempotency-Key`, repetições da mesma requisição
+    aguardam a tentativa em andamento ou recebem a resposta já gravada
+    (cabeçalho `Idempotent-Replayed: true`), sem nova chamada ao LLM.
+
+    Se a espera estimada pelo LLM passar do prazo do cliente
+    (`X-Request-Timeout`), responde 503 com `Retry-After` ou, com
+    ADMISSION_ACTION=degrade, classifica localmente (`X-Degraded: true`).
+
+    Com API keys configuradas, cada classificação conta no limite por minuto
+    e na cota diária do cliente (429 ao excedê-los; ver app.rate_limit);
+    repetições idempotentes e requisições recusadas com 503 não contam.
+
+    Args:
+        review_data (ReviewCreate): Dados da avaliação
+        response (Response): Resposta (cabeçalhos de idempotência)
+        db (Session): Sessão do banco de dados
+        client (Optional[ApiClient]): Cliente identificado pela API key
+        sentiment_analyzer (SentimentAnalyzer): Analisador de sentimento
+        priority (str): Faixa de prioridade das chamadas ao LLM
+        idempotency_key (Optional[str]): Chave de idempotência do cliente
+        request_timeout (Optional[float]): Prazo do cliente em segundos
+
+    Returns:
+        SentimentAnalysisResponse: Resultado da análise de sentimento
+    """
+    if priority not in LANES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"X-Request-Priority inválido. Disponíveis: {', '.join(LANES)}",
+        )
+    if request_timeout is None:
+        request_timeout = settings.ADMISSION_DEFAULT_TIMEOUT
+    elif request_timeout <= 0:
+        raise HTTPException(
+            status_code=400, detail=f"{TIMEOUT_HEADER} deve ser maior que zero"
+        )
+    if idempotency_key is None:
+        return await _classify_and_store(
+            review_data, db, sentiment_analyzer, priority, request_timeout, response,
+            client=client,
+        )
+
+    idempotency_key = idempotency_key.strip()
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{IDEMPOTENCY_HEADER} deve ter de 1 a {MAX_KEY_LENGTH} caracteres",
+        )
+
+    single_flight = get_single_flight()
+    fingerprint = request_fingerprint(
+        review_data.customer_name, review_data.review_text
+    )
+    try:
+        with phase("cache"):
+            result = single_flight.recent(idempotency_key, fingerprint)
+            if result is None:
+                stored = await run_in_threadpool(
+                    _find_idempotent_review, db, idempotency_key
+                )
+                if stored is not None:
+                    result = _idempotent_response(stored, review_data)
+                    single_flight.remember(idempotency_key, fingerprint, result)
+        replayed = result is not None
+        if not replayed:
+            result, replayed = await single_flight.run(
+                idempotency_key,
+                fingerprint,
+                lambda: _classify_and_store(
+                    review_data,
+                    db,
+                    sentiment_analyzer,
+                    priority,
+                    request_timeout,
+                    response,
+                    idempotency_key,
+                    client,
+                ),
+            )
+    except IdempotencyKeyMismatch:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{IDEMPOTENCY_HEADER} já usada com outra avaliação",
+        )
+
+    if replayed:
+        response.headers[REPLAYED_HEADER] = "true"
+    return result
+
+
 @router.get("/reviews", response_model=List[ReviewResponse])
 async def get_all_reviews(
+    request: Request,
     skip: int = Query(0, ge=0, description="Número de registros a pular"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     db: Session = Depends(get_db),
 ):
     """
     Retorna uma lista de todas as avaliações analisadas.
 
     Args:
+        request (Request): Requisição (Accept: JSON ou MessagePack)
         skip (int): Número de registros a pular (paginação)
         limit (int): Número máximo de registros a retornar
+        fields (Optional[str]): Campos a retornar (projeção no SQL)
         db (Session): Sessão do banco de dados
 
     Returns:
         List[ReviewResponse]: Lista de avaliações
     """
+    columns = _parse_fields(fields)
     try:
-        reviews = db.query(Review).offset(skip).limit(limit).all()
-        return reviews
+        # Caminho rápido: linhas simples + orjson, sem revalidação Pydantic
+        with phase("db"):
+            rows = rows_to_dicts(
+                db.execute(
+                    select(*columns).order_by(Review.id).offset(skip).limit(limit)
+                ).mappings()
+            )
+        return render_negotiated(request, rows)
 
     except Exception as e:
         raise HTTPException(
@@ -93,16 +520,20 @@ async def get_all_reviews(
 
 @router.get("/reviews/report", response_model=ReportResponse)
 async def get_reviews_report(
+    request: Request,
     start_date: str = Query(..., description="Data inicial (YYYY-MM-DD)"),
     end_date: str = Query(..., description="Data final (YYYY-MM-DD)"),
+    language: Optional[str] = Query(None, description="Filtrar por idioma (pt, en)"),
     db: Session = Depends(get_db),
 ):
     """
     Retorna um relatório das avaliações em um período específico.
 
     Args:
+        request (Request): Requisição (Accept: JSON ou MessagePack)
         start_date (str): Data inicial no formato YYYY-MM-DD
         end_date (str): Data final no formato YYYY-MM-DD
+        language (Optional[str]): Idioma das avaliações consideradas
         db (Session): Sessão do banco de dados
 
     Returns:
@@ -125,32 +556,60 @@ async def get_reviews_report(
                 detail="Data inicial deve ser menor ou igual à data final",
             )
 
-        # Buscar avaliações no período
-        reviews = (
-            db.query(Review)
-            .filter(
-                and_(
-                    Review.created_at >= start_dt,
-                    Review.created_at <= end_dt.replace(hour=23, minute=59, second=59),
-                )
+        # Contar avaliações do período por sentimento e idioma no próprio banco
+        filters = [
+            Review.created_at >= start_dt,
+            Review.created_at <= end_dt.replace(hour=23, minute=59, second=59),
+        ]
+        if language:
+            filters.append(Review.language == language)
+
+        with phase("db"):
+            rows = db.execute(
+                select(Review.sentiment, Review.language, func.count())
+                .where(and_(*filters))
+                .group_by(Review.sentiment, Review.language)
+            ).all()
+
+        sentiment_counts = {}
+        language_counts = {}
+        for sentiment, review_language, count in rows:
+            review_language = review_language or UNDETERMINED_LANGUAGE
+            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + count
+            language_counts[review_language] = (
+                language_counts.get(review_language, 0) + count
             )
-            .all()
-        )
 
-        # Contar sentimentos
-        total_reviews = len(reviews)
-        positive_count = len([r for r in reviews if r.sentiment == "positiva"])
-        negative_count = len([r for r in reviews if r.sentiment == "negativa"])
-        neutral_count = len([r for r in reviews if r.sentiment == "neutra"])
+        # Meses já arquivados entram pelas contagens diárias dos manifestos
+        with phase("archive"):
+            archived_sentiments, archived_languages = archived_counts(
+                start_dt.date(), end_dt.date(), language
+            )
+        for sentiment, count in archived_sentiments.items():
+            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + count
+        for archived_language, count in archived_languages.items():
+            language_counts[archived_language] = (
+                language_counts.get(archived_language, 0) + count
+            )
 
-        return ReportResponse(
+        # Clientes distintos: união dos sketches diários (inclui os arquivados)
+        with phase("rollup"):
+            customers, customers_total = distinct_customers(
+                db, start_dt.date(), end_dt.date(), language
+            )
+
+        report = ReportResponse(
             start_date=start_date,
             end_date=end_date,
-            total_reviews=total_reviews,
-            positive_count=positive_count,
-            negative_count=negative_count,
-            neutral_count=neutral_count,
+            total_reviews=sum(sentiment_counts.values()),
+            positive_count=sentiment_counts.get("positiva", 0),
+            negative_count=sentiment_counts.get("negativa", 0),
+            neutral_count=sentiment_counts.get("neutra", 0),
+            language_counts=language_counts,
+            distinct_customers=customers,
+            distinct_customers_total=customers_total,
         )
+        return render_negotiated(request, report.model_dump())
 
     except HTTPException:
         raise
@@ -160,27 +619,258 @@ async def get_reviews_report(
         )
 
 
+@router.get("/reviews/stats/live")
+async def get_live_review_stats():
+    """
+    Distribuição de sentimentos nas últimas janelas (ex.: 15m, 1h, 24h).
+
+    Servido pelos contadores deslizantes, sem acesso ao banco; com vários
+    workers os contadores são compartilhados e cobrem o tráfego de todos.
+
+    Returns:
+        dict: Total, contagem e fração por sentimento de cada janela
+    """
+    return {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        **get_live_stats().snapshot(),
+    }
+
+
+@router.get("/reviews/stream")
+async def stream_reviews():
+    """
+    Stream (Server-Sent Events) das avaliações classificadas neste worker.
+
+    Eventos:
+        review: cada avaliação classificada (id, sentimento, idioma etc.)
+        stats: a cada SSE_STATS_INTERVAL segundos, contagem por sentimento
+            no intervalo (delta) e desde o início do worker (totals)
+        dropped: quantidade de avaliações descartadas por lentidão do cliente
+
+    Returns:
+        StreamingResponse: Stream text/event-stream
+    """
+    hub = get_broadcast_hub()
+    subscription = hub.subscribe()
+    if subscription is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Limite de conexões do stream atingido",
+            headers={"Retry-After": "30"},
+        )
+    return StreamingResponse(
+        sse_stream(hub, subscription, settings.SSE_HEARTBEAT),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/reviews/export")
+async def export_reviews(
+    format: str = Query("parquet", description="Formato: parquet ou arrow"),
+    start_date: Optional[str] = Query(None, description="Data inicial (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="Data final (YYYY-MM-DD)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Exporta as avaliações (banco e meses arquivados) em Parquet ou Arrow.
+
+    O arquivo é gerado e enviado em streaming, um row group por vez.
+
+    Args:
+        format (str): "parquet" ou "arrow" (Arrow IPC stream)
+        start_date (Optional[str]): Data inicial no formato YYYY-MM-DD
+        end_date (Optional[str]): Data final no formato YYYY-MM-DD
+        db (Session): Sessão do banco de dados
+
+    Returns:
+        StreamingResponse: Arquivo exportado
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato inválido. Disponíveis: {', '.join(EXPORT_FORMATS)}",
+        )
+    try:
+        start_dt = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Formato de data inválido. Use YYYY-MM-DD"
+        )
+    if end_dt:
+        end_dt = end_dt.replace(hour=23, minute=59, second=59)
+
+    try:
+        schema = review_schema()
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    media_type, extension = EXPORT_FORMATS[format]
+    # Gerador síncrono: o Starlette o consome fora do event loop
+    chunks = iter_export_chunks(
+        iter_review_batches(db.get_bind(), start_dt, end_dt), schema, format
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="reviews.{extension}"'
+        },
+    )
+
+
+@router.get("/llm/lanes")
+async def get_llm_lanes():
+    """
+    Estado das faixas de prioridade do LLM neste worker.
+
+    Returns:
+        dict: Slots, fila (queue_depth), chamadas em andamento e tempos de
+            espera por orçamento de cada faixa, e o estado do controle de
+            admissão (classificações em andamento, decisões, espera estimada)
+    """
+    stats = get_llm_budget().stats()
+    admission = get_admission_controller()
+    stats["admission"] = admission.stats() if admission else None
+    return stats
+
+
+@router.get("/llm/tiers")
+async def get_llm_tiers():
+    """
+    Uso das camadas de modelos do LLM neste worker.
+
+    Returns:
+        dict: Para cada camada, respostas aceitas, escalonamentos (baixa
+            confiança ou resposta inválida), latência e tokens; e o modelo
+            local em uso (versão, acurácia contra o LLM), que aparece como
+            primeira camada com LOCAL_MODEL_ACCEPT_CONFIDENCE > 0
+    """
+    local_model = get_local_model()
+    tiers = model_tiers()
+    if local_model is not None and settings.LOCAL_MODEL_ACCEPT_CONFIDENCE > 0:
+        tiers = [local_model.version, *tiers]
+    return {
+        "escalation_confidence": settings.LLM_ESCALATION_CONFIDENCE,
+        **get_tier_stats().as_dict(tiers),
+        "local": model_report(local_model),
+    }
+
+
+@router.get("/llm/shadow")
+async def get_llm_shadow_report():
+    """
+    Comparação entre o modelo principal e o modelo em sombra neste worker.
+
+    Returns:
+        dict: Latência, tokens e erros por modelo e concordância de rótulos
+            nas requisições amostradas
+    """
+    return shadow_report()
+
+
+@router.get("/customers/{customer_name}/reviews")
+async def get_customer_reviews(
+    request: Request,
+    customer_name: str,
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros"),
+    cursor: Optional[str] = Query(None, description="Cursor da página seguinte"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
+    """
+    Avaliações de um cliente, das mais recentes às mais antigas.
+
+    A busca usa o índice (customer_name, id) e pagina por chave: cada página
+    traz `next_cursor`, a ser enviado em `cursor` para obter a seguinte
+    (null na última página). Considera apenas a tabela quente (não arquivada).
+
+    Args:
+        request (Request): Requisição (Accept: JSON ou MessagePack)
+        customer_name (str): Nome do cliente (correspondência exata)
+        limit (int): Número máximo de registros por página
+        cursor (Optional[str]): Cursor retornado pela página anterior
+        fields (Optional[str]): Campos a retornar (projeção no SQL)
+        db (Session): Sessão do banco de dados
+
+    Returns:
+        dict: customer_name, reviews e next_cursor
+    """
+    columns = _parse_fields(fields)
+    with_id = any(column.key == "id" for column in columns)
+    filters = [Review.customer_name == customer_name]
+    if cursor:
+        filters.append(Review.id < _decode_cursor(cursor))
+    try:
+        # O id é sempre lido para montar o cursor, mesmo fora de `fields`
+        with phase("db"):
+            rows = rows_to_dicts(
+                db.execute(
+                    select(*columns if with_id else (Review.id, *columns))
+                    .where(and_(*filters))
+                    .order_by(Review.id.desc())
+                    .limit(limit + 1)
+                ).mappings()
+            )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1]["id"])
+        if not with_id:
+            for row in rows:
+                del row["id"]
+
+        return render_negotiated(
+            request,
+            {
+                "customer_name": customer_name,
+                "reviews": rows,
+                "next_cursor": next_cursor,
+            },
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Erro ao buscar avaliações do cliente: {str(e)}"
+        )
+
+
 @router.get("/reviews/{review_id}", response_model=ReviewResponse)
-async def get_review_by_id(review_id: int, db: Session = Depends(get_db)):
+async def get_review_by_id(
+    request: Request,
+    review_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
     """
     Busca uma avaliação específica pelo ID.
 
     Args:
+        request (Request): Requisição (Accept: JSON ou MessagePack)
         review_id (int): ID da avaliação
+        fields (Optional[str]): Campos a retornar (projeção no SQL)
         db (Session): Sessão do banco de dados
 
     Returns:
         ReviewResponse: Dados da avaliação
     """
+    columns = _parse_fields(fields)
     try:
-        review = db.query(Review).filter(Review.id == review_id).first()
+        with phase("db"):
+            review = (
+                db.execute(select(*columns).where(Review.id == review_id))
+                .mappings()
+                .first()
+            )
 
         if not review:
             raise HTTPException(
                 status_code=404, detail=f"Avaliação com ID {review_id} não encontrada"
             )
 
-        return review
+        return render_negotiated(request, dict(review))
 
     except HTTPException:
         raise
@@ -2,9 +2,11 @@
 Schemas Pydantic para validação de dados.
 """
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import BaseModel, Field
 
+from app.config import settings
+
 
 class ReviewCreate(BaseModel):
     """Schema para criação de uma nova avaliação."""
@@ -12,7 +14,12 @@ class ReviewCreate(BaseModel):
     customer_name: str = Field(
         ..., min_length=1, max_length=255, description="Nome do cliente"
     )
-    review_text: str = Field(..., min_length=1, description="Texto da avaliação")
+    review_text: str = Field(
+        ...,
+        min_length=1,
+        max_length=settings.REVIEW_TEXT_MAX_LENGTH,
+        description="Texto da avaliação",
+    )
 
     class Config:
         json_schema_extra = {
@@ -31,6 +38,7 @@ class ReviewResponse(BaseModel):
     review_text: str
     sentiment: str
     confidence_score: Optional[str] = None
+    language: Optional[str] = None
     created_at: datetime
 
     class Config:
@@ -65,6 +73,10 @@ class ReportResponse(BaseModel):
     positive_count: int
     negative_count: int
     neutral_count: int
+    language_counts: Dict[str, int] = {}
+    # Clientes distintos aproximados (HyperLogLog, erro de ~1,6%)
+    distinct_customers: Dict[str, int] = {}
+    distinct_customers_total: int = 0
 
     class Config:
         json_schema_extra = {
@@ -75,5 +87,8 @@ class ReportResponse(BaseModel):
                 "positive_count": 4,
                 "negative_count": 3,
                 "neutral_count": 3,
+                "language_counts": {"pt": 8, "en": 2},
+                "distinct_customers": {"positiva": 4, "negativa": 2, "neutra": 3},
+                "distinct_customers_total": 7,
             }
         }
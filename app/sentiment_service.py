@@ -1,81 +1,354 @@
 """
 Serviço de análise de sentimento usando LLM (Groq).
 """
+import contextvars
+import hashlib
+import json
 import logging
-import time
-from textblob import TextBlob
-from typing import Tuple, Optional
 import re
-from groq import Groq, RateLimitError
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional
 from app.config import settings
+from app.language import detect_language
+from app.lexicon import analyze_with_lexicon
+from app.llm_budget import LLMBudgetTimeout, get_llm_budget
+from app.llm_stats import get_tier_stats
+from app.local_model import get_local_model
+from app.shadow import get_shadow_evaluator
 
 logger = logging.getLogger(__name__)
 
+# Fronteiras de frase usadas na divisão de textos longos
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+# Estimativa de tokens do template do prompt e da resposta JSON
+PROMPT_OVERHEAD_TOKENS = 150
+CHUNK_RESPONSE_TOKENS = 32
+
+# Prompts por idioma: (mensagem de sistema, template da avaliação)
+PROMPTS = {
+    "pt": (
+        "Você é um especialista em análise de sentimento. "
+        "Responda sempre no formato JSON solicitado.",
+        "Analise o sentimento da seguinte avaliação de cliente e classifique como:\n"
+        '- "positiva" para sentimentos favoráveis, satisfação, elogios\n'
+        '- "negativa" para sentimentos desfavoráveis, insatisfação, reclamações  \n'
+        '- "neutra" para sentimentos neutros, mistos ou informativos\n'
+        "\n"
+        'Avaliação: "{text}"\n'
+        "\n"
+        "Responda APENAS com o formato JSON:\n"
+        '{{"sentiment": "positiva|negativa|neutra", "confidence": "0.XX"}}\n'
+        "\n"
+        "Onde confidence é um valor entre 0.00 e 1.00 indicando sua confiança "
+        "na classificação.",
+    ),
+    "en": (
+        "You are a sentiment analysis expert. Reply only with the requested JSON.",
+        "Classify the sentiment of this customer review as positive, negative or "
+        "neutral (neutral also covers mixed or purely informative reviews).\n"
+        "\n"
+        'Review: "{text}"\n'
+        "\n"
+        "Reply ONLY with JSON: "
+        '{{"sentiment": "positive|negative|neutral", "confidence": "0.XX"}}',
+    ),
+}
+
+# Versão dos prompts gravada com cada avaliação classificada pelo LLM; muda
+# automaticamente quando o texto de algum prompt é alterado
+PROMPT_VERSION = hashlib.sha256(
+    json.dumps(PROMPTS, sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+# Versões de modelo gravadas quando a classificação não veio do LLM
+LEXICON_MODEL_VERSION = "lexicon"
+DEFAULT_MODEL_VERSION = "default"
+
+# Rótulos aceitos na resposta do LLM, normalizados para os rótulos da API
+SENTIMENT_LABELS = {
+    "positiva": "positiva",
+    "negativa": "negativa",
+    "neutra": "neutra",
+    "positive": "positiva",
+    "negative": "negativa",
+    "neutral": "neutra",
+}
+
+
+def model_tiers() -> List[str]:
+    """Modelos do LLM em ordem de escalonamento (GROQ_MODELS ou GROQ_MODEL)."""
+    models = [model.strip() for model in settings.GROQ_MODELS.split(",")]
+    return [model for model in models if model] or [settings.GROQ_MODEL]
+
+
+def _confidence(result: Tuple[str, str]) -> float:
+    try:
+        return float(result[1])
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_chunk_executor: Optional[ThreadPoolExecutor] = None
+_chunk_executor_lock = threading.Lock()
+
+
+def _get_chunk_executor() -> ThreadPoolExecutor:
+    """Pool de threads compartilhado para classificar trechos em paralelo."""
+    global _chunk_executor
+    if _chunk_executor is None:
+        with _chunk_executor_lock:
+            if _chunk_executor is None:
+                _chunk_executor = ThreadPoolExecutor(
+                    max_workers=settings.LLM_CHUNK_CONCURRENCY,
+                    thread_name_prefix="llm-chunk",
+                )
+    return _chunk_executor
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa rápida de tokens (~4 caracteres por token)."""
+    return len(text) // 4 + 1
+
+
+class ReviewTokenBudget:
+    """
+    Tokens (prompt + resposta) que as chamadas ao LLM de uma avaliação podem gastar.
+
+    Antes de cada chamada é reservado o prompt estimado mais o `max_tokens`
+    pedido, limitado ao que resta; depois da chamada a sobra é devolvida
+    conforme o uso informado pelo provedor. Os trechos de um texto longo são
+    classificados em paralelo, por isso as reservas são atômicas.
+    """
+
+    def __init__(self, total: int):
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def reserve(self, prompt_tokens: int, max_tokens: int) -> Optional[int]:
+        """
+        Reserva tokens para uma chamada.
+
+        Args:
+            prompt_tokens (int): Tokens estimados do prompt
+            max_tokens (int): Limite de tokens da resposta desejado
+
+        Returns:
+            Optional[int]: `max_tokens` a usar na chamada, ou None se não
+                sobra espaço nem para a resposta JSON
+        """
+        with self._lock:
+            allowed = min(max_tokens, self.remaining - prompt_tokens)
+            if allowed < min(max_tokens, CHUNK_RESPONSE_TOKENS):
+                return None
+            self.remaining -= prompt_tokens + allowed
+            return allowed
+
+    def settle(self, reserved: int, used: int):
+        """Devolve a parte de uma reserva que a chamada não usou."""
+        with self._lock:
+            self.remaining += max(0, reserved - used)
+
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Divide um texto em trechos de até `max_chars`, respeitando frases.
+
+    Frases são agrupadas enquanto couberem no limite; frases maiores que o
+    limite são quebradas em espaços em branco.
+
+    Args:
+        text (str): Texto a ser dividido
+        max_chars (int): Tamanho máximo de cada trecho
+
+    Returns:
+        List[str]: Trechos do texto
+    """
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_BOUNDARY.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def aggregate_chunk_results(
+    results: List[Tuple[int, Optional[Tuple[str, str]]]]
+) -> Optional[Tuple[str, str]]:
+    """
+    Agrega as classificações dos trechos ponderando por tamanho e confiança.
+
+    O sentimento vencedor é o de maior soma `tamanho * confiança`; a confiança
+    final é essa soma dividida pelo tamanho total classificado, de modo que
+    trechos discordantes reduzem a confiança.
+
+    Args:
+        results: Lista de (tamanho do trecho, (sentimento, confiança) ou None)
+
+    Returns:
+        Optional[Tuple[str, str]]: (sentimento, confiança) ou None se nenhum
+            trecho foi classificado
+    """
+    scores = {}
+    total_length = 0
+    for length, result in results:
+        if not result:
+            continue
+        sentiment, confidence = result
+        try:
+            confidence_value = float(confidence)
+        except ValueError:
+            confidence_value = 0.5
+        scores[sentiment] = scores.get(sentiment, 0.0) + length * confidence_value
+        total_length += length
+
+    if not scores or total_length == 0:
+        return None
+
+    sentiment = max(scores, key=scores.get)
+    return sentiment, f"{scores[sentiment] / total_length:.2f}"
+
 
 class SentimentAnalyzer:
     """Classe para análise de sentimento de textos usando LLM (Groq)."""
     
     def __init__(self):
-        """Inicializa o analisador de sentimento."""
-        self.groq_client = None
+        """
+        Inicializa o analisador de sentimento.
+
+        O cliente Groq não é criado aqui: a importação do SDK e a construção do
+        cliente HTTP acontecem no primeiro uso (ou em `warmup`), mantendo a
+        inicialização dos workers rápida.
+        """
+        self._groq_client = None
+        self._client_lock = threading.Lock()
         self.use_llm = settings.USE_LLM_ANALYSIS
 
-        if self.use_llm and settings.GROQ_API_KEY != "gsk_YOUR_GROQ_API_KEY":
-            try:
-                self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
-                logger.info(f"Groq client initialized with model: {settings.GROQ_MODEL}")
-            except Exception as e:
-                logger.error(f"Failed to initialize Groq client: {e}")
-                self.use_llm = False
-        else:
+        if not self.use_llm or settings.GROQ_API_KEY == "gsk_YOUR_GROQ_API_KEY":
             logger.info("LLM disabled or API key not configured")
             self.use_llm = False
 
-    def _analyze_with_llm(self, text: str) -> Optional[Tuple[str, str]]:
+    @property
+    def groq_client(self):
+        """Cliente Groq, criado sob demanda na primeira chamada."""
+        if self._groq_client is None and self.use_llm:
+            with self._client_lock:
+                if self._groq_client is None and self.use_llm:
+                    try:
+                        from groq import Groq
+
+                        self._groq_client = Groq(api_key=settings.GROQ_API_KEY)
+                        logger.info(
+                            f"Groq client initialized with model: {settings.GROQ_MODEL}"
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to initialize Groq client: {e}")
+                        self.use_llm = False
+        return self._groq_client
+
+    def warmup(self) -> bool:
+        """
+        Pré-aquece o cliente LLM.
+
+        Cria o cliente e, se `LLM_WARMUP_REQUEST` estiver habilitado, faz uma
+        chamada leve (listagem de modelos) para abrir a conexão TLS do pool.
+
+        Returns:
+            bool: True se o LLM estiver pronto ou desabilitado, False em falha
+        """
+        if not self.use_llm:
+            return True
+
+        client = self.groq_client
+        if client is None:
+            return False
+
+        if settings.LLM_WARMUP_REQUEST:
+            try:
+                client.models.list()
+            except Exception as e:
+                logger.warning(f"LLM warmup request failed: {e}")
+                return False
+        return True
+
+    def _analyze_with_llm(
+        self,
+        text: str,
+        max_tokens: Optional[int] = None,
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+        usage: Optional[dict] = None,
+    ) -> Optional[Tuple[str, str]]:
         """
         Analisa sentimento usando LLM (Groq).
         
         Args:
             text (str): Texto a ser analisado
+            max_tokens (Optional[int]): Limite de tokens da resposta
+                (padrão: LLM_MAX_TOKENS)
+            language (Optional[str]): Idioma do texto, que define o prompt
+            model (Optional[str]): Modelo a usar (padrão: GROQ_MODEL)
+            usage (Optional[dict]): Se informado, recebe o modelo, a latência
+                da chamada (latency_ms) e os tokens consumidos
             
         Returns:
             Optional[Tuple[str, str]]: (sentimento, confiança) ou None se falhar
         """
         if not self.groq_client:
             return None
-        
-        prompt = f"""Analise o sentimento da seguinte avaliação de cliente e classifique como:
-- "positiva" para sentimentos favoráveis, satisfação, elogios
-- "negativa" para sentimentos desfavoráveis, insatisfação, reclamações  
-- "neutra" para sentimentos neutros, mistos ou informativos
 
-Avaliação: "{text}"
+        from groq import RateLimitError
 
-Responda APENAS com o formato JSON:
-{{"sentiment": "positiva|negativa|neutra", "confidence": "0.XX"}}
+        system_prompt, template = PROMPTS.get(language, PROMPTS["pt"])
+        prompt = template.format(text=text)
 
-Onde confidence é um valor entre 0.00 e 1.00 indicando sua confiança na classificação."""
+        model = model or settings.GROQ_MODEL
+        if usage is not None:
+            usage["model"] = model
 
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.GROQ_MODEL,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "Você é um especialista em análise de sentimento. Responda sempre no formato JSON solicitado."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=settings.LLM_MAX_TOKENS,
-                temperature=settings.LLM_TEMPERATURE,
-                top_p=0.9
-            )
-            
+            with get_llm_budget().acquire():
+                started = time.perf_counter()
+                response = self.groq_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=max_tokens or settings.LLM_MAX_TOKENS,
+                    temperature=settings.LLM_TEMPERATURE,
+                    top_p=0.9
+                )
+            if usage is not None:
+                usage["latency_ms"] = (time.perf_counter() - started) * 1000
+                if response.usage is not None:
+                    usage["prompt_tokens"] = response.usage.prompt_tokens or 0
+                    usage["completion_tokens"] = response.usage.completion_tokens or 0
+
             response_text = response.choices[0].message.content.strip()
             logger.debug(f"LLM response: {response_text}")
             
             # Extrair JSON da resposta
-            import json
             try:
                 # Tentar extrair JSON da resposta
                 json_start = response_text.find('{')
@@ -84,7 +357,8 @@ Onde confidence é um valor entre 0.00 e 1.00 indicando sua confiança na classi
                     json_str = response_text[json_start:json_end]
                     result = json.loads(json_str)
                     
-                    sentiment = result.get('sentiment', '').lower()
+                    raw_sentiment = str(result.get('sentiment', '')).lower()
+                    sentiment = SENTIMENT_LABELS.get(raw_sentiment, raw_sentiment)
                     confidence = str(result.get('confidence', '0.50'))
                     
                     # Validar sentimento
@@ -102,6 +376,9 @@ Onde confidence é um valor entre 0.00 e 1.00 indicando sua confiança na classi
                 logger.warning(f"Failed to parse LLM JSON response: {e}")
                 return None
                 
+        except LLMBudgetTimeout as e:
+            logger.warning(f"LLM budget exhausted: {e}")
+            return None
         except RateLimitError as e:
             logger.warning(f"Groq rate limit exceeded: {e}")
             time.sleep(1)  # Aguardar antes de tentar novamente
@@ -110,28 +387,284 @@ Onde confidence é um valor entre 0.00 e 1.00 indicando sua confiança na classi
             logger.error(f"Error calling Groq API: {e}")
             return None
     
-    def analyze_sentiment(self, text: str) -> Tuple[str, str]:
+    def _analyze_long_text(
+        self,
+        text: str,
+        language: Optional[str] = None,
+        budget: Optional[ReviewTokenBudget] = None,
+    ) -> Optional[Tuple[Tuple[str, str], str]]:
+        """
+        Analisa textos longos em trechos classificados em paralelo.
+
+        Os trechos enviados são escolhidos para que o total estimado de
+        tokens (prompt + trecho + resposta) respeite `LLM_MAX_TOKENS_PER_REVIEW`
+        mesmo que cada trecho escalone por todas as camadas de modelos (o
+        limite é dividido pelo número de camadas); se o texto exceder o
+        limite, apenas trechos distribuídos uniformemente ao longo do texto
+        (sempre incluindo o primeiro e o último) são enviados. O limite em si
+        é aplicado a cada chamada pelo `budget`.
+
+        Args:
+            text (str): Texto a ser analisado
+            language (Optional[str]): Idioma do texto
+            budget (Optional[ReviewTokenBudget]): Orçamento de tokens da
+                avaliação (padrão: LLM_MAX_TOKENS_PER_REVIEW)
+
+        Returns:
+            Optional[Tuple[Tuple[str, str], str]]: ((sentimento, confiança),
+                modelo) ou None se falhar ou se nem um trecho couber no limite
+        """
+        if budget is None:
+            budget = ReviewTokenBudget(settings.LLM_MAX_TOKENS_PER_REVIEW)
+        chunks = split_into_chunks(text, settings.LLM_CHUNK_CHARS)
+        costs = [
+            PROMPT_OVERHEAD_TOKENS + estimate_tokens(chunk) + CHUNK_RESPONSE_TOKENS
+            for chunk in chunks
+        ]
+        average_cost = sum(costs) / len(costs)
+        # Pior caso: todo trecho passa por todas as camadas
+        per_tier = settings.LLM_MAX_TOKENS_PER_REVIEW / len(model_tiers())
+        affordable = int(per_tier // average_cost)
+        if affordable == 0:
+            logger.info(
+                f"Long review: no chunk fits the token cap "
+                f"({settings.LLM_MAX_TOKENS_PER_REVIEW}); using the local tier"
+            )
+            return None
+
+        if affordable < len(chunks):
+            if affordable == 1:
+                indexes = [0]
+            else:
+                step = (len(chunks) - 1) / (affordable - 1)
+                indexes = sorted({round(i * step) for i in range(affordable)})
+            logger.info(
+                f"Long review: sending {len(indexes)} of {len(chunks)} chunks "
+                f"(token cap {settings.LLM_MAX_TOKENS_PER_REVIEW})"
+            )
+            chunks = [chunks[i] for i in indexes]
+
+        max_tokens = min(settings.LLM_MAX_TOKENS, CHUNK_RESPONSE_TOKENS)
+        executor = _get_chunk_executor()
+        # Cada trecho roda no contexto de quem chamou (faixa de prioridade etc.)
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                self._analyze_with_tiers, chunk, max_tokens, language, None, budget,
+            )
+            for chunk in chunks
+        ]
+        outcomes = [future.result() for future in futures]
+        result = aggregate_chunk_results(
+            [(len(chunk), outcome[0]) for chunk, outcome in zip(chunks, outcomes)]
+        )
+        if result is None:
+            return None
+        # Versão gravada: a camada mais alta usada em algum trecho
+        tiers = model_tiers()
+        used = [model for _, model in outcomes if model in tiers]
+        model = max(used, key=tiers.index) if used else tiers[-1]
+        return result, model
+
+    def _analyze_with_tiers(
+        self,
+        text: str,
+        max_tokens: Optional[int] = None,
+        language: Optional[str] = None,
+        usage: Optional[dict] = None,
+        budget: Optional[ReviewTokenBudget] = None,
+    ) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+        """
+        Classifica com as camadas de modelos, escalonando quando necessário.
+
+        Cada camada (exceto a última) só tem a resposta aceita se a confiança
+        for ao menos `LLM_ESCALATION_CONFIDENCE`; respostas inválidas ou
+        falhas sempre escalonam. Se nenhuma camada for aceita, vale a
+        resposta válida de maior confiança. O escalonamento para quando a
+        próxima chamada não cabe no orçamento de tokens da avaliação.
+
+        Args:
+            text (str): Texto a ser analisado
+            max_tokens (Optional[int]): Limite de tokens da resposta
+            language (Optional[str]): Idioma do texto
+            usage (Optional[dict]): Se informado, recebe o modelo que
+                respondeu e a latência e os tokens da chamada a esse modelo
+                (as tentativas das demais camadas ficam nas estatísticas por
+                camada, não são atribuídas a ele)
+            budget (Optional[ReviewTokenBudget]): Orçamento de tokens da
+                avaliação (padrão: LLM_MAX_TOKENS_PER_REVIEW)
+
+        Returns:
+            Tuple: ((sentimento, confiança) ou None, modelo que respondeu)
+        """
+        if budget is None:
+            budget = ReviewTokenBudget(settings.LLM_MAX_TOKENS_PER_REVIEW)
+        prompt_tokens = PROMPT_OVERHEAD_TOKENS + estimate_tokens(text)
+        max_tokens = max_tokens or settings.LLM_MAX_TOKENS
+        tiers = model_tiers()
+        stats = get_tier_stats()
+        best = None
+        attempts = {}
+        for position, model in enumerate(tiers):
+            allowed = budget.reserve(prompt_tokens, max_tokens)
+            if allowed is None:
+                logger.info(f"Token cap reached before tier {model}")
+                break
+            attempt = attempts[model] = {}
+            result = self._analyze_with_llm(
+                text, allowed, language, model=model, usage=attempt
+            )
+            reserved = prompt_tokens + allowed
+            used = attempt.get("prompt_tokens", 0) + attempt.get("completion_tokens", 0)
+            # Sem o uso informado pelo provedor, a reserva inteira é gasta
+            budget.settle(reserved, used or reserved)
+            last = position == len(tiers) - 1
+            if result is None:
+                outcome = "invalid"
+            elif last or _confidence(result) >= settings.LLM_ESCALATION_CONFIDENCE:
+                outcome = "accepted"
+            else:
+                outcome = "low_confidence"
+            stats.record(model, attempt, outcome)
+
+            if outcome == "accepted":
+                best = (result, model)
+                break
+            if result is not None and (
+                best is None or _confidence(result) > _confidence(best[0])
+            ):
+                best = (result, model)
+
+        if best is None:
+            return None, None
+        if usage is not None:
+            usage.update(attempts[best[1]])
+        return best
+
+    def analyze_sentiment(
+        self, text: str, language: Optional[str] = None
+    ) -> Tuple[str, str]:
         """
         Analisa o sentimento de um texto usando LLM.
+
+        O idioma define o prompt enviado ao LLM e o léxico local usado como
+        fallback quando o LLM não está disponível ou falha.
         
         Args:
             text (str): Texto a ser analisado
+            language (Optional[str]): Idioma do texto (detectado se omitido)
             
         Returns:
             Tuple[str, str]: Tupla contendo (sentimento, score_confiança)
                 sentimento: 'positiva', 'negativa' ou 'neutra'
                 score_confiança: valor de confiança da análise
         """
+        sentiment, confidence, _, _ = self.analyze_sentiment_versioned(text, language)
+        return sentiment, confidence
+
+    def analyze_sentiment_versioned(
+        self, text: str, language: Optional[str] = None, local_tier: bool = True
+    ) -> Tuple[str, str, str, Optional[str]]:
+        """
+        Analisa o sentimento e informa o que produziu a classificação.
+
+        Args:
+            text (str): Texto a ser analisado
+            language (Optional[str]): Idioma do texto (detectado se omitido)
+            local_tier (bool): Permite ao modelo local responder antes do LLM
+
+        Returns:
+            Tuple[str, str, str, Optional[str]]: (sentimento, confiança,
+                versão do modelo, versão do prompt); a versão do prompt é
+                None quando a classificação não veio do LLM
+        """
         if not text or text.strip() == "":
-            return "neutra", "0.00"
+            return "neutra", "0.00", DEFAULT_MODEL_VERSION, None
         
+        language = language or detect_language(text)
+
         # Tentar análise com LLM primeiro
         if self.use_llm:
-            llm_result = self._analyze_with_llm(text)
+            local_result = local_tier and self._analyze_with_local_tier(text, language)
+            if local_result:
+                return local_result
+            # Limite de tokens somando todas as chamadas ao LLM desta avaliação
+            budget = ReviewTokenBudget(settings.LLM_MAX_TOKENS_PER_REVIEW)
+            if len(text) > settings.LLM_CHUNK_CHARS:
+                long_result = self._analyze_long_text(text, language, budget)
+                llm_result, model = long_result or (None, None)
+            else:
+                shadow = get_shadow_evaluator()
+                usage = {} if shadow and shadow.should_sample() else None
+                llm_result, model = self._analyze_with_tiers(
+                    text, language=language, usage=usage, budget=budget
+                )
+                if usage is not None:
+                    # Modelo candidato: em segundo plano, fora do caminho da resposta
+                    shadow.submit(self, text, language, llm_result, usage)
             if llm_result:
-                logger.debug("Used LLM analysis")
-                return llm_result
-        return "neutra", "0.00"
+                logger.debug(f"Used LLM analysis ({model})")
+                return (*llm_result, model, PROMPT_VERSION)
+
+        return self.analyze_sentiment_local(text, language)
+
+    def _analyze_with_local_tier(
+        self, text: str, language: str
+    ) -> Optional[Tuple[str, str, str, Optional[str]]]:
+        """
+        Camada do modelo local antes do LLM.
+
+        Com `LOCAL_MODEL_ACCEPT_CONFIDENCE` > 0, as previsões do modelo local
+        com ao menos essa confiança são aceitas sem chamar o LLM; as demais
+        escalonam para as camadas do LLM.
+        """
+        if settings.LOCAL_MODEL_ACCEPT_CONFIDENCE <= 0:
+            return None
+        model = get_local_model()
+        if model is None:
+            return None
+        started = time.perf_counter()
+        sentiment, confidence = model.predict([text], [language])[0]
+        accepted = confidence >= settings.LOCAL_MODEL_ACCEPT_CONFIDENCE
+        get_tier_stats().record(
+            model.version,
+            {"latency_ms": (time.perf_counter() - started) * 1000},
+            "accepted" if accepted else "low_confidence",
+        )
+        if not accepted:
+            return None
+        logger.debug(f"Used local model ({model.version})")
+        return sentiment, f"{confidence:.2f}", model.version, None
+
+    def analyze_sentiment_local(
+        self, text: str, language: Optional[str] = None
+    ) -> Tuple[str, str, str, Optional[str]]:
+        """
+        Classifica apenas com a camada local (sem LLM).
+
+        Usado como fallback do LLM e pelo controle de admissão quando o LLM
+        está saturado. Usa o modelo local destilado, se houver e a confiança
+        for ao menos `LOCAL_MODEL_MIN_CONFIDENCE`, e senão o léxico. Retorna
+        o mesmo formato de `analyze_sentiment_versioned`.
+        """
+        if not text or text.strip() == "":
+            return "neutra", "0.00", DEFAULT_MODEL_VERSION, None
+        language = language or detect_language(text)
+
+        model = get_local_model()
+        if model is not None:
+            sentiment, confidence = model.predict([text], [language])[0]
+            if confidence >= settings.LOCAL_MODEL_MIN_CONFIDENCE:
+                logger.debug(f"Used local model ({model.version})")
+                return sentiment, f"{confidence:.2f}", model.version, None
+
+        # Camada local: léxico do idioma
+        if settings.USE_LEXICON_FALLBACK:
+            lexicon_result = analyze_with_lexicon(text, language)
+            if lexicon_result:
+                logger.debug(f"Used lexicon analysis ({language})")
+                return (*lexicon_result, LEXICON_MODEL_VERSION, None)
+        return "neutra", "0.00", DEFAULT_MODEL_VERSION, None
     
     @staticmethod
     def get_sentiment_description(sentiment: str) -> str:
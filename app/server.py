@@ -0,0 +1,183 @@
+"""
+Servidor de produção com múltiplos workers.
+
+A aplicação é importada uma única vez no processo principal (preload) e os
+workers são criados com `fork`, compartilhando o socket de escuta. O orçamento
+de chamadas ao LLM é dividido entre os workers via `app.llm_budget`, usando um
+diretório de estado compartilhado.
+"""
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import uvicorn
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Um worker que cai mais que WORKER_MAX_CRASHES vezes em WORKER_CRASH_WINDOW
+# segundos (ex.: erro ao importar) encerra o servidor em vez de reiniciar
+WORKER_MAX_CRASHES = 5
+WORKER_CRASH_WINDOW = 60.0
+WORKER_MAX_BACKOFF = 30.0
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    """Cria o socket de escuta compartilhado pelos workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, host: str, port: int):
+    """Executa um worker uvicorn no processo filho."""
+    from app.models import engine
+
+    # Conexões herdadas do processo principal não podem ser reutilizadas
+    engine.dispose(close=False)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    config = uvicorn.Config(app, host=host, port=port, log_level="info")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def _restart_delay(crashes: List[float], now: float) -> Optional[float]:
+    """
+    Registra uma queda e calcula a espera antes de reiniciar o worker.
+
+    Args:
+        crashes (List[float]): Instantes das quedas recentes (atualizada)
+        now (float): Instante da queda atual (time.monotonic)
+
+    Returns:
+        Optional[float]: Espera em segundos (backoff exponencial), ou None se
+            o worker caiu vezes demais dentro da janela
+    """
+    crashes[:] = [t for t in crashes if now - t < WORKER_CRASH_WINDOW]
+    crashes.append(now)
+    if len(crashes) > WORKER_MAX_CRASHES:
+        return None
+    return min(WORKER_MAX_BACKOFF, 2.0 ** (len(crashes) - 1))
+
+
+def serve(workers: int = 1, host: str = None, port: int = None):
+    """
+    Inicia a API com um ou mais workers.
+
+    Args:
+        workers (int): Número de processos worker
+        host (str): Endereço de escuta (padrão: settings.HOST)
+        port (int): Porta de escuta (padrão: settings.PORT)
+    """
+    host = host or settings.HOST
+    port = port or settings.PORT
+
+    if workers <= 1 or settings.DEBUG:
+        uvicorn.run("app.main:app", host=host, port=port, reload=settings.DEBUG)
+        return
+
+    if not hasattr(os, "fork"):
+        logger.warning("fork indisponível; usando os workers do próprio uvicorn")
+        uvicorn.run("app.main:app", host=host, port=port, workers=workers)
+        return
+
+    # O orçamento do LLM e os contadores de /reviews/stats/live precisam de um
+    # diretório comum a todos os workers
+    budget_dir = None
+    if not settings.LLM_BUDGET_DIR:
+        budget_dir = tempfile.mkdtemp(prefix="sentiment-llm-budget-")
+        settings.LLM_BUDGET_DIR = budget_dir
+    try:
+        exit_code = _serve_forked(workers, host, port)
+    finally:
+        if budget_dir:
+            shutil.rmtree(budget_dir, ignore_errors=True)
+    sys.exit(exit_code)
+
+
+def _serve_forked(workers: int, host: str, port: int) -> int:
+    """Processo principal: cria os workers e os reinicia quando caem."""
+    # Os logs do processo principal seguem o formato dos workers (uvicorn)
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+
+    # Preload: importa a aplicação uma vez, antes do fork
+    from app.main import app
+
+    sock = _bind_socket(host, port)
+    children = {}
+    crashes = {}
+    stopping = False
+    exit_code = 0
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, host, port)
+            finally:
+                os._exit(0)
+        children[pid] = index
+        logger.info(f"Worker {index} iniciado (pid={pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for index in range(workers):
+        spawn(index)
+
+    logger.info(f"🚀 Servindo em http://{host}:{port} com {workers} workers")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if stopping:
+            continue
+        delay = _restart_delay(crashes.setdefault(index, []), time.monotonic())
+        if delay is None:
+            logger.error(
+                f"Worker {index} (pid={pid}) caiu mais de {WORKER_MAX_CRASHES} "
+                f"vezes em {WORKER_CRASH_WINDOW:.0f}s; encerrando o servidor"
+            )
+            exit_code = 1
+            stop(None, None)
+            continue
+        logger.warning(
+            f"Worker {index} (pid={pid}) encerrou; reiniciando em {delay:.0f}s"
+        )
+        time.sleep(delay)
+        if not stopping:
+            spawn(index)
+
+    sock.close()
+    return exit_code
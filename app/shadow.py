@@ -0,0 +1,195 @@
+"""
+Avaliação em sombra (shadow) de um modelo candidato no tráfego real.
+
+Com `SHADOW_MODEL` definido, uma amostra (`SHADOW_SAMPLE_RATE`) das
+avaliações classificadas pelo modelo principal é enviada também ao modelo
+candidato, em um pool de threads próprio e depois que a resposta principal
+já foi obtida: a latência da requisição não muda. Os resultados da sombra
+nunca são gravados; servem apenas para comparar latência, tokens e
+concordância de rótulos entre os modelos (`GET /api/v1/llm/shadow`).
+
+As chamadas da sombra usam a faixa `bulk` do orçamento do LLM e são
+descartadas (contadas em `dropped`) quando já há `SHADOW_MAX_PENDING`
+chamadas pendentes. As estatísticas são mantidas em memória, por worker.
+"""
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app.config import settings
+from app.llm_budget import BULK, llm_lane
+from app.llm_stats import ModelUsageStats
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowEvaluator:
+    """
+    Envia amostras ao modelo candidato e compara com o modelo principal.
+
+    Args:
+        model (str): Modelo candidato
+        sample_rate (float): Fração das requisições enviadas à sombra (0 a 1)
+        concurrency (int): Chamadas simultâneas da sombra
+        max_pending (int): Chamadas pendentes antes de descartar amostras
+    """
+
+    def __init__(
+        self,
+        model: str,
+        sample_rate: float,
+        concurrency: int = 2,
+        max_pending: int = 100,
+    ):
+        self.model = model
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, concurrency), thread_name_prefix="llm-shadow"
+        )
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self.sampled = 0
+        self.dropped = 0
+        self._models: Dict[str, ModelUsageStats] = {}
+        self._pairs = 0
+        self._agreements = 0
+        self._confusion: Dict[str, Dict[str, int]] = {}
+
+    def should_sample(self) -> bool:
+        """Sorteia se a requisição atual entra na amostra."""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def submit(
+        self, analyzer, text: str, language: Optional[str], primary, usage: dict
+    ):
+        """
+        Agenda a classificação pela sombra, sem bloquear quem chamou.
+
+        Args:
+            analyzer: SentimentAnalyzer usado para chamar o modelo candidato
+            text (str): Texto classificado
+            language (Optional[str]): Idioma do texto
+            primary: (sentimento, confiança) do modelo principal ou None
+            usage (dict): Latência e tokens da chamada principal
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending += 1
+            self.sampled += 1
+        try:
+            self._executor.submit(self._run, analyzer, text, language, primary, usage)
+        except RuntimeError:
+            # Executor encerrado (shutdown do processo)
+            self._done()
+
+    def _run(self, analyzer, text, language, primary, primary_usage):
+        try:
+            shadow_usage = {}
+            with llm_lane(BULK):
+                shadow = analyzer._analyze_with_llm(
+                    text, language=language, model=self.model, usage=shadow_usage
+                )
+            self.record(
+                primary_usage.get("model"), primary, primary_usage, shadow, shadow_usage
+            )
+        except Exception as e:
+            logger.warning(f"Shadow evaluation failed: {e}")
+        finally:
+            self._done()
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+            if not self._pending:
+                self._idle.notify_all()
+
+    def record(self, primary_model, primary, primary_usage, shadow, shadow_usage):
+        """Registra uma comparação entre o modelo principal e a sombra."""
+        primary_model = primary_model or settings.GROQ_MODEL
+        with self._lock:
+            for model, result, usage in (
+                (primary_model, primary, primary_usage),
+                (self.model, shadow, shadow_usage),
+            ):
+                stats = self._models.setdefault(model, ModelUsageStats())
+                stats.add(usage, result is not None)
+            if primary is not None and shadow is not None:
+                self._pairs += 1
+                self._agreements += primary[0] == shadow[0]
+                row = self._confusion.setdefault(primary[0], {})
+                row[shadow[0]] = row.get(shadow[0], 0) + 1
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda o fim das chamadas pendentes (testes e shutdown)."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def report(self) -> dict:
+        """Comparação entre os modelos nas requisições amostradas."""
+        with self._lock:
+            return {
+                "enabled": True,
+                "primary_model": settings.GROQ_MODEL,
+                "shadow_model": self.model,
+                "sample_rate": self.sample_rate,
+                "sampled": self.sampled,
+                "pending": self._pending,
+                "dropped": self.dropped,
+                "models": {
+                    model: stats.as_dict() for model, stats in self._models.items()
+                },
+                "agreement": {
+                    "pairs": self._pairs,
+                    "agreements": self._agreements,
+                    "rate": (
+                        round(self._agreements / self._pairs, 4)
+                        if self._pairs
+                        else None
+                    ),
+                    "confusion": {
+                        primary: dict(row) for primary, row in self._confusion.items()
+                    },
+                },
+            }
+
+
+_shadow_evaluator: Optional[ShadowEvaluator] = None
+_shadow_lock = threading.Lock()
+
+
+def get_shadow_evaluator() -> Optional[ShadowEvaluator]:
+    """Avaliador em sombra do processo (None se SHADOW_MODEL não estiver definido)."""
+    global _shadow_evaluator
+    if not settings.SHADOW_MODEL or settings.SHADOW_SAMPLE_RATE <= 0:
+        return None
+    if _shadow_evaluator is None or _shadow_evaluator.model != settings.SHADOW_MODEL:
+        with _shadow_lock:
+            if (
+                _shadow_evaluator is None
+                or _shadow_evaluator.model != settings.SHADOW_MODEL
+            ):
+                _shadow_evaluator = ShadowEvaluator(
+                    settings.SHADOW_MODEL,
+                    settings.SHADOW_SAMPLE_RATE,
+                    concurrency=settings.SHADOW_CONCURRENCY,
+                    max_pending=settings.SHADOW_MAX_PENDING,
+                )
+                logger.info(
+                    f"Shadow evaluation: {settings.SHADOW_MODEL} "
+                    f"({settings.SHADOW_SAMPLE_RATE:.0%} of requests)"
+                )
+    return _shadow_evaluator
+
+
+def shadow_report() -> dict:
+    """Relatório da avaliação em sombra (ou indicação de que está desligada)."""
+    evaluator = get_shadow_evaluator()
+    if evaluator is None:
+        return {"enabled": False, "primary_model": settings.GROQ_MODEL}
+    return evaluator.report()
@@ -0,0 +1,215 @@
+"""
+Tempos por fase de cada requisição.
+
+O `TimingMiddleware` cria um registro de tempos por requisição (em uma
+context var) e, ao responder, envia as fases no cabeçalho `Server-Timing` e
+grava uma linha de access log em JSON no logger `app.access`. As rotas
+marcam suas fases com `phase("llm")`, `phase("db")` etc.; a fase
+`validation` (leitura do corpo, validação e dependências) e a
+`serialization` (da saída do endpoint ao início da resposta) são medidas
+pela `TimedRoute`.
+
+Exemplo de cabeçalho:
+    Server-Timing: validation;dur=0.4, llm;dur=812.0, db;dur=3.1,
+                   serialization;dur=0.2, total;dur=816.3
+"""
+import functools
+import inspect
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi.routing import APIRoute
+
+from app.config import settings
+
+access_logger = logging.getLogger("app.access")
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class RequestTimings:
+    """Acumula a duração (ms) de cada fase de uma requisição."""
+
+    __slots__ = ("started", "phases", "endpoint_finished")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.endpoint_finished: Optional[float] = None
+
+    def add(self, name: str, milliseconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + milliseconds
+
+    def elapsed(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total: float) -> str:
+        """Valor do cabeçalho Server-Timing."""
+        metrics = [
+            f"{name};dur={duration:.2f}" for name, duration in self.phases.items()
+        ]
+        metrics.append(f"total;dur={total:.2f}")
+        return ", ".join(metrics)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Registro de tempos da requisição atual (None fora de requisições)."""
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Mede um trecho como uma fase da requisição atual.
+
+    Fora de uma requisição (scripts, testes unitários) não faz nada. Fases
+    repetidas são somadas.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000)
+
+
+def _timed_endpoint(endpoint):
+    """Envolve o endpoint para medir validação (antes) e serialização (depois)."""
+
+    def on_enter():
+        timings = _current.get()
+        if timings is not None:
+            # Do início da requisição até aqui: corpo, validação e dependências
+            timings.add("validation", timings.elapsed())
+        return timings
+
+    def on_exit(timings):
+        if timings is not None:
+            timings.endpoint_finished = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            timings = on_enter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                on_exit(timings)
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            timings = on_enter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                on_exit(timings)
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute que registra as fases de validação e serialização."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+class TimingMiddleware:
+    """
+    Middleware ASGI que publica os tempos por fase de cada requisição.
+
+    Args:
+        app: Aplicação ASGI
+        server_timing (bool): Envia o cabeçalho Server-Timing
+        access_log (bool): Grava a linha de access log em JSON
+    """
+
+    def __init__(self, app, server_timing: bool = True, access_log: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+        self.access_log = access_log
+        if access_log and not access_logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            access_logger.addHandler(handler)
+            access_logger.setLevel(logging.INFO)
+            access_logger.propagate = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        state = {"status": None, "bytes": 0}
+
+        async def send_with_timings(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                if timings.endpoint_finished is not None:
+                    timings.add(
+                        "serialization",
+                        (time.perf_counter() - timings.endpoint_finished) * 1000,
+                    )
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append(
+                        (
+                            b"server-timing",
+                            timings.server_timing(timings.elapsed()).encode("latin-1"),
+                        )
+                    )
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _current.reset(token)
+            if self.access_log:
+                self._log(scope, timings, state)
+
+    @staticmethod
+    def _log(scope, timings: RequestTimings, state: dict):
+        client = scope.get("client")
+        record = {
+            "ts": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "status": state["status"] or 500,
+            "duration_ms": round(timings.elapsed(), 2),
+            "bytes": state["bytes"],
+            "phases": {name: round(value, 2) for name, value in timings.phases.items()},
+            "client": client[0] if client else None,
+        }
+        # Cliente identificado pela API key (ver app.rate_limit)
+        api_client = scope.get("state", {}).get("api_client")
+        if api_client:
+            record["api_client"] = api_client
+        access_logger.info(json.dumps(record, separators=(",", ":")))
+
+
+def add_timing_middleware(app):
+    """Registra o TimingMiddleware conforme as configurações."""
+    if settings.SERVER_TIMING_ENABLED or settings.ACCESS_LOG_ENABLED:
+        app.add_middleware(
+            TimingMiddleware,
+            server_timing=settings.SERVER_TIMING_ENABLED,
+            access_log=settings.ACCESS_LOG_ENABLED,
+        )
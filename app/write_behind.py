@@ -0,0 +1,440 @@
+"""
+Persistência write-behind das avaliações.
+
+Com `WRITE_BEHIND_ENABLED=True`, cada avaliação classificada é gravada em um
+spool local (arquivo JSONL só de anexação, com fsync) e confirmada
+imediatamente com um ID pré-alocado. Uma thread em segundo plano insere os
+registros do spool no banco em lotes multi-linha. Na inicialização, spools
+deixados por processos encerrados (queda do worker ou do banco) são
+reprocessados; as inserções ignoram IDs já existentes, então o replay é
+idempotente.
+
+Layout do diretório de spool (`WRITE_BEHIND_DIR`):
+    spool-<pid>.jsonl            segmento ativo de um worker (travado com flock)
+    spool-<pid>-<ts>-<n>.ready   segmento selado aguardando inserção
+    *.claimed-<pid>              segmento em processamento pelo worker <pid>
+    *.failed                     segmento em quarentena (não pôde ser inserido)
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.config import settings
+from app.models import Review, engine
+
+logger = logging.getLogger(__name__)
+
+
+def _pid_alive(pid: int) -> bool:
+    """Verifica se um processo ainda está em execução."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _try_lock(fd) -> bool:
+    """Tenta travar um arquivo de forma exclusiva e não bloqueante."""
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - plataformas sem flock
+        return True
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+class IdAllocator:
+    """
+    Pré-aloca IDs de avaliações em blocos.
+
+    No PostgreSQL os IDs são retirados da sequence da tabela, de modo que
+    vários workers nunca colidem. Nos demais bancos (SQLite) os IDs partem do
+    maior ID existente e só são seguros com um único processo escritor.
+    """
+
+    def __init__(self, bind, block_size: int = 100):
+        self.bind = bind
+        self.block_size = block_size
+        self._ids = deque()
+        self._last_local = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        table = Review.__table__.name
+        with self.bind.connect() as connection:
+            if self.bind.dialect.name == "postgresql":
+                rows = connection.execute(
+                    text(
+                        f"SELECT nextval(pg_get_serial_sequence('{table}', 'id')) "
+                        "FROM generate_series(1, :n)"
+                    ),
+                    {"n": self.block_size},
+                )
+                self._ids.extend(sorted(row[0] for row in rows))
+                return
+
+            max_id = connection.execute(select(func.max(Review.id))).scalar() or 0
+        start = max(max_id, self._last_local) + 1
+        self._ids.extend(range(start, start + self.block_size))
+        self._last_local = start + self.block_size - 1
+
+    def next_id(self) -> int:
+        """Retorna o próximo ID reservado."""
+        with self._lock:
+            if not self._ids:
+                self._refill()
+            return self._ids.popleft()
+
+
+class ReviewSpool:
+    """
+    Arquivo de spool só de anexação, com fsync em grupo.
+
+    Escritas concorrentes compartilham o mesmo fsync: quem chega ao fsync
+    depois de outra thread já ter sincronizado sua linha não sincroniza de
+    novo.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True):
+        self.directory = directory
+        self.fsync = fsync
+        self.path = os.path.join(directory, f"spool-{os.getpid()}.jsonl")
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._segments = 0
+        self.pending = 0
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        _try_lock(self._file.fileno())
+
+    def append(self, record: dict):
+        """Anexa um registro ao spool e garante sua durabilidade."""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._write_lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._written += 1
+            self.pending += 1
+            sequence = self._written
+            fd = self._file.fileno()
+
+        if self.fsync:
+            with self._sync_lock:
+                if self._synced < sequence:
+                    with self._write_lock:
+                        target = self._written
+                        fd = self._file.fileno()
+                    os.fsync(fd)
+                    self._synced = target
+
+    def rotate(self) -> Optional[str]:
+        """
+        Sela o segmento ativo e abre um novo.
+
+        Returns:
+            Optional[str]: Caminho do segmento selado, ou None se vazio
+        """
+        with self._sync_lock, self._write_lock:
+            if self.pending == 0:
+                return None
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._segments += 1
+            # O timestamp evita colisão com segmentos de uma execução anterior
+            # que tenha recebido o mesmo PID (comum em containers)
+            sealed = os.path.join(
+                self.directory,
+                f"spool-{os.getpid()}-{time.time_ns()}-{self._segments}.ready",
+            )
+            os.rename(self.path, sealed)
+            self.pending = 0
+            self._synced = self._written
+            self._open()
+            return sealed
+
+    def close(self):
+        """Fecha o segmento ativo."""
+        with self._write_lock:
+            self._file.close()
+
+
+class WriteBehindWriter:
+    """
+    Confirma avaliações via spool local e as insere no banco em lotes.
+
+    Args:
+        bind: Engine de destino (padrão: engine da aplicação)
+        directory (str): Diretório do spool
+        batch_size (int): Registros por INSERT multi-linha
+        flush_interval (float): Intervalo máximo entre flushes, em segundos
+    """
+
+    def __init__(
+        self,
+        bind=None,
+        directory: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        fsync: Optional[bool] = None,
+    ):
+        self.bind = bind or engine
+        self.directory = directory or settings.WRITE_BEHIND_DIR
+        self.batch_size = batch_size or settings.WRITE_BEHIND_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.WRITE_BEHIND_FLUSH_INTERVAL
+        self.fsync = settings.WRITE_BEHIND_FSYNC if fsync is None else fsync
+        self.allocator = IdAllocator(self.bind, block_size=self.batch_size)
+        self.spool = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        # Registros descartados por conflitos na inserção (ver _insert_batch)
+        self.dropped = 0
+        # Segmentos movidos para quarentena (ver _load_segments)
+        self.quarantined = 0
+
+    def start(self):
+        """Reprocessa spools órfãos e inicia a thread de flush."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.spool = ReviewSpool(self.directory, fsync=self.fsync)
+        replayed = self.replay()
+        if replayed:
+            logger.info(f"Write-behind replay: {replayed} reviews recovered")
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Interrompe a thread de flush e grava os registros pendentes."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+        self.flush()
+        if self.spool:
+            self.spool.close()
+            if os.path.exists(self.spool.path) and not os.path.getsize(self.spool.path):
+                os.remove(self.spool.path)
+
+    def submit(self, values: dict) -> int:
+        """
+        Grava uma avaliação no spool e retorna seu ID pré-alocado.
+
+        Args:
+            values (dict): customer_name, review_text, sentiment,
+                confidence_score e, opcionalmente, o "id" já reservado com
+                `allocator.next_id()`
+
+        Returns:
+            int: ID definitivo da avaliação
+        """
+        record = dict(values)
+        review_id = record.get("id") or self.allocator.next_id()
+        record["id"] = review_id
+        record.setdefault("created_at", datetime.utcnow())
+        record["created_at"] = record["created_at"].isoformat()
+        self.spool.append(record)
+
+        if self.spool.pending >= self.batch_size:
+            self._wakeup.set()
+        return review_id
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # O segmento fica no disco e é reprocessado no próximo ciclo
+                logger.error(f"Write-behind flush failed: {e}")
+
+    def flush(self) -> int:
+        """
+        Insere no banco o segmento ativo e segmentos pendentes deste processo.
+
+        Returns:
+            int: Número de registros processados
+        """
+        with self._flush_lock:
+            if self.spool:
+                self.spool.rotate()
+            pid = os.getpid()
+            pattern = os.path.join(self.directory, f"spool-{pid}-*.ready")
+            claimed = glob.glob(os.path.join(self.directory, f"*.claimed-{pid}"))
+            segments = claimed + [self._claim(p) for p in sorted(glob.glob(pattern))]
+            return self._load_segments([p for p in segments if p])
+
+    def replay(self) -> int:
+        """
+        Reprocessa spools deixados por processos que não estão mais ativos.
+
+        Returns:
+            int: Número de registros processados
+        """
+        segments = []
+        own_pid = os.getpid()
+        for path in sorted(glob.glob(os.path.join(self.directory, "spool-*"))):
+            name = os.path.basename(path)
+            if name.endswith(".jsonl"):
+                if path == self.spool.path or not self._is_orphan_spool(path):
+                    continue
+            elif ".claimed-" in name:
+                pid = int(name.rsplit("-", 1)[1])
+                if pid != own_pid and _pid_alive(pid):
+                    continue
+            elif not name.endswith(".ready"):
+                continue
+
+            claimed = self._claim(path)
+            if claimed:
+                segments.append(claimed)
+        return self._load_segments(segments)
+
+    def _load_segments(self, paths) -> int:
+        """
+        Insere cada segmento, isolando os que não podem ser inseridos.
+
+        Falhas de conexão com o banco interrompem o ciclo (os segmentos ficam
+        no disco para o próximo); qualquer outro erro move o segmento para
+        quarentena (`.failed`) sem impedir a inserção dos seguintes.
+        """
+        processed = 0
+        for path in paths:
+            try:
+                processed += self._load_segment(path)
+            except (OperationalError, InterfaceError):
+                raise
+            except Exception as e:
+                failed = f"{path.split('.claimed-')[0]}.failed"
+                os.replace(path, failed)
+                self.quarantined += 1
+                logger.error(f"Write-behind: segment quarantined as {failed}: {e}")
+        return processed
+
+    @staticmethod
+    def _is_orphan_spool(path: str) -> bool:
+        """Um spool ativo é órfão se nenhum processo mantém o flock nele."""
+        with open(path, "a") as spool_file:
+            return _try_lock(spool_file.fileno())
+
+    @staticmethod
+    def _claim(path: str) -> Optional[str]:
+        """Reivindica um segmento renomeando-o (operação atômica)."""
+        base = path.split(".claimed-")[0]
+        claimed = f"{base}.claimed-{os.getpid()}"
+        if claimed == path:
+            return path
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _load_segment(self, path: str) -> int:
+        """Insere os registros de um segmento em lotes e o remove."""
+        records = []
+        with open(path, encoding="utf-8") as segment:
+            for line in segment:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Linha parcial de uma queda durante a escrita
+                    logger.warning(f"Ignoring corrupt spool line in {path}")
+                    continue
+                record["created_at"] = datetime.fromisoformat(record["created_at"])
+                records.append(record)
+
+        for start in range(0, len(records), self.batch_size):
+            self._insert_batch(records[start:start + self.batch_size])
+
+        os.remove(path)
+        return len(records)
+
+    def _insert_batch(self, records):
+        """INSERT multi-linha que ignora IDs já gravados (replay idempotente)."""
+        table = Review.__table__
+        dialect = self.bind.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+
+        if dialect_insert is not None:
+            # Sem alvo explícito: a chave primária é (id, created_at) quando a
+            # tabela está particionada
+            statement = dialect_insert(table).on_conflict_do_nothing()
+        else:
+            statement = insert(table)
+
+        with self.bind.begin() as connection:
+            connection.execute(statement, records)
+            if dialect_insert is None:
+                return
+            # IDs já gravados (replay) são esperados; um registro cujo ID não
+            # está na tabela foi descartado por outro conflito (ex.: índice
+            # único de idempotency_key) e seu ID confirmado não existe
+            ids = [record["id"] for record in records]
+            stored = set(
+                connection.execute(
+                    select(Review.id).where(Review.id.in_(ids))
+                ).scalars()
+            )
+        dropped = [review_id for review_id in ids if review_id not in stored]
+        if dropped:
+            self.dropped += len(dropped)
+            logger.error(
+                f"Write-behind: {len(dropped)} reviews dropped by insert conflicts "
+                f"(ids {dropped[:10]})"
+            )
+
+
+_writer: Optional[WriteBehindWriter] = None
+
+
+def start_write_behind(bind=None) -> WriteBehindWriter:
+    """Cria e inicia o writer do processo."""
+    global _writer
+    _writer = WriteBehindWriter(bind=bind)
+    _writer.start()
+    return _writer
+
+
+def stop_write_behind():
+    """Encerra o writer do processo, gravando os registros pendentes."""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def get_write_behind_writer() -> Optional[WriteBehindWriter]:
+    """Retorna o writer ativo, ou None se o modo write-behind estiver desligado."""
+    return _writer
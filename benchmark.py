@@ -0,0 +1,327 @@
+"""
+Benchmarks da Sentiment Analysis API.
+
+Uso:
+    python benchmark.py startup [--runs 5]
+    python benchmark.py serialize [--rows 1000] [--runs 20]
+    python benchmark.py inserts [--rows 2000] [--concurrency 16]
+    python benchmark.py wire [--rows 1000] [--runs 20]
+    python benchmark.py ratelimit [--checks 100000] [--lease 20]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Adicionar o diretório da aplicação ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _run_python(code: str) -> float:
+    """Executa um trecho em um interpretador novo e retorna o tempo medido."""
+    output = subprocess.check_output(
+        [sys.executable, "-c", code], cwd=ROOT_DIR, text=True
+    )
+    return float(output.strip().splitlines()[-1])
+
+
+def bench_startup(args):
+    """Mede o tempo de importação de `app.main` e do startup (lifespan)."""
+    import_code = (
+        "import time; t = time.perf_counter(); import app.main; "
+        "print(time.perf_counter() - t)"
+    )
+    startup_code = (
+        "import time; t = time.perf_counter(); import app.main; "
+        "from fastapi.testclient import TestClient\n"
+        "with TestClient(app.main.app):\n"
+        "    pass\n"
+        "print(time.perf_counter() - t)"
+    )
+
+    import_times = [_run_python(import_code) for _ in range(args.runs)]
+    startup_times = [_run_python(startup_code) for _ in range(args.runs)]
+
+    print(f"📦 Import de app.main (mediana de {args.runs}): "
+          f"{statistics.median(import_times) * 1000:.1f} ms")
+    print(f"🚀 Import + startup (mediana de {args.runs}): "
+          f"{statistics.median(startup_times) * 1000:.1f} ms")
+
+
+def _create_engine(database_url: str = None):
+    """Cria a engine do benchmark (SQLite temporário por padrão)."""
+    import tempfile
+
+    from sqlalchemy import create_engine
+
+    from app.models import Base
+
+    if not database_url:
+        path = os.path.join(tempfile.mkdtemp(prefix="sentiment-bench-"), "bench.db")
+        database_url = f"sqlite:///{path}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _create_sample_database(rows: int):
+    """Cria um banco SQLite temporário com avaliações sintéticas."""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import insert
+
+    from app.models import Review
+
+    engine = _create_engine()
+
+    now = datetime.utcnow()
+    sentiments = ["positiva", "negativa", "neutra"]
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Review.__table__),
+            [
+                {
+                    "customer_name": f"Cliente {i}",
+                    "review_text": "Atendimento muito bom, recomendo! " * 4,
+                    "sentiment": sentiments[i % 3],
+                    "confidence_score": "0.90",
+                    "created_at": now - timedelta(minutes=i),
+                }
+                for i in range(rows)
+            ],
+        )
+    return engine
+
+
+def _time_per_call(func, runs: int) -> float:
+    """Retorna a mediana do tempo de execução de `func` em segundos."""
+    func()  # aquecimento
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def bench_serialize(args):
+    """Compara a serialização de GET /reviews: ORM + Pydantic vs linhas + orjson."""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import select
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Review
+    from app.responses import render_json, rows_to_dicts
+    from app.routes import REVIEW_COLUMNS
+    from app.schemas import ReviewResponse
+
+    engine = _create_sample_database(args.rows)
+    session = sessionmaker(bind=engine)()
+
+    def orm_path():
+        # Caminho anterior: objetos ORM, validação from_attributes e json padrão
+        reviews = session.query(Review).limit(args.rows).all()
+        validated = [ReviewResponse.model_validate(r) for r in reviews]
+        JSONResponse(content=jsonable_encoder(validated)).body
+        session.expunge_all()
+
+    def fast_path():
+        rows = session.execute(
+            select(*REVIEW_COLUMNS).order_by(Review.id).limit(args.rows)
+        ).mappings()
+        render_json(rows_to_dicts(rows)).body
+
+    before = _time_per_call(orm_path, args.runs)
+    after = _time_per_call(fast_path, args.runs)
+    session.close()
+
+    print(f"🐢 ORM + Pydantic + json: {args.rows / before:,.0f} linhas/s "
+          f"({before * 1000:.1f} ms por página)")
+    print(f"🚀 Core select + orjson: {args.rows / after:,.0f} linhas/s "
+          f"({after * 1000:.1f} ms por página)")
+    print(f"📈 Ganho: {before / after:.1f}x")
+
+
+def bench_inserts(args):
+    """Compara commit por avaliação com o modo write-behind (spool + lotes)."""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Review
+    from app.write_behind import WriteBehindWriter
+
+    values = {
+        "customer_name": "Cliente",
+        "review_text": "Atendimento excelente, recomendo!",
+        "sentiment": "positiva",
+        "confidence_score": "0.90",
+    }
+
+    engine = _create_engine(args.database_url)
+    Session = sessionmaker(bind=engine)
+
+    def insert_sync(_):
+        # Caminho síncrono: uma transação (e um fsync no banco) por avaliação
+        session = Session()
+        try:
+            review = Review(**values)
+            session.add(review)
+            session.flush()
+            review.id
+            session.commit()
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        list(executor.map(insert_sync, range(args.rows)))
+    sync_elapsed = time.perf_counter() - started
+
+    writer = WriteBehindWriter(
+        bind=_create_engine(args.database_url),
+        directory=tempfile.mkdtemp(prefix="sentiment-spool-"),
+    )
+    writer.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        list(executor.map(lambda _: writer.submit(values), range(args.rows)))
+    ack_elapsed = time.perf_counter() - started
+    writer.stop()
+    total_elapsed = time.perf_counter() - started
+
+    print(f"🐢 Commit por avaliação: {args.rows / sync_elapsed:,.0f} inserts/s")
+    print(f"🚀 Write-behind (confirmação): {args.rows / ack_elapsed:,.0f} inserts/s")
+    print(f"🚀 Write-behind (até o banco): {args.rows / total_elapsed:,.0f} inserts/s")
+    print(f"📈 Ganho: {sync_elapsed / total_elapsed:.1f}x")
+
+
+def bench_wire(args):
+    """Bytes enviados e tempo de leitura no cliente de GET /reviews por formato."""
+    import json
+    import zlib
+
+    from sqlalchemy import select
+
+    from app.compression import _Compressor, brotli
+    from app.responses import MsgPackResponse, msgpack, render_json, rows_to_dicts
+    from app.routes import REVIEW_COLUMNS
+
+    engine = _create_sample_database(args.rows)
+    with engine.connect() as connection:
+        rows = rows_to_dicts(
+            connection.execute(select(*REVIEW_COLUMNS).limit(args.rows)).mappings()
+        )
+
+    bodies = {"json": (render_json(rows).body, json.loads)}
+    if msgpack is not None:
+        bodies["msgpack"] = (MsgPackResponse(rows).body, msgpack.unpackb)
+    decoders = {
+        "identity": lambda data: data,
+        "gzip": lambda data: zlib.decompress(data, 31),
+    }
+    if brotli is not None:
+        decoders["br"] = brotli.decompress
+
+    baseline = len(bodies["json"][0])
+    for name, (body, parse) in bodies.items():
+        for encoding, decode in decoders.items():
+            wire = body
+            if encoding != "identity":
+                wire = _Compressor(encoding, 6, 4).compress(body, final=True)
+            elapsed = _time_per_call(lambda: parse(decode(wire)), args.runs)
+            print(
+                f"📦 {name:8} {encoding:8} {len(wire):>10,} bytes "
+                f"({len(wire) / baseline:6.1%}), leitura {elapsed * 1000:.2f} ms"
+            )
+
+
+def bench_ratelimit(args):
+    """Custo por requisição da identificação, do token bucket e da cota."""
+    import asyncio
+
+    from app.rate_limit import DatabaseQuotaStore, RateLimiter, parse_api_keys
+
+    clients = parse_api_keys(
+        "bench:chave", rate_per_minute=1e12, burst=1e12, daily_quota=10**12
+    )
+    stores = {
+        "memória": None,
+        "banco": DatabaseQuotaStore(_create_engine()),
+    }
+
+    async def run(limiter):
+        started = time.perf_counter()
+        for _ in range(args.checks):
+            await limiter.check(limiter.identify("chave"))
+        return time.perf_counter() - started
+
+    for name, store in stores.items():
+        limiter = RateLimiter(clients, store=store, lease_size=args.lease)
+        elapsed = asyncio.run(run(limiter))
+        print(f"🔑 Cota em {name:8} {elapsed / args.checks * 1e6:.2f} µs/requisição")
+
+
+def build_parser():
+    """Monta o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Benchmarks da API")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    startup_parser = subparsers.add_parser(
+        "startup", help="Tempo de importação e inicialização da aplicação"
+    )
+    startup_parser.add_argument("--runs", type=int, default=5)
+    startup_parser.set_defaults(func=bench_startup)
+
+    serialize_parser = subparsers.add_parser(
+        "serialize", help="Linhas/s serializadas por GET /reviews"
+    )
+    serialize_parser.add_argument("--rows", type=int, default=1000)
+    serialize_parser.add_argument("--runs", type=int, default=20)
+    serialize_parser.set_defaults(func=bench_serialize)
+
+    inserts_parser = subparsers.add_parser(
+        "inserts", help="Throughput de inserção: síncrono vs write-behind"
+    )
+    inserts_parser.add_argument("--rows", type=int, default=2000)
+    inserts_parser.add_argument("--concurrency", type=int, default=16)
+    inserts_parser.add_argument(
+        "--database-url", default=None, help="Banco de destino (padrão: SQLite)"
+    )
+    inserts_parser.set_defaults(func=bench_inserts)
+
+    wire_parser = subparsers.add_parser(
+        "wire", help="Bytes e tempo de leitura: JSON/MessagePack × gzip/brotli"
+    )
+    wire_parser.add_argument("--rows", type=int, default=1000)
+    wire_parser.add_argument("--runs", type=int, default=20)
+    wire_parser.set_defaults(func=bench_wire)
+
+    ratelimit_parser = subparsers.add_parser(
+        "ratelimit", help="Custo por requisição do limite de taxa e da cota por API key"
+    )
+    ratelimit_parser.add_argument("--checks", type=int, default=100000)
+    ratelimit_parser.add_argument(
+        "--lease", type=int, default=20, help="Reserva de cota por consulta ao banco"
+    )
+    ratelimit_parser.set_defaults(func=bench_ratelimit)
+
+    return parser
+
+
+def main():
+    """Função principal."""
+    args = build_parser().parse_args()
+    started = time.perf_counter()
+    args.func(args)
+    print(f"⏱️ Benchmark concluído em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,39 @@
 """
-Script para gerar dados de teste para a API de análise de sentimento.
+Gerador de carga e de dados de teste para a API de análise de sentimento.
+
+Gera carga em malha aberta (open loop): as requisições são disparadas em
+horários planejados a partir da taxa alvo (`--rps`), independentemente de as
+anteriores já terem respondido, e a latência é medida a partir do horário
+planejado. Assim, lentidão do servidor aparece como latência em vez de
+reduzir a carga enviada (sem "coordinated omission"). `--concurrency` limita
+as requisições em andamento; a espera por uma vaga conta como latência.
+
+Cada requisição vira uma linha em `test_results_<timestamp>.jsonl` (operação,
+status, latência, erro e, nos POSTs, o sentimento esperado e o predito), que
+o `analyze_test_results.py` consome.
+
+Uso:
+    python generate_test_data.py
+    python generate_test_data.py --rps 50 --duration 60 --concurrency 200 \
+        --mix post=70,list=20,report=10
 """
-import requests
+import argparse
+import asyncio
 import json
+import random
+import sys
 import time
 from datetime import datetime, timedelta
-import random
+
+import httpx
+
+from analyze_test_results import StreamingMetrics, print_load_summary
 
 # Configurações
 API_BASE_URL = "http://localhost:8000/api/v1"
 
+OPERATIONS = ("post", "list", "report")
+
 # Dados de teste com diferentes sentimentos
 TEST_REVIEWS = [
     # Avaliações POSITIVAS em português
@@ -136,127 +160,235 @@ TEST_REVIEWS = [
 ]
 
 
-def test_api_connection():
-    """Testa se a API está funcionando."""
-    try:
-        response = requests.get(f"{API_BASE_URL.replace('/api/v1', '')}/health")
-        if response.status_code == 200:
-            print("✅ API está funcionando!")
-            return True
-        else:
-            print(f"❌ API retornou status {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Não foi possível conectar à API. Certifique-se de que ela está rodando.")
-        return False
-    except Exception as e:
-        print(f"❌ Erro ao testar conexão: {e}")
-        return False
+def parse_mix(mix):
+    """
+    Converte "post=70,list=20,report=10" em pesos por operação.
 
+    Returns:
+        dict: Peso de cada operação
+    """
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(
+                f"Operação inválida: {name}. Disponíveis: {', '.join(OPERATIONS)}"
+            )
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("O mix precisa de ao menos uma operação com peso positivo")
+    return weights
 
-def create_review(review_data):
-    """Cria uma avaliação via API."""
-    try:
-        response = requests.post(
-            f"{API_BASE_URL}/reviews",
+
+def schedule(rps, duration, max_requests=None, arrival="uniform", rng=random):
+    """
+    Gera os horários planejados (segundos desde o início) das requisições.
+
+    Args:
+        rps (float): Taxa alvo de requisições por segundo
+        duration (float): Duração da carga em segundos
+        max_requests (int): Limite opcional de requisições
+        arrival (str): "uniform" (intervalos fixos) ou "poisson"
+
+    Yields:
+        float: Horário planejado de cada requisição
+    """
+    offset = 0.0
+    sent = 0
+    while offset < duration and (max_requests is None or sent < max_requests):
+        yield offset
+        sent += 1
+        offset += rng.expovariate(rps) if arrival == "poisson" else 1 / rps
+
+
+def classify_error(exc):
+    """Nome curto do tipo de falha de uma requisição."""
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.ConnectError):
+        return "connect_error"
+    return type(exc).__name__
+
+
+async def send_request(client, operation, index, rng=random):
+    """
+    Executa uma operação da mistura.
+
+    Returns:
+        tuple: (resposta, dados extras do registro)
+    """
+    if operation == "post":
+        review = TEST_REVIEWS[index % len(TEST_REVIEWS)]
+        response = await client.post(
+            "/reviews",
             json={
-                "customer_name": review_data["customer_name"],
-                "review_text": review_data["review_text"]
+                "customer_name": review["customer_name"],
+                "review_text": review["review_text"],
             },
-            headers={"Content-Type": "application/json"}
         )
-        
+        extra = {
+            "customer_name": review["customer_name"],
+            "review_text": review["review_text"],
+            "expected_sentiment": review["expected_sentiment"],
+        }
         if response.status_code == 201:
             result = response.json()
-            return result
-        else:
-            print(f"❌ Erro ao criar avaliação: {response.status_code} - {response.text}")
+            extra.update({
+                "id": result["id"],
+                "predicted_sentiment": result["sentiment"],
+                "confidence_score": result["confidence_score"],
+                "is_correct": result["sentiment"] == review["expected_sentiment"],
+            })
+        return response, extra
+
+    if operation == "list":
+        response = await client.get(
+            "/reviews", params={"skip": rng.randint(0, 100), "limit": 20}
+        )
+        return response, {}
+
+    end = datetime.now().date()
+    start = end - timedelta(days=rng.randint(1, 30))
+    response = await client.get(
+        "/reviews/report",
+        params={"start_date": start.isoformat(), "end_date": end.isoformat()},
+    )
+    return response, {}
+
+
+async def run_load(
+    client,
+    rps,
+    duration,
+    concurrency,
+    mix,
+    max_requests=None,
+    arrival="uniform",
+    on_record=None,
+    rng=random,
+):
+    """
+    Dispara a carga em malha aberta e entrega um registro por requisição.
+
+    Args:
+        client (httpx.AsyncClient): Cliente com base_url da API
+        rps (float): Taxa alvo de requisições por segundo
+        duration (float): Duração em segundos
+        concurrency (int): Máximo de requisições em andamento
+        mix (dict): Pesos por operação (ver parse_mix)
+        max_requests (int): Limite opcional de requisições
+        arrival (str): "uniform" ou "poisson"
+        on_record (callable): Recebe cada registro assim que concluído
+
+    Returns:
+        int: Requisições disparadas
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    operations = list(mix)
+    weights = [mix[name] for name in operations]
+    pending = set()
+    started_at = loop.time()
+
+    async def execute(index, operation, intended):
+        record = {"operation": operation, "intended_start": round(intended, 6)}
+        try:
+            async with semaphore:
+                response, extra = await send_request(client, operation, index, rng)
+            record["status"] = response.status_code
+            record.update(extra)
+            if response.status_code >= 400:
+                record["error"] = f"http_{response.status_code}"
+        except Exception as exc:
+            record["status"] = None
+            record["error"] = classify_error(exc)
+        # Latência a partir do horário planejado, incluindo fila e atrasos
+        record["latency_ms"] = round((loop.time() - started_at - intended) * 1000, 3)
+        if on_record:
+            on_record(record)
+
+    index = 0
+    for intended in schedule(rps, duration, max_requests, arrival, rng):
+        delay = started_at + intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        operation = rng.choices(operations, weights)[0]
+        task = asyncio.create_task(execute(index, operation, intended))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        index += 1
+
+    if pending:
+        await asyncio.gather(*pending)
+    return index
+
+
+async def check_api(client):
+    """Testa se a API está funcionando."""
+    try:
+        response = await client.get(client.base_url.copy_with(path="/health"))
+    except httpx.HTTPError as e:
+        print(f"❌ Não foi possível conectar à API ({classify_error(e)}). "
+              "Certifique-se de que ela está rodando.")
+        return False
+    if response.status_code != 200:
+        print(f"❌ API retornou status {response.status_code}")
+        return False
+    print("✅ API está funcionando!")
+    return True
+
+
+async def generate_load(args):
+    """Executa a carga configurada e grava os registros em JSONL."""
+    mix = parse_mix(args.mix)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = args.output or f"test_results_{timestamp}.jsonl"
+
+    metrics = StreamingMetrics()
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=args.timeout, limits=limits
+    ) as client:
+        if not await check_api(client):
             return None
-            
-    except Exception as e:
-        print(f"❌ Erro na requisição: {e}")
-        return None
 
+        print(f"🚀 Carga: {args.rps} req/s por {args.duration}s, "
+              f"até {args.concurrency} em andamento, mix {mix}")
+        with open(filename, "w", encoding="utf-8") as f:
+            def on_record(record):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                metrics.add(record)
+
+            started = time.perf_counter()
+            sent = await run_load(
+                client,
+                rps=args.rps,
+                duration=args.duration,
+                concurrency=args.concurrency,
+                mix=mix,
+                max_requests=args.requests,
+                arrival=args.arrival,
+                on_record=on_record,
+            )
+            elapsed = time.perf_counter() - started
 
-def generate_test_data():
-    """Gera dados de teste na API."""
-    print("🚀 Iniciando geração de dados de teste...")
-    print(f"📊 Total de avaliações a serem criadas: {len(TEST_REVIEWS)}")
-    print()
-    
-    # Testar conexão primeiro
-    if not test_api_connection():
-        return
-    
-    results = []
-    correct_predictions = 0
-    total_predictions = 0
-    
-    print("📝 Criando avaliações de teste...")
-    print("-" * 80)
-    
-    for i, review_data in enumerate(TEST_REVIEWS, 1):
-        print(f"[{i:2d}/{len(TEST_REVIEWS)}] {review_data['customer_name']}")
-        
-        # Criar avaliação
-        result = create_review(review_data)
-        
-        if result:
-            predicted_sentiment = result["sentiment"]
-            expected_sentiment = review_data["expected_sentiment"]
-            confidence = result["confidence_score"]
-            
-            # Verificar se a predição está correta
-            is_correct = predicted_sentiment == expected_sentiment
-            if is_correct:
-                correct_predictions += 1
-            total_predictions += 1
-            
-            # Mostrar resultado
-            status_icon = "✅" if is_correct else "❌"
-            print(f"    {status_icon} Esperado: {expected_sentiment} | Predito: {predicted_sentiment} | Confiança: {confidence}")
-            
-            # Armazenar resultado
-            results.append({
-                "id": result["id"],
-                "customer_name": review_data["customer_name"],
-                "review_text": review_data["review_text"],
-                "expected_sentiment": expected_sentiment,
-                "predicted_sentiment": predicted_sentiment,
-                "confidence_score": confidence,
-                "is_correct": is_correct
-            })
-            
-        else:
-            print("    ❌ Falha ao criar avaliação")
-        
-        # Pequena pausa para não sobrecarregar a API
-        time.sleep(0.5)
-    
     print("-" * 80)
-    print("📊 RESUMO DOS RESULTADOS:")
-    print(f"Total de avaliações criadas: {total_predictions}")
-    print(f"Predições corretas: {correct_predictions}")
-    print(f"Predições incorretas: {total_predictions - correct_predictions}")
-    
-    if total_predictions > 0:
-        accuracy = (correct_predictions / total_predictions) * 100
-        print(f"Acurácia: {accuracy:.1f}%")
-    
-    # Mostrar estatísticas por sentimento
-    print("\n📈 ESTATÍSTICAS POR SENTIMENTO:")
-    sentiments = ["positiva", "negativa", "neutra"]
-    
-    for sentiment in sentiments:
-        expected_count = len([r for r in results if r["expected_sentiment"] == sentiment])
-        predicted_count = len([r for r in results if r["predicted_sentiment"] == sentiment])
-        correct_count = len([r for r in results if r["expected_sentiment"] == sentiment and r["is_correct"]])
-        
-        if expected_count > 0:
-            sentiment_accuracy = (correct_count / expected_count) * 100
-            print(f"  {sentiment.capitalize()}: {correct_count}/{expected_count} corretas ({sentiment_accuracy:.1f}%)")
-    
-    return results
+    print("📊 RESUMO DA CARGA:")
+    print(f"Requisições disparadas: {sent} em {elapsed:.1f}s")
+    print_load_summary(metrics.load)
+
+    if metrics.total:
+        print(f"\nAcurácia dos POSTs: {metrics.accuracy * 100:.1f}% "
+              f"({metrics.correct}/{metrics.total})")
+        for label, values in metrics.per_class().items():
+            print(f"  {label.capitalize()}: F1 {values['f1']:.3f} "
+                  f"({values['support']} exemplos)")
+
+    print(f"\n💾 Resultados salvos em: {filename}")
+    return filename
 
 
 def show_examples():
@@ -290,31 +422,47 @@ curl -X GET "http://localhost:8000/api/v1/reviews/report?start_date=2024-01-01&e
 """)
 
 
+def build_parser():
+    """Monta o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Gerador de carga da Sentiment Analysis API"
+    )
+    parser.add_argument("--base-url", default=API_BASE_URL)
+    parser.add_argument("--rps", type=float, default=2.0,
+                        help="Requisições por segundo")
+    parser.add_argument("--duration", type=float, default=len(TEST_REVIEWS) / 2,
+                        help="Duração em segundos")
+    parser.add_argument("--requests", type=int, help="Limite de requisições")
+    parser.add_argument("--concurrency", type=int, default=50,
+                        help="Máximo de requisições em andamento")
+    parser.add_argument("--mix", default="post=1",
+                        help="Pesos por operação, ex.: post=70,list=20,report=10")
+    parser.add_argument("--arrival", choices=["uniform", "poisson"], default="uniform")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="Timeout por requisição (s)")
+    parser.add_argument("--output", help="Arquivo JSONL de saída")
+    return parser
+
+
 def main():
     """Função principal."""
+    args = build_parser().parse_args()
+
     print("=" * 80)
-    print("🧪 GERADOR DE DADOS DE TESTE - SENTIMENT ANALYSIS API")
+    print("🧪 GERADOR DE CARGA - SENTIMENT ANALYSIS API")
     print("=" * 80)
-    
-    # Gerar dados de teste
-    results = generate_test_data()
-    
-    if results:
-        # Salvar resultados em arquivo JSON
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"test_results_{timestamp}.json"
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
-        
-        print(f"\n💾 Resultados salvos em: {filename}")
+
+    try:
+        asyncio.run(generate_load(args))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
     
     # Mostrar exemplos de uso
     show_examples()
     
-    print("\n✨ Geração de dados de teste concluída!")
+    print("\n✨ Geração de carga concluída!")
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,326 @@
+"""
+Comandos administrativos da aplicação.
+
+Uso:
+    python manage.py migrate
+    python manage.py serve --workers 4
+    python manage.py partition
+    python manage.py archive --retention-days 365
+    python manage.py export reviews --format parquet --output reviews.parquet
+    python manage.py export test-results --input test_results.json
+    python manage.py backfill --concurrency 4 --rate-share 0.25
+    python manage.py rollup
+    python manage.py train-local --limit 200000
+"""
+import argparse
+import os
+import sys
+
+# Adicionar o diretório da aplicação ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cmd_migrate(args):
+    """Cria ou atualiza o schema do banco de dados."""
+    from app.models import migrate
+
+    print("🗄️ Aplicando migrações no banco de dados...")
+    changes = migrate()
+    if changes:
+        for change in changes:
+            print(f"  ✅ {change}")
+    print("✨ Schema atualizado.")
+
+
+def cmd_serve(args):
+    """Inicia o servidor de produção com N workers."""
+    from app.server import serve
+
+    serve(workers=args.workers, host=args.host, port=args.port)
+
+
+def cmd_partition(args):
+    """Particiona a tabela de avaliações por mês e cria as próximas partições."""
+    from app.archive import partition_reviews_table
+
+    print("🗂️ Particionando a tabela de avaliações...")
+    for change in partition_reviews_table():
+        print(f"  ✅ {change}")
+    print("✨ Partições atualizadas.")
+
+
+def cmd_archive(args):
+    """Arquiva os meses anteriores à janela de retenção."""
+    from app.archive import archive_reviews
+
+    archived = archive_reviews(
+        retention_days=args.retention_days,
+        archive_dir=args.archive_dir,
+        dry_run=args.dry_run,
+    )
+    if not archived:
+        print("ℹ️ Nenhum mês a arquivar.")
+    for month, rows in archived:
+        if args.dry_run:
+            print(f"  📦 {month} seria arquivado")
+        else:
+            print(f"  ✅ {month}: {rows} avaliações arquivadas")
+
+
+def cmd_export(args):
+    """Exporta avaliações ou resultados de teste em Parquet/Arrow."""
+    from datetime import datetime
+
+    from app.export import (
+        EXPORT_FORMATS,
+        iter_export_chunks,
+        iter_review_batches,
+        iter_test_result_batches,
+        review_schema,
+        test_result_schema,
+        write_export,
+    )
+
+    extension = EXPORT_FORMATS[args.format][1]
+    if args.source == "reviews":
+        start = (
+            datetime.strptime(args.start_date, "%Y-%m-%d") if args.start_date else None
+        )
+        end = datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else None
+        if end:
+            end = end.replace(hour=23, minute=59, second=59)
+        batches = iter_review_batches(
+            start=start, end=end, batch_size=args.row_group_size
+        )
+        schema = review_schema()
+        output = args.output or f"reviews.{extension}"
+    else:
+        if not args.input:
+            raise SystemExit("❌ Informe o arquivo de resultados com --input")
+        batches = iter_test_result_batches(args.input, batch_size=args.row_group_size)
+        schema = test_result_schema()
+        output = args.output or f"{os.path.splitext(args.input)[0]}.{extension}"
+
+    written = write_export(iter_export_chunks(batches, schema, args.format), output)
+    print(f"💾 Exportação salva em: {output} ({written} bytes)")
+
+
+def cmd_backfill(args):
+    """Reclassifica avaliações com modelo ou prompt desatualizados."""
+    from app.backfill import count_stale, run_backfill, target_versions
+
+    model_version, prompt_version = target_versions()
+    stale = count_stale()
+    print(
+        f"🔄 Modelo {model_version}, prompt {prompt_version}: "
+        f"{stale} avaliações desatualizadas"
+    )
+    if args.dry_run or not stale:
+        return
+
+    def report(state):
+        print(
+            f"  ✅ {state['processed']} processadas (último id {state['last_id']}, "
+            f"{state['changed']} mudaram de sentimento)"
+        )
+
+    state = run_backfill(
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        rate_share=args.rate_share,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+        limit=args.limit,
+        progress=report,
+    )
+    if state["fallback"]:
+        print(f"⚠️ {state['fallback']} avaliações classificadas sem o LLM (fallback)")
+    print("✨ Backfill concluído." if state["completed"] else "⏸️ Backfill pausado.")
+
+
+def cmd_rollup(args):
+    """Gera os rollups diários (contagens e clientes distintos)."""
+    from datetime import datetime
+
+    from app.rollups import build_daily_rollups
+
+    start = end = None
+    if args.start_date:
+        start = datetime.strptime(args.start_date, "%Y-%m-%d").date()
+    if args.end_date:
+        end = datetime.strptime(args.end_date, "%Y-%m-%d").date()
+    days = build_daily_rollups(start_date=start, end_date=end, rebuild=args.rebuild)
+    if not days:
+        print("ℹ️ Nenhum dia novo para resumir.")
+        return
+    print(
+        f"✅ {len(days)} dias resumidos ({min(days)} a {max(days)}, "
+        f"{sum(days.values())} avaliações)"
+    )
+
+
+def cmd_train_local(args):
+    """Treina o modelo local com as classificações do LLM e publica o artefato."""
+    from app.local_model import train_local_model
+
+    print("🧠 Treinando o modelo local com os rótulos do LLM...")
+    try:
+        manifest = train_local_model(
+            output_dir=args.output,
+            limit=args.limit,
+            holdout=args.holdout,
+            bits=args.bits,
+            epochs=args.epochs,
+            min_samples=args.min_samples,
+        )
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    training, report = manifest["training"], manifest["report"]
+    print(
+        f"✅ {manifest['version']}: {training['samples']} avaliações de treino, "
+        f"{training['seconds']}s"
+    )
+    if report["samples"]:
+        print(
+            f"📊 Concordância com o LLM: {report['accuracy']:.1%} "
+            f"(léxico: {report['lexicon_accuracy']:.1%}, "
+            f"{report['samples']} avaliações)"
+        )
+        for threshold, coverage in report["coverage"].items():
+            if coverage["accuracy"] is not None:
+                print(
+                    f"   confiança ≥ {threshold}: {coverage['share']:.1%} "
+                    f"das avaliações, {coverage['accuracy']:.1%} de concordância"
+                )
+    print("✨ Artefato publicado; os workers o carregam sem reiniciar.")
+
+
+def build_parser():
+    """Monta o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Comandos da Sentiment Analysis API")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Cria ou atualiza o schema do banco de dados"
+    )
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    from app.config import settings
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Inicia a API com múltiplos workers (app pré-carregada)"
+    )
+    serve_parser.add_argument("--workers", type=int, default=settings.WORKERS)
+    serve_parser.add_argument("--host", default=settings.HOST)
+    serve_parser.add_argument("--port", type=int, default=settings.PORT)
+    serve_parser.set_defaults(func=cmd_serve)
+
+    partition_parser = subparsers.add_parser(
+        "partition",
+        help="Particiona a tabela por mês (PostgreSQL); execute mensalmente",
+    )
+    partition_parser.set_defaults(func=cmd_partition)
+
+    archive_parser = subparsers.add_parser(
+        "archive", help="Move meses antigos para arquivos JSONL comprimidos"
+    )
+    archive_parser.add_argument(
+        "--retention-days", type=int, default=settings.ARCHIVE_RETENTION_DAYS
+    )
+    archive_parser.add_argument("--archive-dir", default=settings.ARCHIVE_DIR)
+    archive_parser.add_argument("--dry-run", action="store_true")
+    archive_parser.set_defaults(func=cmd_archive)
+
+    export_parser = subparsers.add_parser(
+        "export", help="Exporta avaliações ou resultados de teste em Parquet/Arrow"
+    )
+    export_parser.add_argument("source", choices=["reviews", "test-results"])
+    export_parser.add_argument(
+        "--format", choices=["parquet", "arrow"], default="parquet"
+    )
+    export_parser.add_argument("--output")
+    export_parser.add_argument("--input", help="Arquivo de resultados (test-results)")
+    export_parser.add_argument("--start-date", help="Data inicial (YYYY-MM-DD)")
+    export_parser.add_argument("--end-date", help="Data final (YYYY-MM-DD)")
+    export_parser.add_argument(
+        "--row-group-size", type=int, default=settings.EXPORT_ROW_GROUP_SIZE
+    )
+    export_parser.set_defaults(func=cmd_export)
+
+    backfill_parser = subparsers.add_parser(
+        "backfill",
+        help="Reclassifica avaliações com modelo/prompt desatualizados (retomável)",
+    )
+    backfill_parser.add_argument(
+        "--batch-size", type=int, default=settings.BACKFILL_BATCH_SIZE
+    )
+    backfill_parser.add_argument(
+        "--concurrency", type=int, default=settings.BACKFILL_CONCURRENCY
+    )
+    backfill_parser.add_argument(
+        "--rate-share",
+        type=float,
+        default=settings.BACKFILL_RATE_SHARE,
+        help="Fração de GROQ_REQUESTS_PER_MINUTE usada pelo backfill",
+    )
+    backfill_parser.add_argument("--checkpoint", default=settings.BACKFILL_CHECKPOINT)
+    backfill_parser.add_argument(
+        "--restart", action="store_true", help="Ignora o checkpoint e recomeça"
+    )
+    backfill_parser.add_argument(
+        "--limit", type=int, help="Máximo de linhas nesta execução"
+    )
+    backfill_parser.add_argument("--dry-run", action="store_true")
+    backfill_parser.set_defaults(func=cmd_backfill)
+
+    rollup_parser = subparsers.add_parser(
+        "rollup",
+        help="Resume os dias completos (clientes distintos); execute diariamente",
+    )
+    rollup_parser.add_argument("--start-date", help="Data inicial (YYYY-MM-DD)")
+    rollup_parser.add_argument("--end-date", help="Data final (YYYY-MM-DD)")
+    rollup_parser.add_argument(
+        "--rebuild", action="store_true", help="Refaz os dias que já têm rollup"
+    )
+    rollup_parser.set_defaults(func=cmd_rollup)
+
+    train_parser = subparsers.add_parser(
+        "train-local", help="Treina o modelo local com as classificações do LLM"
+    )
+    train_parser.add_argument(
+        "--output",
+        default=None,
+        help="Diretório do artefato (padrão: LOCAL_MODEL_DIR)",
+    )
+    train_parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Máximo de avaliações (as mais recentes)",
+    )
+    train_parser.add_argument(
+        "--holdout",
+        type=float,
+        default=0.2,
+        help="Fração reservada ao relatório de acurácia",
+    )
+    train_parser.add_argument(
+        "--bits", type=int, default=18, help="log2 do número de features"
+    )
+    train_parser.add_argument("--epochs", type=int, default=30)
+    train_parser.add_argument("--min-samples", type=int, default=50)
+    train_parser.set_defaults(func=cmd_train_local)
+
+    return parser
+
+
+def main():
+    """Função principal."""
+    args = build_parser().parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,29 @@
 """
 Script para popular o banco de dados com dados de exemplo para demonstração.
 Este script cria avaliações diretamente no banco sem usar a API.
+
+Sem argumentos abre o menu interativo. Com `--count` gera N avaliações
+sintéticas sem chamar o LLM (sentimento, data, idioma e tamanho sorteados
+com distribuições realistas) e as carrega em lote: COPY no PostgreSQL,
+executemany nos demais bancos.
+
+Uso:
+    python populate_database.py
+    python populate_database.py --count 1000000 --days 365 --seed 42
 """
-import sys
-import os
-from datetime import datetime, timedelta
+import argparse
+import csv
+import io
+import math
 import random
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
 
-# Adicionar o diretório da aplicação ao path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from sqlalchemy import func, select
 
-from app.models import Review, SessionLocal, create_tables
+from app.language import detect_language
+from app.models import Review, SessionLocal, engine, migrate
 from app.sentiment_service import SentimentAnalyzer
 
 # Dados de exemplo para popular o banco
@@ -21,44 +34,371 @@ SAMPLE_REVIEWS = [
     ("Ana Costa", "Equipe muito prestativa e eficiente. Recomendo!"),
     ("Pedro Oliveira", "Serviço rápido e profissional. Adorei a experiência!"),
     ("Carla Lima", "Fantástico! Tudo funcionou perfeitamente."),
-    
+
     # Avaliações negativas
     ("Roberto Ferreira", "Péssimo atendimento, muito demorado e ineficiente."),
     ("Juliana Rocha", "Produto com defeito e suporte não resolveu o problema."),
     ("Carlos Almeida", "Experiência terrível, não recomendo para ninguém."),
     ("Fernanda Dias", "Muito insatisfeita com o serviço prestado."),
     ("Ricardo Gomes", "Atendimento ruim e produto de baixa qualidade."),
-    
+
     # Avaliações neutras
     ("Luciana Martins", "Serviço ok, nada excepcional mas cumpriu o básico."),
     ("Marcos Barbosa", "Produto mediano, funciona mas poderia ser melhor."),
     ("Patricia Souza", "Atendimento padrão, sem grandes problemas ou elogios."),
     ("André Ribeiro", "Experiência regular, dentro do esperado."),
     ("Camila Castro", "Serviço aceitável, mas há espaço para melhorias."),
-    
+
     # Avaliações em inglês
     ("John Smith", "Amazing service! Very satisfied with the quality."),
     ("Sarah Johnson", "Terrible experience, would not recommend."),
     ("Mike Wilson", "Average service, nothing special but okay."),
-    
+
     # Avaliações mistas
     ("Beatriz Lopes", "O produto é bom, mas o atendimento deixou a desejar."),
     ("Gabriel Moura", "Gostei do serviço em geral, mas houve alguns problemas."),
 ]
 
+# Distribuições do gerador sintético
+SENTIMENT_WEIGHTS = {"positiva": 0.55, "negativa": 0.27, "neutra": 0.18}
+LANGUAGE_WEIGHTS = {"pt": 0.85, "en": 0.15}
+# Volume relativo por dia da semana (segunda = 0) e por hora do dia
+WEEKDAY_WEIGHTS = [1.0, 1.05, 1.05, 1.0, 0.95, 0.75, 0.7]
+HOUR_WEIGHTS = [
+    0.2, 0.1, 0.1, 0.1, 0.1, 0.2, 0.4, 0.7, 1.0, 1.3, 1.4, 1.4,
+    1.3, 1.3, 1.4, 1.4, 1.3, 1.2, 1.2, 1.3, 1.3, 1.1, 0.8, 0.4,
+]
+# Número de palavras: log-normal (mediana ~25, cauda longa), limitado
+LENGTH_MEDIAN_WORDS = 25
+LENGTH_SIGMA = 0.8
+LENGTH_MAX_WORDS = 600
+
+SENTENCES = {
+    ("pt", "positiva"): [
+        "Excelente atendimento!", "Produto de ótima qualidade.",
+        "A entrega foi muito rápida.", "Equipe muito prestativa e atenciosa.",
+        "Superou minhas expectativas.", "Recomendo para todos.",
+        "O suporte resolveu meu problema rapidamente.", "Adorei a experiência.",
+        "Voltarei a comprar com certeza.", "Tudo funcionou perfeitamente.",
+    ],
+    ("pt", "negativa"): [
+        "Péssimo atendimento.", "O produto chegou com defeito.",
+        "A entrega atrasou mais de uma semana.",
+        "Ninguém respondeu minhas mensagens.",
+        "Muito insatisfeito com o serviço.", "Não recomendo.",
+        "O suporte foi despreparado e lento.",
+        "Experiência frustrante do começo ao fim.",
+        "Pedi reembolso e ainda não recebi.", "A qualidade é muito fraca.",
+    ],
+    ("pt", "neutra"): [
+        "O produto é ok.", "Atendimento dentro do esperado.",
+        "A entrega chegou no prazo.", "Nada de excepcional.",
+        "Cumpre o básico.", "O preço é compatível com o mercado.",
+        "Comprei para uso no dia a dia.", "A embalagem era simples.",
+        "Ainda estou testando o produto.", "Experiência regular.",
+    ],
+    ("en", "positiva"): [
+        "Excellent service!", "Great product quality.", "Delivery was very fast.",
+        "The team was really helpful.", "It exceeded my expectations.",
+        "I recommend it to everyone.", "Support solved my issue quickly.",
+        "Loved the experience.", "I will definitely buy again.",
+        "Everything worked perfectly.",
+    ],
+    ("en", "negativa"): [
+        "Terrible service.", "The product arrived broken.",
+        "Delivery was late by over a week.", "Nobody answered my messages.",
+        "Very disappointed with the service.", "I do not recommend it.",
+        "Support was slow and unhelpful.", "A frustrating experience overall.",
+        "I asked for a refund and never got it.", "The quality is poor.",
+    ],
+    ("en", "neutra"): [
+        "The product is okay.", "Service was as expected.",
+        "Delivery arrived on time.", "Nothing special.", "It does the basics.",
+        "The price is in line with the market.", "I bought it for everyday use.",
+        "The packaging was simple.", "Still testing the product.",
+        "An average experience.",
+    ],
+}
+FIRST_NAMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique",
+    "Isabela", "João", "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Pedro",
+    "Rafaela", "Samuel", "Tatiana", "Vinícius", "John", "Sarah", "Mike", "Emily",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Costa", "Lima", "Pereira", "Ferreira",
+    "Almeida", "Rodrigues", "Gomes", "Martins", "Rocha", "Ribeiro", "Barbosa",
+    "Castro", "Moura", "Lopes", "Smith", "Johnson", "Brown", "Wilson",
+]
+
+SEED_COLUMNS = (
+    "customer_name", "review_text", "sentiment", "confidence_score",
+    "language", "created_at",
+)
+
+
+def _cumulative(weights):
+    total, cumulative = 0.0, []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+# Tamanho das tabelas pré-sorteadas de textos, confianças e instantes: o laço
+# de geração só indexa, sem sorteios de distribuições contínuas por linha
+_TABLE_SIZE = 4096
+
+
+def generate_synthetic_reviews(count, days=365, customers=None, rng=None, now=None):
+    """
+    Gera avaliações sintéticas sem chamar o LLM.
+
+    - Datas: volume crescente ao longo do período, com sazonalidade semanal
+      e concentração no horário comercial
+    - Sentimento e idioma: proporções de SENTIMENT_WEIGHTS e LANGUAGE_WEIGHTS,
+      com confiança mais alta para textos positivos/negativos
+    - Tamanho: número de palavras log-normal (mediana de ~25 palavras)
+    - Clientes: alguns clientes frequentes e muitos ocasionais (Zipf)
+
+    Textos, confianças e instantes dentro da hora vêm de tabelas de
+    `_TABLE_SIZE` valores pré-sorteados (por idioma e sentimento); hora do
+    período e idioma/sentimento são buscas binárias em somas acumuladas.
+
+    Args:
+        count (int): Número de avaliações
+        days (int): Período coberto, terminando agora
+        customers (int): Número de clientes distintos (padrão: count / 3)
+        rng (random.Random): Gerador aleatório (para sementes reproduzíveis)
+        now (datetime): Fim do período (padrão: agora, UTC)
+
+    Yields:
+        dict: Valores de uma avaliação
+    """
+    rng = rng or random.Random()
+    now = now or datetime.utcnow()
+    start = (now - timedelta(days=days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    customers = max(1, customers or count // 3)
+
+    # Hora do período: tendência de crescimento linear (2x no fim) x dia da
+    # semana x hora do dia, em uma única tabela acumulada
+    slot_starts, slot_weights = [], []
+    for offset in range(days + 1):
+        day = start + timedelta(days=offset)
+        day_weight = (1 + offset / max(days, 1)) * WEEKDAY_WEIGHTS[day.weekday()]
+        for hour, hour_weight in enumerate(HOUR_WEIGHTS):
+            slot_starts.append(day + timedelta(hours=hour))
+            slot_weights.append(day_weight * hour_weight)
+    slot_cumulative = _cumulative(slot_weights)
+    slot_total = slot_cumulative[-1]
+    last_slot = len(slot_starts) - 1
+
+    # Idioma e sentimento sorteados juntos (são independentes)
+    combinations, combination_weights = [], []
+    for language, language_weight in LANGUAGE_WEIGHTS.items():
+        for sentiment, sentiment_weight in SENTIMENT_WEIGHTS.items():
+            combinations.append((language, sentiment))
+            combination_weights.append(language_weight * sentiment_weight)
+    combination_cumulative = _cumulative(combination_weights)
+    combination_total = combination_cumulative[-1]
+
+    mu = math.log(LENGTH_MEDIAN_WORDS)
+    texts, confidences = [], {}
+    for language, sentiment in combinations:
+        pool = [
+            (sentence, sentence.count(" ") + 1)
+            for sentence in SENTENCES[(language, sentiment)]
+        ]
+        table = []
+        for _ in range(_TABLE_SIZE):
+            target_words = min(
+                LENGTH_MAX_WORDS, max(2, int(rng.lognormvariate(mu, LENGTH_SIGMA)))
+            )
+            parts, words = [], 0
+            while words < target_words:
+                sentence, sentence_words = pool[int(rng.random() * len(pool))]
+                parts.append(sentence)
+                words += sentence_words
+            table.append(" ".join(parts))
+        texts.append(table)
+    for sentiment in SENTIMENT_WEIGHTS:
+        if sentiment == "neutra":
+            draws = (0.5 + 0.4 * rng.betavariate(4, 3) for _ in range(_TABLE_SIZE))
+        else:
+            draws = (0.6 + 0.39 * rng.betavariate(6, 2) for _ in range(_TABLE_SIZE))
+        confidences[sentiment] = [f"{value:.2f}" for value in draws]
+    # (idioma, sentimento, textos, confianças) de cada combinação
+    combinations = [
+        (language, sentiment, table, confidences[sentiment])
+        for (language, sentiment), table in zip(combinations, texts)
+    ]
+
+    # Instantes dentro da hora sorteada
+    one_hour = timedelta(hours=1)
+    offsets = [one_hour * rng.random() for _ in range(_TABLE_SIZE)]
+
+    names = [None] * customers
+    first_count, last_count = len(FIRST_NAMES), len(LAST_NAMES)
+    random_ = rng.random
+    for _ in range(count):
+        slot = bisect_right(slot_cumulative, random_() * slot_total, 0, last_slot)
+        created_at = slot_starts[slot] + offsets[int(random_() * _TABLE_SIZE)]
+        if created_at > now:
+            created_at = now - offsets[int(random_() * _TABLE_SIZE)]
+
+        language, sentiment, text_table, confidence_table = combinations[
+            bisect_right(combination_cumulative, random_() * combination_total)
+        ]
+
+        # Zipf aproximado: índices baixos (clientes frequentes) são mais comuns
+        customer = int(customers ** random_()) - 1
+        customer_name = names[customer]
+        if customer_name is None:
+            customer_name = names[customer] = (
+                f"{FIRST_NAMES[customer % first_count]} "
+                f"{LAST_NAMES[(customer // first_count) % last_count]} {customer}"
+            )
+
+        yield {
+            "customer_name": customer_name,
+            "review_text": text_table[int(random_() * _TABLE_SIZE)],
+            "sentiment": sentiment,
+            "confidence_score": confidence_table[int(random_() * _TABLE_SIZE)],
+            "language": language,
+            "created_at": created_at,
+        }
+
+
+def _copy_batch(raw_connection, batch):
+    """Carrega um lote com COPY ... FROM STDIN (PostgreSQL)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow([row[column] for column in SEED_COLUMNS])
+    buffer.seek(0)
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {Review.__tablename__} ({', '.join(SEED_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    raw_connection.commit()
+
+
+def bulk_load(reviews, bind=None, batch_size=10000):
+    """
+    Carrega avaliações em lotes, sem objetos ORM.
+
+    Usa COPY no PostgreSQL e INSERT com executemany nos demais bancos; cada
+    lote é confirmado separadamente.
+
+    Args:
+        reviews (iterable): Avaliações (dicts com SEED_COLUMNS)
+        bind: Engine de destino (padrão: engine da aplicação)
+        batch_size (int): Registros por lote
+
+    Returns:
+        int: Avaliações carregadas
+    """
+    bind = bind or engine
+    loaded = 0
+    batch = []
+
+    if bind.dialect.name == "postgresql":
+        raw_connection = bind.raw_connection()
+        try:
+            for review in reviews:
+                batch.append(review)
+                if len(batch) >= batch_size:
+                    _copy_batch(raw_connection, batch)
+                    loaded += len(batch)
+                    batch = []
+            if batch:
+                _copy_batch(raw_connection, batch)
+                loaded += len(batch)
+        finally:
+            raw_connection.close()
+        return loaded
+
+    statement = Review.__table__.insert()
+    for review in reviews:
+        batch.append(review)
+        if len(batch) >= batch_size:
+            with bind.begin() as connection:
+                connection.execute(statement, batch)
+            loaded += len(batch)
+            batch = []
+    if batch:
+        with bind.begin() as connection:
+            connection.execute(statement, batch)
+        loaded += len(batch)
+    return loaded
+
+
+def sentiment_counts(bind=None):
+    """Contagem de avaliações por sentimento em uma única consulta."""
+    bind = bind or engine
+    with bind.connect() as connection:
+        rows = connection.execute(
+            select(Review.sentiment, func.count()).group_by(Review.sentiment)
+        ).all()
+    return {sentiment: count for sentiment, count in rows}
+
+
+def print_sentiment_counts(counts):
+    """Mostra as contagens por sentimento."""
+    total = sum(counts.values())
+    print(f"Total de avaliações: {total}")
+    labels = (
+        ("Positivas", "positiva"),
+        ("Negativas", "negativa"),
+        ("Neutras", "neutra"),
+    )
+    for label, key in labels:
+        count = counts.get(key, 0)
+        share = count / total * 100 if total else 0.0
+        print(f"{label}: {count} ({share:.1f}%)")
+
+
+def seed_database(count, days=365, batch_size=10000, seed=None, customers=None):
+    """Gera e carrega avaliações sintéticas (modo não interativo)."""
+    migrate()
+    rng = random.Random(seed)
+
+    print(
+        f"🌱 Gerando {count} avaliações sintéticas ({days} dias) "
+        f"em {engine.dialect.name}..."
+    )
+    started = time.perf_counter()
+    loaded = bulk_load(
+        generate_synthetic_reviews(count, days=days, customers=customers, rng=rng),
+        batch_size=batch_size,
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ {loaded} avaliações carregadas em {elapsed:.1f}s "
+        f"({loaded / elapsed:,.0f}/s)"
+    )
+
+    print("\n📊 ESTATÍSTICAS DO BANCO:")
+    print_sentiment_counts(sentiment_counts())
+    return loaded
+
+
 def create_sample_data():
     """Cria dados de exemplo no banco de dados."""
     print("🗄️ Criando dados de exemplo no banco de dados...")
-    
-    # Criar tabelas se não existirem
-    create_tables()
-    
+
+    # Criar/atualizar tabelas se necessário
+    migrate()
+
     # Inicializar analisador de sentimento
     analyzer = SentimentAnalyzer()
-    
+
     # Criar sessão do banco
     db = SessionLocal()
-    
+
     try:
         # Verificar se já existem dados
         existing_count = db.query(Review).count()
@@ -68,65 +408,67 @@ def create_sample_data():
             if response.lower() != 's':
                 print("❌ Operação cancelada.")
                 return
-        
+
         created_count = 0
-        
+
         for customer_name, review_text in SAMPLE_REVIEWS:
             # Analisar sentimento
-            sentiment, confidence = analyzer.analyze_sentiment(review_text)
-            
+            language = detect_language(review_text)
+            (
+                sentiment,
+                confidence,
+                model_version,
+                prompt_version,
+            ) = analyzer.analyze_sentiment_versioned(review_text, language)
+
             # Criar data aleatória nos últimos 30 dias
             days_ago = random.randint(0, 30)
             created_at = datetime.now() - timedelta(days=days_ago)
-            
+
             # Criar review
             review = Review(
                 customer_name=customer_name,
                 review_text=review_text,
                 sentiment=sentiment,
                 confidence_score=confidence,
+                language=language,
+                model_version=model_version,
+                prompt_version=prompt_version,
                 created_at=created_at
             )
-            
+
             db.add(review)
             created_count += 1
-            
+
             print(f"✅ {customer_name}: {sentiment} (confiança: {confidence})")
-        
+
         # Salvar no banco
         db.commit()
-        
+
         print(f"\n🎉 {created_count} avaliações criadas com sucesso!")
-        
+
         # Mostrar estatísticas
-        total_reviews = db.query(Review).count()
-        positive_count = db.query(Review).filter(Review.sentiment == 'positiva').count()
-        negative_count = db.query(Review).filter(Review.sentiment == 'negativa').count()
-        neutral_count = db.query(Review).filter(Review.sentiment == 'neutra').count()
-        
-        print(f"\n📊 ESTATÍSTICAS DO BANCO:")
-        print(f"Total de avaliações: {total_reviews}")
-        print(f"Positivas: {positive_count}")
-        print(f"Negativas: {negative_count}")
-        print(f"Neutras: {neutral_count}")
-        
+        print("\n📊 ESTATÍSTICAS DO BANCO:")
+        print_sentiment_counts(sentiment_counts(db.get_bind()))
+
     except Exception as e:
         print(f"❌ Erro ao criar dados: {e}")
         db.rollback()
     finally:
         db.close()
 
+
 def clear_database():
     """Limpa todos os dados do banco."""
     print("🗑️ Limpando banco de dados...")
-    
+
     db = SessionLocal()
     try:
         count = db.query(Review).count()
         if count == 0:
             print("ℹ️ Banco já está vazio.")
             return
-        
+
         response = input(f"⚠️ Isso irá deletar {count} avaliações. Confirma? (s/n): ")
         if response.lower() == 's':
             db.query(Review).delete()
@@ -140,52 +482,81 @@ def clear_database():
     finally:
         db.close()
 
+
 def show_database_stats():
     """Mostra estatísticas do banco de dados."""
     print("📊 Estatísticas do banco de dados:")
-    
+
     db = SessionLocal()
     try:
-        total = db.query(Review).count()
-        if total == 0:
+        counts = sentiment_counts(db.get_bind())
+        if not counts:
             print("ℹ️ Banco de dados vazio.")
             return
-        
-        positive = db.query(Review).filter(Review.sentiment == 'positiva').count()
-        negative = db.query(Review).filter(Review.sentiment == 'negativa').count()
-        neutral = db.query(Review).filter(Review.sentiment == 'neutra').count()
-        
-        print(f"Total de avaliações: {total}")
-        print(f"Positivas: {positive} ({positive/total*100:.1f}%)")
-        print(f"Negativas: {negative} ({negative/total*100:.1f}%)")
-        print(f"Neutras: {neutral} ({neutral/total*100:.1f}%)")
-        
+
+        print_sentiment_counts(counts)
+
         # Mostrar algumas avaliações recentes
-        recent_reviews = db.query(Review).order_by(Review.created_at.desc()).limit(5).all()
-        
-        print(f"\n📝 Últimas 5 avaliações:")
+        recent_reviews = (
+            db.query(Review).order_by(Review.created_at.desc()).limit(5).all()
+        )
+
+        print("\n📝 Últimas 5 avaliações:")
         for review in recent_reviews:
             print(f"  {review.id}: {review.customer_name} - {review.sentiment}")
-            
+
     except Exception as e:
         print(f"❌ Erro ao consultar banco: {e}")
     finally:
         db.close()
 
+
+def build_parser():
+    """Monta o parser de argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(description="Popula o banco com avaliações")
+    parser.add_argument(
+        "--count", type=int, help="Avaliações sintéticas a gerar (modo não interativo)"
+    )
+    parser.add_argument(
+        "--days", type=int, default=365, help="Período coberto, em dias"
+    )
+    parser.add_argument(
+        "--customers", type=int, help="Clientes distintos (padrão: count / 3)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=10000, help="Registros por lote"
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Semente para resultados reproduzíveis"
+    )
+    return parser
+
+
 def main():
     """Função principal."""
+    args = build_parser().parse_args()
+    if args.count:
+        seed_database(
+            args.count,
+            days=args.days,
+            batch_size=args.batch_size,
+            seed=args.seed,
+            customers=args.customers,
+        )
+        return
+
     print("🗄️ GERADOR DE DADOS DE EXEMPLO - BANCO DE DADOS")
     print("=" * 60)
-    
+
     while True:
         print("\nOpções disponíveis:")
         print("1. Criar dados de exemplo")
         print("2. Mostrar estatísticas do banco")
         print("3. Limpar banco de dados")
         print("4. Sair")
-        
+
         choice = input("\nEscolha uma opção (1-4): ").strip()
-        
+
         if choice == '1':
             create_sample_data()
         elif choice == '2':
@@ -198,6 +569,6 @@ def main():
         else:
             print("❌ Opção inválida. Tente novamente.")
 
+
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,99 @@
+"""
+Testes unitários para o controle de admissão.
+"""
+import time
+
+import pytest
+
+from app.admission import ADMIT, DEGRADE, REJECT, AdmissionController
+from app.llm_budget import (
+    BULK,
+    INTERACTIVE,
+    LLMBudget,
+    LLMBudgetTimeout,
+    llm_deadline,
+)
+
+
+class TestAdmissionController:
+    """Testes para AdmissionController e a estimativa de espera."""
+
+    def _budget(self, service_time=0.5, **options):
+        budget = LLMBudget(max_concurrency=2, interactive_share=0.5, **options)
+        budget._stats[INTERACTIVE].record_service(service_time)
+        return budget
+
+    def test_rejects_when_queue_exceeds_deadline(self):
+        """Testa a recusa com Retry-After quando a fila passa do prazo."""
+        controller = AdmissionController(self._budget(), action=REJECT)
+        assert controller.decide(INTERACTIVE, timeout=1.0).action == ADMIT
+
+        trackers = [controller.track(INTERACTIVE) for _ in range(6)]
+        for tracker in trackers:
+            tracker.__enter__()
+        # 6 à frente em 2 slots de 0,5 s: 1,5 s de espera + 0,5 s de chamada
+        decision = controller.decide(INTERACTIVE, timeout=1.0)
+        assert decision.action == REJECT
+        assert decision.estimated_wait == pytest.approx(1.5)
+        assert decision.retry_after == 2
+        assert controller.decide(INTERACTIVE, timeout=5.0).action == ADMIT
+        assert controller.saturated() is False
+        for tracker in trackers:
+            tracker.__exit__(None, None, None)
+
+        assert controller.stats()["decisions"] == {ADMIT: 2, DEGRADE: 0, REJECT: 1}
+        assert controller.stats()["in_flight"][INTERACTIVE] == 0
+
+    def test_degrade_and_in_flight_limit(self):
+        """Testa a degradação e o limite de classificações simultâneas."""
+        controller = AdmissionController(
+            self._budget(), action=DEGRADE, max_in_flight=1, ready_max_wait=5.0
+        )
+        with controller.track(BULK):
+            decision = controller.decide(INTERACTIVE, timeout=30.0)
+            assert decision.action == DEGRADE
+            assert controller.saturated() is True
+            assert controller.stats()["estimated_wait_ms"][INTERACTIVE] is None
+        assert controller.decide(INTERACTIVE, timeout=30.0).action == ADMIT
+
+    def test_rate_limit_wait_and_client_deadline(self):
+        """Testa a espera pelo token bucket e o prazo do cliente no orçamento."""
+        budget = LLMBudget(max_concurrency=0, requests_per_minute=60)
+        # Rajada de 1 token, reposição de 1 por segundo
+        assert budget.estimate_wait(INTERACTIVE, ahead=0) == pytest.approx(
+            0, abs=0.01
+        )
+        assert budget.estimate_wait(INTERACTIVE, ahead=3) == pytest.approx(
+            3, abs=0.05
+        )
+
+        with budget.acquire(timeout=1):
+            pass
+        started = time.monotonic()
+        with llm_deadline(0.1), pytest.raises(LLMBudgetTimeout):
+            with budget.acquire():
+                pass
+        assert time.monotonic() - started < 0.5
+
+    def test_queue_is_weighted_by_calls_per_classification(self):
+        """Testa a espera com várias chamadas ao LLM por classificação."""
+        budget = self._budget()
+        controller = AdmissionController(budget, action=REJECT)
+        # Classificações que escalonam por 3 camadas
+        for _ in range(200):
+            with controller.track(INTERACTIVE):
+                for _ in range(3):
+                    with budget.acquire(timeout=1):
+                        pass
+        budget._stats[INTERACTIVE].service_ewma = 0.5
+        assert controller.calls_per_classification() == pytest.approx(3, abs=0.01)
+
+        trackers = [controller.track(INTERACTIVE) for _ in range(2)]
+        for tracker in trackers:
+            tracker.__enter__()
+        # 2 classificações à frente = 6 chamadas em 2 slots de 0,5 s
+        decision = controller.decide(INTERACTIVE, timeout=2.0)
+        assert decision.estimated_wait == pytest.approx(1.5, abs=0.01)
+        assert decision.action == REJECT
+        for tracker in trackers:
+            tracker.__exit__(None, None, None)
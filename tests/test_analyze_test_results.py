@@ -0,0 +1,100 @@
+"""
+Testes unitários para as métricas em streaming do analyze_test_results.
+"""
+import json
+
+import pytest
+
+from analyze_test_results import (
+    StreamingMetrics,
+    compute_metrics,
+    write_json_summary,
+)
+
+
+def _result(expected, predicted, confidence):
+    return {
+        "customer_name": "Cliente",
+        "review_text": "Texto",
+        "expected_sentiment": expected,
+        "predicted_sentiment": predicted,
+        "confidence_score": confidence,
+        "is_correct": expected == predicted,
+    }
+
+
+class TestStreamingMetrics:
+    """Testes para a classe StreamingMetrics."""
+
+    def test_confusion_and_per_class(self):
+        """Testa matriz de confusão e precisão/recall/F1 por classe."""
+        metrics = StreamingMetrics()
+        for result in [
+            _result("positiva", "positiva", "0.90"),
+            _result("positiva", "neutra", "0.60"),
+            _result("negativa", "negativa", "0.80"),
+            _result("neutra", "neutra", "0.70"),
+        ]:
+            metrics.update(result)
+
+        assert metrics.total == 4
+        assert metrics.accuracy == 0.75
+        assert metrics.count("positiva", "neutra") == 1
+
+        per_class = metrics.per_class()
+        assert per_class["positiva"]["precision"] == 1.0
+        assert per_class["positiva"]["recall"] == 0.5
+        assert per_class["neutra"]["precision"] == 0.5
+        assert per_class["neutra"]["f1"] == pytest.approx(2 / 3)
+        assert metrics.confidence_median() == pytest.approx(0.75)
+
+    def test_calibration_bins(self):
+        """Testa os bins de calibração e o ECE."""
+        metrics = StreamingMetrics(bins=2)
+        metrics.update(_result("positiva", "positiva", "0.90"))
+        metrics.update(_result("positiva", "negativa", "0.90"))
+        metrics.update(_result("neutra", "neutra", "0.20"))
+
+        calibration = metrics.calibration()
+        assert calibration[1]["count"] == 2
+        assert calibration[1]["accuracy"] == 0.5
+        assert calibration[0]["accuracy"] == 1.0
+        expected_ece = (2 * abs(0.9 - 0.5) + abs(0.2 - 1.0)) / 3
+        assert metrics.expected_calibration_error() == pytest.approx(expected_ece)
+
+    def test_error_examples_are_bounded(self):
+        """Testa que a memória de exemplos de erro é limitada."""
+        metrics = StreamingMetrics(max_errors=3)
+        for _ in range(100):
+            metrics.update(_result("positiva", "negativa", "0.50"))
+        assert len(metrics.error_examples) == 3
+        assert metrics.total - metrics.correct == 100
+
+    def test_compute_metrics_from_jsonl(self, tmp_path):
+        """Testa a leitura em uma passagem de um arquivo JSONL."""
+        path = tmp_path / "test_results.jsonl"
+        lines = [json.dumps(_result("positiva", "positiva", "0.95"))] * 5
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        metrics = compute_metrics(str(path))
+        assert metrics.total == 5
+        assert metrics.accuracy == 1.0
+
+    def test_json_summary_includes_histograms(self, tmp_path):
+        """Testa o resumo JSON com os histogramas de latência por operação."""
+        metrics = StreamingMetrics()
+        for latency in (10.0, 20.0, 400.0):
+            metrics.add(dict(
+                _result("positiva", "positiva", "0.90"),
+                operation="post", latency_ms=latency, status=201, intended_start=0.0,
+            ))
+
+        path = write_json_summary(metrics, str(tmp_path / "summary.json"))
+        with open(path, encoding="utf-8") as f:
+            summary = json.load(f)
+
+        histogram = summary["load"]["histograms"]["post"]
+        assert histogram["count"] == 3
+        assert sum(histogram["buckets"].values()) == 3
+        assert summary["load"]["operations"]["post"]["count"] == 3
+        assert summary["classification"]["accuracy"] == 1.0
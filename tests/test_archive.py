@@ -0,0 +1,160 @@
+"""
+Testes unitários para o arquivamento de meses antigos.
+"""
+import gzip
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app.archive import (
+    _archive_month,
+    archive_reviews,
+    archived_counts,
+    iter_archived_reviews,
+)
+from app.models import Base, Review
+
+
+def _insert(engine, created_at, sentiment="positiva", language="pt"):
+    with engine.begin() as connection:
+        connection.execute(
+            Review.__table__.insert(),
+            {
+                "customer_name": "Cliente",
+                "review_text": "Atendimento excelente!",
+                "sentiment": sentiment,
+                "confidence_score": "0.90",
+                "language": language,
+                "created_at": created_at,
+            },
+        )
+
+
+class TestArchive:
+    """Testes para archive_reviews e a leitura dos arquivos."""
+
+    @pytest.fixture(autouse=True)
+    def setup_engine(self, tmp_path):
+        self.engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}")
+        Base.metadata.create_all(bind=self.engine)
+        self.archive_dir = str(tmp_path / "archive")
+
+    def _count(self):
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.count(Review.id))).scalar()
+
+    def test_archives_months_before_retention(self):
+        """Testa que apenas meses completos fora da retenção são arquivados."""
+        _insert(self.engine, datetime(2020, 1, 10, 12))
+        _insert(self.engine, datetime(2020, 1, 20, 8), "negativa", "en")
+        _insert(self.engine, datetime(2020, 3, 5, 9), "neutra")
+        _insert(self.engine, datetime.utcnow() - timedelta(days=1))
+
+        archived = archive_reviews(
+            bind=self.engine, retention_days=30, archive_dir=self.archive_dir
+        )
+
+        assert archived == [("2020-01", 2), ("2020-03", 1)]
+        assert self._count() == 1
+        data_path = os.path.join(self.archive_dir, "reviews_2020_01.jsonl.gz")
+        with gzip.open(data_path, "rt", encoding="utf-8") as data_file:
+            assert len(data_file.readlines()) == 2
+
+    def test_archived_counts_and_iteration(self):
+        """Testa contagens dos manifestos e leitura dos dados arquivados."""
+        _insert(self.engine, datetime(2020, 1, 10, 12))
+        _insert(self.engine, datetime(2020, 1, 20, 8), "negativa", "en")
+        archive_reviews(
+            bind=self.engine, retention_days=30, archive_dir=self.archive_dir
+        )
+
+        sentiments, languages = archived_counts(
+            date(2020, 1, 1), date(2020, 1, 31), archive_dir=self.archive_dir
+        )
+        assert sentiments == {"positiva": 1, "negativa": 1}
+        assert languages == {"pt": 1, "en": 1}
+
+        sentiments, _ = archived_counts(
+            date(2020, 1, 1), date(2020, 1, 15), language="pt",
+            archive_dir=self.archive_dir,
+        )
+        assert sentiments == {"positiva": 1}
+
+        reviews = list(
+            iter_archived_reviews(
+                start=datetime(2020, 1, 15), archive_dir=self.archive_dir
+            )
+        )
+        assert [review["sentiment"] for review in reviews] == ["negativa"]
+        assert isinstance(reviews[0]["created_at"], datetime)
+
+    def test_rearchiving_a_month_keeps_both_files(self):
+        """Testa que dados tardios de um mês arquivado geram um novo arquivo."""
+        _insert(self.engine, datetime(2020, 1, 10, 12))
+        archive_reviews(
+            bind=self.engine, retention_days=30, archive_dir=self.archive_dir
+        )
+        _insert(self.engine, datetime(2020, 1, 11, 12), "negativa")
+        archive_reviews(
+            bind=self.engine, retention_days=30, archive_dir=self.archive_dir
+        )
+
+        sentiments, _ = archived_counts(
+            date(2020, 1, 1), date(2020, 1, 31), archive_dir=self.archive_dir
+        )
+        assert sentiments == {"positiva": 1, "negativa": 1}
+        assert len(list(iter_archived_reviews(archive_dir=self.archive_dir))) == 2
+
+    def test_pending_manifest_without_delete_is_discarded(self):
+        """Testa que um arquivo cuja remoção não foi confirmada é descartado."""
+        _insert(self.engine, datetime(2020, 1, 10, 12))
+        os.makedirs(self.archive_dir)
+        with self.engine.connect() as connection:
+            _archive_month(connection, date(2020, 1, 1), self.archive_dir)
+            connection.rollback()
+
+        archived = archive_reviews(
+            bind=self.engine, retention_days=30, archive_dir=self.archive_dir
+        )
+
+        assert archived == [("2020-01", 1)]
+        assert sorted(os.listdir(self.archive_dir)) == [
+            "reviews_2020_01.jsonl.gz",
+            "reviews_2020_01.manifest.json",
+        ]
+        sentiments, _ = archived_counts(
+            date(2020, 1, 1), date(2020, 1, 31), archive_dir=self.archive_dir
+        )
+        assert sentiments == {"positiva": 1}
+
+    def test_pending_manifest_after_delete_is_published(self):
+        """Testa que um arquivo com a remoção já confirmada é publicado."""
+        _insert(self.engine, datetime(2020, 1, 10, 12))
+        os.makedirs(self.archive_dir)
+        with self.engine.begin() as connection:
+            _archive_month(connection, date(2020, 1, 1), self.archive_dir)
+            connection.execute(Review.__table__.delete())
+
+        archived = archive_reviews(
+            bind=self.engine, retention_days=30, archive_dir=self.archive_dir
+        )
+
+        assert archived == []
+        sentiments, _ = archived_counts(
+            date(2020, 1, 1), date(2020, 1, 31), archive_dir=self.archive_dir
+        )
+        assert sentiments == {"positiva": 1}
+
+    def test_zero_retention_is_not_replaced_by_default(self):
+        """Testa que retention_days=0 arquiva até o mês anterior ao atual."""
+        last_month = datetime.utcnow().replace(day=1) - timedelta(days=1)
+        _insert(self.engine, last_month)
+
+        archived = archive_reviews(
+            bind=self.engine, retention_days=0, archive_dir=self.archive_dir
+        )
+
+        assert archived == [(last_month.strftime("%Y-%m"), 1)]
+        assert self._count() == 0
@@ -0,0 +1,107 @@
+"""
+Testes unitários para a reclassificação de avaliações desatualizadas.
+"""
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.backfill import count_stale, load_checkpoint, run_backfill, target_versions
+from app.config import settings
+from app.models import Base, Review
+
+
+class FakeAnalyzer:
+    """Analisador que classifica tudo como positiva com as versões atuais."""
+
+    use_llm = False
+
+    def __init__(self):
+        self.calls = []
+
+    def analyze_sentiment_versioned(self, text, language=None, local_tier=True):
+        self.calls.append(text)
+        return ("positiva", "0.95", *target_versions())
+
+
+class TestBackfill:
+    """Testes para run_backfill."""
+
+    @pytest.fixture(autouse=True)
+    def setup_engine(self, tmp_path):
+        self.engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}")
+        Base.metadata.create_all(bind=self.engine)
+        self.checkpoint = str(tmp_path / "backfill.json")
+
+        model_version, prompt_version = target_versions()
+        rows = [
+            ("Texto repetido", None, None),
+            ("Texto repetido", "modelo-antigo", prompt_version),
+            ("Outro texto", model_version, "prompt-antigo"),
+            ("Já atualizado", model_version, prompt_version),
+            ("Mais um", "lexicon", None),
+        ]
+        with self.engine.begin() as connection:
+            connection.execute(
+                Review.__table__.insert(),
+                [
+                    {
+                        "customer_name": "Cliente",
+                        "review_text": text,
+                        "sentiment": "neutra",
+                        "confidence_score": "0.50",
+                        "language": "pt",
+                        "model_version": model,
+                        "prompt_version": prompt,
+                    }
+                    for text, model, prompt in rows
+                ],
+            )
+
+    def _run(self, analyzer, **kwargs):
+        return run_backfill(
+            bind=self.engine,
+            analyzer=analyzer,
+            batch_size=2,
+            concurrency=2,
+            checkpoint_path=self.checkpoint,
+            **kwargs,
+        )
+
+    def test_reclassifies_only_stale_rows(self):
+        """Testa que apenas linhas desatualizadas são reclassificadas."""
+        assert count_stale(self.engine) == 4
+        analyzer = FakeAnalyzer()
+
+        state = self._run(analyzer)
+
+        assert state["completed"] is True
+        assert state["processed"] == 4
+        assert state["changed"] == 4
+        # Textos repetidos no mesmo lote são classificados uma vez
+        assert sorted(analyzer.calls) == ["Mais um", "Outro texto", "Texto repetido"]
+        assert count_stale(self.engine) == 0
+        with self.engine.connect() as connection:
+            sentiments = connection.execute(
+                select(Review.sentiment).order_by(Review.id)
+            ).scalars().all()
+        assert sentiments == ["positiva", "positiva", "positiva", "neutra", "positiva"]
+
+    def test_resumes_from_checkpoint(self):
+        """Testa a retomada a partir do checkpoint após uma interrupção."""
+        state = self._run(FakeAnalyzer(), limit=2)
+        assert state["completed"] is False
+        assert load_checkpoint(self.checkpoint)["last_id"] == 2
+
+        analyzer = FakeAnalyzer()
+        state = self._run(analyzer)
+        assert state["completed"] is True
+        assert state["processed"] == 4
+        assert sorted(analyzer.calls) == ["Mais um", "Outro texto"]
+
+    def test_new_model_restarts_pass(self, monkeypatch):
+        """Testa que uma troca de modelo descarta o checkpoint anterior."""
+        self._run(FakeAnalyzer())
+        monkeypatch.setattr(settings, "GROQ_MODEL", "modelo-novo")
+
+        state = self._run(FakeAnalyzer())
+        assert state["model_version"] == "modelo-novo"
+        assert state["processed"] == 5
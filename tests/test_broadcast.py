@@ -0,0 +1,76 @@
+"""
+Testes unitários para o hub de difusão (SSE).
+"""
+import asyncio
+import json
+
+from app.broadcast import BroadcastHub, sse_stream
+
+
+def _events(chunk: bytes):
+    """Converte um trecho SSE em uma lista de (evento, dados)."""
+    events = []
+    for block in chunk.decode("utf-8").strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line)
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestBroadcastHub:
+    """Testes para a classe BroadcastHub."""
+
+    def test_fan_out_encodes_once(self):
+        """Testa que todos os inscritos recebem os mesmos bytes."""
+
+        async def scenario():
+            hub = BroadcastHub(stats_interval=60)
+            first, second = hub.subscribe(), hub.subscribe()
+            hub.publish_review({"id": 1, "sentiment": "positiva"})
+            chunks = await asyncio.gather(first.next(1), second.next(1))
+            hub.unsubscribe(first)
+            hub.unsubscribe(second)
+            return chunks
+
+        first, second = asyncio.run(scenario())
+        assert first is second
+        assert _events(first) == [("review", {"id": 1, "sentiment": "positiva"})]
+
+    def test_slow_consumer_drops_and_coalesces(self):
+        """Testa o descarte de avaliações e a fusão de resumos pendentes."""
+
+        async def scenario():
+            hub = BroadcastHub(queue_size=2, stats_interval=60)
+            subscription = hub.subscribe()
+            for review_id in range(5):
+                hub.publish_review({"id": review_id, "sentiment": "neutra"})
+            hub.publish_stats()
+            hub.publish_review({"id": 5, "sentiment": "negativa"})
+            hub.publish_stats()
+            chunk = await subscription.next(1)
+            hub.unsubscribe(subscription)
+            return chunk
+
+        events = _events(asyncio.run(scenario()))
+        assert events[0] == ("dropped", {"count": 4})
+        assert [data["id"] for name, data in events if name == "review"] == [4, 5]
+
+        stats = [data for name, data in events if name == "stats"]
+        assert len(stats) == 1
+        assert stats[0]["delta"] == {"negativa": 1}
+        assert stats[0]["totals"] == {"neutra": 5, "negativa": 1}
+
+    def test_stream_keepalive_and_unsubscribe(self):
+        """Testa o keepalive do stream e a remoção do inscrito ao encerrar."""
+
+        async def scenario():
+            hub = BroadcastHub(stats_interval=60)
+            subscription = hub.subscribe()
+            stream = sse_stream(hub, subscription, heartbeat=0.01)
+            chunks = [await stream.__anext__(), await stream.__anext__()]
+            await stream.aclose()
+            return chunks, hub.subscriber_count
+
+        chunks, subscribers = asyncio.run(scenario())
+        assert chunks == [b"retry: 10\n\n", b": keepalive\n\n"]
+        assert subscribers == 0
@@ -0,0 +1,107 @@
+"""
+Testes unitários para a compressão e a negociação das respostas.
+"""
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, _add_vary, brotli, choose_encoding
+from app.responses import prefers_msgpack
+
+PAYLOAD = '{"review_text": "Atendimento excelente e entrega rápida."}' * 500
+
+
+def _client(**options):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, **options)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(PAYLOAD, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("{}", media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(
+            iter([PAYLOAD.encode(), PAYLOAD.encode()]),
+            media_type="application/vnd.apache.arrow.stream",
+        )
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(
+            iter([b"data: 1\n\n" * 500]), media_type="text/event-stream"
+        )
+
+    return TestClient(app)
+
+
+class TestCompression:
+    """Testes para CompressionMiddleware e a negociação de conteúdo."""
+
+    def test_compresses_above_threshold_only(self):
+        """Testa gzip (inclusive fora do event loop) acima do tamanho mínimo."""
+        for threadpool_size in (1, 1 << 30):
+            client = _client(minimum_size=1024, threadpool_size=threadpool_size)
+            response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            assert int(response.headers["content-length"]) < len(PAYLOAD) / 10
+            assert response.text == PAYLOAD
+
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        response = client.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+    def test_vary_on_every_compressible_response(self):
+        """Testa o Vary mesmo quando a resposta não é comprimida."""
+        client = _client(minimum_size=1024)
+        for path, accept_encoding in (
+            ("/large", "gzip"),
+            ("/small", "gzip"),
+            ("/large", "identity"),
+        ):
+            response = client.get(path, headers={"Accept-Encoding": accept_encoding})
+            assert response.headers["vary"] == "Accept-Encoding"
+
+        response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+        assert "vary" not in response.headers
+
+        # Vary da negociação de formato (Accept) é mantido
+        merged = _add_vary([(b"vary", b"Accept")])
+        assert merged == [(b"vary", b"Accept, Accept-Encoding")]
+        assert _add_vary([(b"vary", b"*")]) == [(b"vary", b"*")]
+
+    def test_streaming_and_event_stream(self):
+        """Testa a compressão em streaming e que SSE não é comprimido."""
+        client = _client()
+        headers = {"Accept-Encoding": "gzip"}
+        with client.stream("GET", "/stream", headers=headers) as response:
+            raw = b"".join(response.iter_raw())
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert gzip.decompress(raw) == PAYLOAD.encode() * 2
+
+        response = client.get("/events", headers={"Accept-Encoding": "gzip, br"})
+        assert "content-encoding" not in response.headers
+
+    def test_negotiation(self):
+        """Testa a escolha da codificação e do formato pelos pesos (q)."""
+        assert choose_encoding("gzip;q=0.5, deflate") == "gzip"
+        assert choose_encoding("identity") is None
+        assert choose_encoding("gzip;q=0") is None
+        if brotli is not None:
+            assert choose_encoding("gzip, br") == "br"
+            assert choose_encoding("*") == "br"
+
+        pytest.importorskip("msgpack")
+        assert prefers_msgpack("application/msgpack")
+        assert prefers_msgpack("application/msgpack, application/json;q=0.5")
+        assert not prefers_msgpack("application/json, application/msgpack;q=0.5")
+        assert not prefers_msgpack("*/*")
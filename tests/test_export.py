@@ -0,0 +1,99 @@
+"""
+Testes unitários para a exportação Parquet/Arrow.
+"""
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq  # noqa: E402
+
+from app.export import (  # noqa: E402
+    iter_export_chunks,
+    iter_test_result_batches,
+    review_schema,
+    test_result_schema as results_schema,
+)
+
+
+def _reviews(count):
+    return [
+        {
+            "id": index,
+            "customer_name": f"Cliente {index}",
+            "review_text": "Atendimento excelente!",
+            "sentiment": "positiva" if index % 2 else "negativa",
+            "confidence_score": "0.90",
+            "language": "pt",
+            "created_at": datetime(2024, 1, 1, 12),
+        }
+        for index in range(count)
+    ]
+
+
+class TestExport:
+    """Testes para a codificação colunar em streaming."""
+
+    def test_parquet_row_groups_and_dictionary(self):
+        """Testa um row group por lote e sentimento com dictionary encoding."""
+        rows = _reviews(6)
+        data = b"".join(
+            iter_export_chunks([rows[:4], rows[4:]], review_schema(), "parquet")
+        )
+
+        parquet_file = pq.ParquetFile(io.BytesIO(data))
+        assert parquet_file.metadata.num_row_groups == 2
+        table = parquet_file.read(columns=["sentiment", "confidence_score"])
+        assert pa.types.is_dictionary(table.schema.field("sentiment").type)
+        assert table.column("confidence_score")[0].as_py() == pytest.approx(0.9)
+
+    def test_invalid_confidence_becomes_null(self):
+        """Testa que confianças não numéricas são exportadas como nulas."""
+        rows = _reviews(3)
+        rows[0]["confidence_score"] = "n/a"
+        rows[1]["confidence_score"] = None
+        data = b"".join(iter_export_chunks([rows], review_schema(), "arrow"))
+
+        column = pa.ipc.open_stream(data).read_all().column("confidence_score")
+        assert column.to_pylist()[:2] == [None, None]
+        assert column[2].as_py() == pytest.approx(0.9)
+
+    def test_arrow_stream(self):
+        """Testa a exportação em Arrow IPC stream."""
+        data = b"".join(iter_export_chunks([_reviews(3)], review_schema(), "arrow"))
+        table = pa.ipc.open_stream(data).read_all()
+        assert table.num_rows == 3
+        assert table.column("customer_name")[2].as_py() == "Cliente 2"
+
+    def test_test_results_json_and_jsonl(self, tmp_path):
+        """Testa a leitura de resultados em JSON array e em JSONL."""
+        result = {
+            "id": 1,
+            "customer_name": "Ana",
+            "review_text": "Gostei",
+            "expected_sentiment": "positiva",
+            "predicted_sentiment": "positiva",
+            "confidence_score": "0.95",
+            "is_correct": True,
+        }
+        json_path = tmp_path / "results.json"
+        json_path.write_text(json.dumps([result] * 3), encoding="utf-8")
+        jsonl_path = tmp_path / "results.jsonl"
+        jsonl_path.write_text(
+            "\n".join(json.dumps(result) for _ in range(3)), encoding="utf-8"
+        )
+
+        for path in (json_path, jsonl_path):
+            batches = list(iter_test_result_batches(str(path), batch_size=2))
+            assert [len(batch) for batch in batches] == [2, 1]
+
+        data = b"".join(
+            iter_export_chunks(
+                iter_test_result_batches(str(json_path)), results_schema(), "parquet"
+            )
+        )
+        table = pq.read_table(io.BytesIO(data), columns=["is_correct"])
+        assert table.column_names == ["is_correct"]
+        assert table.num_rows == 3
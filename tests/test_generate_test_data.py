@@ -0,0 +1,91 @@
+"""
+Testes unitários para o gerador de carga em malha aberta.
+"""
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from analyze_test_results import StreamingMetrics
+from generate_test_data import parse_mix, run_load, schedule
+
+
+def _handler(delay=0.0):
+    async def handle(request):
+        await asyncio.sleep(delay)
+        if request.method == "POST":
+            return httpx.Response(
+                201, json={"id": 1, "sentiment": "positiva", "confidence_score": "0.90"}
+            )
+        if request.url.path.endswith("/report"):
+            return httpx.Response(500, json={"detail": "erro"})
+        return httpx.Response(200, json=[])
+
+    return handle
+
+
+def _run(handler, **kwargs):
+    records = []
+
+    async def main():
+        async with httpx.AsyncClient(
+            base_url="http://test/api/v1", transport=httpx.MockTransport(handler)
+        ) as client:
+            return await run_load(client, on_record=records.append, **kwargs)
+
+    sent = asyncio.run(main())
+    return sent, records
+
+
+class TestLoadGenerator:
+    """Testes para o agendamento e a medição de latência."""
+
+    def test_parse_mix(self):
+        """Testa a conversão do mix de operações."""
+        assert parse_mix("post=70,list=20,report=10") == {
+            "post": 70.0, "list": 20.0, "report": 10.0,
+        }
+        with pytest.raises(ValueError):
+            parse_mix("delete=1")
+
+    def test_schedule_is_open_loop(self):
+        """Testa os horários planejados pela taxa alvo."""
+        assert list(schedule(rps=10, duration=0.5)) == pytest.approx(
+            [0.0, 0.1, 0.2, 0.3, 0.4]
+        )
+        assert len(list(schedule(rps=1000, duration=10, max_requests=7))) == 7
+        poisson = list(
+            schedule(rps=100, duration=1, arrival="poisson", rng=random.Random(1))
+        )
+        assert 50 < len(poisson) < 150
+
+    def test_latency_includes_queueing(self):
+        """Testa que a espera por concorrência conta como latência."""
+        sent, records = _run(
+            _handler(delay=0.05),
+            rps=100, duration=1, concurrency=1, mix={"post": 1}, max_requests=5,
+        )
+        assert sent == 5
+        latencies = sorted(record["latency_ms"] for record in records)
+        # Servidor serializado: a última requisição espera as quatro anteriores
+        assert latencies[-1] >= 200
+        assert all(record["expected_sentiment"] for record in records)
+
+    def test_records_feed_analysis(self):
+        """Testa que os registros alimentam latência, erros e acurácia."""
+        _, records = _run(
+            _handler(),
+            rps=200, duration=1, concurrency=10,
+            mix={"post": 1, "list": 1, "report": 1}, max_requests=60,
+            rng=random.Random(3),
+        )
+        metrics = StreamingMetrics()
+        for record in records:
+            metrics.add(record)
+
+        assert metrics.load.total == 60
+        assert set(metrics.load.latency) == {"post", "list", "report"}
+        report_errors = metrics.load.errors[("report", "http_500")]
+        assert report_errors == metrics.load.latency["report"].count
+        assert metrics.total == metrics.load.latency["post"].count
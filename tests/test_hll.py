@@ -0,0 +1,35 @@
+"""
+Testes unitários para o sketch HyperLogLog.
+"""
+import pytest
+
+from app.hll import HyperLogLog, normalize_customer
+
+
+class TestHyperLogLog:
+    """Testes para HyperLogLog."""
+
+    def test_count_is_close_to_cardinality(self):
+        """Testa o erro da estimativa em cardinalidades pequenas e grandes."""
+        for cardinality in (10, 1000, 50000):
+            sketch = HyperLogLog()
+            sketch.update(f"cliente-{i}" for i in range(cardinality))
+            sketch.update(f"cliente-{i}" for i in range(cardinality))  # repetidos
+            assert sketch.count() == pytest.approx(cardinality, rel=0.05)
+
+    def test_merge_is_union_and_survives_serialization(self):
+        """Testa que a combinação conta a união e que o sketch é serializável."""
+        first, second = HyperLogLog(), HyperLogLog()
+        first.update(f"cliente-{i}" for i in range(0, 3000))
+        second.update(f"cliente-{i}" for i in range(2000, 5000))
+
+        restored = HyperLogLog.from_bytes(first.to_bytes())
+        restored.merge(HyperLogLog.from_bytes(second.to_bytes()))
+
+        assert restored.count() == pytest.approx(5000, rel=0.05)
+        with pytest.raises(ValueError):
+            restored.merge(HyperLogLog(precision=10))
+
+    def test_normalize_customer(self):
+        """Testa que variações de caixa e espaços contam como o mesmo cliente."""
+        assert normalize_customer("  Ana   Silva ") == normalize_customer("ana silva")
@@ -0,0 +1,65 @@
+"""
+Testes unitários para as chaves de idempotência.
+"""
+import asyncio
+
+import pytest
+
+from app.idempotency import IdempotencyKeyMismatch, SingleFlight, request_fingerprint
+
+
+class TestSingleFlight:
+    """Testes para a classe SingleFlight."""
+
+    def test_concurrent_calls_are_coalesced(self):
+        """Testa que repetições concorrentes aguardam a mesma execução."""
+        single_flight = SingleFlight()
+        fingerprint = request_fingerprint("Ana", "Ótimo!")
+        calls = []
+
+        async def classify():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"id": 1}
+
+        async def scenario():
+            return await asyncio.gather(
+                *(single_flight.run("k1", fingerprint, classify) for _ in range(3))
+            )
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert [result for result, _ in results] == [{"id": 1}] * 3
+        assert sorted(replayed for _, replayed in results) == [False, True, True]
+        assert single_flight.recent("k1", fingerprint) == {"id": 1}
+
+    def test_failures_are_not_remembered(self):
+        """Testa que uma falha é compartilhada, mas não memorizada."""
+        single_flight = SingleFlight()
+        fingerprint = request_fingerprint("Ana", "Ótimo!")
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("LLM indisponível")
+
+        async def scenario():
+            return await asyncio.gather(
+                single_flight.run("k1", fingerprint, failing),
+                single_flight.run("k1", fingerprint, failing),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert single_flight.recent("k1", fingerprint) is None
+
+    def test_key_reused_with_other_content(self):
+        """Testa a rejeição de uma chave usada com outro conteúdo."""
+        single_flight = SingleFlight(max_recent=1)
+        single_flight.remember("k1", request_fingerprint("Ana", "Ótimo!"), {"id": 1})
+
+        with pytest.raises(IdempotencyKeyMismatch):
+            single_flight.recent("k1", request_fingerprint("Ana", "Péssimo!"))
+
+        single_flight.remember("k2", request_fingerprint("Ana", "Bom"), {"id": 2})
+        assert single_flight.recent("k1", request_fingerprint("Ana", "Ótimo!")) is None
@@ -0,0 +1,145 @@
+"""
+Testes unitários para os contadores deslizantes de sentimento.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from app.config import settings
+from app.live_stats import (
+    SharedSlidingWindowCounters,
+    SlidingWindowCounters,
+    get_live_stats,
+    warm_up_live_stats,
+)
+from app.models import Base, Review
+
+NOW = 1_700_000_000.0
+
+
+def _counts(snapshot, label):
+    return snapshot["windows"][label]["counts"]
+
+
+class TestSlidingWindowCounters:
+    """Testes para a classe SlidingWindowCounters."""
+
+    def test_windows_expire_old_minutes(self):
+        """Testa que cada janela considera apenas os seus minutos."""
+        counters = SlidingWindowCounters([15, 60])
+        counters.record("positiva", NOW - 50 * 60)
+        counters.record("negativa", NOW - 10 * 60)
+        counters.record("neutra", NOW)
+        counters.record("positiva", NOW)
+
+        snapshot = counters.snapshot(NOW)
+        assert _counts(snapshot, "15m") == {"positiva": 1, "negativa": 1, "neutra": 1}
+        assert _counts(snapshot, "1h") == {"positiva": 2, "negativa": 1, "neutra": 1}
+        assert snapshot["windows"]["1h"]["total"] == 4
+
+        # 20 minutos depois nada resta em 15 minutos e a primeira sai de 1 hora
+        snapshot = counters.snapshot(NOW + 20 * 60)
+        assert snapshot["windows"]["15m"]["total"] == 0
+        assert _counts(snapshot, "1h") == {"positiva": 1, "negativa": 1, "neutra": 1}
+
+        # Após mais de uma hora, tudo expira
+        snapshot = counters.snapshot(NOW + 11 * 60 + 60 * 60)
+        assert snapshot["windows"]["1h"]["total"] == 0
+
+    def test_matches_brute_force(self):
+        """Testa os totais incrementais contra uma contagem direta."""
+        counters = SlidingWindowCounters([5, 30])
+        events = []
+        for step in range(300):
+            when = NOW + step * 37
+            sentiment = ("positiva", "negativa", "neutra")[step % 3]
+            counters.record(sentiment, when)
+            events.append((int(when // 60), sentiment))
+
+            minute = int(when // 60)
+            for window, label in ((5, "5m"), (30, "30m")):
+                expected = sum(1 for m, _ in events if minute - m < window)
+                assert counters.snapshot(when)["windows"][label]["total"] == expected
+
+    def test_warm_up_from_database(self, tmp_path):
+        """Testa o aquecimento a partir do banco."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}")
+        Base.metadata.create_all(bind=engine)
+        now = datetime.utcnow()
+        with engine.begin() as connection:
+            connection.execute(
+                Review.__table__.insert(),
+                [
+                    {
+                        "customer_name": "Cliente",
+                        "review_text": "Texto",
+                        "sentiment": sentiment,
+                        "created_at": now - timedelta(minutes=age),
+                    }
+                    for sentiment, age in (
+                        ("positiva", 1),
+                        ("positiva", 2),
+                        ("negativa", 30),
+                        ("neutra", 60 * 30),
+                    )
+                ],
+            )
+
+        counters = SlidingWindowCounters([15, 60, 1440])
+        assert warm_up_live_stats(counters, bind=engine) == 3
+
+        snapshot = counters.snapshot()
+        assert snapshot["warmed"] is True
+        assert _counts(snapshot, "15m")["positiva"] == 2
+        assert snapshot["windows"]["1h"]["total"] == 3
+        assert snapshot["windows"]["24h"]["total"] == 3
+
+        # Workers com contadores compartilhados: só o primeiro carrega
+        first = SharedSlidingWindowCounters([15, 60, 1440], str(tmp_path))
+        second = SharedSlidingWindowCounters([15, 60, 1440], str(tmp_path))
+        assert warm_up_live_stats(first, bind=engine) == 3
+        assert warm_up_live_stats(second, bind=engine) == 0
+        assert second.snapshot()["warmed"] is True
+        assert second.snapshot()["windows"]["24h"]["total"] == 3
+
+
+class TestSharedSlidingWindowCounters:
+    """Testes para a classe SharedSlidingWindowCounters."""
+
+    def test_workers_share_counts(self, tmp_path):
+        """Testa que cada worker responde pelo tráfego de todos."""
+        first = SharedSlidingWindowCounters([15, 60], str(tmp_path))
+        second = SharedSlidingWindowCounters([15, 60], str(tmp_path))
+        first.record("positiva", NOW - 50 * 60)
+        second.record("negativa", NOW - 10 * 60)
+        first.record("neutra", NOW)
+        second.record("positiva", NOW)
+
+        for counters in (first, second):
+            snapshot = counters.snapshot(NOW)
+            assert snapshot["shared"] is True
+            assert _counts(snapshot, "15m") == {
+                "positiva": 1, "negativa": 1, "neutra": 1
+            }
+            assert snapshot["windows"]["1h"]["total"] == 4
+        assert first.snapshot(NOW + 20 * 60)["windows"]["15m"]["total"] == 0
+
+    def test_matches_in_memory_counters(self, tmp_path):
+        """Testa o arquivo compartilhado contra os contadores em memória."""
+        shared = SharedSlidingWindowCounters([5, 30], str(tmp_path))
+        memory = SlidingWindowCounters([5, 30])
+        for step in range(300):
+            when = NOW + step * 37
+            sentiment = ("positiva", "negativa", "neutra")[step % 3]
+            shared.record(sentiment, when)
+            memory.record(sentiment, when)
+            expected = memory.snapshot(when)["windows"]
+            assert shared.snapshot(when)["windows"] == expected
+
+    def test_used_with_budget_dir(self, tmp_path, monkeypatch):
+        """Testa que o diretório compartilhado ativa os contadores comuns."""
+        from app import live_stats
+
+        monkeypatch.setattr(live_stats, "_live_stats", None)
+        monkeypatch.setattr(settings, "LLM_BUDGET_DIR", str(tmp_path))
+        assert isinstance(get_live_stats(), SharedSlidingWindowCounters)
@@ -0,0 +1,126 @@
+"""
+Testes unitários para o orçamento compartilhado do LLM.
+"""
+import threading
+import time
+
+import pytest
+
+from app.llm_budget import LLMBudget, LLMBudgetTimeout
+
+
+class TestLLMBudget:
+    """Testes para a classe LLMBudget."""
+
+    def _max_parallel(self, budget, threads=6):
+        """Executa chamadas simuladas e retorna o pico de concorrência."""
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def call():
+            nonlocal active, peak
+            with budget.acquire(timeout=5):
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                time.sleep(0.02)
+                with lock:
+                    active -= 1
+
+        workers = [threading.Thread(target=call) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return peak
+
+    def test_concurrency_limit_in_process(self):
+        """Testa o limite de concorrência em memória."""
+        assert self._max_parallel(LLMBudget(max_concurrency=2)) <= 2
+
+    def test_concurrency_limit_shared_between_instances(self, tmp_path):
+        """Testa que instâncias com o mesmo diretório dividem os slots."""
+        first = LLMBudget(max_concurrency=1, state_dir=str(tmp_path))
+        second = LLMBudget(max_concurrency=1, state_dir=str(tmp_path))
+
+        with first.acquire(timeout=1):
+            with pytest.raises(LLMBudgetTimeout):
+                with second.acquire(timeout=0.05):
+                    pass
+
+        with second.acquire(timeout=1):
+            pass
+
+    def test_rate_limit_shared_between_instances(self, tmp_path):
+        """Testa que o token bucket é compartilhado via arquivo."""
+        first = LLMBudget(0, requests_per_minute=60, state_dir=str(tmp_path))
+        second = LLMBudget(0, requests_per_minute=60, state_dir=str(tmp_path))
+
+        with first.acquire(timeout=0.1):
+            pass
+        with pytest.raises(LLMBudgetTimeout):
+            with second.acquire(timeout=0.1):
+                pass
+
+
+class TestLLMBudgetLanes:
+    """Testes para as faixas de prioridade do orçamento."""
+
+    def test_bulk_cannot_use_reserved_slots(self):
+        """Testa que a faixa bulk não ocupa os slots reservados."""
+        budget = LLMBudget(max_concurrency=4, interactive_share=0.5)
+        assert budget.reserved_slots == 2
+
+        first = budget.acquire(timeout=1, lane="bulk")
+        second = budget.acquire(timeout=1, lane="bulk")
+        with first, second:
+            with pytest.raises(LLMBudgetTimeout):
+                with budget.acquire(timeout=0.05, lane="bulk"):
+                    pass
+            with budget.acquire(timeout=0.05), budget.acquire(timeout=0.05):
+                stats = budget.stats()["lanes"]
+                assert stats["interactive"]["in_flight"] == 2
+                assert stats["bulk"]["in_flight"] == 2
+                assert stats["bulk"]["timeouts"] == 1
+
+    def test_bulk_keeps_rate_reserve(self):
+        """Testa que a faixa bulk não consome a reserva do token bucket."""
+        budget = LLMBudget(4, requests_per_minute=6, interactive_share=0.5)
+
+        for _ in range(2):
+            with budget.acquire(timeout=0.05, lane="bulk"):
+                pass
+        with pytest.raises(LLMBudgetTimeout):
+            with budget.acquire(timeout=0.05, lane="bulk"):
+                pass
+        for _ in range(2):
+            with budget.acquire(timeout=0.05, lane="interactive"):
+                pass
+
+    def test_lane_from_context_and_queue_depth(self):
+        """Testa a faixa vinda do contexto e a profundidade da fila."""
+        from app.llm_budget import llm_lane
+
+        budget = LLMBudget(max_concurrency=2, interactive_share=0.5)
+        waiting = threading.Event()
+
+        def queued_bulk_call():
+            with llm_lane("bulk"):
+                waiting.set()
+                with pytest.raises(LLMBudgetTimeout):
+                    with budget.acquire(timeout=0.3):
+                        pass
+
+        with budget.acquire(timeout=1, lane="bulk"):
+            worker = threading.Thread(target=queued_bulk_call)
+            worker.start()
+            waiting.wait()
+            time.sleep(0.05)
+            assert budget.stats()["lanes"]["bulk"]["queue_depth"] == 1
+            worker.join()
+
+        lanes = budget.stats()["lanes"]
+        assert lanes["bulk"]["queue_depth"] == 0
+        assert lanes["bulk"]["acquired"] == 1
+        assert lanes["interactive"]["acquired"] == 0
@@ -0,0 +1,138 @@
+"""
+Testes unitários para o modelo local destilado dos rótulos do LLM.
+"""
+import json
+import os
+import random
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.config import settings
+from app.local_model import (
+    MANIFEST_NAME,
+    LocalModel,
+    LocalModelLoader,
+    hash_features,
+    train,
+    train_local_model,
+)
+from app.models import Base, Review
+from app.sentiment_service import SentimentAnalyzer
+
+WORDS = {
+    "positiva": ["adorei", "excelente", "entrega rápida", "recomendo", "perfeito"],
+    "negativa": ["odiei", "quebrado", "atrasou muito", "não recomendo", "defeito"],
+    "neutra": ["recebi", "pedido", "chegou hoje", "produto comum", "normal"],
+}
+
+
+def _samples(count, seed=0):
+    generator = random.Random(seed)
+    samples = []
+    for index in range(count):
+        label = list(WORDS)[index % 3]
+        words = generator.sample(WORDS[label], 2) + [generator.choice(WORDS["neutra"])]
+        samples.append((" ".join(words), label))
+    return samples
+
+
+class TestLocalModel:
+    """Testes para o treino, o artefato e a troca do modelo local."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(
+                Review.__table__.insert(),
+                [
+                    {
+                        "customer_name": "Ana",
+                        "review_text": text,
+                        "sentiment": label,
+                        "language": "pt",
+                        "model_version": "llama-3.3-70b-versatile",
+                        # Sem prompt_version: rótulo do léxico, fora do treino
+                        "prompt_version": "v1" if index % 10 else None,
+                    }
+                    for index, (text, label) in enumerate(_samples(300))
+                ],
+            )
+        return engine
+
+    def test_train_and_batch_predict(self):
+        """Testa o hashing de features e o ajuste do modelo linear."""
+        rows, columns, values = hash_features(
+            ["Adorei adorei", ""], ["pt", None], bits=10
+        )
+        assert list(rows) == [0, 0, 0, 0]  # 2 palavras, 1 par e o idioma
+        assert columns.max() < 1024
+        assert values[0] == pytest.approx(0.5)
+
+        samples = _samples(150)
+        weights, bias = train(
+            [text for text, _ in samples], [label for _, label in samples], bits=12
+        )
+        assert weights.shape == (4096, 3)
+
+        model = LocalModel(
+            weights, bias, {"version": "v", "labels": list(WORDS), "bits": 12}
+        )
+        predictions = model.predict(["adorei, recomendo", "quebrado e com defeito"])
+        assert [sentiment for sentiment, _ in predictions] == ["positiva", "negativa"]
+        assert all(0.5 < confidence <= 1.0 for _, confidence in predictions)
+        assert model.predict([]) == []
+
+    def test_train_local_model_publishes_artifact_with_report(self, engine, tmp_path):
+        """Testa o treino a partir do banco, o artefato e o relatório."""
+        output = tmp_path / "model"
+        manifest = train_local_model(
+            output_dir=str(output), bind=engine, holdout=0.25, bits=12, min_samples=50
+        )
+
+        training, report = manifest["training"], manifest["report"]
+        assert training["samples"] + training["holdout"] == 270
+        assert report["samples"] == training["holdout"]
+        assert report["accuracy"] >= 0.9
+        assert "lexicon_accuracy" in report
+        assert set(report["confusion"]) == {"positiva", "negativa", "neutra"}
+        assert os.path.exists(output / MANIFEST_NAME)
+        assert os.path.exists(output / manifest["weights"])
+
+        with pytest.raises(RuntimeError):
+            train_local_model(output_dir=str(output), bind=engine, min_samples=1000)
+
+    def test_hot_swap_and_analyzer_fallback(self, engine, tmp_path, monkeypatch):
+        """Testa a troca do artefato sem reinício e o uso no fallback local."""
+        output = str(tmp_path / "model")
+        loader = LocalModelLoader(output, reload_interval=0)
+        assert loader.current() is None
+
+        first = train_local_model(output_dir=output, bind=engine, bits=12)
+        model = loader.current()
+        assert model.version == first["version"]
+        assert model.weights.__class__.__name__ == "memmap"
+
+        monkeypatch.setattr("app.sentiment_service.get_local_model", loader.current)
+        monkeypatch.setattr(settings, "LOCAL_MODEL_MIN_CONFIDENCE", 0.5)
+        analyzer = SentimentAnalyzer()
+        sentiment, confidence, version, prompt = analyzer.analyze_sentiment_local(
+            "odiei, veio quebrado", "pt"
+        )
+        assert (sentiment, version, prompt) == ("negativa", first["version"], None)
+        assert float(confidence) >= 0.5
+
+        # Novo artefato: o manifesto é trocado e o loader carrega a nova versão
+        second = dict(first, version="local-novo")
+        with open(os.path.join(output, MANIFEST_NAME), "w", encoding="utf-8") as file:
+            json.dump(second, file)
+        assert loader.current().version == "local-novo"
+
+        # Artefato inválido: mantém o modelo em uso
+        with open(os.path.join(output, MANIFEST_NAME), "w", encoding="utf-8") as file:
+            file.write(
+                '{"version": "quebrado", "labels": [], "bits": 1, "weights": "x.npy"}'
+            )
+        assert loader.current().version == "local-novo"
@@ -0,0 +1,59 @@
+"""
+Testes unitários para o gerador sintético e a carga em lote.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from app.models import Base
+from populate_database import bulk_load, generate_synthetic_reviews, sentiment_counts
+
+
+class TestSyntheticSeeder:
+    """Testes para generate_synthetic_reviews e bulk_load."""
+
+    def test_distribution(self):
+        """Testa período, proporções e tamanhos das avaliações geradas."""
+        now = datetime(2024, 6, 30, 12)
+        reviews = list(
+            generate_synthetic_reviews(5000, days=90, rng=random.Random(7), now=now)
+        )
+
+        assert len(reviews) == 5000
+        assert all(now - timedelta(days=91) <= r["created_at"] <= now for r in reviews)
+
+        positive = sum(r["sentiment"] == "positiva" for r in reviews) / len(reviews)
+        assert 0.5 < positive < 0.6
+        portuguese = sum(r["language"] == "pt" for r in reviews) / len(reviews)
+        assert 0.8 < portuguese < 0.9
+
+        # Volume crescente: a segunda metade do período tem mais avaliações
+        middle = now - timedelta(days=45)
+        recent = sum(r["created_at"] >= middle for r in reviews)
+        assert recent > len(reviews) / 2
+
+        lengths = sorted(len(r["review_text"].split()) for r in reviews)
+        assert 15 <= lengths[len(lengths) // 2] <= 40
+        assert all(0.5 <= float(r["confidence_score"]) <= 0.99 for r in reviews)
+
+    def test_seed_is_reproducible(self):
+        """Testa que a mesma semente gera os mesmos dados."""
+        now = datetime(2024, 6, 30)
+        first = list(generate_synthetic_reviews(50, rng=random.Random(1), now=now))
+        second = list(generate_synthetic_reviews(50, rng=random.Random(1), now=now))
+        assert first == second
+
+    def test_bulk_load_sqlite(self, tmp_path):
+        """Testa a carga em lotes com executemany no SQLite."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+        Base.metadata.create_all(bind=engine)
+
+        loaded = bulk_load(
+            generate_synthetic_reviews(250, rng=random.Random(3)),
+            bind=engine,
+            batch_size=100,
+        )
+
+        assert loaded == 250
+        assert sum(sentiment_counts(engine).values()) == 250
@@ -0,0 +1,113 @@
+"""
+Testes unitários para a identificação por API key, o limite de taxa e as cotas.
+"""
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.rate_limit import (
+    ApiClient,
+    DatabaseQuotaStore,
+    MemoryQuotaStore,
+    RateLimiter,
+    hash_api_key,
+    parse_api_keys,
+)
+
+
+class TestRateLimit:
+    """Testes para parse_api_keys, RateLimiter e os stores de cota."""
+
+    def test_parse_api_keys(self):
+        """Testa a leitura das chaves com limites padrão e específicos."""
+        clients = parse_api_keys(
+            "loja:abc, parceiro:xyz:120:500",
+            rate_per_minute=60,
+            burst=5,
+            daily_quota=1000,
+        )
+        assert clients[hash_api_key("abc")] == ApiClient("loja", 60, 5, 1000)
+        assert clients[hash_api_key("xyz")] == ApiClient("parceiro", 120, 5, 500)
+        assert "abc" not in clients
+        assert parse_api_keys("") == {}
+        with pytest.raises(ValueError):
+            parse_api_keys("sem-chave")
+
+    def test_token_bucket_rejects_burst(self):
+        """Testa a recusa com Retry-After quando a rajada acaba."""
+        client = ApiClient("loja", rate_per_minute=60, burst=2, daily_quota=0)
+        limiter = RateLimiter({hash_api_key("abc"): client})
+        assert limiter.identify("abc") == client
+        assert limiter.identify("outra") is None
+
+        results = [asyncio.run(limiter.check(client)) for _ in range(3)]
+        assert [result.allowed for result in results] == [True, True, False]
+        assert results[0].headers["X-RateLimit-Remaining"] == "1"
+        assert results[2].headers["Retry-After"] == "1"
+        assert "X-Quota-Remaining" not in results[0].headers
+
+    def test_memory_quota_is_split_across_workers(self):
+        """Testa que, em memória, cada worker conta a sua fração da cota."""
+        client = ApiClient("loja", rate_per_minute=6000, burst=100, daily_quota=4)
+        limiter = RateLimiter({}, store=MemoryQuotaStore(), workers=2)
+
+        results = [asyncio.run(limiter.check(client)) for _ in range(3)]
+        assert [result.allowed for result in results] == [True, True, False]
+        assert results[0].headers["X-Quota-Remaining"] == "2"
+        assert results[1].headers["X-Quota-Remaining"] == "0"
+
+    def test_daily_quota_with_shared_store(self, tmp_path):
+        """Testa a cota diária compartilhada por dois workers via banco."""
+        bind = create_engine(f"sqlite:///{tmp_path / 'quotas.db'}")
+        client = ApiClient("loja", rate_per_minute=6000, burst=100, daily_quota=5)
+        workers = [
+            RateLimiter({}, store=DatabaseQuotaStore(bind), lease_size=2)
+            for _ in range(2)
+        ]
+
+        allowed = [
+            asyncio.run(workers[i % 2].check(client)).allowed for i in range(8)
+        ]
+        assert allowed.count(True) == 5
+        result = asyncio.run(workers[0].check(client))
+        assert not result.allowed
+        assert result.headers["X-Quota-Remaining"] == "0"
+        assert int(result.headers["Retry-After"]) == int(
+            result.headers["X-Quota-Reset"]
+        )
+
+        store = MemoryQuotaStore()
+        assert store.lease("loja", date(2024, 1, 1), 3, 4) == (3, 3)
+        assert store.lease("loja", date(2024, 1, 1), 3, 4) == (1, 4)
+        assert store.lease("loja", date(2024, 1, 2), 3, 4) == (3, 3)
+
+    def test_concurrent_checks_share_one_lease(self, tmp_path):
+        """Testa que requisições simultâneas não reservam um lote cada uma."""
+        store = DatabaseQuotaStore(create_engine(f"sqlite:///{tmp_path / 'q.db'}"))
+        client = ApiClient("loja", rate_per_minute=60000, burst=1000, daily_quota=100)
+        limiter = RateLimiter({}, store=store, lease_size=10, workers=2)
+
+        async def burst():
+            return await asyncio.gather(*(limiter.check(client) for _ in range(5)))
+
+        results = asyncio.run(burst())
+        assert all(result.allowed for result in results)
+        # Uma única reserva de 10 unidades atende as 5 requisições
+        assert store.lease("loja", limiter._leases["loja"].day, 0, 100) == (0, 10)
+
+    def test_lease_is_capped_and_released(self, tmp_path):
+        """Testa a reserva limitada à fração do worker e a devolução no fim."""
+        store = DatabaseQuotaStore(create_engine(f"sqlite:///{tmp_path / 'q.db'}"))
+        client = ApiClient("loja", rate_per_minute=60000, burst=1000, daily_quota=9)
+        limiter = RateLimiter({}, store=store, lease_size=10, workers=3)
+
+        assert asyncio.run(limiter.check(client)).allowed
+        day = limiter._leases["loja"].day
+        # 9 livres / 3 workers: reserva 3 em vez de 10
+        assert store.lease("loja", day, 0, 9) == (0, 3)
+
+        assert limiter.release_leases() == 2
+        assert store.lease("loja", day, 0, 9) == (0, 1)
+        assert limiter._leases["loja"].remaining == 0
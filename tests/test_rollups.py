@@ -0,0 +1,99 @@
+"""
+Testes unitários para os rollups diários e a contagem de clientes distintos.
+"""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app.models import Base, DailyRollup, Review
+from app.rollups import build_daily_rollups, distinct_customers
+
+
+def _insert(engine, customer, created_at, sentiment="negativa", language="pt"):
+    with engine.begin() as connection:
+        connection.execute(
+            Review.__table__.insert(),
+            {
+                "customer_name": customer,
+                "review_text": "Atendimento ruim",
+                "sentiment": sentiment,
+                "confidence_score": "0.90",
+                "language": language,
+                "created_at": created_at,
+            },
+        )
+
+
+class TestRollups:
+    """Testes para build_daily_rollups e distinct_customers."""
+
+    @pytest.fixture(autouse=True)
+    def setup_engine(self, tmp_path):
+        self.engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}")
+        Base.metadata.create_all(bind=self.engine)
+
+    def _rollup_rows(self):
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(func.count()).select_from(DailyRollup)
+            ).scalar()
+
+    def test_build_is_incremental_and_skips_today(self):
+        """Testa que apenas dias completos são resumidos, uma única vez."""
+        _insert(self.engine, "Ana", datetime(2024, 3, 1, 10))
+        _insert(self.engine, "ana ", datetime(2024, 3, 1, 15))
+        _insert(self.engine, "Bruno", datetime(2024, 3, 2, 9), "positiva", "en")
+        _insert(self.engine, "Carla", datetime.utcnow())
+
+        days = build_daily_rollups(self.engine)
+
+        assert days[date(2024, 3, 1)] == 2
+        assert days[date(2024, 3, 2)] == 1
+        assert datetime.utcnow().date() not in days
+        assert self._rollup_rows() == 2
+        assert build_daily_rollups(self.engine) == {}
+
+        _insert(self.engine, "Davi", datetime(2024, 3, 1, 20))
+        assert build_daily_rollups(self.engine, rebuild=True)[date(2024, 3, 1)] == 3
+
+    def test_distinct_customers_merges_rollups_and_raw_rows(self):
+        """Testa a união entre dias resumidos e dias ainda sem rollup."""
+        for day in range(1, 11):
+            for customer in range(20):
+                _insert(self.engine, f"cliente-{customer}", datetime(2024, 3, day, 12))
+        _insert(self.engine, "Positivo", datetime(2024, 3, 5, 12), "positiva")
+        build_daily_rollups(self.engine, end_date=date(2024, 3, 6))
+        today = datetime.utcnow()
+        _insert(self.engine, "cliente-99", today)
+        _insert(self.engine, "cliente-0", today)
+
+        with self.engine.connect() as connection:
+            counts, total = distinct_customers(
+                connection, date(2024, 3, 1), today.date()
+            )
+            english, english_total = distinct_customers(
+                connection, date(2024, 3, 1), today.date(), language="en"
+            )
+
+        assert counts == {"negativa": 21, "positiva": 1}
+        assert total == 22
+        assert english == {} and english_total == 0
+
+    def test_archive_keeps_distinct_customers(self, tmp_path):
+        """Testa que os meses arquivados continuam nos clientes distintos."""
+        from app.archive import archive_reviews
+
+        _insert(self.engine, "Ana", datetime(2020, 1, 10))
+        _insert(self.engine, "Bruno", datetime(2020, 1, 11))
+        archive_reviews(
+            bind=self.engine, retention_days=30, archive_dir=str(tmp_path / "archive")
+        )
+
+        with self.engine.connect() as connection:
+            assert connection.execute(select(func.count(Review.id))).scalar() == 0
+            counts, total = distinct_customers(
+                connection, date(2020, 1, 1), date(2020, 1, 31)
+            )
+        assert counts == {"negativa": 2}
+        assert total == 2
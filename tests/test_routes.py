@@ -1,12 +1,15 @@
 """
 Testes unitários para as rotas da API.
 """
+from datetime import datetime
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.models import Base, get_db
+from app.models import Base, Review, get_db
+from app.schemas import ReviewResponse
 
 # Configurar banco de dados de teste em memória
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -53,6 +56,13 @@ class TestReviewsAPI:
         assert response.status_code == 200
         assert response.json()["status"] == "healthy"
 
+    def test_ready_check(self, setup_database):
+        """Testa endpoint de prontidão (aquecimento do pool e do LLM)."""
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert response.json()["checks"]["database"] == "ok"
+
     def test_create_review(self, setup_database):
         """Testa criação de uma nova avaliação."""
         review_data = {
@@ -85,6 +95,17 @@ class TestReviewsAPI:
         assert isinstance(data, list)
         assert len(data) >= 1
 
+    def test_get_all_reviews_matches_schema(self, setup_database):
+        """Testa que o caminho rápido mantém o formato de ReviewResponse."""
+        client.post(
+            "/api/v1/reviews",
+            json={"customer_name": "Lia", "review_text": "Tudo certo."},
+        )
+
+        data = client.get("/api/v1/reviews").json()
+        assert set(data[0]) == set(ReviewResponse.model_fields)
+        ReviewResponse.model_validate(data[0])
+
     def test_get_review_by_id(self, setup_database):
         """Testa busca de avaliação por ID."""
         # Primeiro criar uma avaliação
@@ -103,6 +124,26 @@ class TestReviewsAPI:
         assert data["id"] == review_id
         assert data["customer_name"] == "Pedro Costa"
 
+    def test_get_reviews_with_fields(self, setup_database):
+        """Testa projeção de campos na listagem e na busca por ID."""
+        create_response = client.post(
+            "/api/v1/reviews",
+            json={"customer_name": "Rita", "review_text": "Serviço bom."},
+        )
+        review_id = create_response.json()["id"]
+
+        data = client.get("/api/v1/reviews?fields=id,sentiment").json()
+        assert set(data[0]) == {"id", "sentiment"}
+
+        response = client.get(f"/api/v1/reviews/{review_id}?fields=id,created_at")
+        assert response.status_code == 200
+        assert set(response.json()) == {"id", "created_at"}
+
+    def test_get_reviews_with_invalid_fields(self, setup_database):
+        """Testa projeção com campo inexistente."""
+        response = client.get("/api/v1/reviews?fields=id,senha")
+        assert response.status_code == 400
+
     def test_get_review_by_invalid_id(self, setup_database):
         """Testa busca de avaliação com ID inválido."""
         response = client.get("/api/v1/reviews/999")
@@ -132,6 +173,400 @@ class TestReviewsAPI:
         assert "negative_count" in data
         assert "neutral_count" in data
 
+    def test_get_reviews_report_by_language(self, setup_database):
+        """Testa a contagem de avaliações por idioma no relatório."""
+        client.post(
+            "/api/v1/reviews",
+            json={"customer_name": "Ana", "review_text": "Gostei muito do serviço."},
+        )
+        client.post(
+            "/api/v1/reviews",
+            json={"customer_name": "John", "review_text": "The service was great."},
+        )
+
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        response = client.get(
+            f"/api/v1/reviews/report?start_date={today}&end_date={today}"
+        )
+        assert response.json()["language_counts"] == {"pt": 1, "en": 1}
+
+        response = client.get(
+            f"/api/v1/reviews/report?start_date={today}&end_date={today}&language=en"
+        )
+        assert response.json()["total_reviews"] == 1
+
+    def test_get_reviews_report_includes_archive(
+        self, setup_database, tmp_path, monkeypatch
+    ):
+        """Testa que o relatório soma as avaliações arquivadas."""
+        from app.archive import archive_reviews
+        from app.config import settings
+
+        with engine.begin() as connection:
+            connection.execute(
+                Review.__table__.insert(),
+                {
+                    "customer_name": "Ana",
+                    "review_text": "Ótimo",
+                    "sentiment": "positiva",
+                    "confidence_score": "0.90",
+                    "language": "pt",
+                    "created_at": datetime(2020, 1, 10),
+                },
+            )
+        archive_reviews(bind=engine, retention_days=30, archive_dir=str(tmp_path))
+        monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+
+        response = client.get(
+            "/api/v1/reviews/report?start_date=2020-01-01&end_date=2020-01-31"
+        )
+        data = response.json()
+        assert data["total_reviews"] == 1
+        assert data["positive_count"] == 1
+        assert data["language_counts"] == {"pt": 1}
+        assert data["distinct_customers"] == {"positiva": 1}
+        assert data["distinct_customers_total"] == 1
+
+    def test_get_customer_reviews_paginates(self, setup_database):
+        """Testa a busca por cliente com paginação por cursor."""
+        for text in ["Ótimo", "Bom", "Ruim"]:
+            client.post(
+                "/api/v1/reviews", json={"customer_name": "Ana", "review_text": text}
+            )
+        client.post(
+            "/api/v1/reviews", json={"customer_name": "Bruno", "review_text": "Ok"}
+        )
+
+        response = client.get(
+            "/api/v1/customers/Ana/reviews?limit=2&fields=review_text"
+        )
+        assert response.status_code == 200
+        first_page = response.json()
+        assert [r["review_text"] for r in first_page["reviews"]] == ["Ruim", "Bom"]
+        assert "id" not in first_page["reviews"][0]
+
+        response = client.get(
+            f"/api/v1/customers/Ana/reviews?limit=2&cursor={first_page['next_cursor']}"
+        )
+        second_page = response.json()
+        assert [r["review_text"] for r in second_page["reviews"]] == ["Ótimo"]
+        assert second_page["next_cursor"] is None
+
+        response = client.get("/api/v1/customers/Ana/reviews?cursor=%%%")
+        assert response.status_code == 400
+
+    def test_get_reviews_msgpack(self, setup_database):
+        """Testa a representação MessagePack das avaliações e do relatório."""
+        msgpack = pytest.importorskip("msgpack")
+        client.post(
+            "/api/v1/reviews", json={"customer_name": "Ana", "review_text": "Ótimo!"}
+        )
+        headers = {"Accept": "application/msgpack"}
+
+        response = client.get("/api/v1/reviews", headers=headers)
+        assert response.headers["content-type"] == "application/msgpack"
+        reviews = msgpack.unpackb(response.content)
+        assert reviews[0]["customer_name"] == "Ana"
+        assert reviews[0]["created_at"] == client.get("/api/v1/reviews").json()[0][
+            "created_at"
+        ]
+
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        response = client.get(
+            f"/api/v1/reviews/report?start_date={today}&end_date={today}",
+            headers=headers,
+        )
+        assert msgpack.unpackb(response.content)["total_reviews"] == 1
+
+    def test_export_reviews_parquet(self, setup_database):
+        """Testa a exportação das avaliações em Parquet."""
+        pa = pytest.importorskip("pyarrow")
+        import io
+        import pyarrow.parquet as pq
+
+        client.post(
+            "/api/v1/reviews",
+            json={"customer_name": "Ana", "review_text": "Gostei muito do serviço."},
+        )
+
+        response = client.get("/api/v1/reviews/export?format=parquet")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.parquet"
+        table = pq.read_table(io.BytesIO(response.content))
+        assert table.num_rows == 1
+        assert pa.types.is_dictionary(table.schema.field("sentiment").type)
+
+        response = client.get("/api/v1/reviews/export?format=csv")
+        assert response.status_code == 400
+
+    def test_server_timing_and_access_log(self, setup_database):
+        """Testa o cabeçalho Server-Timing e a linha de access log."""
+        import json
+        import logging
+
+        from app.timing import access_logger
+
+        records = []
+        handler = logging.Handler()
+        handler.emit = lambda record: records.append(record.getMessage())
+        access_logger.addHandler(handler)
+        try:
+            response = client.post(
+                "/api/v1/reviews",
+                json={"customer_name": "Ana", "review_text": "Gostei muito!"},
+            )
+        finally:
+            access_logger.removeHandler(handler)
+
+        phases = {
+            item.split(";")[0].strip()
+            for item in response.headers["server-timing"].split(",")
+        }
+        assert {"validation", "llm", "db", "serialization", "total"} <= phases
+
+        line = json.loads(records[-1])
+        assert line["method"] == "POST"
+        assert line["path"] == "/api/v1/reviews"
+        assert line["status"] == 201
+        assert "llm" in line["phases"]
+
+    def test_create_review_idempotency_key(self, setup_database):
+        """Testa que repetições com Idempotency-Key não gravam de novo."""
+        from app.idempotency import get_single_flight
+
+        review_data = {
+            "customer_name": "Ana",
+            "review_text": "Entrega rápida, gostei!",
+        }
+        headers = {"Idempotency-Key": "pedido-123"}
+
+        first = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert first.status_code == 201
+        assert "Idempotent-Replayed" not in first.headers
+
+        retry = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert retry.status_code == 201
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert retry.json() == first.json()
+
+        # Sem o cache em memória (outro worker): resposta vinda do banco
+        get_single_flight()._recent.clear()
+        retry = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert retry.json()["id"] == first.json()["id"]
+
+        db = TestingSessionLocal()
+        try:
+            assert db.query(Review).count() == 1
+        finally:
+            db.close()
+
+    def test_idempotency_key_with_write_behind(
+        self, setup_database, tmp_path, monkeypatch
+    ):
+        """Testa que a chave é reservada antes da confirmação no write-behind."""
+        from app import routes
+        from app.idempotency import get_single_flight
+        from app.models import IdempotencyKey
+        from app.write_behind import WriteBehindWriter
+
+        writer = WriteBehindWriter(
+            bind=engine, directory=str(tmp_path / "spool"), fsync=False
+        )
+        writer.start()
+        monkeypatch.setattr(routes, "get_write_behind_writer", lambda: writer)
+        review_data = {"customer_name": "Ana", "review_text": "Chegou antes do prazo"}
+        headers = {"Idempotency-Key": "pedido-wb"}
+        try:
+            first = client.post("/api/v1/reviews", json=review_data, headers=headers)
+            assert first.status_code == 201
+
+            # Outro worker, com a avaliação ainda no spool
+            get_single_flight()._recent.clear()
+            retry = client.post("/api/v1/reviews", json=review_data, headers=headers)
+            assert retry.headers["Idempotent-Replayed"] == "true"
+            assert retry.json()["id"] == first.json()["id"]
+        finally:
+            writer.stop()
+
+        db = TestingSessionLocal()
+        try:
+            assert db.query(Review).count() == 1
+            assert db.get(IdempotencyKey, "pedido-wb").review_id == first.json()["id"]
+        finally:
+            db.close()
+        assert writer.dropped == 0
+
+        other = dict(review_data, review_text="Outro texto")
+        response = client.post("/api/v1/reviews", json=other, headers=headers)
+        assert response.status_code == 422
+
+    def test_idempotency_key_released_when_spool_fails(
+        self, setup_database, tmp_path, monkeypatch
+    ):
+        """Testa que a reserva da chave é desfeita se o spool falhar."""
+        from app import routes
+        from app.models import IdempotencyKey
+        from app.write_behind import WriteBehindWriter
+
+        writer = WriteBehindWriter(
+            bind=engine, directory=str(tmp_path / "spool"), fsync=False
+        )
+        writer.start()
+        monkeypatch.setattr(routes, "get_write_behind_writer", lambda: writer)
+        review_data = {"customer_name": "Ana", "review_text": "Chegou antes do prazo"}
+        headers = {"Idempotency-Key": "pedido-disco-cheio"}
+        submit = writer.submit
+
+        def disk_full(values):
+            raise OSError(28, "No space left on device")
+
+        try:
+            monkeypatch.setattr(writer, "submit", disk_full)
+            response = client.post("/api/v1/reviews", json=review_data, headers=headers)
+            assert response.status_code == 500
+
+            db = TestingSessionLocal()
+            try:
+                assert db.get(IdempotencyKey, "pedido-disco-cheio") is None
+            finally:
+                db.close()
+
+            # A repetição classifica de novo em vez de devolver um ID fantasma
+            monkeypatch.setattr(writer, "submit", submit)
+            retry = client.post("/api/v1/reviews", json=review_data, headers=headers)
+            assert retry.status_code == 201
+            assert "Idempotent-Replayed" not in retry.headers
+        finally:
+            writer.stop()
+
+        db = TestingSessionLocal()
+        try:
+            assert db.query(Review).count() == 1
+            assert db.query(Review).one().id == retry.json()["id"]
+        finally:
+            db.close()
+
+    def test_live_stats(self, setup_database):
+        """Testa os contadores deslizantes servidos sem acesso ao banco."""
+        before = client.get("/api/v1/reviews/stats/live").json()
+        client.post(
+            "/api/v1/reviews",
+            json={"customer_name": "Ana", "review_text": "Gostei muito!"},
+        )
+        after = client.get("/api/v1/reviews/stats/live").json()
+
+        assert set(after["windows"]) == {"15m", "1h", "24h"}
+        assert after["windows"]["15m"]["total"] == before["windows"]["15m"]["total"] + 1
+
+    def test_llm_lanes(self, setup_database):
+        """Testa a prioridade por cabeçalho e o endpoint das faixas do LLM."""
+        response = client.post(
+            "/api/v1/reviews",
+            json={"customer_name": "Ana", "review_text": "Gostei muito!"},
+            headers={"X-Request-Priority": "urgent"},
+        )
+        assert response.status_code == 400
+
+        response = client.get("/api/v1/llm/lanes")
+        assert response.status_code == 200
+        assert set(response.json()["lanes"]) == {"interactive", "bulk"}
+
+        response = client.get("/api/v1/llm/shadow")
+        assert response.status_code == 200
+        assert response.json()["enabled"] is False
+
+    def test_admission_control(self, setup_database, monkeypatch):
+        """Testa a recusa (503) e a degradação com o LLM saturado."""
+        from app import routes
+        from app.admission import AdmissionController
+        from app.llm_budget import LLMBudget
+
+        controller = AdmissionController(LLMBudget(max_concurrency=1), action="reject")
+        monkeypatch.setattr(routes, "get_admission_controller", lambda: controller)
+        monkeypatch.setattr(routes.get_sentiment_analyzer(), "use_llm", True)
+        review_data = {"customer_name": "Ana", "review_text": "Gostei muito!"}
+        timeout = {"X-Request-Timeout": "1.5"}
+
+        with controller.track("interactive"), controller.track("interactive"):
+            response = client.post("/api/v1/reviews", json=review_data, headers=timeout)
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "2"
+
+            controller.action = "degrade"
+            response = client.post("/api/v1/reviews", json=review_data, headers=timeout)
+            assert response.status_code == 201
+            assert response.headers["X-Degraded"] == "true"
+            assert response.json()["sentiment"] == "positiva"
+
+        response = client.post(
+            "/api/v1/reviews", json=review_data, headers={"X-Request-Timeout": "0"}
+        )
+        assert response.status_code == 400
+
+    def test_api_key_rate_limit(self, setup_database, monkeypatch):
+        """Testa a exigência da API key e o 429 com os cabeçalhos de cota."""
+        from app import rate_limit
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "API_KEYS", "loja:segredo")
+        limiter = rate_limit.RateLimiter(
+            {rate_limit.hash_api_key("segredo"): rate_limit.ApiClient("loja", 60, 5, 1)}
+        )
+        monkeypatch.setattr(rate_limit, "_rate_limiter", limiter)
+        review_data = {"customer_name": "Ana", "review_text": "Gostei muito!"}
+
+        assert client.get("/api/v1/reviews").status_code == 401
+        response = client.get("/api/v1/reviews", headers={"X-API-Key": "errada"})
+        assert response.status_code == 401
+        response = client.get("/api/v1/reviews", headers={"X-API-Key": "segredo"})
+        assert response.status_code == 200
+
+        headers = {"X-API-Key": "segredo"}
+        response = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert response.status_code == 201
+        assert response.headers["X-Quota-Remaining"] == "0"
+
+        response = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert response.status_code == 429
+        assert response.headers["X-Quota-Limit"] == "1"
+        assert "Retry-After" in response.headers
+
+    def test_quota_not_charged_for_replays_or_shed(self, setup_database, monkeypatch):
+        """Testa que repetições idempotentes e recusas 503 não consomem a cota."""
+        from app import rate_limit, routes
+        from app.admission import AdmissionController
+        from app.config import settings
+        from app.llm_budget import LLMBudget
+
+        monkeypatch.setattr(settings, "API_KEYS", "loja:segredo")
+        limiter = rate_limit.RateLimiter(
+            {rate_limit.hash_api_key("segredo"): rate_limit.ApiClient("loja", 60, 5, 2)}
+        )
+        monkeypatch.setattr(rate_limit, "_rate_limiter", limiter)
+        review_data = {"customer_name": "Ana", "review_text": "Gostei muito!"}
+        headers = {"X-API-Key": "segredo", "Idempotency-Key": "pedido-cota"}
+
+        first = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert first.status_code == 201
+        assert first.headers["X-Quota-Remaining"] == "1"
+        retry = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert retry.headers["Idempotent-Replayed"] == "true"
+
+        controller = AdmissionController(LLMBudget(max_concurrency=1), action="reject")
+        monkeypatch.setattr(routes, "get_admission_controller", lambda: controller)
+        monkeypatch.setattr(routes.get_sentiment_analyzer(), "use_llm", True)
+        headers = {"X-API-Key": "segredo", "X-Request-Timeout": "1.5"}
+        with controller.track("interactive"), controller.track("interactive"):
+            response = client.post("/api/v1/reviews", json=review_data, headers=headers)
+            assert response.status_code == 503
+
+        monkeypatch.setattr(routes.get_sentiment_analyzer(), "use_llm", False)
+        response = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert response.status_code == 201
+        assert response.headers["X-Quota-Remaining"] == "0"
+        response = client.post("/api/v1/reviews", json=review_data, headers=headers)
+        assert response.status_code == 429
+
     def test_get_reviews_report_invalid_date(self, setup_database):
         """Testa relatório com data inválida."""
         response = client.get(
@@ -1,7 +1,10 @@
 """
 Testes unitários para o serviço de análise de sentimento.
 """
-from app.sentiment_service import SentimentAnalyzer
+from app.config import settings
+from app.language import detect_language
+from app.lexicon import analyze_with_lexicon
+from app.sentiment_service import SentimentAnalyzer, split_into_chunks
 
 
 class TestSentimentAnalyzer:
@@ -43,6 +46,10 @@ class TestSentimentAnalyzer:
         assert sentiment == "neutra"
         assert float(confidence) == 0.0
 
+    def test_client_is_created_lazily(self):
+        """Testa que o cliente Groq não é criado no construtor."""
+        assert self.analyzer._groq_client is None
+
     def test_get_sentiment_description(self):
         """Testa obtenção de descrição do sentimento."""
         assert "positiva" in SentimentAnalyzer.get_sentiment_description("positiva")
@@ -51,3 +58,196 @@ class TestSentimentAnalyzer:
         assert "não identificado" in SentimentAnalyzer.get_sentiment_description(
             "invalido"
         )
+
+
+class TestLongTextAnalysis:
+    """Testes para a análise de textos longos em trechos."""
+
+    def setup_method(self):
+        """Configuração executada antes de cada teste."""
+        self.analyzer = SentimentAnalyzer()
+        self.analyzer.use_llm = True
+        self.calls = []
+
+        def fake_llm(text, max_tokens=None, language=None, **kwargs):
+            self.calls.append(text)
+            if "ruim" in text:
+                return "negativa", "0.90"
+            return "positiva", "0.80"
+
+        self.analyzer._analyze_with_llm = fake_llm
+
+    def test_split_into_chunks_respects_sentences(self):
+        """Testa que os trechos respeitam o limite e as frases."""
+        text = "Frase um é boa. Frase dois é ótima! Frase três? " * 20
+        chunks = split_into_chunks(text, 100)
+
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert all(chunk.endswith((".", "!", "?")) for chunk in chunks)
+        assert " ".join(chunks).split() == text.split()
+
+    def test_long_text_is_aggregated_by_length(self):
+        """Testa a agregação ponderada pelo tamanho dos trechos."""
+        positive = "O atendimento foi excelente e rápido. " * 150
+        negative = "O produto chegou ruim. " * 20
+        sentiment, confidence = self.analyzer.analyze_sentiment(positive + negative)
+
+        assert len(self.calls) > 1
+        assert sentiment == "positiva"
+        assert 0 < float(confidence) < 0.80
+
+    def test_token_cap_limits_chunks(self, monkeypatch):
+        """Testa o limite de tokens gastos por avaliação."""
+        # Cada trecho de ~2000 caracteres custa ~680 tokens estimados
+        monkeypatch.setattr(settings, "LLM_MAX_TOKENS_PER_REVIEW", 1500)
+        self.analyzer.analyze_sentiment("Uma frase qualquer de teste. " * 2000)
+
+        assert len(self.calls) == 2
+
+    def test_token_cap_is_divided_by_tiers(self, monkeypatch):
+        """Testa que o limite vale mesmo se todos os trechos escalonarem."""
+        monkeypatch.setattr(settings, "LLM_MAX_TOKENS_PER_REVIEW", 1500)
+        monkeypatch.setattr(settings, "GROQ_MODELS", "pequeno,grande")
+        monkeypatch.setattr(settings, "LLM_ESCALATION_CONFIDENCE", 0.99)
+        self.analyzer.analyze_sentiment("Uma frase qualquer de teste. " * 2000)
+
+        # Um trecho por camada: 2 chamadas de ~680 tokens
+        assert len(self.calls) == 2
+
+    def test_local_tier_when_no_chunk_fits(self, monkeypatch):
+        """Testa o fallback local quando nem um trecho cabe no limite."""
+        monkeypatch.setattr(settings, "LLM_MAX_TOKENS_PER_REVIEW", 500)
+        result = self.analyzer.analyze_sentiment_versioned(
+            "Uma frase qualquer de teste. " * 2000, "pt"
+        )
+
+        assert self.calls == []
+        assert result[3] is None  # não veio do LLM
+
+
+class TestLanguageRouting:
+    """Testes para a detecção de idioma e o léxico por idioma."""
+
+    def test_detect_language(self):
+        """Testa a detecção de português e inglês."""
+        text = "O atendimento foi ótimo, não tenho do que reclamar."
+        assert detect_language(text) == "pt"
+        assert detect_language("The service was okay, nothing special.") == "en"
+
+    def test_detect_language_without_signal(self):
+        """Testa que textos sem sinal usam o idioma padrão."""
+        assert detect_language("ok", default="pt") == "pt"
+
+    def test_lexicon_per_language(self):
+        """Testa o léxico local de cada idioma."""
+        english = analyze_with_lexicon("Amazing service, very helpful!", "en")
+        assert english[0] == "positiva"
+        assert analyze_with_lexicon("Não gostei, foi péssimo.", "pt")[0] == "negativa"
+        assert analyze_with_lexicon("Texto qualquer", "fr") is None
+
+
+class TestModelTiers:
+    """Testes para o escalonamento entre camadas de modelos."""
+
+    def setup_method(self):
+        """Configuração executada antes de cada teste."""
+        self.analyzer = SentimentAnalyzer()
+        self.analyzer.use_llm = True
+        self.responses = {}
+        self.calls = []
+        self.max_tokens = []
+
+        def fake_llm(text, max_tokens=None, language=None, model=None, usage=None):
+            self.calls.append(model)
+            self.max_tokens.append(max_tokens)
+            if usage is not None:
+                usage.update(latency_ms=10.0, prompt_tokens=100, completion_tokens=10)
+            return self.responses[model]
+
+        self.analyzer._analyze_with_llm = fake_llm
+
+    def test_confident_small_model_is_accepted(self, monkeypatch):
+        """Testa que a camada rápida responde quando está confiante."""
+        monkeypatch.setattr(settings, "GROQ_MODELS", "pequeno, grande")
+        self.responses = {"pequeno": ("positiva", "0.95"), "grande": ("neutra", "0.99")}
+
+        result = self.analyzer.analyze_sentiment_versioned("Adorei o produto", "pt")
+        assert result[:3] == ("positiva", "0.95", "pequeno")
+        assert self.calls == ["pequeno"]
+
+    def test_escalates_on_low_confidence_or_invalid(self, monkeypatch):
+        """Testa o escalonamento por baixa confiança e por resposta inválida."""
+        from app.llm_stats import get_tier_stats
+
+        monkeypatch.setattr(settings, "GROQ_MODELS", "pequeno,medio,grande")
+        monkeypatch.setattr(settings, "LLM_ESCALATION_CONFIDENCE", 0.8)
+        self.responses = {
+            "pequeno": ("neutra", "0.55"),
+            "medio": None,
+            "grande": ("negativa", "0.70"),
+        }
+        before = get_tier_stats().as_dict(["pequeno", "medio", "grande"])["tiers"]
+
+        result = self.analyzer.analyze_sentiment_versioned("Veio com defeito?", "pt")
+        assert result[:3] == ("negativa", "0.70", "grande")
+        assert self.calls == ["pequeno", "medio", "grande"]
+
+        after = get_tier_stats().as_dict(["pequeno", "medio", "grande"])["tiers"]
+        deltas = [
+            {key: a[key] - b[key] for key in ("accepted", "low_confidence", "invalid")}
+            for a, b in zip(after, before)
+        ]
+        assert deltas == [
+            {"accepted": 0, "low_confidence": 1, "invalid": 0},
+            {"accepted": 0, "low_confidence": 0, "invalid": 1},
+            {"accepted": 1, "low_confidence": 0, "invalid": 0},
+        ]
+
+    def test_best_answer_when_last_tier_fails(self, monkeypatch):
+        """Testa que vale a melhor resposta válida se a última camada falhar."""
+        monkeypatch.setattr(settings, "GROQ_MODELS", "pequeno,grande")
+        self.responses = {"pequeno": ("positiva", "0.60"), "grande": None}
+
+        result = self.analyzer.analyze_sentiment_versioned("Bom", "pt")
+        assert result[:3] == ("positiva", "0.60", "pequeno")
+
+    def test_token_cap_applies_to_short_texts(self, monkeypatch):
+        """Testa que o limite por avaliação vale somando as camadas."""
+        monkeypatch.setattr(settings, "GROQ_MODELS", "pequeno,medio,grande")
+        monkeypatch.setattr(settings, "LLM_ESCALATION_CONFIDENCE", 0.8)
+        monkeypatch.setattr(settings, "LLM_MAX_TOKENS", 1024)
+        monkeypatch.setattr(settings, "LLM_MAX_TOKENS_PER_REVIEW", 1000)
+        self.responses = {
+            "pequeno": ("neutra", "0.50"),
+            "medio": ("neutra", "0.60"),
+            "grande": ("positiva", "0.90"),
+        }
+
+        result = self.analyzer.analyze_sentiment_versioned("Bom", "pt")
+        # Prompt de ~151 tokens; cada chamada usa 110 e devolve a sobra
+        assert self.max_tokens == [849, 739, 629]
+        assert result[:3] == ("positiva", "0.90", "grande")
+
+        monkeypatch.setattr(settings, "LLM_MAX_TOKENS_PER_REVIEW", 400)
+        self.calls = []
+        self.analyzer.analyze_sentiment_versioned("Bom", "pt")
+        # A terceira chamada não cabe: fica a melhor resposta das anteriores
+        assert self.calls == ["pequeno", "medio"]
+
+    def test_usage_is_attributed_to_the_answering_tier(self, monkeypatch):
+        """Testa que o uso informado é só o da camada que respondeu."""
+        monkeypatch.setattr(settings, "GROQ_MODELS", "pequeno,grande")
+        monkeypatch.setattr(settings, "LLM_ESCALATION_CONFIDENCE", 0.8)
+        self.responses = {
+            "pequeno": ("neutra", "0.50"),
+            "grande": ("positiva", "0.90"),
+        }
+
+        usage = {}
+        self.analyzer._analyze_with_tiers("Bom", language="pt", usage=usage)
+        # Sem somar a tentativa da camada pequena
+        assert usage == {
+            "latency_ms": 10.0,
+            "prompt_tokens": 100,
+            "completion_tokens": 10,
+        }
@@ -0,0 +1,21 @@
+"""
+Testes unitários para o servidor com múltiplos workers.
+"""
+from app.server import WORKER_CRASH_WINDOW, WORKER_MAX_CRASHES, _restart_delay
+
+
+class TestRestartDelay:
+    """Testes para o limite de reinícios dos workers."""
+
+    def test_backoff_then_give_up(self):
+        """Testa o backoff exponencial e a desistência após quedas demais."""
+        crashes = []
+        delays = [_restart_delay(crashes, float(i)) for i in range(WORKER_MAX_CRASHES)]
+        assert delays == [1.0, 2.0, 4.0, 8.0, 16.0]
+        assert _restart_delay(crashes, float(WORKER_MAX_CRASHES)) is None
+
+    def test_old_crashes_are_forgotten(self):
+        """Testa que quedas fora da janela não contam para o limite."""
+        crashes = [float(i) for i in range(WORKER_MAX_CRASHES)]
+        assert _restart_delay(crashes, WORKER_CRASH_WINDOW + 10) == 1.0
+        assert len(crashes) == 1
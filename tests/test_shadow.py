@@ -0,0 +1,108 @@
+"""
+Testes unitários para a avaliação em sombra de um modelo candidato.
+"""
+import threading
+from types import SimpleNamespace
+
+from app.config import settings
+from app.sentiment_service import SentimentAnalyzer
+from app.shadow import ShadowEvaluator, get_shadow_evaluator
+
+
+class FakeCompletions:
+    """Simula o endpoint de chat do Groq com uma resposta por modelo."""
+
+    def __init__(self, labels, release=None):
+        self.labels = labels
+        self.release = release
+        self.models = []
+
+    def create(self, model, **kwargs):
+        self.models.append(model)
+        if self.release is not None and model in self.release:
+            self.release[model].wait(2)
+        content = f'{{"sentiment": "{self.labels[model]}", "confidence": "0.90"}}'
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=120, completion_tokens=12),
+        )
+
+
+def _analyzer(completions):
+    analyzer = SentimentAnalyzer()
+    analyzer.use_llm = True
+    analyzer._groq_client = SimpleNamespace(
+        chat=SimpleNamespace(completions=completions)
+    )
+    return analyzer
+
+
+class TestShadowEvaluator:
+    """Testes para a classe ShadowEvaluator."""
+
+    def test_report_agreement_and_usage(self):
+        """Testa latência, tokens e concordância no relatório."""
+        evaluator = ShadowEvaluator("candidato", sample_rate=1.0)
+        usage = {"latency_ms": 100.0, "prompt_tokens": 100, "completion_tokens": 10}
+        fast = {"latency_ms": 20.0, "prompt_tokens": 100, "completion_tokens": 8}
+
+        evaluator.record(
+            "principal", ("positiva", "0.9"), usage, ("positiva", "0.8"), fast
+        )
+        evaluator.record(
+            "principal", ("neutra", "0.6"), usage, ("negativa", "0.7"), fast
+        )
+        evaluator.record("principal", ("neutra", "0.6"), usage, None, {})
+
+        report = evaluator.report()
+        assert report["agreement"]["pairs"] == 2
+        assert report["agreement"]["rate"] == 0.5
+        assert report["agreement"]["confusion"]["neutra"] == {"negativa": 1}
+        assert report["models"]["principal"]["latency_ms"]["mean"] == 100.0
+        assert report["models"]["candidato"]["latency_ms"]["p50"] == 20.0
+        assert report["models"]["candidato"]["errors"] == 1
+        assert report["models"]["candidato"]["tokens"]["completion"] == 16
+
+    def test_shadow_runs_off_the_response_path(self, monkeypatch):
+        """Testa que a resposta não espera o modelo em sombra."""
+        monkeypatch.setattr(settings, "SHADOW_MODEL", "candidato")
+        monkeypatch.setattr(settings, "SHADOW_SAMPLE_RATE", 1.0)
+        release = {"candidato": threading.Event()}
+        completions = FakeCompletions(
+            {settings.GROQ_MODEL: "positiva", "candidato": "negativa"}, release
+        )
+        analyzer = _analyzer(completions)
+
+        # Com a sombra bloqueada, a classificação principal retorna normalmente
+        sentiment, _, model_version, _ = analyzer.analyze_sentiment_versioned(
+            "Gostei bastante do produto", "pt"
+        )
+        assert (sentiment, model_version) == ("positiva", settings.GROQ_MODEL)
+
+        evaluator = get_shadow_evaluator()
+        release["candidato"].set()
+        assert evaluator.wait_idle(2)
+        assert completions.models == [settings.GROQ_MODEL, "candidato"]
+
+        report = evaluator.report()
+        assert report["agreement"] == {
+            "pairs": 1,
+            "agreements": 0,
+            "rate": 0.0,
+            "confusion": {"positiva": {"negativa": 1}},
+        }
+        assert report["models"][settings.GROQ_MODEL]["tokens"]["prompt"] == 120
+
+    def test_drops_samples_when_backlogged(self):
+        """Testa o descarte de amostras quando a sombra está atrasada."""
+        release = {"candidato": threading.Event()}
+        analyzer = _analyzer(FakeCompletions({"candidato": "neutra"}, release))
+        evaluator = ShadowEvaluator("candidato", 1.0, concurrency=1, max_pending=1)
+
+        evaluator.submit(analyzer, "Texto", "pt", ("neutra", "0.5"), {})
+        evaluator.submit(analyzer, "Texto", "pt", ("neutra", "0.5"), {})
+        release["candidato"].set()
+        assert evaluator.wait_idle(2)
+
+        report = evaluator.report()
+        assert (report["sampled"], report["dropped"]) == (1, 1)
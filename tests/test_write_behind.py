@@ -0,0 +1,129 @@
+"""
+Testes unitários para a persistência write-behind.
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app.models import Base, Review
+from app.write_behind import WriteBehindWriter
+
+
+def _review_values(index):
+    return {
+        "customer_name": f"Cliente {index}",
+        "review_text": "Atendimento excelente!",
+        "sentiment": "positiva",
+        "confidence_score": "0.90",
+    }
+
+
+class TestWriteBehindWriter:
+    """Testes para a classe WriteBehindWriter."""
+
+    @pytest.fixture(autouse=True)
+    def setup_engine(self, tmp_path):
+        """Banco SQLite em arquivo, visível pela thread de flush."""
+        self.engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}")
+        Base.metadata.create_all(bind=self.engine)
+
+    def _count(self):
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.count(Review.id))).scalar()
+
+    def test_submit_and_flush(self, tmp_path):
+        """Testa que os registros do spool são inseridos em lote."""
+        writer = WriteBehindWriter(
+            bind=self.engine,
+            directory=str(tmp_path / "spool"),
+            batch_size=3,
+            fsync=False,
+        )
+        writer.start()
+        ids = [writer.submit(_review_values(i)) for i in range(7)]
+        writer.stop()
+
+        assert ids == sorted(set(ids))
+        assert self._count() == 7
+
+    def test_replay_orphan_spool(self, tmp_path):
+        """Testa o replay de um spool deixado por um processo encerrado."""
+        writer = WriteBehindWriter(bind=self.engine, directory=str(tmp_path / "spool"))
+        writer.start()
+        writer._stopping.set()
+        writer._wakeup.set()
+        writer._thread.join()
+        writer.submit(_review_values(1))
+        writer.submit(_review_values(2))
+        writer.spool.close()
+
+        # Simula o spool de um worker que caiu antes do flush
+        orphan = os.path.join(str(tmp_path / "spool"), "spool-999999.jsonl")
+        os.rename(writer.spool.path, orphan)
+
+        recovered = WriteBehindWriter(
+            bind=self.engine, directory=str(tmp_path / "spool")
+        )
+        recovered.start()
+        recovered.stop()
+
+        assert self._count() == 2
+        assert not os.path.exists(orphan)
+
+    def test_replay_is_idempotent(self, tmp_path):
+        """Testa que reprocessar registros já inseridos não os duplica."""
+        writer = WriteBehindWriter(bind=self.engine, directory=str(tmp_path / "spool"))
+        writer.start()
+        writer.submit(_review_values(1))
+        segment = writer.spool.rotate()
+        with open(segment, encoding="utf-8") as f:
+            content = f.read()
+        writer.stop()
+
+        ready = os.path.join(str(tmp_path / "spool"), "spool-1-0-1.ready")
+        with open(ready, "w") as f:
+            f.write(content)
+        again = WriteBehindWriter(bind=self.engine, directory=str(tmp_path / "spool"))
+        again.start()
+        again.stop()
+
+        assert self._count() == 1
+
+    def test_flush_counts_dropped_conflicts(self, tmp_path):
+        """Testa que registros descartados por conflito são contados."""
+        writer = WriteBehindWriter(
+            bind=self.engine, directory=str(tmp_path / "spool"), fsync=False
+        )
+        writer.start()
+        writer.submit(dict(_review_values(1), idempotency_key="chave"))
+        writer.submit(dict(_review_values(2), idempotency_key="chave"))
+        writer.stop()
+
+        assert self._count() == 1
+        assert writer.dropped == 1
+
+    def test_bad_segment_is_quarantined(self, tmp_path):
+        """Testa que um segmento inválido não impede a inserção dos demais."""
+        directory = str(tmp_path / "spool")
+        writer = WriteBehindWriter(bind=self.engine, directory=directory)
+        writer.start()
+        writer.submit(_review_values(1))
+        segment = writer.spool.rotate()
+        with open(segment, encoding="utf-8") as f:
+            content = f.read()
+        os.remove(segment)
+        writer.stop()
+
+        # Registro sem created_at: a inserção do segmento falha
+        with open(os.path.join(directory, "spool-1-0-1.ready"), "w") as f:
+            f.write('{"id": 999, "customer_name": "Cliente"}\n')
+        with open(os.path.join(directory, "spool-1-0-2.ready"), "w") as f:
+            f.write(content)
+        again = WriteBehindWriter(bind=self.engine, directory=directory)
+        again.start()
+        again.stop()
+
+        assert self._count() == 1
+        assert again.quarantined == 1
+        assert os.path.exists(os.path.join(directory, "spool-1-0-1.ready.failed"))